@@ -0,0 +1,43 @@
+"""Key recommendation batches by engine input hash
+
+Revision ID: a4c9d567e0f1
+Revises: f2a7b345c8d9
+Create Date: 2026-03-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9d567e0f1'
+down_revision = 'f2a7b345c8d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('recommendation_batches', sa.Column('input_hash', sa.String(), nullable=True))
+    op.add_column('recommendation_batches', sa.Column('plan_summary', postgresql.JSONB(), nullable=True))
+
+    op.create_index(
+        'ix_recommendation_batches_input_hash',
+        'recommendation_batches',
+        ['portfolio_id', 'input_hash'],
+    )
+    # At most one PENDING batch per set of engine inputs (concurrent plan
+    # requests race on this index instead of both inserting).
+    op.create_index(
+        'uq_recommendation_batches_pending_input',
+        'recommendation_batches',
+        ['portfolio_id', 'input_hash'],
+        unique=True,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade():
+    op.drop_index('uq_recommendation_batches_pending_input', table_name='recommendation_batches')
+    op.drop_index('ix_recommendation_batches_input_hash', table_name='recommendation_batches')
+    op.drop_column('recommendation_batches', 'plan_summary')
+    op.drop_column('recommendation_batches', 'input_hash')
@@ -0,0 +1,46 @@
+"""Latest prices table maintained on ingest
+
+Revision ID: e1f6a234b7c8
+Revises: d0e5f123f6a7
+Create Date: 2026-03-12 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e1f6a234b7c8'
+down_revision = 'd0e5f123f6a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'latest_prices',
+        sa.Column('listing_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('listing.listing_id'), nullable=False),
+        sa.Column('is_close', sa.Boolean(), nullable=False),
+        sa.Column('source_id', sa.String(), nullable=False),
+        sa.Column('price_point_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('as_of', postgresql.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('price', sa.Numeric(precision=28, scale=10), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=True),
+        sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('listing_id', 'is_close', 'source_id'),
+    )
+
+    # Backfill from existing history (newest row per listing / is_close / source)
+    op.execute(
+        """
+        INSERT INTO latest_prices (listing_id, is_close, source_id, price_point_id, as_of, price, currency)
+        SELECT DISTINCT ON (listing_id, is_close, source_id)
+               listing_id, is_close, source_id, price_point_id, as_of, price, currency
+        FROM price_points
+        ORDER BY listing_id, is_close, source_id, as_of DESC
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('latest_prices')
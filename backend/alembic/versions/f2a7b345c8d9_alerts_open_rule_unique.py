@@ -0,0 +1,52 @@
+"""Partial unique index on open alerts per (portfolio, listing, rule)
+
+Revision ID: f2a7b345c8d9
+Revises: e1f6a234b7c8
+Create Date: 2026-03-13 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7b345c8d9'
+down_revision = 'e1f6a234b7c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Resolve duplicate open alerts left by the old SELECT-then-INSERT dedup
+    # (keep the oldest), so the unique index can be built.
+    op.execute(
+        """
+        UPDATE alerts SET resolved_at = now()
+        WHERE alert_id IN (
+            SELECT alert_id FROM (
+                SELECT alert_id,
+                       row_number() OVER (
+                           PARTITION BY portfolio_id, listing_id, rule_code
+                           ORDER BY created_at, alert_id
+                       ) AS rn
+                FROM alerts
+                WHERE resolved_at IS NULL
+            ) ranked
+            WHERE rn > 1
+        )
+        """
+    )
+
+    # At most one unresolved alert per key; portfolio-level alerts
+    # (listing_id NULL) deduplicate too.
+    op.create_index(
+        'uq_alerts_open_rule',
+        'alerts',
+        ['portfolio_id', 'listing_id', 'rule_code'],
+        unique=True,
+        postgresql_where=sa.text('resolved_at IS NULL'),
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade():
+    op.drop_index('uq_alerts_open_rule', table_name='alerts')
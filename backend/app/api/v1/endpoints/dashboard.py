@@ -10,11 +10,12 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy import desc, func, select, true
+from sqlalchemy import desc, func, select
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.domain import models
+from app.services.price_lookup import get_latest_closes
 
 
 def _normalize_price_to_gbp(price: Decimal, currency: str | None) -> Decimal:
@@ -125,19 +126,7 @@ def get_dashboard_summary(
     
     # Get latest prices for all holdings (most recent available, even if not today)
     listing_ids = [h.listing_id for h, _, _ in holdings_query]
-    latest_prices = {}
-    for listing_id in listing_ids:
-        price = (
-            db.query(models.PricePoint)
-            .filter(
-                models.PricePoint.listing_id == listing_id,
-                models.PricePoint.is_close == true(),
-            )
-            .order_by(desc(models.PricePoint.as_of))
-            .first()
-        )
-        if price:
-            latest_prices[listing_id] = price
+    latest_prices = get_latest_closes(db, listing_ids)
     
     # Get policy allocations
     allocations = (
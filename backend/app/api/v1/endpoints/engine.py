@@ -1,23 +1,31 @@
 """Engine API endpoints - trade plan generation."""
 from datetime import datetime, timezone
-from decimal import Decimal
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 
 from app.api import deps
 from app.domain import models
-from app.domain.engine import AssetPosition, RunInputSnapshot
+from app.queue.redis_queue import JobPayload, get_queue
+from app.schemas.backtest import BacktestRequest, BacktestResultResponse
+from app.schemas.market_data import RefreshResponse
+from app.schemas.scenarios import ScenarioRequest
 from app.services.engine_calculator import generate_trade_plan
 from app.services.engine_inputs import gather_engine_inputs
+from app.services.plan_cache import lookup_cached_plan, store_cached_plan
+from app.services.recommendation_generation import (
+    SERVABLE_STATUSES,
+    batch_status,
+    find_batch_for_inputs,
+    generate_recommendation_batch,
+    plan_summary,
+)
+from app.services.scenarios import PriceShock, evaluate_scenarios
 
 router = APIRouter()
 
-DRIFT_THRESHOLD_PCT = Decimal("5.0")
-
-
 class CurrentPosition(BaseModel):
     listing_id: str
     ticker: str
@@ -37,6 +45,7 @@ class ProposedTrade(BaseModel):
     quantity: str
     estimated_value_gbp: str
     reason: str
+    recommendation_line_id: str | None = None
 
 
 class TradePlanResponse(BaseModel):
@@ -62,101 +71,9 @@ class TradePlanResponse(BaseModel):
     block_reason: str | None
     block_message: str | None
 
-
-def _to_str(value: Decimal | float | int | str) -> str:
-    if isinstance(value, Decimal):
-        return format(value, "f")
-    if isinstance(value, (float, int)):
-        return str(value)
-    return value
-
-
-def _to_decimal(value: str | int | float | Decimal | None) -> Decimal:
-    if value is None:
-        return Decimal("0")
-    return Decimal(str(value))
-
-
-def _normalize_price_to_gbp(price: Decimal, currency: str | None) -> Decimal:
-    """Normalize price to GBP base currency.
-
-    If the price currency is GBp or GBX (pence), convert to GBP by dividing by 100.
-    """
-    if currency == "GBp" or currency == "GBX":
-        return price / Decimal("100")
-    return price
-
-
-def _build_run_input_snapshot(snapshot_data: dict) -> RunInputSnapshot:
-    """Transform engine_inputs snapshot_data into RunInputSnapshot for calculator."""
-    portfolio_id = UUID(snapshot_data["portfolio_id"])
-    cash_balance_gbp = _to_decimal(snapshot_data["cash_snapshot"]["balance_gbp"])
-
-    # Build asset positions from holding snapshots and allocation map
-    positions: list[AssetPosition] = []
-    holding_by_listing: dict[str, dict] = {
-        h["listing_id"]: h for h in snapshot_data["holding_snapshots"]
-    }
-    allocation_by_listing: dict[str, dict] = {
-        a["listing_id"]: a for a in snapshot_data["allocation_map"]
-    }
-    price_by_listing: dict[str, dict] = {
-        p["listing_id"]: p for p in snapshot_data["price_points_used"]
-    }
-
-    # Calculate total portfolio value for weight calculations
-    total_value = cash_balance_gbp
-    for holding in snapshot_data["holding_snapshots"]:
-        price_info = price_by_listing.get(holding["listing_id"])
-        if price_info:
-            raw_price = _to_decimal(price_info["price"])
-            currency = price_info.get("currency")
-            price = _normalize_price_to_gbp(raw_price, currency)
-            quantity = _to_decimal(holding["quantity"])
-            total_value += price * quantity
-
-    # Build positions from holdings that have allocations
-    for listing_id, holding in holding_by_listing.items():
-        allocation = allocation_by_listing.get(listing_id)
-        price_info = price_by_listing.get(listing_id)
-
-        if not allocation or not price_info:
-            continue
-
-        ticker = holding.get("ticker") or allocation.get("ticker", "")
-        current_quantity = _to_decimal(holding["quantity"])
-        raw_price = _to_decimal(price_info["price"])
-        currency = price_info.get("currency")
-        current_price_gbp = _normalize_price_to_gbp(raw_price, currency)
-        current_value_gbp = current_quantity * current_price_gbp
-        target_weight_pct = _to_decimal(allocation.get("target_weight_pct"))
-
-        # Calculate current weight percentage
-        if total_value > 0:
-            current_weight_pct = (current_value_gbp / total_value) * Decimal("100")
-        else:
-            current_weight_pct = Decimal("0")
-
-        drift_pct = current_weight_pct - target_weight_pct
-
-        positions.append(
-            AssetPosition(
-                listing_id=UUID(listing_id),
-                ticker=ticker,
-                current_quantity=current_quantity,
-                current_price_gbp=current_price_gbp,
-                current_value_gbp=current_value_gbp,
-                target_weight_pct=target_weight_pct,
-                current_weight_pct=current_weight_pct,
-                drift_pct=drift_pct,
-            )
-        )
-
-    return RunInputSnapshot(
-        portfolio_id=portfolio_id,
-        cash_balance_gbp=cash_balance_gbp,
-        positions=positions,
-    )
+    # Stored recommendation batch this plan is served from
+    recommendation_batch_id: str | None = None
+    recommendation_status: str | None = None
 
 
 @router.get(
@@ -172,9 +89,27 @@ def get_trade_plan(
     """Generate a trade plan for the portfolio (tenancy-checked).
     
     Gathers engine inputs, checks for blocking conditions (frozen, stale prices),
-    and generates recommended trades if not blocked.
+    and generates recommended trades if not blocked.  The plan is persisted as
+    a PENDING recommendation batch keyed by the input hash; repeat requests
+    with unchanged inputs are served from that batch.  The response is also
+    cached under the input versions (plan_cache), so a poll with nothing
+    changed costs a version probe and a status read.
     """
     as_of = datetime.now(timezone.utc)
+
+    # Cheap version check first: unchanged inputs → the cached response.
+    cached = lookup_cached_plan(db, portfolio_id, as_of)
+    if cached is not None:
+        batch_state = batch_status(db, cached["recommendation_batch_id"])
+        if batch_state in SERVABLE_STATUSES:
+            return TradePlanResponse(
+                **cached,
+                is_blocked=False,
+                block_reason=None,
+                block_message=None,
+                recommendation_status=batch_state,
+            )
+
     result = gather_engine_inputs(db, str(portfolio_id), as_of)
 
     if result.is_blocked:
@@ -195,9 +130,8 @@ def get_trade_plan(
             block_message=result.block_message,
         )
 
-    # Transform snapshot data into RunInputSnapshot
-    snapshot_data = result.snapshot_data
-    if not snapshot_data:
+    inputs = result.inputs
+    if inputs is None:
         return TradePlanResponse(
             portfolio_id=str(portfolio_id),
             as_of=as_of.isoformat().replace("+00:00", "Z"),
@@ -214,59 +148,158 @@ def get_trade_plan(
             block_message="Unable to gather snapshot data",
         )
 
-    run_input = _build_run_input_snapshot(snapshot_data)
-
-    # Generate trade plan
-    trade_plan = generate_trade_plan(run_input)
+    # Same inputs → same plan: serve the batch generated from them, if any.
+    input_hash = inputs.input_hash()
+    batch = find_batch_for_inputs(db, portfolio_id, input_hash)
+    if batch is None:
+        run_input = inputs.run_input()
+        trade_plan = generate_trade_plan(run_input)
+        batch = generate_recommendation_batch(
+            db,
+            run_input,
+            trade_plan,
+            input_hash,
+            inputs.as_of_iso,
+        )
+        db.commit()
 
-    # Calculate total value for response
-    total_value = run_input.cash_balance_gbp + sum(
-        pos.current_value_gbp for pos in run_input.positions
+    body = {**batch.plan_summary, "recommendation_batch_id": str(batch.recommendation_batch_id)}
+    store_cached_plan(inputs, body)
+    return TradePlanResponse(
+        **body,
+        is_blocked=False,
+        block_reason=None,
+        block_message=None,
+        recommendation_status=batch.status,
     )
 
-    # Build current positions response
-    positions_response: list[CurrentPosition] = []
-    for pos in run_input.positions:
-        positions_response.append(
-            CurrentPosition(
-                listing_id=str(pos.listing_id),
-                ticker=pos.ticker,
-                current_quantity=_to_str(pos.current_quantity),
-                current_price_gbp=_to_str(pos.current_price_gbp),
-                current_value_gbp=_to_str(pos.current_value_gbp),
-                target_weight_pct=_to_str(pos.target_weight_pct),
-                current_weight_pct=_to_str(pos.current_weight_pct),
-                drift_pct=_to_str(pos.drift_pct),
-                is_drifted=abs(pos.drift_pct) > DRIFT_THRESHOLD_PCT,
-            )
-        )
 
-    # Build trades response
-    trades_response: list[ProposedTrade] = []
-    for trade in trade_plan.trades:
-        trades_response.append(
-            ProposedTrade(
-                action=trade.action,
-                ticker=trade.ticker,
-                listing_id=str(trade.listing_id),
-                quantity=_to_str(trade.quantity),
-                estimated_value_gbp=_to_str(trade.estimated_value_gbp),
-                reason=trade.reason,
-            )
+class ScenarioPlan(BaseModel):
+    name: str
+    total_value_gbp: str
+    cash_balance_gbp: str
+    positions: list[CurrentPosition]
+    trades: list[ProposedTrade]
+    projected_post_trade_cash: str
+    cash_pool_used: str
+    cash_pool_remaining: str
+    warnings: list[str]
+
+
+class ScenarioResponse(BaseModel):
+    portfolio_id: str
+    as_of: str
+    scenarios: list[ScenarioPlan]
+    is_blocked: bool
+    block_reason: str | None
+    block_message: str | None
+
+
+@router.post(
+    "/{portfolio_id}/engine/scenarios",
+    response_model=ScenarioResponse,
+)
+def evaluate_price_scenarios(
+    request: ScenarioRequest,
+    portfolio_id: UUID,
+    db: deps.SessionDep,
+    user: deps.CurrentUser,
+    portfolio: Annotated[models.Portfolio, Depends(deps.require_portfolio_access)],
+):
+    """What-if trade plans under price shocks (nothing is persisted).
+
+    Engine inputs are gathered once; every scenario scales the current
+    prices by its multipliers and gets its own drift and trade plan, in
+    request order.  A blocked portfolio returns no scenarios.
+    """
+    as_of = datetime.now(timezone.utc)
+    as_of_iso = as_of.isoformat().replace("+00:00", "Z")
+
+    result = gather_engine_inputs(db, str(portfolio_id), as_of)
+    if result.is_blocked or result.inputs is None:
+        return ScenarioResponse(
+            portfolio_id=str(portfolio_id),
+            as_of=as_of_iso,
+            scenarios=[],
+            is_blocked=True,
+            block_reason=result.block_reason or "NO_DATA",
+            block_message=result.block_message or "Unable to gather snapshot data",
         )
 
-    return TradePlanResponse(
+    shocks = [
+        PriceShock(
+            name=spec.name if spec.name is not None else str(index),
+            listing_multipliers=spec.listing_multipliers,
+            sleeve_multipliers=spec.sleeve_multipliers,
+        )
+        for index, spec in enumerate(request.scenarios)
+    ]
+    scenarios = []
+    for shock, (run_input, plan) in zip(shocks, evaluate_scenarios(result.inputs, shocks)):
+        summary = plan_summary(run_input, plan, as_of_iso)
+        del summary["portfolio_id"], summary["as_of"]
+        scenarios.append(ScenarioPlan(name=shock.name, **summary))
+    return ScenarioResponse(
         portfolio_id=str(portfolio_id),
-        as_of=snapshot_data.get("as_of", as_of.isoformat().replace("+00:00", "Z")),
-        total_value_gbp=_to_str(total_value),
-        cash_balance_gbp=_to_str(run_input.cash_balance_gbp),
-        positions=positions_response,
-        trades=trades_response,
-        projected_post_trade_cash=_to_str(trade_plan.projected_post_trade_cash),
-        cash_pool_used=_to_str(trade_plan.cash_pool_used),
-        cash_pool_remaining=_to_str(trade_plan.cash_pool_remaining),
-        warnings=trade_plan.warnings,
+        as_of=as_of_iso,
+        scenarios=scenarios,
         is_blocked=False,
         block_reason=None,
         block_message=None,
     )
+
+
+@router.post(
+    "/{portfolio_id}/engine/backtest",
+    response_model=RefreshResponse,
+)
+def enqueue_backtest(
+    request: BacktestRequest,
+    user: deps.CurrentUser,
+    portfolio: Annotated[models.Portfolio, Depends(deps.require_portfolio_access)],
+):
+    """Replay the engine over stored closes as a BACKTEST worker job.
+
+    A request identical to one still queued for the portfolio returns that
+    job; different parameters always get a job of their own.  Results are read back from
+    ``GET /engine/backtest/{job_id}`` once the job has run.
+    """
+    job_id, created = get_queue().enqueue_coalesced(
+        JobPayload(
+            task_kind="BACKTEST",
+            portfolio_id=str(portfolio.portfolio_id),
+            requested_by_user_id=str(user.user_id),
+            params=request.model_dump(mode="json"),
+        )
+    )
+    return RefreshResponse(job_id=job_id, status="enqueued" if created else "coalesced")
+
+
+@router.get(
+    "/{portfolio_id}/engine/backtest/{job_id}",
+    response_model=BacktestResultResponse,
+)
+def get_backtest_result(
+    job_id: UUID,
+    db: deps.SessionDep,
+    portfolio: Annotated[models.Portfolio, Depends(deps.require_portfolio_access)],
+):
+    """Result of a finished BACKTEST job (404 while it is queued or running)."""
+    run = (
+        db.query(models.TaskRun)
+        .filter(
+            models.TaskRun.job_id == job_id,
+            models.TaskRun.task_kind == "BACKTEST",
+            models.TaskRun.portfolio_id == portfolio.portfolio_id,
+        )
+        .order_by(models.TaskRun.ended_at.desc())
+        .first()
+    )
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Backtest result not found")
+    return BacktestResultResponse(
+        job_id=str(run.job_id),
+        run_id=str(run.run_id),
+        status=run.status,
+        summary=run.summary,
+    )
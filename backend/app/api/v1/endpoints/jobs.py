@@ -0,0 +1,69 @@
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.api import deps
+from app.queue.redis_queue import JobPayload, get_queue
+from app.schemas.jobs import DeadLetterResponse, JobStatusResponse
+from app.schemas.market_data import RefreshResponse
+
+router = APIRouter()
+
+
+@router.get("/dead-letter", response_model=list[DeadLetterResponse])
+def list_dead_letters(
+    admin: deps.CurrentActiveSuperuser,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Jobs that exhausted their retries, newest first (admin only)."""
+    return [
+        DeadLetterResponse.from_dead_letter(entry)
+        for entry in get_queue().list_dead_letters(limit=limit)
+    ]
+
+
+@router.post("/global-price-refresh", response_model=RefreshResponse)
+def enqueue_global_price_refresh(admin: deps.CurrentActiveSuperuser):
+    """Refresh every portfolio's listings in one shared job (admin only)."""
+    job_id, created = get_queue().enqueue_coalesced(
+        JobPayload(
+            task_kind="GLOBAL_PRICE_REFRESH",
+            portfolio_id="",
+            requested_by_user_id=str(admin.user_id),
+        )
+    )
+    return RefreshResponse(job_id=job_id, status="enqueued" if created else "coalesced")
+
+
+@router.post("/fleet-trade-plan", response_model=RefreshResponse)
+def enqueue_fleet_trade_plan(admin: deps.CurrentActiveSuperuser):
+    """Compute trade plans for every enabled portfolio in one job (admin only)."""
+    job_id, created = get_queue().enqueue_coalesced(
+        JobPayload(
+            task_kind="FLEET_TRADE_PLAN",
+            portfolio_id="",
+            requested_by_user_id=str(admin.user_id),
+        )
+    )
+    return RefreshResponse(job_id=job_id, status="enqueued" if created else "coalesced")
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+def get_job_status(
+    job_id: str,
+    current_user: deps.CurrentUser,
+    db: deps.SessionDep,
+):
+    """Lifecycle state of an enqueued job (visible to the portfolio's users)."""
+    job_status = get_queue().get_job_status(job_id)
+    if job_status is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    if not current_user.is_bootstrap_admin:
+        try:
+            portfolio_id = UUID(job_status.portfolio_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        deps.require_portfolio_access(portfolio_id, current_user, db)
+
+    return JobStatusResponse.model_validate(job_status.model_dump())
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, Query
 
 from app.api import deps
 from app.domain import models
-from app.queue.redis_queue import enqueue_job
+from app.queue.redis_queue import JobPayload, get_queue
 from app.schemas.market_data import PricePointResponse, FxRateResponse, RefreshResponse, SyncRequest, SyncResponse
 from app.services.market_data_service import sync_portfolio_prices
 import asyncio
@@ -106,12 +106,15 @@ def refresh_market_data(
     current_user: deps.CurrentUser,
     db: deps.SessionDep,
 ):
-    job_id = enqueue_job(
-        "PRICE_REFRESH",
-        str(portfolio.portfolio_id),
-        str(current_user.user_id),
+    # Repeated clicks and scheduler ticks share the pending job, if any.
+    job_id, created = get_queue().enqueue_coalesced(
+        JobPayload(
+            task_kind="PRICE_REFRESH",
+            portfolio_id=str(portfolio.portfolio_id),
+            requested_by_user_id=str(current_user.user_id),
+        )
     )
-    return RefreshResponse(job_id=job_id)
+    return RefreshResponse(job_id=job_id, status="enqueued" if created else "coalesced")
 
 
 @router.post(
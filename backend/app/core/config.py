@@ -29,9 +29,35 @@ class Settings(BaseSettings):
     # ── Redis ─────────────────────────────────────────────────────────────────
     redis_url: str = "redis://redis:6379/0"
 
+    # ── Worker ────────────────────────────────────────────────────────────────
+    worker_concurrency: int = 8
+    worker_task_kind_limits: dict[str, int] = {
+        "PRICE_REFRESH": 8,
+        "GLOBAL_PRICE_REFRESH": 1,
+        "FLEET_TRADE_PLAN": 1,
+        "BACKTEST": 2,
+    }
+
+    # ── Reliable queue ────────────────────────────────────────────────────────
+    queue_reliable: bool = True
+    queue_visibility_timeout_seconds: int = 600  # must exceed the lease heartbeat
+    queue_lease_heartbeat_seconds: float = 60.0  # running jobs re-extend their lease
+    queue_max_attempts: int = 5
+    queue_retry_backoff_seconds: float = 10.0
+    queue_retry_backoff_max_seconds: float = 900.0
+    queue_dead_letter_max: int = 1000
+    queue_maintenance_interval_seconds: float = 5.0
+    queue_coalesce_ttl_seconds: int = 3600  # safety net for an orphaned pending key
+    queue_job_status_ttl_seconds: int = 86400
+
     # ── Market Data ────────────────────────────────────────────────────────────
     marketdata_provider: str = "mock"  # mock, yahoo, alphavantage
     marketdata_api_key: str | None = None
+    marketdata_max_concurrency: int = 8
+    marketdata_rate_limit_per_second: float = 5.0
+    marketdata_currency_cache_backend: str = "memory"  # memory, redis
+    marketdata_currency_cache_ttl_hours: int = 24
+    marketdata_currency_cache_max_entries: int = 5000
 
     # ── Data Quality (DQ) ──────────────────────────────────────────────────────
     dq_stale_max_minutes_intraday: int = 30
@@ -39,6 +65,30 @@ class Settings(BaseSettings):
     dq_jump_threshold_pct: float = 10.0
     dq_require_close: bool = True
     dq_fx_stale_max_days: int = 3
+    # Evaluate GLOBAL_PRICE_REFRESH DQ with NumPy masks (same violations)
+    dq_columnar_evaluation: bool = False
+
+    # ── Drift Monitor ──────────────────────────────────────────────────────────
+    drift_monitor_enabled: bool = True
+    drift_state_ttl_seconds: int = 86400  # running totals are rebuilt after this
+
+    # ── Engine Batch (fleet trade plan) ────────────────────────────────────────
+    engine_batch_max_workers: int | None = None  # defaults to os.cpu_count()
+    # Fewer portfolios than this run on threads (no process start-up cost)
+    engine_batch_process_threshold: int = 32
+
+    # ── Engine Calculator ──────────────────────────────────────────────────────
+    # Integer trade-plan core; same plans as the Decimal core, less overhead
+    engine_calculator_fixed_point: bool = False
+    # Per-sleeve order caps (sleeve_code → max orders, JSON in env), applied
+    # before MAX_SELL_ORDERS / MAX_BUY_ORDERS; sleeves not listed are uncapped
+    engine_sleeve_sell_caps: dict[str, int] = {}
+    engine_sleeve_buy_caps: dict[str, int] = {}
+
+    # ── Engine Plan Cache ──────────────────────────────────────────────────────
+    engine_plan_cache_backend: str = "memory"  # memory, redis, off
+    engine_plan_cache_ttl_seconds: int = 300
+    engine_plan_cache_max_entries: int = 2000
 
     # ── Mock Provider Anomaly Injection (for testing) ───────────────────────────
     mock_stale_prices: bool = False
@@ -47,15 +97,29 @@ class Settings(BaseSettings):
 
     # ── Venue Configuration ────────────────────────────────────────────────────
     venue_lse_tz: str = "Europe/London"
+    venue_lse_open_time: str = "08:00"
     venue_lse_close_time: str = "16:30"
     venue_nyse_tz: str = "America/New_York"
+    venue_nyse_open_time: str = "09:30"
     venue_nyse_close_time: str = "16:00"
+    # JSON {"VENUE": ["YYYY-MM-DD", ...]}; defaults to the bundled table
+    trading_holidays_file: str | None = None
+    trading_calendar_window_days: int = 30
 
     # ── Scheduler ───────────────────────────────────────────────────────────────
     scheduler_api_base_url: str = "http://localhost:8000"
     scheduler_interval_minutes: int = 5
     scheduler_auth_email: str | None = None
     scheduler_auth_password: str | None = None
+    # One GLOBAL_PRICE_REFRESH per tick instead of one job per portfolio
+    # (the scheduler account must be the bootstrap admin).
+    scheduler_global_refresh: bool = False
+    # Skip ticks while every venue is shut (weekends, holidays, overnight),
+    # once the post-close grace period has passed.  Off by default: it relies
+    # on trading_holidays_file covering the current year.
+    scheduler_skip_closed_markets: bool = False
+    scheduler_post_close_grace_minutes: int = 60
+
     @field_validator("cookie_samesite")
     @classmethod
     def validate_cookie_samesite(cls, value: str) -> str:
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from decimal import Decimal
+from typing import Optional
 import uuid
 
 
@@ -33,6 +34,7 @@ class AssetPosition:
     target_weight_pct: Decimal
     current_weight_pct: Decimal
     drift_pct: Decimal
+    sleeve_code: Optional[str] = None
 
     def __post_init__(self) -> None:
         if self.current_quantity < 0:
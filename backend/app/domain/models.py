@@ -131,6 +131,26 @@ class PricePoint(Base):
         UniqueConstraint('listing_id', 'as_of', 'source_id', 'is_close', name='uq_price_point'),
     )
 
+
+class LatestPrice(Base):
+    """Latest price per listing / close flag / source, maintained on ingest.
+
+    Materialised view of ``price_points`` so hot read paths (engine inputs,
+    dashboard, DQ) avoid sorting the full price history per listing.
+    Rebuildable from history via ``app.services.latest_prices``.
+    """
+    __tablename__ = "latest_prices"
+
+    listing_id = Column(UUID(as_uuid=True), ForeignKey("listing.listing_id"), primary_key=True)
+    is_close = Column(Boolean, primary_key=True)
+    source_id = Column(String, primary_key=True)
+    price_point_id = Column(UUID(as_uuid=True), nullable=False)
+    as_of = Column(TIMESTAMP(timezone=True), nullable=False)
+    price = Column(Numeric(precision=28, scale=10), nullable=False)
+    currency = Column(String(3), nullable=True)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class FxRate(Base):
     """Append-only FX rates for validation and valuation."""
     __tablename__ = "fx_rates"
@@ -165,6 +185,17 @@ class Alert(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     resolved_at = Column(TIMESTAMP(timezone=True), nullable=True)
 
+    __table_args__ = (
+        # At most one unresolved alert per key (dedup arbiter for create_alerts)
+        Index(
+            'uq_alerts_open_rule',
+            'portfolio_id', 'listing_id', 'rule_code',
+            unique=True,
+            postgresql_where=resolved_at.is_(None),
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
 class FreezeState(Base):
     """Circuit breaker state for a portfolio."""
     __tablename__ = "freeze_states"
@@ -372,13 +403,15 @@ class RecommendationBatch(Base):
 
     recommendation_batch_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     portfolio_id = Column(UUID(as_uuid=True), ForeignKey("portfolio.portfolio_id"), nullable=False)
-    status = Column(String, nullable=False, default="PENDING")  # PENDING, EXECUTED, EXECUTED_PARTIAL, IGNORED
+    status = Column(String, nullable=False, default="PENDING")  # PENDING, EXECUTED, EXECUTED_PARTIAL, IGNORED, SUPERSEDED
     generated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
     executed_at = Column(TIMESTAMP(timezone=True), nullable=True)
     ignored_at = Column(TIMESTAMP(timezone=True), nullable=True)
     closed_by_user_id = Column(UUID(as_uuid=True), ForeignKey("user.user_id"), nullable=True)
     execution_summary = Column(JSONB, nullable=True)
     run_id = Column(UUID(as_uuid=True), ForeignKey("task_runs.run_id"), nullable=True)
+    input_hash = Column(String, nullable=True)  # EngineInputs.input_hash of the inputs
+    plan_summary = Column(JSONB, nullable=True)  # stored /engine/plan response body
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
@@ -390,6 +423,14 @@ class RecommendationBatch(Base):
     __table_args__ = (
         Index('ix_recommendation_batches_portfolio_status', 'portfolio_id', 'status'),
         Index('ix_recommendation_batches_generated', generated_at.desc()),
+        Index('ix_recommendation_batches_input_hash', 'portfolio_id', 'input_hash'),
+        # At most one PENDING batch per engine inputs (arbiter for generation)
+        Index(
+            'uq_recommendation_batches_pending_input',
+            'portfolio_id', 'input_hash',
+            unique=True,
+            postgresql_where=status == 'PENDING',
+        ),
     )
 
 
@@ -5,7 +5,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.api.v1.endpoints import auth, registry, portfolios, market_data, alerts, freeze, notifications, ledger, snapshots, ledger_import, engine, recommendations, dashboard
+from app.api.v1.endpoints import auth, registry, portfolios, market_data, alerts, freeze, notifications, ledger, snapshots, ledger_import, engine, recommendations, dashboard, jobs
 from app.services.scheduler import init_scheduler, start_scheduler, shutdown_scheduler, register_weekly_retention_job
 from app.services.jobs.retention import cleanup_old_logs
 
@@ -97,6 +97,9 @@ app.include_router(recommendations.router, prefix=f"{settings.API_V1_STR}/portfo
 # Phase 6 API endpoints (Dashboard)
 app.include_router(dashboard.router, prefix=f"{settings.API_V1_STR}/portfolios", tags=["dashboard"])
 
+# Job queue operations
+app.include_router(jobs.router, prefix=f"{settings.API_V1_STR}/jobs", tags=["jobs"])
+
 
 @app.get("/health")
 def health_check():
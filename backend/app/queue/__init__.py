@@ -1,7 +1,10 @@
 """Redis Queue Module for job management."""
 
 from app.queue.redis_queue import (
+    AsyncRedisQueue,
+    DeadLetter,
     JobPayload,
+    JobStatus,
     RedisQueue,
     dequeue_job,
     enqueue_job,
@@ -9,7 +12,10 @@ from app.queue.redis_queue import (
 )
 
 __all__ = [
+    "AsyncRedisQueue",
+    "DeadLetter",
     "JobPayload",
+    "JobStatus",
     "RedisQueue",
     "get_queue",
     "enqueue_job",
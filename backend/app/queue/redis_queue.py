@@ -1,15 +1,61 @@
-"""Redis Queue implementation for job management."""
-
+"""Redis Queue implementation for job management.
+
+Reliable mode (``settings.queue_reliable``, used by the worker runtime):
+
+  - ``dequeue_job`` BLMOVEs a job from ``ta:jobs`` into ``ta:jobs:processing``
+    and leases it for ``queue_visibility_timeout_seconds``;
+  - ``extend_lease`` pushes the deadline out again; the worker pool calls it
+    every ``queue_lease_heartbeat_seconds`` while the job runs, so only jobs
+    whose worker died (or hung its event loop) expire;
+  - ``ack`` removes a finished job from the processing list;
+  - ``fail`` (or an expired lease, found by ``reap_stalled``) schedules a
+    retry in ``ta:jobs:delayed`` with exponential backoff, until
+    ``queue_max_attempts`` is reached and the job goes to ``ta:jobs:dead``;
+  - ``promote_due_retries`` moves retries whose backoff has elapsed back
+    onto ``ta:jobs``.
+
+Delivery is at-least-once: a job whose lease expires while it is still
+running (its heartbeat stopped) is retried, so handlers must be idempotent
+(price refreshes are).
+
+Coalescing: at most one *pending* (enqueued, not yet started) job exists per
+(task_kind, portfolio_id, params).  ``ta:jobs:pending:<kind>:<portfolio>``
+(plus ``:<params digest>`` for jobs with arguments, e.g. BACKTEST) holds its
+job_id; enqueueing again returns that id instead of pushing a duplicate.
+The key is released when a worker picks the job up, so a request made while
+a refresh is running still gets a fresh job.  Every job's lifecycle is
+tracked in ``ta:jobs:status:<job_id>`` for the job-status endpoint.
+"""
+
+import hashlib
 import json
+import time
 import uuid
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import redis
-from pydantic import BaseModel, Field
+import redis.asyncio as aioredis
+from pydantic import BaseModel, Field, PrivateAttr
+from redis.exceptions import WatchError
 
 from app.core.config import settings
 
+QUEUE_NAME = "ta:jobs"
+PROCESSING_SUFFIX = ":processing"
+LEASES_SUFFIX = ":leases"
+DELAYED_SUFFIX = ":delayed"
+DEAD_SUFFIX = ":dead"
+PENDING_PREFIX = QUEUE_NAME + ":pending:"
+STATUS_PREFIX = QUEUE_NAME + ":status:"
+
+JOB_QUEUED = "QUEUED"
+JOB_RUNNING = "RUNNING"
+JOB_RETRYING = "RETRYING"
+JOB_SUCCEEDED = "SUCCEEDED"
+JOB_FAILED = "FAILED"  # failed without retry support (non-reliable mode)
+JOB_DEAD = "DEAD"
+
 
 class JobPayload(BaseModel):
     """Job payload model for queue operations."""
@@ -21,6 +67,11 @@ class JobPayload(BaseModel):
     enqueued_at: str = Field(
         default_factory=lambda: datetime.now(timezone.utc).isoformat()
     )
+    attempts: int = 0  # failed deliveries so far
+    params: dict[str, Any] = Field(default_factory=dict)  # task-specific arguments (BACKTEST)
+
+    # Exact processing-list entry this job was dequeued as (reliable mode).
+    _receipt: Optional[str] = PrivateAttr(default=None)
 
     class Config:
         json_encoders = {
@@ -28,6 +79,68 @@ class JobPayload(BaseModel):
         }
 
 
+class DeadLetter(BaseModel):
+    """A job that exhausted its retries (or can never succeed)."""
+
+    job: JobPayload
+    error: str
+    failed_at: str = Field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat()
+    )
+
+
+class JobStatus(BaseModel):
+    """Last known lifecycle state of a job."""
+
+    job_id: str
+    task_kind: str
+    portfolio_id: str
+    requested_by_user_id: str
+    enqueued_at: str
+    status: str
+    attempts: int = 0
+    updated_at: str
+    error: Optional[str] = None
+
+
+def pending_key(task_kind: str, portfolio_id: str, params: dict[str, Any] | None = None) -> str:
+    """Coalescing key; jobs with different ``params`` never coalesce."""
+    key = f"{PENDING_PREFIX}{task_kind}:{portfolio_id}"
+    if params:
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        key += ":" + hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    return key
+
+
+def status_key(job_id: str) -> str:
+    return f"{STATUS_PREFIX}{job_id}"
+
+
+def _write_status(pipe, job: JobPayload, status: str, error: str | None = None) -> None:
+    """Buffer a job-status update on a (sync or async) pipeline."""
+    mapping = {
+        "job_id": job.job_id,
+        "task_kind": job.task_kind,
+        "portfolio_id": job.portfolio_id,
+        "requested_by_user_id": job.requested_by_user_id,
+        "enqueued_at": job.enqueued_at,
+        "status": status,
+        "attempts": job.attempts,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if error is not None:
+        mapping["error"] = error
+    key = status_key(job.job_id)
+    pipe.hset(key, mapping=mapping)
+    pipe.expire(key, settings.queue_job_status_ttl_seconds)
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff before retry number ``attempts`` (1-based)."""
+    delay = settings.queue_retry_backoff_seconds * (2 ** max(0, attempts - 1))
+    return min(delay, settings.queue_retry_backoff_max_seconds)
+
+
 class RedisQueue:
     """Redis-backed job queue."""
 
@@ -39,20 +152,46 @@ class RedisQueue:
         """
         self.redis_url = redis_url or settings.redis_url
         self.client = redis.from_url(self.redis_url, decode_responses=True)
-        self.queue_name = "ta:jobs"
+        self.queue_name = QUEUE_NAME
+        self.dead_name = QUEUE_NAME + DEAD_SUFFIX
 
     def enqueue_job(self, job: JobPayload) -> str:
-        """Enqueue a job using LPUSH.
+        """Enqueue a job using LPUSH, coalescing with a pending duplicate.
+
+        Args:
+            job: JobPayload instance to enqueue.
+
+        Returns:
+            The job_id of the enqueued job, or of the already pending job
+            for the same (task_kind, portfolio_id, params).
+        """
+        job_id, _ = self.enqueue_coalesced(job)
+        return job_id
+
+    def enqueue_coalesced(self, job: JobPayload) -> tuple[str, bool]:
+        """Enqueue ``job`` unless one is already pending for its portfolio.
 
         Args:
             job: JobPayload instance to enqueue.
 
         Returns:
-            The job_id of the enqueued job.
+            ``(job_id, created)`` — ``created`` is False when an existing
+            pending job was returned instead.
         """
-        job_json = job.model_dump_json()
-        self.client.lpush(self.queue_name, job_json)
-        return job.job_id
+        key = pending_key(job.task_kind, job.portfolio_id, job.params)
+        while True:
+            if self.client.set(
+                key, job.job_id, nx=True, ex=settings.queue_coalesce_ttl_seconds
+            ):
+                with self.client.pipeline(transaction=True) as pipe:
+                    pipe.lpush(self.queue_name, job.model_dump_json())
+                    _write_status(pipe, job, JOB_QUEUED)
+                    pipe.execute()
+                return job.job_id, True
+            existing = self.client.get(key)
+            if existing is not None:
+                return existing, False
+            # The pending job was picked up between SET and GET; try again.
 
     def dequeue_job(self, timeout: int = 5) -> Optional[JobPayload]:
         """Dequeue a job using BRPOP with blocking.
@@ -67,9 +206,36 @@ class RedisQueue:
         if result:
             # result is (queue_name, item)
             job_json = result[1]
-            return JobPayload.model_validate_json(job_json)
+            job = JobPayload.model_validate_json(job_json)
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    key = pending_key(job.task_kind, job.portfolio_id, job.params)
+                    pipe.watch(key)
+                    owns_key = pipe.get(key) == job.job_id
+                    pipe.multi()
+                    if owns_key:
+                        pipe.delete(key)
+                    _write_status(pipe, job, JOB_RUNNING)
+                    pipe.execute()
+                except WatchError:
+                    pass
+            return job
         return None
 
+    def get_job_status(self, job_id: str) -> Optional[JobStatus]:
+        """Look up a job's lifecycle state.
+
+        Args:
+            job_id: Job identifier returned at enqueue time.
+
+        Returns:
+            JobStatus, or None if unknown or expired.
+        """
+        fields = self.client.hgetall(status_key(job_id))
+        if not fields:
+            return None
+        return JobStatus.model_validate(fields)
+
     def get_queue_length(self) -> int:
         """Get current queue length.
 
@@ -78,6 +244,279 @@ class RedisQueue:
         """
         return self.client.llen(self.queue_name)
 
+    def list_dead_letters(self, limit: int = 100) -> list[DeadLetter]:
+        """Most recent dead-lettered jobs, newest first.
+
+        Args:
+            limit: Maximum number of entries to return.
+
+        Returns:
+            DeadLetter entries from the dead-letter list.
+        """
+        entries = self.client.lrange(self.dead_name, 0, limit - 1)
+        return [DeadLetter.model_validate_json(entry) for entry in entries]
+
+
+class AsyncRedisQueue:
+    """asyncio Redis-backed job queue (same list and payloads as RedisQueue).
+
+    Used by the worker runtime so waiting for a job never blocks the event
+    loop that is running other jobs.  See the module docstring for the
+    reliable-mode keys and lifecycle.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        *,
+        client: aioredis.Redis | None = None,
+        reliable: bool | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize async Redis queue.
+
+        Args:
+            redis_url: Redis connection URL. Defaults to settings.redis_url.
+            client: Pre-built client (e.g. fakeredis in tests).
+            reliable: Use processing list, leases and retries. Defaults to
+                settings.queue_reliable.
+            clock: Wall-clock source for lease and backoff deadlines.
+        """
+        self.redis_url = redis_url or settings.redis_url
+        self.client = client if client is not None else aioredis.from_url(
+            self.redis_url, decode_responses=True
+        )
+        self.reliable = settings.queue_reliable if reliable is None else reliable
+        self.queue_name = QUEUE_NAME
+        self.processing_name = QUEUE_NAME + PROCESSING_SUFFIX
+        self.leases_name = QUEUE_NAME + LEASES_SUFFIX
+        self.delayed_name = QUEUE_NAME + DELAYED_SUFFIX
+        self.dead_name = QUEUE_NAME + DEAD_SUFFIX
+        self._clock = clock
+
+    async def enqueue_job(self, job: JobPayload) -> str:
+        """Enqueue a job using LPUSH, coalescing with a pending duplicate.
+
+        Args:
+            job: JobPayload instance to enqueue.
+
+        Returns:
+            The job_id of the enqueued job, or of the already pending job
+            for the same (task_kind, portfolio_id, params).
+        """
+        key = pending_key(job.task_kind, job.portfolio_id, job.params)
+        while True:
+            if await self.client.set(
+                key, job.job_id, nx=True, ex=settings.queue_coalesce_ttl_seconds
+            ):
+                async with self.client.pipeline(transaction=True) as pipe:
+                    pipe.lpush(self.queue_name, job.model_dump_json())
+                    _write_status(pipe, job, JOB_QUEUED)
+                    await pipe.execute()
+                return job.job_id
+            existing = await self.client.get(key)
+            if existing is not None:
+                return existing
+
+    async def dequeue_job(self, timeout: int = 5) -> Optional[JobPayload]:
+        """Dequeue a job without blocking the event loop.
+
+        In reliable mode the job is BLMOVEd into the processing list and
+        leased; it stays there until ``ack`` or ``fail``.  Otherwise BRPOP.
+
+        Args:
+            timeout: Timeout in seconds to wait for a job. Defaults to 5.
+
+        Returns:
+            JobPayload instance if a job is available, None if timeout.
+        """
+        if not self.reliable:
+            result = await self.client.brpop(self.queue_name, timeout=timeout)
+            if not result:
+                return None
+            job = JobPayload.model_validate_json(result[1])
+        else:
+            raw = await self.client.blmove(
+                self.queue_name, self.processing_name, timeout, "RIGHT", "LEFT"
+            )
+            if raw is None:
+                return None
+            await self.client.zadd(self.leases_name, {raw: self._lease_deadline()})
+            job = JobPayload.model_validate_json(raw)
+            job._receipt = raw
+        await self._mark_running(job)
+        return job
+
+    async def ack(self, job: JobPayload) -> None:
+        """Mark a dequeued job as done."""
+        async with self.client.pipeline(transaction=True) as pipe:
+            if self.reliable and job._receipt is not None:
+                pipe.lrem(self.processing_name, 1, job._receipt)
+                pipe.zrem(self.leases_name, job._receipt)
+            _write_status(pipe, job, JOB_SUCCEEDED)
+            await pipe.execute()
+
+    async def extend_lease(self, job: JobPayload) -> bool:
+        """Push a running job's lease deadline out by the visibility timeout.
+
+        Returns:
+            False when the lease is gone (already reaped and rescheduled);
+            the lease is not recreated then.
+        """
+        if not self.reliable or job._receipt is None:
+            return True
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.leases_name, {job._receipt: self._lease_deadline()}, xx=True)
+            pipe.zscore(self.leases_name, job._receipt)
+            _, deadline = await pipe.execute()
+        return deadline is not None
+
+    async def fail(self, job: JobPayload, error: str, *, retry: bool = True) -> None:
+        """Record a failed delivery: retry with backoff or dead-letter.
+
+        A job whose lease was already reaped (and so already rescheduled) is
+        left alone.  ``retry=False`` dead-letters immediately, for jobs that
+        can never succeed (e.g. an unknown task kind).
+        """
+        if not self.reliable or job._receipt is None:
+            async with self.client.pipeline(transaction=True) as pipe:
+                _write_status(pipe, job, JOB_FAILED, error)
+                await pipe.execute()
+            return
+        raw = job._receipt
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.leases_name)
+                if await pipe.zscore(self.leases_name, raw) is None:
+                    return
+                pipe.multi()
+                pipe.lrem(self.processing_name, 1, raw)
+                pipe.zrem(self.leases_name, raw)
+                self._reschedule(pipe, job, error, retry=retry)
+                await pipe.execute()
+            except WatchError:
+                # The reaper (or another worker) touched the lease first.
+                return
+
+    async def reap_stalled(self) -> int:
+        """Reschedule jobs whose visibility timeout has expired.
+
+        Processing-list entries without a lease (a worker died between
+        BLMOVE and ZADD) are leased first so they expire normally.  An
+        expired lease whose entry has already left the processing list
+        (acked or failed meanwhile) is dropped, not rescheduled.
+
+        Returns:
+            Number of stalled jobs rescheduled.
+        """
+        if not self.reliable:
+            return 0
+        now = self._clock()
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.leases_name, self.processing_name)
+                processing = await pipe.lrange(self.processing_name, 0, -1)
+                expired = await pipe.zrangebyscore(self.leases_name, "-inf", now)
+                if not processing and not expired:
+                    return 0
+                pipe.multi()
+                if processing:
+                    deadline = now + settings.queue_visibility_timeout_seconds
+                    pipe.zadd(self.leases_name, {raw: deadline for raw in processing}, nx=True)
+                in_processing = set(processing)
+                stalled = [raw for raw in expired if raw in in_processing]
+                for raw in expired:
+                    pipe.zrem(self.leases_name, raw)
+                for raw in stalled:
+                    pipe.lrem(self.processing_name, 1, raw)
+                    self._reschedule(
+                        pipe,
+                        JobPayload.model_validate_json(raw),
+                        "visibility timeout expired",
+                    )
+                await pipe.execute()
+            except WatchError:
+                # Acked/failed concurrently; the next sweep picks up the rest.
+                return 0
+        return len(stalled)
+
+    async def promote_due_retries(self) -> int:
+        """Move delayed retries whose backoff has elapsed back onto the queue.
+
+        Returns:
+            Number of jobs requeued.
+        """
+        if not self.reliable:
+            return 0
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.delayed_name)
+                due = await pipe.zrangebyscore(self.delayed_name, "-inf", self._clock())
+                if not due:
+                    return 0
+                pipe.multi()
+                pipe.zrem(self.delayed_name, *due)
+                pipe.lpush(self.queue_name, *due)
+                await pipe.execute()
+            except WatchError:
+                return 0
+        return len(due)
+
+    async def maintain(self) -> None:
+        """One reaper sweep: reschedule stalled jobs, requeue due retries."""
+        await self.reap_stalled()
+        await self.promote_due_retries()
+
+    async def list_dead_letters(self, limit: int = 100) -> list[DeadLetter]:
+        """Most recent dead-lettered jobs, newest first."""
+        entries = await self.client.lrange(self.dead_name, 0, limit - 1)
+        return [DeadLetter.model_validate_json(entry) for entry in entries]
+
+    async def _mark_running(self, job: JobPayload) -> None:
+        """Release the job's coalescing key (if still its own) and mark it RUNNING."""
+        key = pending_key(job.task_kind, job.portfolio_id, job.params)
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                owns_key = await pipe.get(key) == job.job_id
+                pipe.multi()
+                if owns_key:
+                    pipe.delete(key)
+                _write_status(pipe, job, JOB_RUNNING)
+                await pipe.execute()
+            except WatchError:
+                # A new job claimed the key meanwhile; leave it alone.
+                pass
+
+    def _lease_deadline(self) -> float:
+        return self._clock() + settings.queue_visibility_timeout_seconds
+
+    def _reschedule(self, pipe, job: JobPayload, error: str, *, retry: bool = True) -> None:
+        """Queue the retry (or dead letter) for ``job`` on a MULTI pipeline."""
+        attempts = job.attempts + 1
+        retried = job.model_copy(update={"attempts": attempts})
+        if retry and attempts < settings.queue_max_attempts:
+            ready_at = self._clock() + retry_delay_seconds(attempts)
+            pipe.zadd(self.delayed_name, {retried.model_dump_json(): ready_at})
+            _write_status(pipe, retried, JOB_RETRYING, error)
+            return
+        dead = DeadLetter(job=retried, error=error)
+        pipe.lpush(self.dead_name, dead.model_dump_json())
+        pipe.ltrim(self.dead_name, 0, settings.queue_dead_letter_max - 1)
+        _write_status(pipe, retried, JOB_DEAD, error)
+
+    async def get_queue_length(self) -> int:
+        """Get current queue length.
+
+        Returns:
+            Number of jobs in the queue.
+        """
+        return await self.client.llen(self.queue_name)
+
+    async def close(self) -> None:
+        """Close the underlying connection pool."""
+        await self.client.aclose()
+
 
 # Singleton instance
 _queue_instance: RedisQueue | None = None
@@ -106,7 +545,8 @@ def enqueue_job(
         requested_by_user_id: ID of the user requesting the task.
 
     Returns:
-        The job_id of the enqueued job.
+        The job_id of the enqueued job, or of the pending job it was
+        coalesced with.
     """
     job = JobPayload(
         task_kind=task_kind,
@@ -7,13 +7,14 @@ import asyncio
 import logging
 import signal
 import sys
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import httpx
 
 from app.core.config import settings
 from app.core.logging import get_logger, with_correlation
+from app.services.trading_calendar import TradingCalendar, get_trading_calendar
 
 logger = get_logger(__name__)
 
@@ -26,6 +27,10 @@ class Scheduler:
         self.interval_minutes = settings.SCHEDULER_INTERVAL_MINUTES
         self.email = settings.SCHEDULER_AUTH_EMAIL
         self.password = settings.SCHEDULER_AUTH_PASSWORD
+        self.global_refresh = settings.scheduler_global_refresh
+        self.skip_closed_markets = settings.scheduler_skip_closed_markets
+        self.post_close_grace = timedelta(minutes=settings.scheduler_post_close_grace_minutes)
+        self.calendar: TradingCalendar = get_trading_calendar()
         self.access_token: Optional[str] = None
         self.shutdown_event = asyncio.Event()
         
@@ -100,7 +105,10 @@ class Scheduler:
                 if response.status_code == 200:
                     data = response.json()
                     job_id = data.get("job_id")
-                    logger.info(f"Enqueued refresh for portfolio {portfolio_id}, job_id={job_id}")
+                    # "coalesced" means a refresh for this portfolio was already pending
+                    logger.info(
+                        f"Refresh for portfolio {portfolio_id}: {data.get('status')}, job_id={job_id}"
+                    )
                     return True
                 elif response.status_code == 401:
                     # Token expired, try re-login
@@ -114,6 +122,45 @@ class Scheduler:
                 logger.error(f"Error refreshing portfolio {portfolio_id}: {e}")
                 return False
     
+    async def refresh_all(self) -> bool:
+        # Trigger one shared refresh for every portfolio (admin account only)
+        if not self.access_token:
+            return False
+        
+        async with httpx.AsyncClient() as client:
+            try:
+                response = await client.post(
+                    f"{self.api_base}/api/v1/jobs/global-price-refresh",
+                    headers={"Authorization": f"Bearer {self.access_token}"}
+                )
+                if response.status_code == 200:
+                    data = response.json()
+                    logger.info(
+                        f"Global refresh: {data.get('status')}, job_id={data.get('job_id')}"
+                    )
+                    return True
+                elif response.status_code == 401:
+                    if await self.login():
+                        return await self.refresh_all()
+                    return False
+                else:
+                    logger.error(f"Failed to enqueue global refresh: {response.status_code}")
+                    return False
+            except Exception as e:
+                logger.error(f"Error enqueuing global refresh: {e}")
+                return False
+    
+    def markets_active(self, now: datetime) -> bool:
+        # True while any venue is open or closed less than the grace period ago
+        # (the close still has to be fetched).
+        for venue in self.calendar.venues:
+            if self.calendar.is_open(venue, now):
+                return True
+            last_close = self.calendar.last_close(venue, now)
+            if last_close is not None and now - last_close < self.post_close_grace:
+                return True
+        return False
+    
     async def run(self):
         # Main scheduler loop
         logger.info(f"Scheduler starting (interval={self.interval_minutes}min)...")
@@ -126,9 +173,16 @@ class Scheduler:
         while not self.shutdown_event.is_set():
             start_time = datetime.now(timezone.utc)
             
-            # Get all portfolios
-            portfolios = await self.get_portfolios()
-            logger.info(f"Found {len(portfolios)} portfolios to refresh")
+            if self.skip_closed_markets and not self.markets_active(start_time):
+                logger.info("All venues closed, skipping refresh")
+                portfolios = []
+            elif self.global_refresh:
+                await self.refresh_all()
+                portfolios = []
+            else:
+                # Get all portfolios
+                portfolios = await self.get_portfolios()
+                logger.info(f"Found {len(portfolios)} portfolios to refresh")
             
             # Refresh each portfolio
             for portfolio in portfolios:
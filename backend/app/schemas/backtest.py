@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from pydantic import Field, model_validator
+
+from app.schemas.common import ApiModel, DecimalStr
+from app.services.engine_calculator import (
+    DRIFT_THRESHOLD_PCT,
+    MAX_BUY_ORDERS,
+    MAX_SELL_ORDERS,
+    MIN_TRADE_SIZE_GBP,
+)
+
+
+class BacktestConfig(ApiModel):
+    """One engine parameter set to replay."""
+
+    drift_threshold_pct: DecimalStr = Field(DRIFT_THRESHOLD_PCT, ge=0)
+    min_trade_size_gbp: DecimalStr = Field(MIN_TRADE_SIZE_GBP, ge=0)
+    max_sells: int = Field(MAX_SELL_ORDERS, ge=0)
+    max_buys: int = Field(MAX_BUY_ORDERS, ge=0)
+    sleeve_sell_caps: dict[str, int] | None = None  # None: settings.engine_sleeve_sell_caps
+    sleeve_buy_caps: dict[str, int] | None = None
+
+
+class BacktestRequest(ApiModel):
+    """BACKTEST job arguments (stored on the job as ``params``)."""
+
+    start: date
+    end: date
+    # Starting ledger; defaults to the portfolio's current cash / holdings.
+    cash_gbp: DecimalStr | None = Field(None, ge=0)
+    holdings: dict[uuid.UUID, DecimalStr] | None = None
+    configs: list[BacktestConfig] = Field(
+        default_factory=lambda: [BacktestConfig()], min_length=1, max_length=50
+    )
+    include_series: bool = True
+
+    @model_validator(mode="after")
+    def _check_window(self) -> "BacktestRequest":
+        if self.end < self.start:
+            raise ValueError("end must not be before start")
+        if self.holdings and any(quantity < 0 for quantity in self.holdings.values()):
+            raise ValueError("holdings quantities cannot be negative")
+        return self
+
+
+class BacktestResultResponse(ApiModel):
+    job_id: str
+    run_id: str
+    status: str
+    summary: dict | None
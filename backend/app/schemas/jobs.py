@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from pydantic import ConfigDict
+
+from app.queue.redis_queue import DeadLetter
+from app.schemas.common import ApiModel
+
+
+class JobStatusResponse(ApiModel):
+    job_id: str
+    task_kind: str
+    portfolio_id: str
+    requested_by_user_id: str
+    enqueued_at: str
+    status: str
+    attempts: int
+    updated_at: str
+    error: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DeadLetterResponse(ApiModel):
+    job_id: str
+    task_kind: str
+    portfolio_id: str
+    requested_by_user_id: str
+    enqueued_at: str
+    attempts: int
+    error: str
+    failed_at: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @classmethod
+    def from_dead_letter(cls, entry: DeadLetter) -> "DeadLetterResponse":
+        return cls(
+            job_id=entry.job.job_id,
+            task_kind=entry.job.task_kind,
+            portfolio_id=entry.job.portfolio_id,
+            requested_by_user_id=entry.job.requested_by_user_id,
+            enqueued_at=entry.job.enqueued_at,
+            attempts=entry.job.attempts,
+            error=entry.error,
+            failed_at=entry.failed_at,
+        )
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import uuid
+from decimal import Decimal
+
+from pydantic import Field, model_validator
+
+from app.schemas.common import ApiModel, DecimalStr
+
+# Beyond this, shocked values overflow the calculator's Decimal quantization.
+MAX_PRICE_MULTIPLIER = Decimal("1000")
+
+
+class ScenarioSpec(ApiModel):
+    """One price shock: price multipliers by listing and/or sleeve code
+    (both apply when a position matches both)."""
+
+    name: str | None = Field(None, max_length=100)  # defaults to its index
+    listing_multipliers: dict[uuid.UUID, DecimalStr] = Field(default_factory=dict)
+    sleeve_multipliers: dict[str, DecimalStr] = Field(default_factory=dict)
+
+    @model_validator(mode="after")
+    def _check_multipliers(self) -> "ScenarioSpec":
+        multipliers = [*self.listing_multipliers.values(), *self.sleeve_multipliers.values()]
+        if any(not 0 <= multiplier <= MAX_PRICE_MULTIPLIER for multiplier in multipliers):
+            raise ValueError(f"price multipliers must be between 0 and {MAX_PRICE_MULTIPLIER}")
+        return self
+
+
+class ScenarioRequest(ApiModel):
+    scenarios: list[ScenarioSpec] = Field(min_length=1, max_length=1000)
@@ -4,12 +4,91 @@ Phase 2: Data Quality Gate
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert
 from app.domain.models import Alert
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Callable, Iterable, Optional
 import uuid
 
 
+@dataclass
+class AlertSpec:
+    """One alert to raise (e.g. built from a DQViolation)."""
+
+    listing_id: Optional[str]
+    severity: str  # INFO, WARN, CRITICAL
+    rule_code: str  # DQ_GBX_SCALE, DQ_STALE_CLOSE, etc.
+    title: str
+    message: Optional[str] = None
+    details: Optional[dict] = None
+
+
+def create_alerts(
+    db: Session,
+    portfolio_id: str,
+    specs: Iterable[AlertSpec],
+) -> list[Alert]:
+    """
+    Insert many alerts in one statement, skipping duplicates.
+
+    Deduplication is enforced by the partial unique index
+    ``uq_alerts_open_rule`` on (portfolio_id, listing_id, rule_code)
+    WHERE resolved_at IS NULL: ``INSERT ... ON CONFLICT DO NOTHING RETURNING``
+    yields only the rows actually inserted.  Repeated keys within *specs*
+    keep the first occurrence.
+
+    Does NOT commit; the caller owns the transaction.
+
+    Args:
+        db: SQLAlchemy session
+        portfolio_id: Portfolio UUID
+        specs: Alerts to raise (objects with AlertSpec's attributes, such as
+            DQViolation, are accepted)
+
+    Returns:
+        Newly created Alert objects, in the order of *specs*.
+        Keys that already had an unresolved alert are omitted.
+    """
+    rows: list[dict] = []
+    seen: set[tuple[Optional[str], str]] = set()
+    now = datetime.now(timezone.utc)
+    for spec in specs:
+        listing_id = str(spec.listing_id) if spec.listing_id is not None else None
+        key = (listing_id, spec.rule_code)
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append(
+            {
+                "alert_id": uuid.uuid4(),
+                "portfolio_id": portfolio_id,
+                "listing_id": listing_id,
+                "severity": spec.severity,
+                "rule_code": spec.rule_code,
+                "title": spec.title,
+                "message": spec.message,
+                "details": spec.details,
+                "created_at": now,
+                "resolved_at": None,
+            }
+        )
+    if not rows:
+        return []
+
+    stmt = (
+        insert(Alert)
+        .values(rows)
+        .on_conflict_do_nothing(
+            index_elements=["portfolio_id", "listing_id", "rule_code"],
+            index_where=Alert.resolved_at.is_(None),
+        )
+        .returning(Alert)
+    )
+    created = {alert.alert_id: alert for alert in db.scalars(stmt)}
+    return [created[row["alert_id"]] for row in rows if row["alert_id"] in created]
+
+
 def create_alert(
     db: Session,
     portfolio_id: str,
@@ -23,8 +102,9 @@ def create_alert(
     """
     Create an alert with deduplication.
     
-    Before creating, checks for unresolved alert with same (portfolio_id, listing_id, rule_code).
-    Returns Alert if created, None if duplicate (unresolved alert already exists).
+    Single-row form of create_alerts: no alert is created when an unresolved
+    alert with the same (portfolio_id, listing_id, rule_code) exists.
+    Commits on success.
     
     Args:
         db: SQLAlchemy session (externally provided, not FastAPI Depends)
@@ -39,39 +119,26 @@ def create_alert(
     Returns:
         Alert object if created, None if duplicate unresolved alert exists
     """
-    # Check for existing unresolved alert with same (portfolio_id, listing_id, rule_code)
-    existing_alert = db.query(Alert).filter(
-        and_(
-            Alert.portfolio_id == portfolio_id,
-            Alert.listing_id == listing_id,
-            Alert.rule_code == rule_code,
-            Alert.resolved_at.is_(None)  # Only unresolved alerts count as duplicates
-        )
-    ).first()
-    
-    if existing_alert:
+    created = create_alerts(
+        db,
+        portfolio_id,
+        [
+            AlertSpec(
+                listing_id=listing_id,
+                severity=severity,
+                rule_code=rule_code,
+                title=title,
+                message=message,
+                details=details,
+            )
+        ],
+    )
+    if not created:
         # Deduplication: alert already exists and is unresolved
         return None
-    
-    # Create new alert
-    alert = Alert(
-        alert_id=uuid.uuid4(),
-        portfolio_id=portfolio_id,
-        listing_id=listing_id,
-        severity=severity,
-        rule_code=rule_code,
-        title=title,
-        message=message,
-        details=details,
-        created_at=datetime.now(timezone.utc),
-        resolved_at=None
-    )
-    
-    db.add(alert)
+
     db.commit()
-    db.refresh(alert)
-    
-    return alert
+    return created[0]
 
 
 def resolve_alert(db: Session, alert_id: str) -> bool:
@@ -139,6 +206,66 @@ def resolve_alerts_by_rule(
     return count
 
 
+def resolve_cleared_alerts(
+    db: Session,
+    portfolio_id: str,
+    active: Iterable[AlertSpec],
+    rule_prefix: str = "DQ_",
+    evaluated: Optional[Callable[[Optional[str], str], bool]] = None,
+) -> list[uuid.UUID]:
+    """
+    Resolve open alerts whose violation is no longer present.
+
+    Diffs the portfolio's unresolved alerts (rule codes starting with
+    *rule_prefix*) against the (listing_id, rule_code) keys in *active* and
+    resolves the cleared ones with a single bulk UPDATE.  The open-alert read
+    is served by the uq_alerts_open_rule partial index.  Alerts whose key
+    *evaluated* rejects (e.g. data_quality.freshly_evaluated, when the fetch
+    for that listing failed) stay open.
+
+    Does NOT commit; the caller owns the transaction.
+
+    Args:
+        db: SQLAlchemy session
+        portfolio_id: Portfolio UUID
+        active: Violations from the current evaluation (AlertSpec-like)
+        rule_prefix: Only alerts raised by this rule family are auto-resolved
+        evaluated: (listing_id, rule_code) → whether the current evaluation
+            covered that key; None means every key was covered
+
+    Returns:
+        IDs of the alerts resolved
+    """
+    active_keys = {
+        (str(spec.listing_id) if spec.listing_id is not None else None, spec.rule_code)
+        for spec in active
+    }
+    open_alerts = db.query(Alert.alert_id, Alert.listing_id, Alert.rule_code).filter(
+        and_(
+            Alert.portfolio_id == portfolio_id,
+            Alert.resolved_at.is_(None),
+            Alert.rule_code.startswith(rule_prefix),
+        )
+    ).all()
+
+    cleared = []
+    for alert_id, listing_id, rule_code in open_alerts:
+        key = (str(listing_id) if listing_id is not None else None, rule_code)
+        if key not in active_keys and (evaluated is None or evaluated(*key)):
+            cleared.append(alert_id)
+    if cleared:
+        db.query(Alert).filter(
+            and_(
+                Alert.alert_id.in_(cleared),
+                Alert.resolved_at.is_(None),
+            )
+        ).update(
+            {Alert.resolved_at: datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+    return cleared
+
+
 def get_unresolved_alerts(db: Session, portfolio_id: str) -> list[Alert]:
     """
     Get all unresolved alerts for a portfolio.
@@ -0,0 +1,440 @@
+"""
+Historical Backtest
+
+Replays the engine over stored daily closes (``price_points``, is_close) for
+one portfolio's allocation policy, so DRIFT_THRESHOLD_PCT / MIN_TRADE_SIZE_GBP
+and the order caps can be tuned against history instead of the live API:
+
+  1. ``load_price_history`` reads the window's closes in one query and
+     ``build_price_history`` lays them out as columns: a trading-day axis
+     (every date with at least one close) and a day × listing matrix of the
+     close in force, as an index into flat price arrays (-1 before a
+     listing's first close), plus the matching "trusted" mask.
+  2. ``replay`` walks the day axis with an in-memory ledger (cash +
+     quantities).  Each day the held positions pick up the close in force,
+     generate_trade_plan runs on the resulting snapshot and the trades are
+     applied to the ledger at those closes (no costs or slippage).  One
+     BacktestDay is yielded per day, so callers stream valuations.
+
+Inputs follow the live engine (engine_inputs / price_lookup): positions are
+the listings of the starting holdings that carry a policy allocation,
+prices are normalized to GBP, and a held listing without a close, or whose
+close is more than PRICE_STALENESS_DAYS old (weekend / holiday days at its
+venue excluded), blocks that day's plan (the day is still valued on the
+last known closes).
+
+``run_backtest`` loads the inputs once and replays every parameter set over
+them; BACKTEST worker jobs and ``scripts/run_backtest.py`` both use it.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import true
+from sqlalchemy.orm import Session
+
+from app.domain.engine import AssetPosition, ProposedTrade, RunInputSnapshot
+from app.domain.models import (
+    CashSnapshot,
+    HoldingSnapshot,
+    InstrumentListing,
+    PortfolioPolicyAllocation,
+    PricePoint,
+)
+from app.services.engine_calculator import (
+    DRIFT_THRESHOLD_PCT,
+    MAX_BUY_ORDERS,
+    MAX_SELL_ORDERS,
+    MIN_TRADE_SIZE_GBP,
+    generate_trade_plan,
+)
+from app.services.engine_inputs import _normalize_price_to_gbp
+from app.services.price_lookup import PRICE_STALENESS_DAYS, get_listing_exchanges
+from app.services.trading_calendar import get_trading_calendar
+
+_HUNDRED = Decimal("100")
+_ZERO = Decimal("0")
+# Calendar days a close can stay in force: PRICE_STALENESS_DAYS trading days
+# plus a weekend-and-holiday run.
+_LOOKBACK_DAYS = PRICE_STALENESS_DAYS + 7
+
+
+@dataclass
+class PriceHistory:
+    """Daily closes of a set of listings in columnar form."""
+
+    listing_ids: list[uuid.UUID]
+    days: np.ndarray  # datetime64[D], ascending
+    close_index: np.ndarray  # int64 [day, listing] → prices index, -1 = no close yet
+    trusted: np.ndarray  # bool [day, listing]: close present and not stale
+    prices: list[Decimal]  # GBP, flat over all listings
+
+    def column(self) -> dict[uuid.UUID, int]:
+        return {listing_id: index for index, listing_id in enumerate(self.listing_ids)}
+
+
+@dataclass(frozen=True)
+class BacktestParams:
+    drift_threshold: Decimal = DRIFT_THRESHOLD_PCT
+    min_trade_size: Decimal = MIN_TRADE_SIZE_GBP
+    max_sells: int = MAX_SELL_ORDERS
+    max_buys: int = MAX_BUY_ORDERS
+    sleeve_sell_caps: Optional[Mapping[str, int]] = None
+    sleeve_buy_caps: Optional[Mapping[str, int]] = None
+
+
+@dataclass
+class StartState:
+    """Starting ledger and the policy the plans are generated against."""
+
+    portfolio_id: uuid.UUID
+    cash_gbp: Decimal
+    quantities: dict[uuid.UUID, Decimal]
+    allocations: list[PortfolioPolicyAllocation]
+    tickers: dict[uuid.UUID, str] = field(default_factory=dict)
+
+
+@dataclass
+class BacktestDay:
+    day: date
+    total_value_gbp: Decimal  # after the day's trades
+    cash_gbp: Decimal
+    trades: list[ProposedTrade]
+    blocked: bool
+
+
+@dataclass
+class BacktestSummary:
+    """Running totals over a stream of BacktestDays."""
+
+    params: BacktestParams
+    days: int = 0
+    blocked_days: int = 0
+    trades: int = 0
+    turnover_gbp: Decimal = _ZERO
+    start_value_gbp: Optional[Decimal] = None
+    end_value_gbp: Optional[Decimal] = None
+    peak_value_gbp: Decimal = _ZERO
+    max_drawdown_pct: Decimal = _ZERO
+    series: list[tuple[date, Decimal]] = field(default_factory=list)
+
+    def add(self, day: BacktestDay) -> None:
+        value = day.total_value_gbp
+        self.days += 1
+        self.blocked_days += day.blocked
+        self.trades += len(day.trades)
+        self.turnover_gbp += sum((t.estimated_value_gbp for t in day.trades), _ZERO)
+        if self.start_value_gbp is None:
+            self.start_value_gbp = value
+        self.end_value_gbp = value
+        if value > self.peak_value_gbp:
+            self.peak_value_gbp = value
+        elif self.peak_value_gbp > 0:
+            drawdown = (self.peak_value_gbp - value) / self.peak_value_gbp * _HUNDRED
+            if drawdown > self.max_drawdown_pct:
+                self.max_drawdown_pct = drawdown
+        self.series.append((day.day, value))
+
+    def to_json(self, include_series: bool = True) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "params": {
+                "drift_threshold_pct": format(self.params.drift_threshold, "f"),
+                "min_trade_size_gbp": format(self.params.min_trade_size, "f"),
+                "max_sells": self.params.max_sells,
+                "max_buys": self.params.max_buys,
+                "sleeve_sell_caps": dict(self.params.sleeve_sell_caps or {}),
+                "sleeve_buy_caps": dict(self.params.sleeve_buy_caps or {}),
+            },
+            "days": self.days,
+            "blocked_days": self.blocked_days,
+            "trades": self.trades,
+            "turnover_gbp": _str(self.turnover_gbp),
+            "start_value_gbp": _str(self.start_value_gbp),
+            "end_value_gbp": _str(self.end_value_gbp),
+            "max_drawdown_pct": _str(self.max_drawdown_pct.quantize(Decimal("0.0001"))),
+        }
+        if include_series:
+            payload["series"] = {
+                "days": [day.isoformat() for day, _ in self.series],
+                "total_value_gbp": [_str(value) for _, value in self.series],
+            }
+        return payload
+
+
+# ─── Price history ───────────────────────────────────────────────────────────
+
+
+def load_price_history(
+    db: Session,
+    listing_ids: Sequence[uuid.UUID],
+    start: date,
+    end: date,
+) -> PriceHistory:
+    """Every close of *listing_ids* from far enough before *start* that the
+    first day has its closes in force, through *end*, in one query."""
+    rows = []
+    if listing_ids:
+        rows = (
+            db.query(PricePoint.listing_id, PricePoint.as_of, PricePoint.price, PricePoint.currency)
+            .filter(
+                PricePoint.listing_id.in_(list(listing_ids)),
+                PricePoint.is_close == true(),
+                PricePoint.as_of >= _midnight(start - timedelta(days=_LOOKBACK_DAYS)),
+                PricePoint.as_of < _midnight(end + timedelta(days=1)),
+            )
+            .order_by(PricePoint.listing_id, PricePoint.as_of)
+            .all()
+        )
+    exchanges = get_listing_exchanges(db, listing_ids)
+    return build_price_history(rows, start, end, listing_ids, exchanges)
+
+
+def build_price_history(
+    rows: Iterable[tuple[uuid.UUID, datetime, Decimal, Optional[str]]],
+    start: date,
+    end: date,
+    listing_ids: Sequence[uuid.UUID] = (),
+    exchange_by_listing: Optional[Mapping[uuid.UUID, str]] = None,
+) -> PriceHistory:
+    """Columnar history from ``(listing_id, as_of, price, currency)`` closes
+    ordered by listing and as_of.  A listing's later close on the same (UTC)
+    day replaces the earlier one.
+
+    A close's age counts the trading days of its listing's venue
+    (*exchange_by_listing*) after its date; listings without a known venue
+    age in calendar days."""
+    by_listing: dict[uuid.UUID, dict[date, Decimal]] = {lid: {} for lid in listing_ids}
+    for listing_id, as_of, price, currency in rows:
+        by_listing.setdefault(listing_id, {})[_as_utc(as_of).date()] = _normalize_price_to_gbp(
+            price, currency
+        )
+
+    prices: list[Decimal] = []
+    offsets: list[int] = []
+    listing_days: list[np.ndarray] = []
+    for closes in by_listing.values():
+        offsets.append(len(prices))
+        listing_days.append(np.array(list(closes), dtype="datetime64[D]"))
+        prices.extend(closes.values())
+
+    close_day = (
+        np.concatenate(listing_days) if listing_days else np.array([], dtype="datetime64[D]")
+    )
+    days = np.unique(close_day)
+    days = days[(days >= np.datetime64(start, "D")) & (days <= np.datetime64(end, "D"))]
+
+    close_index = np.full((len(days), len(by_listing)), -1, dtype=np.int64)
+    for column, (offset, closes_on) in enumerate(zip(offsets, listing_days)):
+        last = np.searchsorted(closes_on, days, side="right") - 1
+        close_index[:, column] = np.where(last >= 0, last + offset, -1)
+
+    present = close_index >= 0
+    if close_day.size:
+        closed_on = close_day[np.where(present, close_index, 0)]
+        age_days = (days[:, None] - closed_on).astype(np.int64)
+        calendar = get_trading_calendar()
+        for column, listing_id in enumerate(by_listing):
+            exchange = (exchange_by_listing or {}).get(listing_id)
+            if exchange is None or not calendar.knows(exchange) or not days.size:
+                continue
+            holidays = calendar.holidays_between(
+                exchange, start - timedelta(days=_LOOKBACK_DAYS), end
+            )
+            # Trading days in (close date, day].
+            age_days[:, column] = np.busday_count(
+                closed_on[:, column] + 1, days + 1, holidays=holidays
+            )
+    else:
+        age_days = np.zeros(close_index.shape, dtype=np.int64)
+    trusted = present & (age_days <= PRICE_STALENESS_DAYS)
+
+    return PriceHistory(
+        listing_ids=list(by_listing),
+        days=days,
+        close_index=close_index,
+        trusted=trusted,
+        prices=prices,
+    )
+
+
+# ─── Replay ──────────────────────────────────────────────────────────────────
+
+
+def replay(history: PriceHistory, start: StartState, params: BacktestParams) -> Iterator[BacktestDay]:
+    """Step through *history* one day at a time from *start*."""
+    cash = start.cash_gbp
+    quantities = dict(start.quantities)
+    held = list(quantities)
+    allocation_by_listing = {a.listing_id: a for a in start.allocations}
+    column = history.column()
+    columns = np.array([column.get(lid, -1) for lid in held], dtype=np.int64)
+    always_blocked = bool((columns < 0).any())  # a held listing with no history at all
+    columns = np.where(columns < 0, 0, columns)
+
+    # Per held listing: close in force and its flat index (refreshed only
+    # when the index moves).
+    price: list[Optional[Decimal]] = [None] * len(held)
+    price_index = [-1] * len(held)
+    plan_args = (
+        params.drift_threshold,
+        params.min_trade_size,
+        params.max_sells,
+        params.max_buys,
+        params.sleeve_sell_caps,
+        params.sleeve_buy_caps,
+    )
+
+    for day_index, day in enumerate(history.days.tolist()):
+        if held:
+            row = history.close_index[day_index, columns].tolist()
+            blocked = always_blocked or not bool(history.trusted[day_index, columns].all())
+        else:
+            row, blocked = [], False
+        for k, index in enumerate(row):
+            if index != price_index[k] and index >= 0:
+                price_index[k] = index
+                price[k] = history.prices[index]
+
+        trades: list[ProposedTrade] = []
+        if not blocked:
+            snapshot = _snapshot(start, held, quantities, price, cash, allocation_by_listing)
+            plan = generate_trade_plan(snapshot, *plan_args)
+            trades = plan.trades
+            for trade in trades:
+                if trade.action == "SELL":
+                    quantities[trade.listing_id] -= trade.quantity
+                    cash += trade.estimated_value_gbp
+                else:
+                    quantities[trade.listing_id] += trade.quantity
+                    cash -= trade.estimated_value_gbp
+
+        total_value = cash + sum(
+            (quantities[lid] * p for lid, p in zip(held, price) if p is not None), _ZERO
+        )
+        yield BacktestDay(
+            day=day, total_value_gbp=total_value, cash_gbp=cash, trades=trades, blocked=blocked
+        )
+
+
+def _snapshot(
+    start: StartState,
+    held: list[uuid.UUID],
+    quantities: dict[uuid.UUID, Decimal],
+    price: list[Optional[Decimal]],
+    cash: Decimal,
+    allocation_by_listing: dict[uuid.UUID, PortfolioPolicyAllocation],
+) -> RunInputSnapshot:
+    """The RunInputSnapshot EngineInputs.run_input would build for the ledger."""
+    values = []
+    total_value = cash
+    for listing_id, listing_price in zip(held, price):
+        quantity = quantities[listing_id]
+        value = quantity * listing_price
+        total_value += value
+        values.append((listing_id, quantity, listing_price, value))
+
+    positions = []
+    for listing_id, quantity, listing_price, value in values:
+        allocation = allocation_by_listing.get(listing_id)
+        if allocation is None:
+            continue
+        target_weight_pct = allocation.target_weight_pct
+        if target_weight_pct is None:
+            target_weight_pct = _ZERO
+        if total_value > 0:
+            current_weight_pct = (value / total_value) * _HUNDRED
+        else:
+            current_weight_pct = _ZERO
+        positions.append(
+            AssetPosition(
+                listing_id=listing_id,
+                ticker=start.tickers.get(listing_id) or allocation.ticker,
+                current_quantity=quantity,
+                current_price_gbp=listing_price,
+                current_value_gbp=value,
+                target_weight_pct=target_weight_pct,
+                current_weight_pct=current_weight_pct,
+                drift_pct=current_weight_pct - target_weight_pct,
+                sleeve_code=allocation.sleeve_code,
+            )
+        )
+    return RunInputSnapshot(portfolio_id=start.portfolio_id, cash_balance_gbp=cash, positions=positions)
+
+
+# ─── Runs ────────────────────────────────────────────────────────────────────
+
+
+def load_start_state(
+    db: Session,
+    portfolio_id: uuid.UUID,
+    *,
+    cash_gbp: Optional[Decimal] = None,
+    quantities: Optional[Mapping[uuid.UUID, Decimal]] = None,
+) -> StartState:
+    """The portfolio's allocation policy, starting from its current cash and
+    holdings unless *cash_gbp* / *quantities* are given."""
+    allocations = (
+        db.query(PortfolioPolicyAllocation)
+        .filter(PortfolioPolicyAllocation.portfolio_id == portfolio_id)
+        .all()
+    )
+    if cash_gbp is None:
+        cash_gbp = (
+            db.query(CashSnapshot.balance_gbp)
+            .filter(CashSnapshot.portfolio_id == portfolio_id)
+            .scalar()
+        ) or _ZERO
+    if quantities is None:
+        quantities = dict(
+            db.query(HoldingSnapshot.listing_id, HoldingSnapshot.quantity)
+            .filter(HoldingSnapshot.portfolio_id == portfolio_id)
+            .all()
+        )
+    tickers = {}
+    if quantities:
+        tickers = dict(
+            db.query(InstrumentListing.listing_id, InstrumentListing.ticker)
+            .filter(InstrumentListing.listing_id.in_(list(quantities)))
+            .all()
+        )
+    return StartState(
+        portfolio_id=portfolio_id,
+        cash_gbp=cash_gbp,
+        quantities=dict(quantities),
+        allocations=allocations,
+        tickers=tickers,
+    )
+
+
+def run_backtest(
+    history: PriceHistory,
+    start: StartState,
+    params_list: Sequence[BacktestParams],
+) -> list[BacktestSummary]:
+    """Replay every parameter set over the same history and start state."""
+    summaries = []
+    for params in params_list:
+        summary = BacktestSummary(params=params)
+        for day in replay(history, start, params):
+            summary.add(day)
+        summaries.append(summary)
+    return summaries
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _str(value: Optional[Decimal]) -> Optional[str]:
+    return format(value, "f") if value is not None else None
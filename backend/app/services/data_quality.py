@@ -18,22 +18,26 @@ Eight rules are enforced:
 """
 from __future__ import annotations
 
-import zoneinfo
+import uuid
 from dataclasses import dataclass, field
-from datetime import datetime, timezone, timedelta, time
+from datetime import datetime, timezone, timedelta
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-from typing import Optional
+from typing import Callable, Iterable, Optional
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.domain.models import (
     InstrumentListing,
+    LatestPrice,
     Portfolio,
     PortfolioConstituent,
     PricePoint,
 )
 from app.services.market_data_adapter import FxQuote, PriceQuote
+from app.services.price_lookup import ListingLatestPrices, get_latest_prices
+from app.services.trading_calendar import get_trading_calendar
 
 
 # ─── DQ Violation ─────────────────────────────────────────────────────────────
@@ -57,41 +61,33 @@ class DQViolation:
 
 # ─── Venue / Market-Close Helpers ─────────────────────────────────────────────
 
-# Exchange codes (as stored in InstrumentListing.exchange) mapped to
-# (timezone_name, close_time_HH:MM) tuples sourced from settings.
-_VENUE_MAP: dict[str, tuple[str, str]] = {
-    # London Stock Exchange
-    "LSE":    (settings.venue_lse_tz,  settings.venue_lse_close_time),
-    "XLON":   (settings.venue_lse_tz,  settings.venue_lse_close_time),
-    "LON":    (settings.venue_lse_tz,  settings.venue_lse_close_time),
-    # New York Stock Exchange
-    "NYSE":   (settings.venue_nyse_tz, settings.venue_nyse_close_time),
-    "XNYS":   (settings.venue_nyse_tz, settings.venue_nyse_close_time),
-    # NASDAQ
-    "NASDAQ": (settings.venue_nyse_tz, settings.venue_nyse_close_time),
-    "XNAS":   (settings.venue_nyse_tz, settings.venue_nyse_close_time),
-}
-
-
 def _is_market_closed(exchange: str, as_of: datetime) -> bool:
-    """Return True when the venue was closed at *as_of* (UTC-aware).
+    """Return True when the venue's session for the day has closed at *as_of*.
 
-    Falls back to True (conservative: market closed) when the venue is not
-    recognised, so DQ_MISSING_CLOSE always fires for unknown venues.
+    False before the open, during the session and on weekends / exchange
+    holidays (no close is expected then).  Falls back to True (conservative:
+    market closed) when the venue is not recognised, so DQ_MISSING_CLOSE
+    always fires for unknown venues.
     """
-    config = _VENUE_MAP.get(exchange.upper())
-    if config is None:
+    calendar = get_trading_calendar()
+    if not calendar.knows(exchange):
         return True  # unknown venue → conservative
+    return calendar.closed_for_day(exchange, as_of)
 
-    tz_name, close_str = config
-    try:
-        venue_tz = zoneinfo.ZoneInfo(tz_name)
-    except (zoneinfo.ZoneInfoNotFoundError, KeyError):
-        return True
 
-    venue_now = as_of.astimezone(venue_tz)
-    h, m = (int(x) for x in close_str.split(":"))
-    return venue_now.time() >= time(h, m)
+def _non_trading_days(exchange: str, since: datetime, as_of: datetime) -> int:
+    """Weekend / holiday days at the venue after *since*'s date up to *as_of*'s.
+
+    Zero for venues the trading calendar does not know.
+    """
+    calendar = get_trading_calendar()
+    if not calendar.knows(exchange):
+        return 0
+    return calendar.non_trading_days_between(
+        exchange,
+        calendar.local_date(exchange, _as_utc(since)),
+        calendar.local_date(exchange, _as_utc(as_of)),
+    )
 
 
 def _as_utc(dt: datetime) -> datetime:
@@ -152,7 +148,8 @@ def check_staleness_close(
 ) -> Optional[DQViolation]:
     """DQ_STALE_CLOSE: latest close price older than threshold.
 
-    Severity escalates to CRITICAL when age exceeds 2× the configured
+    Weekends and exchange holidays since the close do not count towards its
+    age.  Severity escalates to CRITICAL when age exceeds 2× the configured
     threshold (e.g., > 6 days when threshold is 3 days).
     """
     if latest_close is None:
@@ -162,6 +159,11 @@ def check_staleness_close(
     age: timedelta = _as_utc(as_of) - _as_utc(latest_close.as_of)
     age_days = age.total_seconds() / 86_400
 
+    if age_days <= threshold_days:
+        return None
+
+    non_trading_days = _non_trading_days(listing.exchange, latest_close.as_of, as_of)
+    age_days -= non_trading_days
     if age_days <= threshold_days:
         return None
 
@@ -174,7 +176,9 @@ def check_staleness_close(
         title=f"Stale Close Price: {listing.ticker}",
         message=(
             f"Latest close price is {age_days:.1f} days old "
-            f"(threshold: {threshold_days} days)."
+            f"(threshold: {threshold_days} days"
+            + (f", {non_trading_days} non-trading days excluded" if non_trading_days else "")
+            + ")."
         ),
         details={
             "listing_id": str(listing.listing_id),
@@ -182,6 +186,7 @@ def check_staleness_close(
             "latest_close_as_of": _as_utc(latest_close.as_of).isoformat(),
             "as_of": _as_utc(as_of).isoformat(),
             "age_days": round(age_days, 2),
+            "non_trading_days": non_trading_days,
             "threshold_days": threshold_days,
         },
     )
@@ -510,9 +515,197 @@ def check_fx_stale(
     )
 
 
+# ─── Per-Listing Views ────────────────────────────────────────────────────────
+
+# Close-price history rows loaded per listing for the DB-vs-DB jump fallback.
+DQ_HISTORY_ROWS = 10
+
+
+@dataclass
+class ListingDQView:
+    """Everything the rules need for one listing, assembled in bulk.
+
+    ``recent_closes`` (newest first) is only loaded for listings without an
+    incoming close quote — the DB-vs-DB jump fallback is its only consumer.
+    """
+
+    listing: InstrumentListing
+    latest_intraday: Optional[LatestPrice] = None
+    latest_close: Optional[LatestPrice] = None
+    quotes: list[PriceQuote] = field(default_factory=list)
+    recent_closes: list[PricePoint] = field(default_factory=list)
+
+    @property
+    def close_quotes(self) -> list[PriceQuote]:
+        return [q for q in self.quotes if q.is_close]
+
+    @property
+    def latest_quote(self) -> Optional[PriceQuote]:
+        """The most recent incoming quote (any type) for GBX/CCY checks."""
+        return max(self.quotes, key=lambda q: q.as_of) if self.quotes else None
+
+    @property
+    def previous_close(self) -> Optional[PricePoint]:
+        """The close immediately preceding ``latest_close`` in history."""
+        if self.latest_close is None:
+            return None
+        latest_as_of = _as_utc(self.latest_close.as_of)
+        for row in self.recent_closes:
+            if _as_utc(row.as_of) < latest_as_of:
+                return row
+        return None
+
+
+def load_listing_views(
+    db: Session,
+    portfolio_id: str,
+    price_quotes: list[PriceQuote],
+) -> list[ListingDQView]:
+    """Build a ListingDQView per monitored constituent in a fixed number of queries.
+
+    Constituents + listings (one join), latest prices (one query) and close
+    history (one windowed query) are loaded for all listings at once, so the
+    cost does not grow with the number of listings.
+    """
+    rows = (
+        db.query(InstrumentListing)
+        .join(
+            PortfolioConstituent,
+            PortfolioConstituent.listing_id == InstrumentListing.listing_id,
+        )
+        .filter(
+            PortfolioConstituent.portfolio_id == portfolio_id,
+            PortfolioConstituent.is_monitored == True,  # noqa: E712
+        )
+        .all()
+    )
+    if not rows:
+        return []
+
+    return _build_views(db, rows, price_quotes)
+
+
+def load_fleet_views(
+    db: Session,
+    price_quotes: list[PriceQuote],
+    portfolio_ids: Optional[list[str]] = None,
+) -> dict[str, tuple[str, list[ListingDQView]]]:
+    """Views for every monitored constituent of many portfolios at once.
+
+    Returns:
+        portfolio_id → (base_currency, views).  Latest prices and close
+        history are loaded once per distinct listing.
+    """
+    query = (
+        db.query(PortfolioConstituent.portfolio_id, Portfolio.base_currency, InstrumentListing)
+        .join(Portfolio, Portfolio.portfolio_id == PortfolioConstituent.portfolio_id)
+        .join(
+            InstrumentListing,
+            PortfolioConstituent.listing_id == InstrumentListing.listing_id,
+        )
+        .filter(PortfolioConstituent.is_monitored == True)  # noqa: E712
+    )
+    if portfolio_ids is not None:
+        query = query.filter(PortfolioConstituent.portfolio_id.in_(portfolio_ids))
+    rows = query.all()
+
+    views = _build_views(db, [listing for _, _, listing in rows], price_quotes)
+    fleet: dict[str, tuple[str, list[ListingDQView]]] = {}
+    for (portfolio_id, base_currency, _), view in zip(rows, views):
+        fleet.setdefault(str(portfolio_id), (base_currency, []))[1].append(view)
+    return fleet
+
+
+def _build_views(
+    db: Session,
+    listings: list[InstrumentListing],
+    price_quotes: list[PriceQuote],
+) -> list[ListingDQView]:
+    """One view per entry of ``listings`` (duplicates allowed), loaded in bulk."""
+    if not listings:
+        return []
+
+    quotes_by_listing: dict[str, list[PriceQuote]] = {}
+    for q in price_quotes:
+        quotes_by_listing.setdefault(q.listing_id, []).append(q)
+
+    latest_by_listing = get_latest_prices(db, [lst.listing_id for lst in listings])
+
+    views: list[ListingDQView] = []
+    for listing in listings:
+        latest = latest_by_listing.get(listing.listing_id) or ListingLatestPrices()
+        views.append(ListingDQView(
+            listing=listing,
+            latest_intraday=latest.intraday,
+            latest_close=latest.close,
+            quotes=quotes_by_listing.get(str(listing.listing_id), []),
+        ))
+
+    needs_history = [
+        view for view in views
+        if view.latest_close is not None and not view.close_quotes
+    ]
+    if needs_history:
+        history = _recent_closes(
+            db,
+            list({view.listing.listing_id for view in needs_history}),
+            DQ_HISTORY_ROWS,
+        )
+        for view in needs_history:
+            view.recent_closes = history.get(view.listing.listing_id, [])
+
+    return views
+
+
 # ─── Main Evaluator ───────────────────────────────────────────────────────────
 
 
+FX_RULE_CODES = frozenset({"DQ_FX_MISSING", "DQ_FX_STALE"})
+
+
+def freshly_evaluated(
+    listings: Iterable[InstrumentListing],
+    price_quotes: list[PriceQuote],
+    fx_quotes: list[FxQuote],
+    base_currency: str,
+) -> Callable[[Optional[str], str], bool]:
+    """Predicate over an alert's ``(listing_id, rule_code)``: did this pass
+    evaluate it on freshly fetched data?
+
+    FX rules need the listing's FX pair in *fx_quotes* (or no pair at all, for
+    listings in the base currency); every other rule needs a quote for the
+    listing in *price_quotes*.  A violation that is absent because its fetch
+    failed has not cleared, so callers keep those alerts open.  Alerts without
+    a listing, or for listings no longer monitored, count as evaluated.
+    """
+    base_ccy = base_currency.upper().strip()
+    quoted = {str(quote.listing_id) for quote in price_quotes}
+    fx_pairs = {frozenset((q.base_ccy.upper(), q.quote_ccy.upper())) for q in fx_quotes}
+    fx_ccy_by_listing = {}
+    for listing in listings:
+        ccy = listing.trading_currency.upper().strip()
+        fx_ccy_by_listing[str(listing.listing_id)] = "GBP" if ccy == "GBX" else ccy
+
+    def evaluated(listing_id: Optional[str], rule_code: str) -> bool:
+        if listing_id is None or listing_id not in fx_ccy_by_listing:
+            return True
+        if rule_code in FX_RULE_CODES:
+            ccy = fx_ccy_by_listing[listing_id]
+            return ccy == base_ccy or frozenset((ccy, base_ccy)) in fx_pairs
+        return listing_id in quoted
+
+    return evaluated
+
+
+def critical_listing_ids(violations: Iterable[DQViolation]) -> set[str]:
+    """Listings with a CRITICAL violation: their quotes did not pass the gate."""
+    return {
+        str(v.listing_id)
+        for v in violations
+        if v.severity == "CRITICAL" and v.listing_id is not None
+    }
+
+
 def evaluate_dq(
     db: Session,
     portfolio_id: str,
@@ -523,7 +716,7 @@ def evaluate_dq(
     """Evaluate all 8 DQ rules for a portfolio's monitored constituents.
 
     Pure function — does NOT write to the database.  The caller persists
-    violations as Alert rows via the alerts service (alerts.create_alert).
+    violations as Alert rows via the alerts service (alerts.create_alerts).
 
     Args:
         db:            SQLAlchemy session (used read-only within this function).
@@ -546,128 +739,125 @@ def evaluate_dq(
 
     base_currency: str = portfolio.base_currency
 
-    # ── Load monitored constituents ───────────────────────────────────────────
-    constituents: list[PortfolioConstituent] = (
-        db.query(PortfolioConstituent)
-        .filter(
-            PortfolioConstituent.portfolio_id == portfolio_id,
-            PortfolioConstituent.is_monitored == True,  # noqa: E712
-        )
-        .all()
-    )
-    if not constituents:
-        return violations
+    # ── Per-listing views (constant number of queries) ────────────────────────
+    for view in load_listing_views(db, portfolio_id, price_quotes):
+        violations.extend(evaluate_listing(view, base_currency, fx_quotes, as_of))
 
-    listing_ids = [str(c.listing_id) for c in constituents]
-
-    # Load listings keyed by listing_id string
-    listings: dict[str, InstrumentListing] = {
-        str(lst.listing_id): lst
-        for lst in db.query(InstrumentListing).filter(
-            InstrumentListing.listing_id.in_(listing_ids)
-        )
-    }
-
-    # ── Index incoming price quotes by listing_id ─────────────────────────────
-    quotes_by_listing: dict[str, list[PriceQuote]] = {}
-    for q in price_quotes:
-        quotes_by_listing.setdefault(q.listing_id, []).append(q)
-
-    # ── Per-listing evaluation ────────────────────────────────────────────────
-    for listing_id_str in listing_ids:
-        listing = listings.get(listing_id_str)
-        if listing is None:
-            continue
-
-        # Fetch the 10 most recent PricePoint rows from DB for this listing.
-        # We need: latest intraday, latest close (current + one previous) for
-        # the staleness / jump checks.
-        price_rows: list[PricePoint] = (
-            db.query(PricePoint)
-            .filter(PricePoint.listing_id == listing.listing_id)
-            .order_by(PricePoint.as_of.desc())
-            .limit(10)
-            .all()
-        )
-
-        latest_intraday: Optional[PricePoint] = next(
-            (p for p in price_rows if not p.is_close), None
-        )
-        close_rows = [p for p in price_rows if p.is_close]
-        latest_close: Optional[PricePoint] = close_rows[0] if close_rows else None
-        prev_close: Optional[PricePoint] = close_rows[1] if len(close_rows) > 1 else None
-
-        # Incoming quotes for this listing
-        quotes: list[PriceQuote] = quotes_by_listing.get(listing_id_str, [])
-        close_quotes = [q for q in quotes if q.is_close]
-
-        # The most recent incoming quote (any type) for GBX/CCY checks
-        latest_quote: Optional[PriceQuote] = (
-            max(quotes, key=lambda q: q.as_of) if quotes else None
-        )
-
-        # Previous close as Decimal for GBX scale comparison baseline
-        prev_close_decimal: Optional[Decimal] = (
-            Decimal(str(latest_close.price)) if latest_close else None
-        )
+    return violations
 
-        # ── Rule 1: DQ_STALE_INTRADAY ────────────────────────────────────────
-        v = check_staleness_intraday(listing, latest_intraday, as_of)
-        if v:
-            violations.append(v)
 
-        # ── Rule 2: DQ_STALE_CLOSE ───────────────────────────────────────────
-        v = check_staleness_close(listing, latest_close, as_of)
-        if v:
-            violations.append(v)
+def evaluate_listing(
+    view: ListingDQView,
+    base_currency: str,
+    fx_quotes: list[FxQuote],
+    as_of: datetime,
+) -> list[DQViolation]:
+    """Run the eight rules against one listing's in-memory view."""
+    violations: list[DQViolation] = []
+    listing = view.listing
+    latest_close = view.latest_close
+    close_quotes = view.close_quotes
+    latest_quote = view.latest_quote
+
+    # Previous close as Decimal for GBX scale comparison baseline
+    prev_close_decimal: Optional[Decimal] = (
+        Decimal(str(latest_close.price)) if latest_close else None
+    )
 
-        # ── Rule 3: DQ_MISSING_CLOSE ─────────────────────────────────────────
-        v = check_missing_close(listing, latest_close, as_of)
+    # ── Rule 1: DQ_STALE_INTRADAY ────────────────────────────────────────────
+    v = check_staleness_intraday(listing, view.latest_intraday, as_of)
+    if v:
+        violations.append(v)
+
+    # ── Rule 2: DQ_STALE_CLOSE ───────────────────────────────────────────────
+    v = check_staleness_close(listing, latest_close, as_of)
+    if v:
+        violations.append(v)
+
+    # ── Rule 3: DQ_MISSING_CLOSE ─────────────────────────────────────────────
+    v = check_missing_close(listing, latest_close, as_of)
+    if v:
+        violations.append(v)
+
+    # ── Rule 4: DQ_JUMP_CLOSE ────────────────────────────────────────────────
+    # Compare an incoming close quote against the DB latest_close (as
+    # "previous"), OR fall back to comparing DB latest vs DB prev.
+    if close_quotes and latest_close:
+        incoming = max(close_quotes, key=lambda q: q.as_of)
+        fake_close = _price_point_from_quote(incoming)
+        v = check_price_jump(listing, fake_close, latest_close)
         if v:
             violations.append(v)
-
-        # ── Rule 4: DQ_JUMP_CLOSE ────────────────────────────────────────────
-        # Compare an incoming close quote against the DB latest_close (as
-        # "previous"), OR fall back to comparing DB latest vs DB prev.
-        if close_quotes and latest_close:
-            incoming = max(close_quotes, key=lambda q: q.as_of)
-            fake_close = _price_point_from_quote(incoming)
-            v = check_price_jump(listing, fake_close, latest_close)
-            if v:
-                violations.append(v)
-        elif latest_close and prev_close:
+    elif latest_close:
+        prev_close = view.previous_close
+        if prev_close is not None:
             v = check_price_jump(listing, latest_close, prev_close)
             if v:
                 violations.append(v)
 
-        # ── Rule 5: DQ_GBX_SCALE ─────────────────────────────────────────────
-        if latest_quote is not None:
-            v = check_gbx_scale(listing, latest_quote, prev_close_decimal)
-            if v:
-                violations.append(v)
-
-        # ── Rule 6: DQ_CCY_MISMATCH ──────────────────────────────────────────
-        if latest_quote is not None:
-            v = check_currency_mismatch(listing, latest_quote)
-            if v:
-                violations.append(v)
-
-        # ── Rule 7: DQ_FX_MISSING ────────────────────────────────────────────
-        v = check_fx_missing(listing, base_currency, fx_quotes)
+    # ── Rule 5: DQ_GBX_SCALE ─────────────────────────────────────────────────
+    if latest_quote is not None:
+        v = check_gbx_scale(listing, latest_quote, prev_close_decimal)
         if v:
             violations.append(v)
 
-        # ── Rule 8: DQ_FX_STALE ──────────────────────────────────────────────
-        v = check_fx_stale(listing, base_currency, fx_quotes, as_of)
+    # ── Rule 6: DQ_CCY_MISMATCH ──────────────────────────────────────────────
+    if latest_quote is not None:
+        v = check_currency_mismatch(listing, latest_quote)
         if v:
             violations.append(v)
 
+    # ── Rule 7: DQ_FX_MISSING ────────────────────────────────────────────────
+    v = check_fx_missing(listing, base_currency, fx_quotes)
+    if v:
+        violations.append(v)
+
+    # ── Rule 8: DQ_FX_STALE ──────────────────────────────────────────────────
+    v = check_fx_stale(listing, base_currency, fx_quotes, as_of)
+    if v:
+        violations.append(v)
+
     return violations
 
 
 # ─── Internal Helpers ─────────────────────────────────────────────────────────
 
 
+def _recent_closes(
+    db: Session,
+    listing_ids: list[uuid.UUID],
+    limit: int,
+) -> dict[uuid.UUID, list[PricePoint]]:
+    """Last ``limit`` close rows per listing (newest first) in one windowed query."""
+    ranked = (
+        db.query(
+            PricePoint.price_point_id.label("price_point_id"),
+            func.row_number()
+            .over(
+                partition_by=PricePoint.listing_id,
+                order_by=PricePoint.as_of.desc(),
+            )
+            .label("rn"),
+        )
+        .filter(
+            PricePoint.listing_id.in_(listing_ids),
+            PricePoint.is_close == True,  # noqa: E712
+        )
+        .subquery()
+    )
+    rows = (
+        db.query(PricePoint)
+        .join(ranked, ranked.c.price_point_id == PricePoint.price_point_id)
+        .filter(ranked.c.rn <= limit)
+        .order_by(PricePoint.listing_id, PricePoint.as_of.desc())
+        .all()
+    )
+    by_listing: dict[uuid.UUID, list[PricePoint]] = {}
+    for row in rows:
+        by_listing.setdefault(row.listing_id, []).append(row)
+    return by_listing
+
+
 def _price_point_from_quote(quote: PriceQuote) -> PricePoint:
     """Build an in-memory (transient) PricePoint from a PriceQuote.
 
@@ -0,0 +1,298 @@
+"""
+Columnar DQ Evaluation
+
+Evaluates the eight DQ rules for thousands of listings at once.  Each
+listing view is flattened into NumPy columns (ages, latest / previous
+close, incoming price, currency codes, FX pair state) and every rule
+becomes a vectorized mask over those columns.
+
+Masks are deliberately a hair wider than the rule thresholds (float vs
+Decimal arithmetic); each hit is then confirmed and rendered by the
+scalar rule function from ``data_quality``.  The output is therefore the
+exact same DQViolation records, in the same order, as calling
+``evaluate_listing`` per view — while the per-listing Python work is
+limited to reading a few attributes.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional, Sequence
+
+import numpy as np
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.data_quality import (
+    DQViolation,
+    ListingDQView,
+    load_fleet_views,
+    _is_market_closed,
+    _price_point_from_quote,
+    check_currency_mismatch,
+    check_fx_missing,
+    check_fx_stale,
+    check_gbx_scale,
+    check_missing_close,
+    check_price_jump,
+    check_staleness_close,
+    check_staleness_intraday,
+)
+from app.services.market_data_adapter import FxQuote, PriceQuote
+
+# Relative slack applied to float thresholds before the exact scalar check.
+_EPS = 1e-9
+_GBX_FAMILY = {"GBX", "GBP"}
+
+# Rule order within a listing, matching evaluate_listing.
+(
+    _STALE_INTRADAY,
+    _STALE_CLOSE,
+    _MISSING_CLOSE,
+    _JUMP_CLOSE,
+    _GBX_SCALE,
+    _CCY_MISMATCH,
+    _FX_MISSING,
+    _FX_STALE,
+) = range(8)
+
+
+def _ts(dt: datetime) -> float:
+    """POSIX timestamp; naive datetimes are UTC (as in _as_utc)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _fx_state(
+    listing_ccy: str,
+    base_ccy: str,
+    fx_quotes: list[FxQuote],
+    as_of_ts: float,
+) -> tuple[bool, bool, float]:
+    """(needs_fx, pair_missing, age_days) for one normalised currency pair."""
+    listing_ccy = "GBP" if listing_ccy == "GBX" else listing_ccy
+    if listing_ccy == base_ccy:
+        return False, False, np.nan
+    matching = [
+        q
+        for q in fx_quotes
+        if (q.base_ccy.upper() == listing_ccy and q.quote_ccy.upper() == base_ccy)
+        or (q.base_ccy.upper() == base_ccy and q.quote_ccy.upper() == listing_ccy)
+    ]
+    if not matching:
+        return True, True, np.nan
+    latest = max(matching, key=lambda q: q.as_of)
+    return True, False, (as_of_ts - _ts(latest.as_of)) / 86_400
+
+
+def evaluate_dq_fleet(
+    db: Session,
+    price_quotes: list[PriceQuote],
+    fx_quotes: list[FxQuote],
+    as_of: datetime,
+    portfolio_ids: Optional[list[str]] = None,
+    fx_quotes_by_portfolio: Optional[dict[str, list[FxQuote]]] = None,
+) -> dict[str, list[DQViolation]]:
+    """Columnar counterpart of ``evaluate_dq`` for many portfolios at once.
+
+    ``fx_quotes_by_portfolio`` overrides ``fx_quotes`` for the portfolios it
+    lists, mirroring what each portfolio's scalar evaluate_dq call would see.
+
+    Returns:
+        portfolio_id → violations, identical to ``evaluate_dq`` per portfolio.
+    """
+    fleet = load_fleet_views(db, price_quotes, portfolio_ids)
+    fx_by_portfolio = fx_quotes_by_portfolio or {}
+    entries = [
+        (view, base_currency, fx_by_portfolio.get(portfolio_id, fx_quotes))
+        for portfolio_id, (base_currency, views) in fleet.items()
+        for view in views
+    ]
+    per_entry = iter(evaluate_views_columnar(entries, as_of))
+
+    violations: dict[str, list[DQViolation]] = {}
+    for portfolio_id, (_, views) in fleet.items():
+        violations[portfolio_id] = [
+            v for _ in views for v in next(per_entry)
+        ]
+    return violations
+
+
+def evaluate_views_columnar(
+    entries: Sequence[tuple[ListingDQView, str, list[FxQuote]]],
+    as_of: datetime,
+) -> list[list[DQViolation]]:
+    """Evaluate ``(view, portfolio_base_currency, fx_quotes)`` entries in one pass.
+
+    Entries that share the same ``fx_quotes`` list object share FX lookups.
+
+    Returns:
+        One violation list per entry, identical to
+        ``evaluate_listing(view, base_currency, fx_quotes, as_of)``.
+    """
+    n = len(entries)
+    results: list[list[DQViolation]] = [[] for _ in range(n)]
+    if n == 0:
+        return results
+
+    as_of_ts = _ts(as_of)
+
+    intraday_ts = np.full(n, np.nan)
+    close_ts = np.full(n, np.nan)
+    jump_current = np.full(n, np.nan)
+    jump_previous = np.full(n, np.nan)
+    quote_price = np.full(n, np.nan)
+    close_price = np.full(n, np.nan)
+    provider_code = np.full(n, -1, dtype=np.int64)
+    listing_code = np.zeros(n, dtype=np.int64)
+    exchange_code = np.zeros(n, dtype=np.int64)
+    pair_code = np.zeros(n, dtype=np.int64)
+
+    ccy_codes: dict[str, int] = {}
+    exchange_codes: dict[str, int] = {}
+    pair_codes: dict[tuple[str, str, int], int] = {}
+    fx_lists: dict[int, list[FxQuote]] = {}
+    latest_quotes: list[Optional[PriceQuote]] = []
+    incoming_closes: list[Optional[PriceQuote]] = []
+
+    for i, (view, base_ccy, fx_quotes) in enumerate(entries):
+        listing = view.listing
+        latest_close = view.latest_close
+        if view.latest_intraday is not None:
+            intraday_ts[i] = _ts(view.latest_intraday.as_of)
+        if latest_close is not None:
+            close_ts[i] = _ts(latest_close.as_of)
+            close_price[i] = _to_float(latest_close.price)
+
+        close_quotes = view.close_quotes
+        incoming = max(close_quotes, key=lambda q: q.as_of) if close_quotes else None
+        incoming_closes.append(incoming)
+        if latest_close is not None:
+            if incoming is not None:
+                jump_current[i] = _to_float(incoming.price)
+                jump_previous[i] = close_price[i]
+            else:
+                previous = view.previous_close
+                if previous is not None:
+                    jump_current[i] = close_price[i]
+                    jump_previous[i] = _to_float(previous.price)
+
+        latest_quote = view.latest_quote
+        latest_quotes.append(latest_quote)
+        if latest_quote is not None:
+            quote_price[i] = _to_float(latest_quote.price)
+            if latest_quote.currency is not None:
+                provider = latest_quote.currency.upper().strip()
+                provider_code[i] = ccy_codes.setdefault(provider, len(ccy_codes))
+
+        listing_ccy = listing.trading_currency.upper().strip()
+        listing_code[i] = ccy_codes.setdefault(listing_ccy, len(ccy_codes))
+        exchange_code[i] = exchange_codes.setdefault(listing.exchange, len(exchange_codes))
+        fx_lists.setdefault(id(fx_quotes), fx_quotes)
+        pair = (listing_ccy, base_ccy.upper().strip(), id(fx_quotes))
+        pair_code[i] = pair_codes.setdefault(pair, len(pair_codes))
+
+    # ── Per-distinct-value lookups (venues, currencies, FX pairs) ────────────
+    venue_closed = np.array(
+        [_is_market_closed(exchange, as_of) for exchange in exchange_codes], dtype=bool
+    )
+    gbx_family = np.zeros(len(ccy_codes), dtype=bool)
+    for ccy, code in ccy_codes.items():
+        gbx_family[code] = ccy in _GBX_FAMILY
+    pair_states = [
+        _fx_state(listing_ccy, base_ccy, fx_lists[fx_id], as_of_ts)
+        for listing_ccy, base_ccy, fx_id in pair_codes
+    ]
+    needs_fx = np.array([s[0] for s in pair_states], dtype=bool)[pair_code]
+    fx_missing = np.array([s[1] for s in pair_states], dtype=bool)[pair_code]
+    fx_age_days = np.array([s[2] for s in pair_states], dtype=float)[pair_code]
+
+    # ── Rule masks ───────────────────────────────────────────────────────────
+    with np.errstate(invalid="ignore", divide="ignore"):
+        intraday_age_min = (as_of_ts - intraday_ts) / 60
+        close_age_days = (as_of_ts - close_ts) / 86_400
+        jump_pct = np.abs(jump_current - jump_previous) / jump_previous * 100
+        gbx_ratio = quote_price / close_price
+
+        masks = {
+            _STALE_INTRADAY: intraday_age_min
+            > settings.dq_stale_max_minutes_intraday * (1 - _EPS),
+            # Calendar age: a superset of the trading-day age the scalar rule uses.
+            _STALE_CLOSE: close_age_days > settings.dq_stale_max_days_close * (1 - _EPS),
+            _MISSING_CLOSE: (
+                np.isnan(close_ts) & venue_closed[exchange_code]
+                if settings.dq_require_close
+                else np.zeros(n, dtype=bool)
+            ),
+            _JUMP_CLOSE: (jump_previous != 0)
+            & (jump_pct > settings.dq_jump_threshold_pct * (1 - _EPS)),
+            _GBX_SCALE: (close_price != 0)
+            & (quote_price > 0)
+            & (
+                ((gbx_ratio > 0.005 * (1 - _EPS)) & (gbx_ratio < 0.02 * (1 + _EPS)))
+                | ((gbx_ratio > 50 * (1 - _EPS)) & (gbx_ratio < 150 * (1 + _EPS)))
+            ),
+            _CCY_MISMATCH: (provider_code >= 0)
+            & (provider_code != listing_code)
+            & ~(gbx_family[np.maximum(provider_code, 0)] & gbx_family[listing_code]),
+            _FX_MISSING: needs_fx & fx_missing,
+            _FX_STALE: needs_fx
+            & ~fx_missing
+            & (fx_age_days > settings.dq_fx_stale_max_days * (1 - _EPS)),
+        }
+
+    # ── Confirm + render hits with the scalar rules, in evaluate_listing order ─
+    hits = sorted(
+        (int(i), rule) for rule, mask in masks.items() for i in np.flatnonzero(mask)
+    )
+    for i, rule in hits:
+        view, base_ccy, fx_quotes = entries[i]
+        violation = _confirm(
+            rule, view, base_ccy, latest_quotes[i], incoming_closes[i], fx_quotes, as_of
+        )
+        if violation is not None:
+            results[i].append(violation)
+    return results
+
+
+def _confirm(
+    rule: int,
+    view: ListingDQView,
+    base_ccy: str,
+    latest_quote: Optional[PriceQuote],
+    incoming_close: Optional[PriceQuote],
+    fx_quotes: list[FxQuote],
+    as_of: datetime,
+) -> Optional[DQViolation]:
+    """Exact scalar check for a masked hit (None for a float-edge false positive)."""
+    listing = view.listing
+    if rule == _STALE_INTRADAY:
+        return check_staleness_intraday(listing, view.latest_intraday, as_of)
+    if rule == _STALE_CLOSE:
+        return check_staleness_close(listing, view.latest_close, as_of)
+    if rule == _MISSING_CLOSE:
+        return check_missing_close(listing, view.latest_close, as_of)
+    if rule == _JUMP_CLOSE:
+        if incoming_close is not None:
+            return check_price_jump(
+                listing, _price_point_from_quote(incoming_close), view.latest_close
+            )
+        return check_price_jump(listing, view.latest_close, view.previous_close)
+    if rule == _GBX_SCALE:
+        return check_gbx_scale(
+            listing, latest_quote, Decimal(str(view.latest_close.price))
+        )
+    if rule == _CCY_MISMATCH:
+        return check_currency_mismatch(listing, latest_quote)
+    if rule == _FX_MISSING:
+        return check_fx_missing(listing, base_ccy, fx_quotes)
+    return check_fx_stale(listing, base_ccy, fx_quotes, as_of)
@@ -0,0 +1,652 @@
+"""
+Incremental Drift Monitor
+
+Keeps per-portfolio running totals (cash, holdings value, sleeve values and
+targets) in Redis, so sleeve drift can be re-evaluated on every price tick or
+ledger batch without re-reading the whole portfolio.
+
+  - ``ensure_loaded`` builds a portfolio's state once from the DB (cash and
+    holding snapshots, latest closes, policy allocations — the same inputs
+    and GBX normalisation as the dashboard).
+  - ``on_prices`` applies new closes: each held listing's value changes by
+    quantity × Δprice, and that delta is added to the holdings total and its
+    sleeve.  ``ta:drift:listing:<listing_id>`` indexes which portfolios hold
+    a listing.
+  - ``on_ledger_entries`` applies quantity and cash deltas from a posted
+    batch.
+
+Every posted batch bumps the portfolio's CashSnapshot ``version_no`` exactly
+once, so the state records the version it reflects (``ledger_version``) and
+a batch is applied only when it is the next one: a batch the build already
+read is skipped, and a gap (a batch that was never applied) drops the state
+for a rebuild.  ``ta:drift:ledger:<portfolio_id>`` holds the newest batch
+version seen, so a build that read the snapshots before that batch
+committed is discarded and redone instead of being stored.
+
+After each update only the sleeve weights are recomputed (one division per
+sleeve).  When a sleeve moves beyond ``DRIFT_THRESHOLD_PCT`` a
+DRIFT_THRESHOLD_CROSSED audit event is recorded; it re-arms once the sleeve
+is back within the threshold.  Updates use WATCH / MULTI so concurrent
+workers and API processes never lose a delta.  State expires after
+``drift_state_ttl_seconds`` and is rebuilt on the next refresh, which also
+picks up policy changes.
+"""
+from __future__ import annotations
+
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Iterable, Optional
+
+import redis
+from redis.exceptions import WatchError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.domain.models import (
+    AuditEvent,
+    CashSnapshot,
+    HoldingSnapshot,
+    LedgerEntry,
+    PortfolioPolicyAllocation,
+)
+from app.services.engine_calculator import DRIFT_THRESHOLD_PCT
+from app.services.market_data_adapter import PriceQuote
+from app.services.price_lookup import get_latest_closes
+
+logger = get_logger(__name__)
+
+STATE_PREFIX = "ta:drift:"
+LISTING_INDEX_PREFIX = "ta:drift:listing:"
+LEDGER_MARKER_PREFIX = "ta:drift:ledger:"
+DRIFT_CROSSED_EVENT = "DRIFT_THRESHOLD_CROSSED"
+
+_TOTAL_FIELDS = ["cash", "holdings", "sleeves", "drifted", "ledger"]
+_BUILD_ATTEMPTS = 3
+_ZERO = Decimal("0")
+_HUNDRED = Decimal("100")
+
+
+def state_key(portfolio_id: str) -> str:
+    return f"{STATE_PREFIX}{portfolio_id}"
+
+
+def listing_index_key(listing_id: str) -> str:
+    return f"{LISTING_INDEX_PREFIX}{listing_id}"
+
+
+def ledger_marker_key(portfolio_id: str) -> str:
+    return f"{LEDGER_MARKER_PREFIX}{portfolio_id}"
+
+
+def price_to_gbp(price: Decimal, currency: Optional[str]) -> Decimal:
+    """GBp / GBX (pence) prices to GBP, as the dashboard values holdings."""
+    if currency == "GBp" or currency == "GBX":
+        return price / _HUNDRED
+    return price
+
+
+# ─── State ────────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class PositionTerm:
+    """One listing's contribution to the portfolio value."""
+
+    quantity: Decimal
+    price_gbp: Optional[Decimal]  # None until a close is known
+    sleeve_code: Optional[str]  # None when the listing has no policy allocation
+
+    @property
+    def value(self) -> Decimal:
+        if self.price_gbp is None:
+            return _ZERO
+        return self.quantity * self.price_gbp
+
+
+@dataclass
+class SleeveTerm:
+    value_gbp: Decimal
+    target_weight_pct: Decimal
+
+
+@dataclass
+class DriftCrossing:
+    """A sleeve that has just moved beyond the drift threshold."""
+
+    portfolio_id: str
+    sleeve_code: str
+    current_weight_pct: Decimal
+    target_weight_pct: Decimal
+    drift_pct: Decimal
+    threshold_pct: Decimal
+
+
+@dataclass
+class DriftState:
+    """Running totals for one portfolio.
+
+    ``positions`` holds only the listings an update touches (all of them
+    right after a build); totals are maintained by delta.
+    """
+
+    portfolio_id: str
+    cash_gbp: Decimal
+    holdings_value_gbp: Decimal
+    sleeves: dict[str, SleeveTerm]
+    drifted: set[str] = field(default_factory=set)
+    positions: dict[str, PositionTerm] = field(default_factory=dict)
+    touched: set[str] = field(default_factory=set)
+    ledger_version: Optional[int] = None  # CashSnapshot.version_no reflected
+
+    @property
+    def total_value_gbp(self) -> Decimal:
+        return self.cash_gbp + self.holdings_value_gbp
+
+    def weight_pct(self, sleeve_code: str) -> Decimal:
+        total = self.total_value_gbp
+        if total <= 0:
+            return _ZERO
+        return self.sleeves[sleeve_code].value_gbp / total * _HUNDRED
+
+    def drift_pct(self, sleeve_code: str) -> Decimal:
+        return self.weight_pct(sleeve_code) - self.sleeves[sleeve_code].target_weight_pct
+
+    def set_price(self, listing_id: str, price_gbp: Decimal) -> None:
+        position = self.positions.get(listing_id)
+        if position is None:
+            return
+        self._shift(position, lambda p: setattr(p, "price_gbp", price_gbp))
+        self.touched.add(listing_id)
+
+    def add_quantity(self, listing_id: str, delta: Decimal) -> None:
+        position = self.positions.setdefault(listing_id, PositionTerm(_ZERO, None, None))
+        self._shift(position, lambda p: setattr(p, "quantity", p.quantity + delta))
+        self.touched.add(listing_id)
+
+    def add_cash(self, delta: Decimal) -> None:
+        self.cash_gbp += delta
+
+    def crossings(self, threshold_pct: Decimal) -> list[DriftCrossing]:
+        """Sleeves newly beyond *threshold_pct*; updates ``drifted``."""
+        crossed = []
+        for code in sorted(self.sleeves):
+            drift = self.drift_pct(code)
+            if abs(drift) <= threshold_pct:
+                self.drifted.discard(code)
+            elif code not in self.drifted:
+                self.drifted.add(code)
+                crossed.append(
+                    DriftCrossing(
+                        portfolio_id=self.portfolio_id,
+                        sleeve_code=code,
+                        current_weight_pct=self.weight_pct(code),
+                        target_weight_pct=self.sleeves[code].target_weight_pct,
+                        drift_pct=drift,
+                        threshold_pct=threshold_pct,
+                    )
+                )
+        return crossed
+
+    def _shift(self, position: PositionTerm, change: Callable[[PositionTerm], None]) -> None:
+        before = position.value
+        change(position)
+        delta = position.value - before
+        self.holdings_value_gbp += delta
+        if position.sleeve_code in self.sleeves:
+            self.sleeves[position.sleeve_code].value_gbp += delta
+
+
+def _encode_position(position: PositionTerm) -> str:
+    return json.dumps([
+        str(position.quantity),
+        None if position.price_gbp is None else str(position.price_gbp),
+        position.sleeve_code,
+    ])
+
+
+def _decode_position(raw: str) -> PositionTerm:
+    quantity, price, sleeve_code = json.loads(raw)
+    return PositionTerm(
+        Decimal(quantity), None if price is None else Decimal(price), sleeve_code
+    )
+
+
+def _encode_totals(state: DriftState) -> dict[str, str]:
+    return {
+        "cash": str(state.cash_gbp),
+        "holdings": str(state.holdings_value_gbp),
+        "sleeves": json.dumps({
+            code: [str(term.value_gbp), str(term.target_weight_pct)]
+            for code, term in state.sleeves.items()
+        }),
+        "drifted": json.dumps(sorted(state.drifted)),
+        "ledger": "" if state.ledger_version is None else str(state.ledger_version),
+    }
+
+
+def _decode_state(
+    portfolio_id: str, listing_ids: list[str], values: list[Optional[str]]
+) -> DriftState:
+    cash, holdings, sleeves, drifted, ledger = values[:5]
+    state = DriftState(
+        portfolio_id=portfolio_id,
+        cash_gbp=Decimal(cash),
+        holdings_value_gbp=Decimal(holdings),
+        sleeves={
+            code: SleeveTerm(Decimal(value), Decimal(target))
+            for code, (value, target) in json.loads(sleeves).items()
+        },
+        drifted=set(json.loads(drifted)),
+        ledger_version=int(ledger) if ledger else None,
+    )
+    for listing_id, raw in zip(listing_ids, values[5:]):
+        if raw is not None:
+            state.positions[listing_id] = _decode_position(raw)
+    return state
+
+
+def build_drift_states(db: Session, portfolio_ids: list[str]) -> dict[str, DriftState]:
+    """Full computation from the DB (four queries for any number of portfolios)."""
+    if not portfolio_ids:
+        return {}
+    uuids = [uuid.UUID(str(pid)) for pid in portfolio_ids]
+
+    cash = {
+        pid: (balance, version)
+        for pid, balance, version in db.query(
+            CashSnapshot.portfolio_id, CashSnapshot.balance_gbp, CashSnapshot.version_no
+        )
+        .filter(CashSnapshot.portfolio_id.in_(uuids))
+        .all()
+    }
+    holdings = (
+        db.query(HoldingSnapshot.portfolio_id, HoldingSnapshot.listing_id, HoldingSnapshot.quantity)
+        .filter(HoldingSnapshot.portfolio_id.in_(uuids))
+        .all()
+    )
+    allocations = (
+        db.query(PortfolioPolicyAllocation)
+        .filter(PortfolioPolicyAllocation.portfolio_id.in_(uuids))
+        .all()
+    )
+    closes = get_latest_closes(
+        db, {listing_id for _, listing_id, _ in holdings} | {a.listing_id for a in allocations}
+    )
+
+    states = {
+        str(pid): DriftState(
+            portfolio_id=str(pid),
+            cash_gbp=cash.get(pid, (_ZERO, 0))[0],
+            holdings_value_gbp=_ZERO,
+            sleeves={},
+            ledger_version=int(cash.get(pid, (_ZERO, 0))[1]),
+        )
+        for pid in uuids
+    }
+    for allocation in allocations:
+        state = states[str(allocation.portfolio_id)]
+        term = state.sleeves.setdefault(allocation.sleeve_code, SleeveTerm(_ZERO, _ZERO))
+        term.target_weight_pct += allocation.target_weight_pct or _ZERO
+        state.positions[str(allocation.listing_id)] = PositionTerm(
+            _ZERO, None, allocation.sleeve_code
+        )
+
+    for pid, listing_id, quantity in holdings:
+        state = states[str(pid)]
+        position = state.positions.setdefault(str(listing_id), PositionTerm(_ZERO, None, None))
+        position.quantity = quantity
+
+    for state in states.values():
+        for listing_id, position in state.positions.items():
+            close = closes.get(uuid.UUID(listing_id))
+            if close is not None:
+                position.price_gbp = price_to_gbp(close.price, close.currency)
+            state.holdings_value_gbp += position.value
+            if position.sleeve_code is not None:
+                state.sleeves[position.sleeve_code].value_gbp += position.value
+        # The first observation is the baseline, not a crossing.
+        state.crossings(DRIFT_THRESHOLD_PCT)
+    return states
+
+
+# ─── Monitor ──────────────────────────────────────────────────────────────────
+
+
+class DriftMonitor:
+    """Redis-backed incremental drift tracking shared by workers and the API."""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        *,
+        client: Optional[redis.Redis] = None,
+        threshold_pct: Decimal = DRIFT_THRESHOLD_PCT,
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        self.client = client or redis.Redis.from_url(
+            redis_url or settings.redis_url, decode_responses=True
+        )
+        self.threshold_pct = threshold_pct
+        self.ttl_seconds = ttl_seconds or settings.drift_state_ttl_seconds
+
+    def ensure_loaded(self, db: Session, portfolio_ids: Iterable[str]) -> int:
+        """Build state for portfolios that have none yet.
+
+        A build whose snapshots predate a batch already seen (the ledger
+        marker) is redone, up to _BUILD_ATTEMPTS times; one still stale after
+        that is left unloaded for the next call.
+
+        Returns:
+            Number of portfolios built.
+        """
+        portfolio_ids = [str(pid) for pid in portfolio_ids]
+        built = 0
+        for _ in range(_BUILD_ATTEMPTS):
+            with self.client.pipeline() as pipe:
+                for pid in portfolio_ids:
+                    pipe.exists(state_key(pid))
+                present = pipe.execute()
+            portfolio_ids = [pid for pid, exists in zip(portfolio_ids, present) if not exists]
+            if not portfolio_ids:
+                break
+            stored = self._store_built(build_drift_states(db, portfolio_ids))
+            built += len(stored)
+            portfolio_ids = [pid for pid in portfolio_ids if pid not in stored]
+        if portfolio_ids:
+            logger.warning(f"Drift state not loaded (ledger moved during build): {portfolio_ids}")
+        return built
+
+    def _store_built(self, states: dict[str, DriftState]) -> set[str]:
+        """Store fresh builds that are still missing; returns the stored ids."""
+        keys = [state_key(pid) for pid in states] + [ledger_marker_key(pid) for pid in states]
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(*keys)
+                stored = set()
+                for pid, state in states.items():
+                    marker = pipe.get(ledger_marker_key(pid))
+                    if pipe.exists(state_key(pid)):
+                        continue
+                    if marker is not None and int(marker) > (state.ledger_version or 0):
+                        continue  # a batch committed after the snapshots were read
+                    stored.add(pid)
+                pipe.multi()
+                for pid in stored:
+                    state = states[pid]
+                    key = state_key(pid)
+                    mapping = _encode_totals(state)
+                    mapping.update(
+                        {f"pos:{lid}": _encode_position(p) for lid, p in state.positions.items()}
+                    )
+                    pipe.hset(key, mapping=mapping)
+                    pipe.expire(key, self.ttl_seconds)
+                    for listing_id in state.positions:
+                        pipe.sadd(listing_index_key(listing_id), pid)
+                        pipe.expire(listing_index_key(listing_id), self.ttl_seconds)
+                pipe.execute()
+                return stored
+            except WatchError:
+                return set()  # raced with a batch or another build: check again
+
+    def invalidate(self, portfolio_id: str) -> None:
+        """Drop a portfolio's state (rebuilt on the next ensure_loaded)."""
+        self.client.delete(state_key(str(portfolio_id)))
+
+    def get_state(self, portfolio_id: str) -> Optional[DriftState]:
+        """Current totals (positions not included), or None when not loaded."""
+        values = self.client.hmget(state_key(str(portfolio_id)), _TOTAL_FIELDS)
+        if values[0] is None:
+            return None
+        return _decode_state(str(portfolio_id), [], values)
+
+    def on_prices(self, db: Session, price_quotes: Iterable[PriceQuote]) -> list[DriftCrossing]:
+        """Apply new closes to every loaded portfolio holding those listings.
+
+        Crossings are recorded as audit events on *db*; the caller commits.
+        """
+        latest: dict[str, PriceQuote] = {}
+        for quote in price_quotes:
+            if not quote.is_close:
+                continue
+            listing_id = str(quote.listing_id)
+            current = latest.get(listing_id)
+            if current is None or quote.as_of > current.as_of:
+                latest[listing_id] = quote
+        if not latest:
+            return []
+
+        listing_ids = list(latest)
+        with self.client.pipeline() as pipe:
+            for listing_id in listing_ids:
+                pipe.smembers(listing_index_key(listing_id))
+            holders = pipe.execute()
+
+        by_portfolio: dict[str, dict[str, Decimal]] = {}
+        for listing_id, portfolio_ids in zip(listing_ids, holders):
+            quote = latest[listing_id]
+            price_gbp = price_to_gbp(Decimal(str(quote.price)), quote.currency)
+            for pid in portfolio_ids:
+                by_portfolio.setdefault(pid, {})[listing_id] = price_gbp
+
+        crossings: list[DriftCrossing] = []
+        for pid, prices in by_portfolio.items():
+            def apply(state: DriftState, prices=prices) -> None:
+                for listing_id, price_gbp in prices.items():
+                    state.set_price(listing_id, price_gbp)
+
+            crossings.extend(self._update(pid, list(prices), apply))
+        record_crossings(db, crossings)
+        return crossings
+
+    def on_ledger_entries(
+        self,
+        db: Session,
+        portfolio_id: str,
+        entries: Iterable[LedgerEntry],
+        ledger_version: Optional[int] = None,
+    ) -> list[DriftCrossing]:
+        """Apply a posted batch's cash and quantity deltas (no-op when not loaded).
+
+        *ledger_version* is the CashSnapshot ``version_no`` the batch produced:
+        a state that already reflects it is left alone, and one that missed an
+        earlier batch is dropped (rebuilt on the next ensure_loaded).
+
+        Crossings are recorded as audit events on *db*; the caller commits.
+        """
+        portfolio_id = str(portfolio_id)
+        cash_delta = _ZERO
+        quantity_deltas: dict[str, Decimal] = {}
+        for entry in entries:
+            cash_delta += entry.net_cash_delta_gbp or _ZERO
+            if entry.listing_id is not None and entry.quantity_delta:
+                listing_id = str(entry.listing_id)
+                quantity_deltas[listing_id] = (
+                    quantity_deltas.get(listing_id, _ZERO) + entry.quantity_delta
+                )
+
+        if ledger_version is not None:
+            self._note_ledger_version(portfolio_id, ledger_version)
+        if not self.client.exists(state_key(portfolio_id)):
+            return []  # not loaded: the next build reads the snapshots
+        closes = get_latest_closes(db, [uuid.UUID(lid) for lid in quantity_deltas])
+        outcome = {"applied": False, "gap": False}
+
+        def apply(state: DriftState) -> bool:
+            outcome["applied"] = outcome["gap"] = False
+            if ledger_version is not None and state.ledger_version is not None:
+                if ledger_version <= state.ledger_version:
+                    return False  # built after this batch: already counted
+                if ledger_version > state.ledger_version + 1:
+                    outcome["gap"] = True
+                    return False
+            state.add_cash(cash_delta)
+            for listing_id, delta in quantity_deltas.items():
+                state.add_quantity(listing_id, delta)
+                close = closes.get(uuid.UUID(listing_id))
+                if state.positions[listing_id].price_gbp is None and close is not None:
+                    # Newly held listing: value it at its latest close.
+                    state.set_price(listing_id, price_to_gbp(close.price, close.currency))
+            if ledger_version is not None:
+                state.ledger_version = ledger_version
+            outcome["applied"] = True
+            return True
+
+        crossings = self._update(portfolio_id, list(quantity_deltas), apply)
+        if outcome["gap"]:
+            logger.warning(
+                f"Drift state for portfolio {portfolio_id} missed a ledger batch; rebuilding"
+            )
+            self.invalidate(portfolio_id)
+            return []
+        if outcome["applied"] and quantity_deltas:
+            with self.client.pipeline() as pipe:
+                for listing_id in quantity_deltas:
+                    pipe.sadd(listing_index_key(listing_id), portfolio_id)
+                pipe.execute()
+        record_crossings(db, crossings)
+        return crossings
+
+    def _note_ledger_version(self, portfolio_id: str, ledger_version: int) -> None:
+        """Raise the portfolio's ledger marker to *ledger_version*."""
+        key = ledger_marker_key(portfolio_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    current = pipe.get(key)
+                    if current is not None and int(current) >= ledger_version:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    pipe.set(key, ledger_version, ex=self.ttl_seconds)
+                    pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    def _update(
+        self,
+        portfolio_id: str,
+        listing_ids: list[str],
+        mutate: Callable[[DriftState], Optional[bool]],
+    ) -> list[DriftCrossing]:
+        """Read the affected fields, apply *mutate*, write back atomically.
+
+        Nothing is written when *mutate* returns False.
+        """
+        key = state_key(portfolio_id)
+        fields = _TOTAL_FIELDS + [f"pos:{lid}" for lid in listing_ids]
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    values = pipe.hmget(key, fields)
+                    if values[0] is None:
+                        pipe.unwatch()
+                        return []  # not loaded: the next build sees the change
+                    state = _decode_state(portfolio_id, listing_ids, values)
+                    if mutate(state) is False:
+                        pipe.unwatch()
+                        return []
+                    crossings = state.crossings(self.threshold_pct)
+                    mapping = _encode_totals(state)
+                    mapping.update({
+                        f"pos:{lid}": _encode_position(state.positions[lid])
+                        for lid in state.touched
+                    })
+                    pipe.multi()
+                    pipe.hset(key, mapping=mapping)
+                    pipe.execute()
+                    return crossings
+                except WatchError:
+                    continue
+
+
+def record_crossings(db: Session, crossings: list[DriftCrossing]) -> None:
+    """Add a DRIFT_THRESHOLD_CROSSED audit event per crossing (caller commits)."""
+    now = datetime.now(timezone.utc)
+    for crossing in crossings:
+        logger.info(
+            f"Drift threshold crossed: portfolio={crossing.portfolio_id} "
+            f"sleeve={crossing.sleeve_code} drift={crossing.drift_pct:.2f}%"
+        )
+        db.add(
+            AuditEvent(
+                audit_event_id=uuid.uuid4(),
+                portfolio_id=uuid.UUID(crossing.portfolio_id),
+                actor_user_id=None,
+                event_type=DRIFT_CROSSED_EVENT,
+                entity_type="PORTFOLIO",
+                entity_id=uuid.UUID(crossing.portfolio_id),
+                occurred_at=now,
+                summary=(
+                    f"Sleeve {crossing.sleeve_code} drift {crossing.drift_pct:+.2f}% "
+                    f"exceeds ±{crossing.threshold_pct}%"
+                ),
+                details={
+                    "sleeve_code": crossing.sleeve_code,
+                    "current_weight_pct": str(crossing.current_weight_pct),
+                    "target_weight_pct": str(crossing.target_weight_pct),
+                    "drift_pct": str(crossing.drift_pct),
+                    "threshold_pct": str(crossing.threshold_pct),
+                },
+            )
+        )
+
+
+# Singleton instance
+_monitor_instance: DriftMonitor | None = None
+
+
+def get_drift_monitor() -> DriftMonitor:
+    """Get or create the global drift monitor."""
+    global _monitor_instance
+    if _monitor_instance is None:
+        _monitor_instance = DriftMonitor()
+    return _monitor_instance
+
+
+def load_baselines(db: Session, portfolio_ids: Iterable[str]) -> None:
+    """Best-effort ensure_loaded before an ingest, so its ticks are deltas."""
+    if not settings.drift_monitor_enabled:
+        return
+    try:
+        get_drift_monitor().ensure_loaded(db, portfolio_ids)
+    except Exception as exc:
+        logger.warning(f"Drift monitor load failed: {exc}")
+
+
+def track_prices(db: Session, price_quotes: Iterable[PriceQuote]) -> list[DriftCrossing]:
+    """Best-effort on_prices; crossings are added to *db* for the caller to commit."""
+    if not settings.drift_monitor_enabled:
+        return []
+    try:
+        return get_drift_monitor().on_prices(db, price_quotes)
+    except Exception as exc:
+        logger.warning(f"Drift monitor price update failed: {exc}")
+        return []
+
+
+def track_ledger_entries(
+    db: Session,
+    portfolio_id: str,
+    entries: Iterable[LedgerEntry],
+    ledger_version: Optional[int] = None,
+) -> None:
+    """Best-effort monitor update after a ledger batch has been committed.
+
+    Never raises: the ledger is the book of record and the monitor state is
+    rebuilt from it on expiry.
+    """
+    if not settings.drift_monitor_enabled:
+        return
+    try:
+        if get_drift_monitor().on_ledger_entries(db, portfolio_id, entries, ledger_version):
+            db.commit()
+    except Exception as exc:
+        db.rollback()
+        logger.warning(f"Drift monitor update failed for portfolio {portfolio_id}: {exc}")
@@ -0,0 +1,302 @@
+"""
+Fleet Trade Plan Service
+
+Runs the engine for every active portfolio in one pass (nightly rebalancing,
+FLEET_TRADE_PLAN jobs, ``scripts/run_fleet_trade_plan.py``):
+
+  1. gather_fleet_engine_inputs — one query per table for the whole fleet.
+  2. EngineInputs.run_input per unblocked portfolio, straight from the rows;
+     the JSON audit payload is only rendered for the RunInputSnapshot rows
+     written in step 4.  A portfolio whose snapshot cannot be built (e.g. a
+     negative cash balance) is recorded as FAILED.
+  3. generate_trade_plan fanned out over a process pool, so the Decimal-heavy
+     calculation scales with cores.  Below ``engine_batch_process_threshold``
+     portfolios a thread pool is used instead: process start-up and pickling
+     would cost more than the plans themselves.
+  4. One ENGINE_PLAN TaskRun + RunInputSnapshot per portfolio and one
+     FLEET_TRADE_PLAN TaskRun, written with bulk INSERTs, and a PENDING
+     recommendation batch per planned portfolio (generate_recommendation_batch;
+     GET /engine/plan then serves it while the inputs are unchanged).
+
+Nothing here commits; the caller owns the transaction.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.domain.engine import RunInputSnapshot, TradePlan
+from app.domain.models import RunInputSnapshot as RunInputSnapshotRow
+from app.domain.models import TaskRun
+from app.services.engine_calculator import generate_trade_plan
+from app.services.engine_inputs import EngineInputs, gather_fleet_engine_inputs
+from app.services.recommendation_generation import generate_recommendation_batch
+
+logger = get_logger(__name__)
+
+# PlanOutcome.status → ENGINE_PLAN TaskRun.status
+_RUN_STATUS = {"PLANNED": "SUCCESS", "BLOCKED": "BLOCKED", "FAILED": "FAILED"}
+
+
+@dataclass
+class PlanOutcome:
+    """Engine result for one portfolio of a fleet run."""
+
+    portfolio_id: str
+    status: str  # PLANNED / BLOCKED / FAILED
+    plan: Optional[TradePlan] = None
+    inputs: Optional[EngineInputs] = None
+    input_hash: Optional[str] = None
+    run_input: Optional[RunInputSnapshot] = None
+    recommendation_batch_id: Optional[str] = None
+    block_reason: Optional[str] = None
+    block_message: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class FleetPlanRun:
+    run_id: str
+    started_at: datetime
+    outcomes: list[PlanOutcome] = field(default_factory=list)
+
+    @property
+    def counts(self) -> dict[str, int]:
+        counts = {"PLANNED": 0, "BLOCKED": 0, "FAILED": 0}
+        for outcome in self.outcomes:
+            counts[outcome.status] += 1
+        return counts
+
+    @property
+    def trade_count(self) -> int:
+        return sum(len(o.plan.trades) for o in self.outcomes if o.plan is not None)
+
+
+def compute_trade_plans(
+    snapshots: list[RunInputSnapshot],
+    *,
+    max_workers: Optional[int] = None,
+    process_threshold: Optional[int] = None,
+) -> list[tuple[Optional[TradePlan], Optional[str]]]:
+    """``generate_trade_plan`` for every snapshot, in input order.
+
+    Each entry is ``(plan, None)`` or ``(None, error)``: one bad portfolio
+    does not sink the batch.
+    """
+    if not snapshots:
+        return []
+    workers = max_workers or settings.engine_batch_max_workers or os.cpu_count() or 1
+    threshold = (
+        settings.engine_batch_process_threshold if process_threshold is None else process_threshold
+    )
+    if workers <= 1 or len(snapshots) == 1:
+        return [_plan_or_error(snapshot) for snapshot in snapshots]
+    chunksize = max(1, len(snapshots) // (workers * 4))  # ignored by the thread pool
+    with _executor(len(snapshots), workers, threshold) as executor:
+        return list(executor.map(_plan_or_error, snapshots, chunksize=chunksize))
+
+
+def _executor(count: int, workers: int, threshold: int) -> Executor:
+    if count < threshold:
+        return ThreadPoolExecutor(max_workers=min(workers, count))
+    # forkserver: the worker process has live threads and DB connections
+    # that must not be copied into the children.
+    return ProcessPoolExecutor(
+        max_workers=min(workers, count),
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+
+
+def _plan_or_error(snapshot: RunInputSnapshot) -> tuple[Optional[TradePlan], Optional[str]]:
+    try:
+        return generate_trade_plan(snapshot), None
+    except Exception as exc:  # reported per portfolio
+        return None, _error_text(exc)
+
+
+def _error_text(exc: Exception) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def plan_fleet(
+    db: Session,
+    *,
+    as_of: Optional[datetime] = None,
+    portfolio_ids: Optional[Iterable[uuid.UUID | str]] = None,
+    max_workers: Optional[int] = None,
+) -> FleetPlanRun:
+    """Gather inputs and compute plans for the fleet (no writes)."""
+    started_at = datetime.now(timezone.utc)
+    as_of = as_of or started_at
+    run = FleetPlanRun(run_id=str(uuid.uuid4()), started_at=started_at)
+
+    gathered = gather_fleet_engine_inputs(db, as_of, portfolio_ids)
+    to_plan: list[PlanOutcome] = []
+    for portfolio_id, result in gathered.items():
+        if result.is_blocked or result.inputs is None:
+            run.outcomes.append(
+                PlanOutcome(
+                    portfolio_id=portfolio_id,
+                    status="BLOCKED",
+                    block_reason=result.block_reason or "NO_DATA",
+                    block_message=result.block_message or "Unable to gather snapshot data",
+                )
+            )
+            continue
+        outcome = PlanOutcome(portfolio_id=portfolio_id, status="PLANNED", inputs=result.inputs)
+        run.outcomes.append(outcome)
+        try:
+            outcome.input_hash = result.inputs.input_hash()
+            outcome.run_input = result.inputs.run_input()
+        except Exception as exc:  # e.g. an overdrawn (negative) cash balance
+            outcome.status = "FAILED"
+            outcome.error = _error_text(exc)
+            continue
+        to_plan.append(outcome)
+
+    plans = compute_trade_plans([o.run_input for o in to_plan], max_workers=max_workers)
+    for outcome, (plan, error) in zip(to_plan, plans):
+        if error is not None:
+            outcome.status = "FAILED"
+            outcome.error = error
+        else:
+            outcome.plan = plan
+
+    logger.info(
+        f"Fleet trade plan computed: portfolios={len(run.outcomes)} "
+        f"planned={run.counts['PLANNED']} trades={run.trade_count}"
+    )
+    return run
+
+
+def record_fleet_run(db: Session, run: FleetPlanRun, job_id: str) -> None:
+    """Write the fleet TaskRun, one ENGINE_PLAN run + input snapshot per
+    portfolio and a recommendation batch per planned portfolio."""
+    ended_at = datetime.now(timezone.utc)
+    job_uuid = uuid.UUID(job_id)
+    fleet_run_id = uuid.UUID(run.run_id)
+
+    db.execute(
+        insert(TaskRun),
+        [
+            {
+                "run_id": fleet_run_id,
+                "job_id": job_uuid,
+                "task_kind": "FLEET_TRADE_PLAN",
+                "portfolio_id": None,
+                "status": "SUCCESS",
+                "started_at": run.started_at,
+                "ended_at": ended_at,
+                "summary": {
+                    "portfolios": len(run.outcomes),
+                    **{key.lower(): value for key, value in run.counts.items()},
+                    "trades": run.trade_count,
+                    "portfolio_statuses": {o.portfolio_id: o.status for o in run.outcomes},
+                },
+            }
+        ],
+    )
+
+    portfolio_runs: list[dict[str, Any]] = []
+    input_rows: list[dict[str, Any]] = []
+    to_generate: list[tuple[PlanOutcome, uuid.UUID]] = []
+    for outcome in run.outcomes:
+        portfolio_run_id = uuid.uuid4()
+        if outcome.plan is not None:
+            to_generate.append((outcome, portfolio_run_id))
+        summary: dict[str, Any] = {"shared_run_id": run.run_id}
+        if outcome.plan is not None:
+            summary["plan"] = plan_to_json(outcome.plan)
+        if outcome.block_reason is not None:
+            summary["block_reason"] = outcome.block_reason
+            summary["block_message"] = outcome.block_message
+        if outcome.error is not None:
+            summary["error"] = outcome.error
+        portfolio_runs.append(
+            {
+                "run_id": portfolio_run_id,
+                "job_id": job_uuid,
+                "task_kind": "ENGINE_PLAN",
+                "portfolio_id": uuid.UUID(outcome.portfolio_id),
+                "status": _RUN_STATUS[outcome.status],
+                "started_at": run.started_at,
+                "ended_at": ended_at,
+                "summary": summary,
+            }
+        )
+        if outcome.inputs is not None:
+            input_rows.append(
+                {
+                    "run_id": portfolio_run_id,
+                    "input_json": outcome.inputs.audit_payload(),
+                    "input_hash": outcome.input_hash,
+                }
+            )
+
+    if portfolio_runs:
+        db.execute(insert(TaskRun), portfolio_runs)
+    if input_rows:
+        db.execute(insert(RunInputSnapshotRow), input_rows)
+
+    for outcome, portfolio_run_id in to_generate:
+        batch = generate_recommendation_batch(
+            db,
+            outcome.run_input,
+            outcome.plan,
+            outcome.input_hash,
+            outcome.inputs.as_of_iso,
+            run_id=portfolio_run_id,
+        )
+        outcome.recommendation_batch_id = str(batch.recommendation_batch_id)
+
+
+def run_fleet_trade_plan(
+    db: Session,
+    job_id: str,
+    *,
+    as_of: Optional[datetime] = None,
+    portfolio_ids: Optional[Iterable[uuid.UUID | str]] = None,
+    max_workers: Optional[int] = None,
+) -> FleetPlanRun:
+    """plan_fleet + record_fleet_run.  Does not commit."""
+    run = plan_fleet(db, as_of=as_of, portfolio_ids=portfolio_ids, max_workers=max_workers)
+    record_fleet_run(db, run, job_id)
+    return run
+
+
+def plan_to_json(plan: TradePlan) -> dict[str, Any]:
+    """JSON-safe form of a TradePlan (Decimals as plain strings)."""
+    return {
+        "trades": [
+            {
+                "action": trade.action,
+                "ticker": trade.ticker,
+                "listing_id": str(trade.listing_id),
+                "quantity": _to_str(trade.quantity),
+                "estimated_value_gbp": _to_str(trade.estimated_value_gbp),
+                "reason": trade.reason,
+            }
+            for trade in plan.trades
+        ],
+        "projected_post_trade_cash": _to_str(plan.projected_post_trade_cash),
+        "total_value_before": _to_str(plan.total_value_before),
+        "total_value_after": _to_str(plan.total_value_after),
+        "cash_pool_used": _to_str(plan.cash_pool_used),
+        "cash_pool_remaining": _to_str(plan.cash_pool_remaining),
+        "warnings": list(plan.warnings),
+    }
+
+
+def _to_str(value: Decimal) -> str:
+    return format(value, "f")
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 from decimal import Decimal, ROUND_FLOOR, ROUND_HALF_UP
+from typing import Any, Mapping, Optional
 
+from app.core.config import settings
 from app.domain.engine import AssetPosition, ProposedTrade, RunInputSnapshot, TradePlan
+from app.services.engine_calculator_fixed import generate_trade_plan_fixed
+from app.services.engine_selection import select_candidates
 
 
 DRIFT_THRESHOLD_PCT = Decimal("5.0")
@@ -14,12 +18,62 @@ PRECISION = Decimal("0.0000000001")
 HUNDRED = Decimal("100")
 
 
+def plan_parameters() -> dict[str, Any]:
+    """The parameters ``generate_trade_plan`` applies by default.
+
+    Part of a plan's identity next to its inputs: EngineInputs.input_hash
+    and the plan cache key include them, so a changed cap is not served a
+    plan computed under the old one.
+    """
+    return {
+        "drift_threshold_pct": str(DRIFT_THRESHOLD_PCT),
+        "min_trade_size_gbp": str(MIN_TRADE_SIZE_GBP),
+        "max_sells": MAX_SELL_ORDERS,
+        "max_buys": MAX_BUY_ORDERS,
+        "sleeve_sell_caps": dict(sorted(settings.engine_sleeve_sell_caps.items())),
+        "sleeve_buy_caps": dict(sorted(settings.engine_sleeve_buy_caps.items())),
+    }
+
+
 def generate_trade_plan(
     snapshot: RunInputSnapshot,
     drift_threshold: Decimal = DRIFT_THRESHOLD_PCT,
     min_trade_size: Decimal = MIN_TRADE_SIZE_GBP,
     max_sells: int = MAX_SELL_ORDERS,
     max_buys: int = MAX_BUY_ORDERS,
+    sleeve_sell_caps: Optional[Mapping[str, int]] = None,
+    sleeve_buy_caps: Optional[Mapping[str, int]] = None,
+) -> TradePlan:
+    """Trade plan for *snapshot*.
+
+    With ``settings.engine_calculator_fixed_point`` the integer core
+    (engine_calculator_fixed) is tried first; it returns the same plan, and
+    hands back to the Decimal core for inputs it cannot reproduce exactly.
+    Per-sleeve caps (engine_selection) default to
+    ``settings.engine_sleeve_sell_caps`` / ``engine_sleeve_buy_caps``.
+    """
+    if sleeve_sell_caps is None:
+        sleeve_sell_caps = settings.engine_sleeve_sell_caps
+    if sleeve_buy_caps is None:
+        sleeve_buy_caps = settings.engine_sleeve_buy_caps
+    args = (
+        drift_threshold, min_trade_size, max_sells, max_buys, sleeve_sell_caps, sleeve_buy_caps
+    )
+    if settings.engine_calculator_fixed_point:
+        plan = generate_trade_plan_fixed(snapshot, *args)
+        if plan is not None:
+            return plan
+    return generate_trade_plan_decimal(snapshot, *args)
+
+
+def generate_trade_plan_decimal(
+    snapshot: RunInputSnapshot,
+    drift_threshold: Decimal = DRIFT_THRESHOLD_PCT,
+    min_trade_size: Decimal = MIN_TRADE_SIZE_GBP,
+    max_sells: int = MAX_SELL_ORDERS,
+    max_buys: int = MAX_BUY_ORDERS,
+    sleeve_sell_caps: Optional[Mapping[str, int]] = None,
+    sleeve_buy_caps: Optional[Mapping[str, int]] = None,
 ) -> TradePlan:
     warnings: list[str] = []
     candidate_trades: list[ProposedTrade] = []
@@ -43,39 +97,23 @@ def generate_trade_plan(
             cash_pool_remaining=_q(snapshot.cash_balance_gbp, PRECISION),
         )
 
-    analyzed_positions = [_analyze_position(position, total_value) for position in positions]
-
-    overweight = [
-        analyzed for analyzed in analyzed_positions if analyzed["drift_pct"] > drift_threshold
-    ]
-    underweight = [
-        analyzed for analyzed in analyzed_positions if analyzed["drift_pct"] < -drift_threshold
-    ]
-
-    overweight.sort(
-        key=lambda item: (
-            -item["drift_pct"],
-            item["position"].ticker,
-            str(item["position"].listing_id),
-        )
-    )
-    underweight.sort(
-        key=lambda item: (
-            item["drift_pct"],
-            item["position"].ticker,
-            str(item["position"].listing_id),
-        )
-    )
+    # (drift_pct, position) pairs; only the selected ones are sorted.
+    overweight: list[tuple[Decimal, AssetPosition]] = []
+    underweight: list[tuple[Decimal, AssetPosition]] = []
+    for position in positions:
+        drift_pct = _drift_pct(position, total_value)
+        if drift_pct > drift_threshold:
+            overweight.append((drift_pct, position))
+        if drift_pct < -drift_threshold:
+            underweight.append((drift_pct, position))
 
     projected_cash_pool = _q(snapshot.cash_balance_gbp, PRECISION)
 
-    if len(overweight) > max_sells:
-        warnings.append(
-            f"Overweight assets exceed sell cap ({max_sells}); limiting sells to highest drift"
-        )
+    to_sell = select_candidates(
+        overweight, "SELL", max_sells, _sell_order, _sleeve, sleeve_sell_caps, warnings
+    )
 
-    for analyzed in overweight[:max_sells]:
-        position = analyzed["position"]
+    for _, position in to_sell:
         target_value = _q((position.target_weight_pct / HUNDRED) * total_value, PRECISION)
         excess_value = _q(position.current_value_gbp - target_value, PRECISION)
 
@@ -107,17 +145,15 @@ def generate_trade_plan(
         )
         projected_cash_pool = _q(projected_cash_pool + sell_value, PRECISION)
 
-    if len(underweight) > max_buys:
-        warnings.append(
-            f"Underweight assets exceed buy cap ({max_buys}); limiting buys to lowest drift"
-        )
+    to_buy = select_candidates(
+        underweight, "BUY", max_buys, _buy_order, _sleeve, sleeve_buy_caps, warnings
+    )
 
-    for analyzed in underweight[:max_buys]:
+    for _, position in to_buy:
         if projected_cash_pool <= 0:
             warnings.append("Buy execution stopped: projected cash pool exhausted")
             break
 
-        position = analyzed["position"]
         target_value = _q((position.target_weight_pct / HUNDRED) * total_value, PRECISION)
         deficit_value = _q(target_value - position.current_value_gbp, PRECISION)
 
@@ -197,14 +233,23 @@ def generate_trade_plan(
     )
 
 
-def _analyze_position(position: AssetPosition, total_value: Decimal) -> dict[str, Decimal | AssetPosition]:
+def _drift_pct(position: AssetPosition, total_value: Decimal) -> Decimal:
     current_weight_pct = _q((position.current_value_gbp / total_value) * HUNDRED, PRECISION)
-    drift_pct = _q(current_weight_pct - position.target_weight_pct, PRECISION)
-    return {
-        "position": position,
-        "current_weight_pct": current_weight_pct,
-        "drift_pct": drift_pct,
-    }
+    return _q(current_weight_pct - position.target_weight_pct, PRECISION)
+
+
+def _sell_order(item: tuple[Decimal, AssetPosition]) -> tuple:
+    drift_pct, position = item
+    return (-drift_pct, position.ticker, str(position.listing_id))
+
+
+def _buy_order(item: tuple[Decimal, AssetPosition]) -> tuple:
+    drift_pct, position = item
+    return (drift_pct, position.ticker, str(position.listing_id))
+
+
+def _sleeve(item: tuple[Decimal, AssetPosition]) -> Optional[str]:
+    return item[1].sleeve_code
 
 
 def _q(value: Decimal, precision: Decimal) -> Decimal:
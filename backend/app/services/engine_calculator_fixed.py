@@ -0,0 +1,269 @@
+"""
+Fixed-Point Trade Plan Core
+
+Integer re-implementation of ``engine_calculator.generate_trade_plan``.
+Every amount is held as an int count of 10^-10 GBP (pence × 10^8), the
+grid the Decimal core quantizes every intermediate onto, so sums,
+differences and share counts are plain int arithmetic and each
+``_q(...)`` becomes a half-up integer division.  Positions are kept as
+tuples and selected (engine_selection) on ``(drift, ticker, listing_id)``:
+UUIDs order by their int value, which is the same order as their
+fixed-width hex strings, so no ``str(listing_id)`` is built.
+
+The output is bit-identical to the Decimal core (same values, same
+exponents, same warnings) on the domain where that can be shown:
+
+  - every input amount is a multiple of 10^-10;
+  - the portfolio is below 10^16 GBP, so no Decimal sum or product of
+    amounts is rounded at 28 significant digits;
+  - the weight ``value / total`` is rounded at 28 digits before quantize;
+    the integer half-up result only matches when the exact quotient is not
+    within that rounding error of a half-unit tie, which is checked per
+    position (the Decimal expression is evaluated for the rare miss).
+
+``generate_trade_plan_fixed`` returns None outside that domain and the
+caller falls back to the Decimal core.
+"""
+from __future__ import annotations
+
+from decimal import ROUND_HALF_UP, Decimal, getcontext
+from operator import eq, itemgetter
+from typing import Mapping, Optional
+
+from app.domain.engine import ProposedTrade, RunInputSnapshot, TradePlan
+from app.services.engine_selection import select_candidates
+
+
+SCALE_EXPONENT = 10
+SCALE = 10**SCALE_EXPONENT
+_PRECISION = Decimal(1).scaleb(-SCALE_EXPONENT)  # engine_calculator.PRECISION
+
+# 100% expressed in weight units: weight_units = value * _WEIGHT_SCALE / total
+_WEIGHT_SCALE = 100 * SCALE
+# Amounts below this sum and multiply without Decimal rounding at 28 digits.
+_MAX_UNITS = 10**26
+_MAX_PRODUCT = 10**28
+# The 28-digit quotient is within 10^-27 (relative) of the exact one; a
+# remainder this far from a tie rounds the same way either way.
+_TIE_MARGIN = 10**14
+
+
+_sort_key = itemgetter(0, 1, 2)
+
+
+def _sleeve(item: tuple) -> Optional[str]:
+    return item[3][0].sleeve_code
+
+
+class _OutOfDomain(Exception):
+    """Inputs the integer core cannot reproduce exactly."""
+
+
+def generate_trade_plan_fixed(
+    snapshot: RunInputSnapshot,
+    drift_threshold: Decimal,
+    min_trade_size: Decimal,
+    max_sells: int,
+    max_buys: int,
+    sleeve_sell_caps: Optional[Mapping[str, int]] = None,
+    sleeve_buy_caps: Optional[Mapping[str, int]] = None,
+) -> Optional[TradePlan]:
+    """Integer-core trade plan, or None when the inputs are outside the
+    exactly-reproducible domain (use the Decimal core instead)."""
+    if getcontext().prec < 28:
+        return None
+    try:
+        return _generate(
+            snapshot,
+            drift_threshold,
+            min_trade_size,
+            max_sells,
+            max_buys,
+            sleeve_sell_caps,
+            sleeve_buy_caps,
+        )
+    except _OutOfDomain:
+        return None
+
+
+def _generate(
+    snapshot: RunInputSnapshot,
+    drift_threshold: Decimal,
+    min_trade_size: Decimal,
+    max_sells: int,
+    max_buys: int,
+    sleeve_sell_caps: Optional[Mapping[str, int]],
+    sleeve_buy_caps: Optional[Mapping[str, int]],
+) -> Optional[TradePlan]:
+    warnings: list[str] = []
+    threshold = _units(drift_threshold)
+    min_trade = _units(min_trade_size)
+    cash = _units(snapshot.cash_balance_gbp)
+
+    positions = snapshot.positions
+    values = _units_of([position.current_value_gbp for position in positions])
+    targets = _units_of([position.target_weight_pct for position in positions])
+    total = cash + sum(values)
+    if total <= 0:
+        return None  # trivial plan; leave it to the Decimal core
+    if total >= _MAX_UNITS or max(targets, default=0) >= _MAX_UNITS:
+        raise _OutOfDomain
+    total_value = _decimal(total)
+
+    # (sort drift, ticker, listing_id, (position, value, target)); prices are
+    # only read for the positions that trade.
+    overweight: list[tuple] = []
+    underweight: list[tuple] = []
+    for row in zip(positions, values, targets):
+        position, value, target = row
+        weight, remainder = divmod(value * _WEIGHT_SCALE, total)
+        twice = 2 * remainder
+        if twice != total and abs(twice - total) * _TIE_MARGIN <= total:
+            weight = _units(
+                ((position.current_value_gbp / total_value) * 100).quantize(
+                    _PRECISION, rounding=ROUND_HALF_UP
+                )
+            )
+        elif twice >= total:
+            weight += 1
+        drift = weight - target
+        if drift > threshold:
+            overweight.append((-drift, position.ticker, position.listing_id, row))
+        if drift < -threshold:
+            underweight.append((drift, position.ticker, position.listing_id, row))
+
+    candidates: list[tuple[str, object, int, int]] = []  # (action, position, quantity, value)
+    cash_pool = cash
+
+    to_sell = select_candidates(
+        overweight, "SELL", max_sells, _sort_key, _sleeve, sleeve_sell_caps, warnings
+    )
+
+    for *_, (position, value, target) in to_sell:
+        target_value = _target_value(position, target, total, total_value)
+        if value - target_value <= 0:
+            continue
+        price = _units(position.current_price_gbp)
+        if price <= 0:
+            warnings.append(f"Skipped SELL for {position.ticker}: current_price_gbp is zero")
+            continue
+
+        quantity = value // price - target_value // price
+        if quantity <= 0:
+            continue
+
+        sell_value = quantity * price
+        candidates.append(("SELL", position, quantity, sell_value))
+        cash_pool += sell_value
+
+    to_buy = select_candidates(
+        underweight, "BUY", max_buys, _sort_key, _sleeve, sleeve_buy_caps, warnings
+    )
+
+    for *_, (position, value, target) in to_buy:
+        if cash_pool <= 0:
+            warnings.append("Buy execution stopped: projected cash pool exhausted")
+            break
+
+        target_value = _target_value(position, target, total, total_value)
+        if target_value - value <= 0:
+            continue
+        price = _units(position.current_price_gbp)
+        if price <= 0:
+            warnings.append(f"Skipped BUY for {position.ticker}: current_price_gbp is zero")
+            continue
+
+        quantity = min(cash_pool // price, target_value // price - value // price)
+        if quantity <= 0:
+            continue
+
+        buy_value = quantity * price
+        candidates.append(("BUY", position, quantity, buy_value))
+        cash_pool -= buy_value
+
+    trades: list[ProposedTrade] = []
+    filtered_count = 0
+    total_sell = 0
+    total_buy = 0
+    for action, position, quantity, trade_value in candidates:
+        if trade_value < min_trade:
+            filtered_count += 1
+            continue
+        if action == "SELL":
+            total_sell += trade_value
+            reason = "DRIFT_ABOVE_THRESHOLD"
+        else:
+            total_buy += trade_value
+            reason = "DRIFT_BELOW_THRESHOLD"
+        trades.append(
+            ProposedTrade(
+                action=action,
+                ticker=position.ticker,
+                listing_id=position.listing_id,
+                quantity=Decimal(quantity),
+                estimated_value_gbp=_decimal(trade_value),
+                reason=reason,
+            )
+        )
+
+    if filtered_count > 0:
+        warnings.append(
+            f"Filtered out {filtered_count} trade(s) below minimum size {min_trade_size} GBP"
+        )
+
+    projected_post_trade_cash = _decimal(cash + total_sell - total_buy)
+    return TradePlan(
+        trades=trades,
+        projected_post_trade_cash=projected_post_trade_cash,
+        warnings=warnings,
+        total_value_before=total_value,
+        total_value_after=total_value,
+        cash_pool_used=_decimal(total_buy),
+        cash_pool_remaining=projected_post_trade_cash,
+    )
+
+
+def _target_value(position, target: int, total: int, total_value: Decimal) -> int:
+    """_q(target_weight / 100 * total_value) in units."""
+    product = target * total
+    if product >= _MAX_PRODUCT:
+        # The Decimal product may be rounded at 28 digits: evaluate it as-is.
+        return _units(
+            ((position.target_weight_pct / 100) * total_value).quantize(
+                _PRECISION, rounding=ROUND_HALF_UP
+            )
+        )
+    target_value, remainder = divmod(product, _WEIGHT_SCALE)
+    if 2 * remainder >= _WEIGHT_SCALE:
+        target_value += 1
+    return target_value
+
+
+def _units(value: Decimal) -> int:
+    """Exact int count of 10^-10 GBP in *value*; _OutOfDomain if inexact
+    or too large to stay exact in Decimal arithmetic."""
+    try:
+        scaled = value.scaleb(SCALE_EXPONENT)
+        units = int(scaled)
+    except (ValueError, OverflowError):  # NaN / Infinity
+        raise _OutOfDomain from None
+    if units != scaled or abs(units) >= _MAX_UNITS:
+        raise _OutOfDomain
+    return units
+
+
+def _units_of(values: list[Decimal]) -> list[int]:
+    """_units over a list, with the conversions and checks run by map()."""
+    scaled = [value.scaleb(SCALE_EXPONENT) for value in values]
+    try:
+        units = list(map(int, scaled))
+    except (ValueError, OverflowError):
+        raise _OutOfDomain from None
+    if not all(map(eq, units, scaled)):
+        raise _OutOfDomain
+    return units
+
+
+def _decimal(units: int) -> Decimal:
+    """The Decimal ``_q`` would have produced for *units* (exponent -10)."""
+    return Decimal(units).scaleb(-SCALE_EXPONENT)
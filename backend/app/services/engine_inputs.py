@@ -1,25 +1,167 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Any, Optional
+import hashlib
+import json
+from typing import Any, Iterable, Optional
 import uuid
 
 from sqlalchemy import true
 from sqlalchemy.orm import Session
 
+from app.domain.engine import AssetPosition, RunInputSnapshot
 from app.domain.models import (
     CashSnapshot,
     FreezeState,
     HoldingSnapshot,
+    LatestPrice,
+    Portfolio,
     PortfolioPolicyAllocation,
-    PricePoint,
 )
+from app.services.engine_calculator import plan_parameters
+from app.services.price_lookup import (
+    PRICE_STALENESS_DAYS,
+    PRICE_STALENESS_THRESHOLD,
+    StalePriceError,
+    aged_listing_ids,
+    evaluate_trusted_closes,
+    get_latest_closes,
+    get_listing_exchanges,
+    price_point_payload,
+    resolve_trusted_closes,
+)
+
+
+@dataclass
+class EngineInputs:
+    """Engine inputs for one portfolio, as read: the ORM rows and the
+    trusted closes.
+
+    ``run_input()`` builds the calculator snapshot straight from the typed
+    column values.  The JSON audit payload (``audit_payload()``, the format
+    stored in run_input_snapshots.input_json) is only rendered when asked
+    for, i.e. when the inputs are persisted.
+    """
+
+    portfolio_id: uuid.UUID
+    as_of: datetime
+    cash_snapshot: Optional[CashSnapshot]
+    holdings: list[HoldingSnapshot]
+    allocations: list[PortfolioPolicyAllocation]
+    ticker_by_listing: dict[uuid.UUID, str]
+    closes_used: list[tuple[LatestPrice, str]]  # (trusted close, ticker), holdings order
+    _payload: Optional[dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def as_of_iso(self) -> str:
+        return _isoformat(self.as_of)
+
+    def run_input(self) -> RunInputSnapshot:
+        """RunInputSnapshot for the calculator (same as
+        ``build_run_input_snapshot(self.audit_payload())``)."""
+        cash_balance_gbp = (
+            self.cash_snapshot.balance_gbp if self.cash_snapshot is not None else Decimal("0")
+        )
+        price_by_listing = {
+            close.listing_id: _normalize_price_to_gbp(close.price, close.currency)
+            for close, _ in self.closes_used
+        }
+        allocation_by_listing = {allocation.listing_id: allocation for allocation in self.allocations}
+
+        # Each column is read once: ORM attribute access is the dominant cost
+        # here at fleet / 10k-position sizes.
+        values: list[tuple[uuid.UUID, Decimal, Decimal, Decimal]] = []
+        total_value = cash_balance_gbp
+        for holding in self.holdings:
+            listing_id = holding.listing_id
+            price = price_by_listing.get(listing_id)
+            if price is None:
+                continue
+            quantity = holding.quantity
+            value = quantity * price
+            total_value += value
+            values.append((listing_id, quantity, price, value))
+
+        positions: list[AssetPosition] = []
+        for listing_id, quantity, price, value in values:
+            allocation = allocation_by_listing.get(listing_id)
+            if allocation is None:
+                continue
+            target_weight_pct = allocation.target_weight_pct
+            if target_weight_pct is None:
+                target_weight_pct = Decimal("0")
+            if total_value > 0:
+                current_weight_pct = (value / total_value) * Decimal("100")
+            else:
+                current_weight_pct = Decimal("0")
+            positions.append(
+                AssetPosition(
+                    listing_id=listing_id,
+                    ticker=self.ticker_by_listing.get(listing_id) or allocation.ticker,
+                    current_quantity=quantity,
+                    current_price_gbp=price,
+                    current_value_gbp=value,
+                    target_weight_pct=target_weight_pct,
+                    current_weight_pct=current_weight_pct,
+                    drift_pct=current_weight_pct - target_weight_pct,
+                    sleeve_code=allocation.sleeve_code,
+                )
+            )
+
+        return RunInputSnapshot(
+            portfolio_id=self.portfolio_id,
+            cash_balance_gbp=cash_balance_gbp,
+            positions=positions,
+        )
 
+    def input_hash(self) -> str:
+        """Stable SHA-256 of the plan inputs: cash, holdings, trusted closes
+        and the allocation policy, plus the engine's default parameters
+        (``engine_calculator.plan_parameters``).
 
-PRICE_STALENESS_DAYS = 3
-PRICE_STALENESS_THRESHOLD = timedelta(days=PRICE_STALENESS_DAYS)
+        Order-insensitive, and ``as_of`` / ``updated_at`` are left out: two
+        gathers over the same inputs hash to the same value whenever they ran.
+        """
+        payload = [
+            str(self.portfolio_id),
+            _to_str(self.cash_snapshot.balance_gbp) if self.cash_snapshot is not None else "0",
+            sorted((str(h.listing_id), _to_str(h.quantity)) for h in self.holdings),
+            sorted(
+                (str(close.listing_id), str(close.price_point_id), _to_str(close.price), close.currency)
+                for close, _ in self.closes_used
+            ),
+            sorted(
+                (
+                    str(a.listing_id),
+                    a.ticker,
+                    a.sleeve_code,
+                    a.policy_role,
+                    _to_str(a.target_weight_pct),
+                    a.priority_rank,
+                    a.policy_hash,
+                )
+                for a in self.allocations
+            ),
+            plan_parameters(),
+        ]
+        encoded = json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def audit_payload(self) -> dict[str, Any]:
+        """The JSON audit payload (rendered once, then reused)."""
+        if self._payload is None:
+            self._payload = _snapshot_data(
+                self.portfolio_id,
+                self.as_of,
+                self.cash_snapshot,
+                self.holdings,
+                self.allocations,
+                self.ticker_by_listing,
+                [price_point_payload(close, ticker) for close, ticker in self.closes_used],
+            )
+        return self._payload
 
 
 @dataclass
@@ -27,18 +169,12 @@ class EngineInputResult:
     is_blocked: bool
     block_reason: Optional[str]
     block_message: Optional[str]
-    snapshot_data: Optional[dict[str, Any]]
+    inputs: Optional[EngineInputs] = None
 
-
-class StalePriceError(Exception):
-    def __init__(self, ticker: str, age: timedelta) -> None:
-        self.ticker = ticker
-        self.age = age
-        age_days = age.total_seconds() / 86_400
-        super().__init__(
-            f"Stale market data for {ticker}; latest trusted price is older than "
-            f"{PRICE_STALENESS_DAYS} days (age={age_days:.2f}d)"
-        )
+    @property
+    def snapshot_data(self) -> Optional[dict[str, Any]]:
+        """Audit payload of the inputs (rendered on first access)."""
+        return self.inputs.audit_payload() if self.inputs is not None else None
 
 
 def gather_engine_inputs(
@@ -60,12 +196,7 @@ def gather_engine_inputs(
         .first()
     )
     if active_freeze is not None:
-        return EngineInputResult(
-            is_blocked=True,
-            block_reason="FROZEN",
-            block_message="Portfolio is currently frozen and cannot run recommendations",
-            snapshot_data=None,
-        )
+        return _frozen_result()
 
     cash_snapshot = (
         db.query(CashSnapshot)
@@ -88,65 +219,242 @@ def gather_engine_inputs(
         allocation.listing_id: allocation.ticker for allocation in policy_allocations
     }
 
-    stale_cutoff = as_of_utc - PRICE_STALENESS_THRESHOLD
-    price_points_used: list[dict[str, Any]] = []
+    price_lookup = resolve_trusted_closes(
+        db,
+        [holding.listing_id for holding in holding_snapshots],
+        ticker_by_listing,
+        as_of_utc,
+    )
+    if price_lookup.is_blocked:
+        return EngineInputResult(
+            is_blocked=True,
+            block_reason=price_lookup.block_reason,
+            block_message=price_lookup.block_message,
+        )
 
-    for holding in holding_snapshots:
-        latest_close = (
-            db.query(PricePoint)
-            .filter(
-                PricePoint.listing_id == holding.listing_id,
-                PricePoint.is_close == true(),
-            )
-            .order_by(PricePoint.as_of.desc())
-            .first()
+    return EngineInputResult(
+        is_blocked=False,
+        block_reason=None,
+        block_message=None,
+        inputs=EngineInputs(
+            portfolio_id=portfolio_uuid,
+            as_of=as_of_utc,
+            cash_snapshot=cash_snapshot,
+            holdings=holding_snapshots,
+            allocations=policy_allocations,
+            ticker_by_listing=ticker_by_listing,
+            closes_used=price_lookup.closes_used,
+        ),
+    )
+
+
+def gather_fleet_engine_inputs(
+    db: Session,
+    as_of: datetime,
+    portfolio_ids: Optional[Iterable[uuid.UUID | str]] = None,
+) -> dict[str, EngineInputResult]:
+    """Engine inputs for many portfolios with one query per table.
+
+    Defaults to every enabled portfolio.  Each result is identical to what
+    ``gather_engine_inputs`` returns for that portfolio: frozen portfolios and
+    portfolios with missing / stale closes come back blocked.  Keyed by the
+    portfolio_id string.
+    """
+    as_of_utc = _as_utc(as_of)
+    if portfolio_ids is None:
+        ids = [
+            pid
+            for (pid,) in db.query(Portfolio.portfolio_id)
+            .filter(Portfolio.is_enabled == true())
+            .order_by(Portfolio.portfolio_id)
+            .all()
+        ]
+    else:
+        ids = list(dict.fromkeys(uuid.UUID(str(pid)) for pid in portfolio_ids))
+    if not ids:
+        return {}
+
+    frozen = {
+        pid
+        for (pid,) in db.query(FreezeState.portfolio_id)
+        .filter(
+            FreezeState.portfolio_id.in_(ids),
+            FreezeState.is_frozen == true(),
+            FreezeState.cleared_at.is_(None),
         )
+        .distinct()
+        .all()
+    }
+    active = [pid for pid in ids if pid not in frozen]
 
-        ticker = ticker_by_listing.get(holding.listing_id, str(holding.listing_id))
+    cash_by_portfolio: dict[uuid.UUID, CashSnapshot] = {}
+    holdings_by_portfolio: dict[uuid.UUID, list[HoldingSnapshot]] = {pid: [] for pid in active}
+    allocations_by_portfolio: dict[uuid.UUID, list[PortfolioPolicyAllocation]] = {
+        pid: [] for pid in active
+    }
+    if active:
+        cash_by_portfolio = {
+            cash.portfolio_id: cash
+            for cash in db.query(CashSnapshot).filter(CashSnapshot.portfolio_id.in_(active)).all()
+        }
+        for holding in (
+            db.query(HoldingSnapshot)
+            .filter(HoldingSnapshot.portfolio_id.in_(active))
+            .order_by(HoldingSnapshot.portfolio_id, HoldingSnapshot.listing_id)
+            .all()
+        ):
+            holdings_by_portfolio[holding.portfolio_id].append(holding)
+        for allocation in (
+            db.query(PortfolioPolicyAllocation)
+            .filter(PortfolioPolicyAllocation.portfolio_id.in_(active))
+            .all()
+        ):
+            allocations_by_portfolio[allocation.portfolio_id].append(allocation)
+
+    closes = get_latest_closes(
+        db,
+        (holding.listing_id for holdings in holdings_by_portfolio.values() for holding in holdings),
+    )
 
-        if latest_close is None:
-            return EngineInputResult(
+    exchanges = get_listing_exchanges(db, aged_listing_ids(closes, as_of_utc))
+
+    results: dict[str, EngineInputResult] = {}
+    for pid in ids:
+        if pid in frozen:
+            results[str(pid)] = _frozen_result()
+            continue
+        holdings = holdings_by_portfolio[pid]
+        allocations = allocations_by_portfolio[pid]
+        ticker_by_listing = {allocation.listing_id: allocation.ticker for allocation in allocations}
+        price_lookup = evaluate_trusted_closes(
+            [holding.listing_id for holding in holdings],
+            closes,
+            ticker_by_listing,
+            as_of_utc,
+            exchanges,
+        )
+        if price_lookup.is_blocked:
+            results[str(pid)] = EngineInputResult(
                 is_blocked=True,
-                block_reason="MISSING_PRICE",
-                block_message=(
-                    f"Missing trusted close price for {ticker}; run is blocked"
-                ),
-                snapshot_data=None,
+                block_reason=price_lookup.block_reason,
+                block_message=price_lookup.block_message,
             )
+            continue
+        results[str(pid)] = EngineInputResult(
+            is_blocked=False,
+            block_reason=None,
+            block_message=None,
+            inputs=EngineInputs(
+                portfolio_id=pid,
+                as_of=as_of_utc,
+                cash_snapshot=cash_by_portfolio.get(pid),
+                holdings=holdings,
+                allocations=allocations,
+                ticker_by_listing=ticker_by_listing,
+                closes_used=price_lookup.closes_used,
+            ),
+        )
+    return results
 
-        latest_close_as_of = _as_utc(latest_close.as_of)
-        if latest_close_as_of < stale_cutoff:
-            stale_error = StalePriceError(
+
+def build_run_input_snapshot(snapshot_data: dict) -> RunInputSnapshot:
+    """RunInputSnapshot from an audit payload (a stored input_json, or any
+    dict in that format).  Freshly gathered inputs use EngineInputs.run_input."""
+    portfolio_id = uuid.UUID(snapshot_data["portfolio_id"])
+    cash_balance_gbp = _to_decimal(snapshot_data["cash_snapshot"]["balance_gbp"])
+
+    # Build asset positions from holding snapshots and allocation map
+    positions: list[AssetPosition] = []
+    holding_by_listing: dict[str, dict] = {
+        h["listing_id"]: h for h in snapshot_data["holding_snapshots"]
+    }
+    allocation_by_listing: dict[str, dict] = {
+        a["listing_id"]: a for a in snapshot_data["allocation_map"]
+    }
+    price_by_listing: dict[str, dict] = {
+        p["listing_id"]: p for p in snapshot_data["price_points_used"]
+    }
+
+    # Calculate total portfolio value for weight calculations
+    total_value = cash_balance_gbp
+    for holding in snapshot_data["holding_snapshots"]:
+        price_info = price_by_listing.get(holding["listing_id"])
+        if price_info:
+            raw_price = _to_decimal(price_info["price"])
+            currency = price_info.get("currency")
+            price = _normalize_price_to_gbp(raw_price, currency)
+            quantity = _to_decimal(holding["quantity"])
+            total_value += price * quantity
+
+    # Build positions from holdings that have allocations
+    for listing_id, holding in holding_by_listing.items():
+        allocation = allocation_by_listing.get(listing_id)
+        price_info = price_by_listing.get(listing_id)
+
+        if not allocation or not price_info:
+            continue
+
+        ticker = holding.get("ticker") or allocation.get("ticker", "")
+        current_quantity = _to_decimal(holding["quantity"])
+        raw_price = _to_decimal(price_info["price"])
+        currency = price_info.get("currency")
+        current_price_gbp = _normalize_price_to_gbp(raw_price, currency)
+        current_value_gbp = current_quantity * current_price_gbp
+        target_weight_pct = _to_decimal(allocation.get("target_weight_pct"))
+
+        # Calculate current weight percentage
+        if total_value > 0:
+            current_weight_pct = (current_value_gbp / total_value) * Decimal("100")
+        else:
+            current_weight_pct = Decimal("0")
+
+        drift_pct = current_weight_pct - target_weight_pct
+
+        positions.append(
+            AssetPosition(
+                listing_id=uuid.UUID(listing_id),
                 ticker=ticker,
-                age=as_of_utc - latest_close_as_of,
+                current_quantity=current_quantity,
+                current_price_gbp=current_price_gbp,
+                current_value_gbp=current_value_gbp,
+                target_weight_pct=target_weight_pct,
+                current_weight_pct=current_weight_pct,
+                drift_pct=drift_pct,
+                sleeve_code=allocation.get("sleeve_code"),
             )
-            return EngineInputResult(
-                is_blocked=True,
-                block_reason="STALE_PRICE",
-                block_message=(
-                    f"Stale market data for {stale_error.ticker}; "
-                    f"latest trusted price is older than {PRICE_STALENESS_DAYS} days"
-                ),
-                snapshot_data=None,
-            )
-
-        price_points_used.append(
-            {
-                "listing_id": str(latest_close.listing_id),
-                "ticker": ticker,
-                "as_of": _isoformat(latest_close_as_of),
-                "price": _to_str(latest_close.price),
-                "currency": latest_close.currency,
-                "is_close": latest_close.is_close,
-            }
         )
 
-    snapshot_data = {
+    return RunInputSnapshot(
+        portfolio_id=portfolio_id,
+        cash_balance_gbp=cash_balance_gbp,
+        positions=positions,
+    )
+
+
+def _frozen_result() -> EngineInputResult:
+    return EngineInputResult(
+        is_blocked=True,
+        block_reason="FROZEN",
+        block_message="Portfolio is currently frozen and cannot run recommendations",
+    )
+
+
+def _snapshot_data(
+    portfolio_uuid: uuid.UUID,
+    as_of_utc: datetime,
+    cash_snapshot: Optional[CashSnapshot],
+    holding_snapshots: list[HoldingSnapshot],
+    policy_allocations: list[PortfolioPolicyAllocation],
+    ticker_by_listing: dict[uuid.UUID, str],
+    price_points_used: list[dict[str, Any]],
+) -> dict[str, Any]:
+    return {
         "portfolio_id": str(portfolio_uuid),
         "as_of": _isoformat(as_of_utc),
         "cash_snapshot": {
             "balance_gbp": _to_str(cash_snapshot.balance_gbp) if cash_snapshot else _to_str(Decimal("0")),
             "updated_at": _isoformat(cash_snapshot.updated_at) if cash_snapshot else None,
+            "version_no": _version(cash_snapshot.version_no) if cash_snapshot else None,
         },
         "holding_snapshots": [
             {
@@ -157,6 +465,7 @@ def gather_engine_inputs(
                 "book_cost_gbp": _to_str(holding.book_cost_gbp),
                 "avg_cost_gbp": _to_str(holding.avg_cost_gbp),
                 "updated_at": _isoformat(holding.updated_at),
+                "version_no": _version(holding.version_no),
             }
             for holding in holding_snapshots
         ],
@@ -179,12 +488,25 @@ def gather_engine_inputs(
         },
     }
 
-    return EngineInputResult(
-        is_blocked=False,
-        block_reason=None,
-        block_message=None,
-        snapshot_data=snapshot_data,
-    )
+
+def _version(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _to_decimal(value: str | int | float | Decimal | None) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    return Decimal(str(value))
+
+
+def _normalize_price_to_gbp(price: Decimal, currency: str | None) -> Decimal:
+    """Normalize price to GBP base currency.
+
+    If the price currency is GBp or GBX (pence), convert to GBP by dividing by 100.
+    """
+    if currency == "GBp" or currency == "GBX":
+        return price / Decimal("100")
+    return price
 
 
 def _as_utc(value: datetime) -> datetime:
@@ -0,0 +1,83 @@
+"""
+Rebalance Candidate Selection
+
+Both trade plan cores (engine_calculator, engine_calculator_fixed) trade the
+first ``max_sells`` overweight and ``max_buys`` underweight positions in
+(drift, ticker, listing_id) order.  ``select_candidates`` picks them with a
+bounded heap (``heapq.nsmallest``): O(n log k) for n drifted positions and a
+cap of k, instead of sorting all n, and exactly ``sorted(items, key)[:k]``,
+ties included.
+
+Per-sleeve caps (sleeve_code → cap, ``settings.engine_sleeve_sell_caps`` /
+``engine_sleeve_buy_caps``) first limit each capped sleeve to its own first
+positions in that order; the overall cap then applies to what is left.
+Positions in sleeves without a cap (or without a sleeve) are only subject to
+the overall cap.
+"""
+from __future__ import annotations
+
+import heapq
+from collections import defaultdict
+from typing import Any, Callable, Mapping, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+_CAP_WARNINGS = {
+    "SELL": "Overweight assets{scope} exceed sell cap ({cap}); limiting sells to highest drift",
+    "BUY": "Underweight assets{scope} exceed buy cap ({cap}); limiting buys to lowest drift",
+}
+
+
+def select_candidates(
+    items: Sequence[T],
+    action: str,
+    cap: int,
+    key: Callable[[T], Any],
+    sleeve_of: Callable[[T], Optional[str]],
+    sleeve_caps: Optional[Mapping[str, int]],
+    warnings: list[str],
+) -> list[T]:
+    """The *items* to trade for *action* (SELL / BUY), in *key* order.
+
+    Appends a warning per sleeve over its cap (by sleeve code) and one when
+    the overall *cap* is exceeded.
+    """
+    if sleeve_caps:
+        items = _cap_sleeves(items, action, key, sleeve_of, sleeve_caps, warnings)
+    if len(items) > cap:
+        warnings.append(_CAP_WARNINGS[action].format(scope="", cap=cap))
+    return first_by_key(items, cap, key)
+
+
+def first_by_key(items: Sequence[T], limit: int, key: Callable[[T], Any]) -> list[T]:
+    """``sorted(items, key=key)[:limit]`` in O(n log limit)."""
+    if limit < 0:
+        return sorted(items, key=key)[:limit]  # slice semantics
+    return heapq.nsmallest(limit, items, key=key)
+
+
+def _cap_sleeves(
+    items: Sequence[T],
+    action: str,
+    key: Callable[[T], Any],
+    sleeve_of: Callable[[T], Optional[str]],
+    sleeve_caps: Mapping[str, int],
+    warnings: list[str],
+) -> list[T]:
+    kept: list[T] = []
+    by_sleeve: dict[str, list[T]] = defaultdict(list)
+    for item in items:
+        sleeve = sleeve_of(item)
+        if sleeve is not None and sleeve in sleeve_caps:
+            by_sleeve[sleeve].append(item)
+        else:
+            kept.append(item)
+
+    for sleeve in sorted(by_sleeve):
+        members = by_sleeve[sleeve]
+        cap = max(sleeve_caps[sleeve], 0)
+        if len(members) > cap:
+            warnings.append(_CAP_WARNINGS[action].format(scope=f" in sleeve {sleeve}", cap=cap))
+            members = first_by_key(members, cap, key)
+        kept.extend(members)
+    return kept
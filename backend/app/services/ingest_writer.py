@@ -0,0 +1,149 @@
+"""
+Batched Ingest Writer
+
+Writes price_points and fx_rates for a whole ingest run as multi-row
+``INSERT ... ON CONFLICT DO NOTHING RETURNING`` statements instead of one
+statement per quote.  RETURNING reports exactly which rows were new, so
+inserted counts stay accurate and latest_prices is upserted only from rows
+that actually landed.
+
+Rows are sent in chunks of ``INSERT_CHUNK_SIZE`` to stay well below the
+Postgres bind-parameter limit (65535) on very large watchlists.
+
+CRITICAL: Uses externally-managed DB sessions.  Nothing here commits.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+import uuid
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.domain.models import FxRate, PricePoint
+from app.services.latest_prices import latest_price_row, upsert_latest_prices
+
+
+INSERT_CHUNK_SIZE = 1000
+
+_PRICE_CONFLICT_COLUMNS = ["listing_id", "as_of", "source_id", "is_close"]
+_FX_CONFLICT_COLUMNS = ["base_ccy", "quote_ccy", "as_of", "source_id"]
+
+
+def price_point_row(
+    *,
+    listing_id: uuid.UUID | str,
+    as_of: datetime,
+    price: Decimal,
+    currency: Optional[str],
+    is_close: bool,
+    source_id: str,
+    raw: Optional[dict] = None,
+) -> dict[str, Any]:
+    """Build a price_points row dict with a fresh primary key."""
+    return {
+        "price_point_id": uuid.uuid4(),
+        "listing_id": listing_id if isinstance(listing_id, uuid.UUID) else uuid.UUID(str(listing_id)),
+        "as_of": as_of,
+        "price": price,
+        "currency": currency,
+        "is_close": is_close,
+        "source_id": source_id,
+        "raw": raw,
+    }
+
+
+def fx_rate_row(
+    *,
+    base_ccy: str,
+    quote_ccy: str,
+    as_of: datetime,
+    rate: Decimal,
+    source_id: str,
+) -> dict[str, Any]:
+    """Build an fx_rates row dict with a fresh primary key."""
+    return {
+        "fx_rate_id": uuid.uuid4(),
+        "base_ccy": base_ccy,
+        "quote_ccy": quote_ccy,
+        "as_of": as_of,
+        "rate": rate,
+        "source_id": source_id,
+    }
+
+
+def insert_price_points(
+    db: Session,
+    rows: Iterable[dict[str, Any]],
+    *,
+    chunk_size: int = INSERT_CHUNK_SIZE,
+) -> int:
+    """Insert price_points idempotently and keep latest_prices in step.
+
+    Returns:
+        Number of rows newly inserted (conflicting rows are skipped).
+    """
+    inserted = 0
+    latest_rows: list[dict[str, Any]] = []
+
+    for chunk in _chunks(list(rows), chunk_size):
+        stmt = (
+            insert(PricePoint)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=_PRICE_CONFLICT_COLUMNS)
+            .returning(
+                PricePoint.price_point_id,
+                PricePoint.listing_id,
+                PricePoint.is_close,
+                PricePoint.source_id,
+                PricePoint.as_of,
+                PricePoint.price,
+                PricePoint.currency,
+            )
+        )
+        for row in db.execute(stmt):
+            inserted += 1
+            latest_rows.append(
+                latest_price_row(
+                    price_point_id=row.price_point_id,
+                    listing_id=row.listing_id,
+                    is_close=row.is_close,
+                    source_id=row.source_id,
+                    as_of=row.as_of,
+                    price=row.price,
+                    currency=row.currency,
+                )
+            )
+
+    upsert_latest_prices(db, latest_rows)
+    return inserted
+
+
+def insert_fx_rates(
+    db: Session,
+    rows: Iterable[dict[str, Any]],
+    *,
+    chunk_size: int = INSERT_CHUNK_SIZE,
+) -> int:
+    """Insert fx_rates idempotently.
+
+    Returns:
+        Number of rows newly inserted (conflicting rows are skipped).
+    """
+    inserted = 0
+    for chunk in _chunks(list(rows), chunk_size):
+        stmt = (
+            insert(FxRate)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=_FX_CONFLICT_COLUMNS)
+            .returning(FxRate.fx_rate_id)
+        )
+        inserted += len(db.execute(stmt).all())
+    return inserted
+
+
+def _chunks(rows: list[dict[str, Any]], size: int) -> Iterable[list[dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
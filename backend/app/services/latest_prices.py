@@ -0,0 +1,170 @@
+"""
+Latest Prices Maintenance
+
+Keeps the ``latest_prices`` table (one row per listing × is_close × source)
+in step with ``price_points``.
+
+Writers call ``upsert_latest_prices`` with the rows they just inserted, in
+the same transaction as the ``price_points`` insert.  ``rebuild_latest_prices``
+backfills the table from history (after a migration, a restore, or a manual
+repair).
+
+CRITICAL: Uses externally-managed DB sessions.  Neither function commits.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+import uuid
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.domain.models import LatestPrice, PricePoint
+
+
+_KEY_COLUMNS = ["listing_id", "is_close", "source_id"]
+
+
+def latest_price_row(
+    *,
+    price_point_id: uuid.UUID,
+    listing_id: uuid.UUID | str,
+    is_close: bool,
+    source_id: str,
+    as_of: datetime,
+    price: Decimal,
+    currency: Optional[str],
+) -> dict[str, Any]:
+    """Build a latest_prices row dict from price point fields."""
+    return {
+        "listing_id": listing_id if isinstance(listing_id, uuid.UUID) else uuid.UUID(str(listing_id)),
+        "is_close": is_close,
+        "source_id": source_id,
+        "price_point_id": price_point_id,
+        "as_of": as_of,
+        "price": price,
+        "currency": currency,
+    }
+
+
+def upsert_latest_prices(db: Session, rows: Iterable[dict[str, Any]]) -> int:
+    """Upsert newly inserted price points into ``latest_prices``.
+
+    Rows sharing a key are collapsed to the newest ``as_of`` first, because
+    Postgres refuses to update the same target row twice in one statement.
+    An existing row is only replaced when the incoming ``as_of`` is newer,
+    so out-of-order backfills never move the latest price backwards.
+
+    Returns:
+        Number of rows sent to the database (after collapsing).
+    """
+    newest: dict[tuple, dict[str, Any]] = {}
+    for row in rows:
+        key = (row["listing_id"], row["is_close"], row["source_id"])
+        current = newest.get(key)
+        if current is None or row["as_of"] > current["as_of"]:
+            newest[key] = row
+
+    if not newest:
+        return 0
+
+    stmt = insert(LatestPrice).values(list(newest.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=_KEY_COLUMNS,
+        set_={
+            "price_point_id": stmt.excluded.price_point_id,
+            "as_of": stmt.excluded.as_of,
+            "price": stmt.excluded.price,
+            "currency": stmt.excluded.currency,
+            "updated_at": func.now(),
+        },
+        where=LatestPrice.as_of < stmt.excluded.as_of,
+    )
+    db.execute(stmt)
+    return len(newest)
+
+
+def upsert_latest_from_price_points(db: Session, price_points: Iterable[PricePoint]) -> int:
+    """Convenience wrapper for callers holding ORM PricePoint objects."""
+    return upsert_latest_prices(
+        db,
+        (
+            latest_price_row(
+                price_point_id=pp.price_point_id,
+                listing_id=pp.listing_id,
+                is_close=pp.is_close,
+                source_id=pp.source_id,
+                as_of=pp.as_of,
+                price=pp.price,
+                currency=pp.currency,
+            )
+            for pp in price_points
+        ),
+    )
+
+
+def rebuild_latest_prices(
+    db: Session,
+    listing_ids: Optional[Iterable[uuid.UUID]] = None,
+) -> int:
+    """Rebuild ``latest_prices`` from ``price_points`` history.
+
+    Args:
+        db:          SQLAlchemy session (caller commits).
+        listing_ids: Restrict the rebuild to these listings; ``None`` rebuilds
+                     the whole table.
+
+    Returns:
+        Number of latest_prices rows written.
+    """
+    scoped_ids = None
+    if listing_ids is not None:
+        scoped_ids = [
+            lid if isinstance(lid, uuid.UUID) else uuid.UUID(str(lid))
+            for lid in listing_ids
+        ]
+        if not scoped_ids:
+            return 0
+
+    clear_stmt = delete(LatestPrice)
+    history = select(
+        PricePoint.listing_id,
+        PricePoint.is_close,
+        PricePoint.source_id,
+        PricePoint.price_point_id,
+        PricePoint.as_of,
+        PricePoint.price,
+        PricePoint.currency,
+    )
+    if scoped_ids is not None:
+        clear_stmt = clear_stmt.where(LatestPrice.listing_id.in_(scoped_ids))
+        history = history.where(PricePoint.listing_id.in_(scoped_ids))
+
+    history = history.distinct(
+        PricePoint.listing_id, PricePoint.is_close, PricePoint.source_id
+    ).order_by(
+        PricePoint.listing_id,
+        PricePoint.is_close,
+        PricePoint.source_id,
+        PricePoint.as_of.desc(),
+    )
+
+    db.execute(clear_stmt)
+    result = db.execute(
+        insert(LatestPrice).from_select(
+            [
+                "listing_id",
+                "is_close",
+                "source_id",
+                "price_point_id",
+                "as_of",
+                "price",
+                "currency",
+            ],
+            history,
+        )
+    )
+    return result.rowcount
@@ -40,6 +40,7 @@ from app.schemas.ledger import (
     CashSnapshotResponse,
     HoldingSnapshotResponse,
 )
+from app.services.drift_monitor import track_ledger_entries
 from app.services.snapshots import apply_cash_delta, apply_holding_delta
 
 
@@ -290,6 +291,8 @@ def post_ledger_batch(
 
     if cash_snapshot is None:
         raise StateError("Cash snapshot not created after posting")
+    # One cash version per batch (the row stays locked until commit).
+    ledger_version = int(cash_snapshot.version_no)
 
     for listing_id in listing_ids:
         holding = db.query(HoldingSnapshot).filter(
@@ -310,6 +313,8 @@ def post_ledger_batch(
     for entry in entry_models:
         db.refresh(entry)
 
+    track_ledger_entries(db, portfolio_id, entry_models, ledger_version)
+
     return _batch_to_response(batch)
 
 
@@ -403,7 +408,8 @@ def reverse_ledger_entries(
 
     total_cash_delta = sum(entry.net_cash_delta_gbp for entry in reversal_entries)
     first_entry_id = reversal_entries[0].entry_id
-    apply_cash_delta(db, portfolio_uuid, total_cash_delta, first_entry_id)
+    cash_snapshot = apply_cash_delta(db, portfolio_uuid, total_cash_delta, first_entry_id)
+    ledger_version = int(cash_snapshot.version_no)
 
     listing_ids = sorted(set(
         entry.listing_id for entry in reversal_entries
@@ -476,6 +482,8 @@ def reverse_ledger_entries(
     for entry in reversal_entries:
         db.refresh(entry)
 
+    track_ledger_entries(db, portfolio_id, reversal_entries, ledger_version)
+
     return _batch_to_response(batch)
 
 
@@ -5,7 +5,7 @@ Defines the abstract contract for market data providers to enable
 provider independence and testability.
 """
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Protocol, Sequence
 from decimal import Decimal
@@ -49,6 +49,34 @@ class FxQuote:
     raw: dict | None
 
 
+@dataclass(frozen=True)
+class ListingRef:
+    """What a provider needs to fetch one listing in a batch.
+    
+    Attributes:
+        listing_id: UUID of the instrument listing (echoed on the quotes)
+        ticker: Provider-facing symbol
+        trading_currency: Expected trading currency, if known
+    """
+    listing_id: str
+    ticker: str
+    trading_currency: str | None = None
+
+
+@dataclass
+class BatchQuotes:
+    """Result of a batched fetch.
+    
+    Attributes:
+        price_quotes: Quotes keyed by ListingRef.listing_id
+        fx_quotes: FX quotes for the requested pairs
+        failures: Listings / pairs the provider returned no data for
+    """
+    price_quotes: list[PriceQuote] = field(default_factory=list)
+    fx_quotes: list[FxQuote] = field(default_factory=list)
+    failures: list[FetchFailure] = field(default_factory=list)
+
+
 class MarketDataAdapter(Protocol):
     """Protocol defining the market data provider interface.
     
@@ -97,6 +125,33 @@ class MarketDataAdapter(Protocol):
             MarketDataError: If the provider request fails
         """
         ...
+    
+    async def fetch_batch(
+        self,
+        listings: Sequence[ListingRef],
+        fx_pairs: Sequence[tuple[str, str]],
+        *,
+        want_close: bool,
+        want_intraday: bool,
+    ) -> BatchQuotes:
+        """Fetch prices and FX rates for a whole job in O(1) provider calls.
+        
+        This is the ingest path.  Unlike fetch_prices, listings carry their
+        ticker, and quotes come back keyed by listing_id.
+        
+        Args:
+            listings: Listings to price
+            fx_pairs: List of (base_ccy, quote_ccy) tuples
+            want_close: Whether to include EOD close prices
+            want_intraday: Whether to include intraday prices
+            
+        Returns:
+            BatchQuotes; items without data are reported in ``failures``
+            
+        Raises:
+            MarketDataError: If the provider request as a whole fails
+        """
+        ...
 
 
 class MarketDataError(Exception):
@@ -121,3 +176,14 @@ class InvalidResponseError(MarketDataError):
 class RateLimitError(MarketDataError):
     """Raised when the provider rate limit is exceeded."""
     pass
+
+
+@dataclass(frozen=True)
+class FetchFailure:
+    """A single listing (or FX pair) a provider could not fetch.
+
+    Providers that fan out per symbol report these instead of failing the
+    whole batch; ``key`` is the listing_id / ticker or ``"BASE/QUOTE"``.
+    """
+    key: str
+    error: MarketDataError
@@ -4,6 +4,11 @@ Market Data Ingestion Pipeline
 Fetches prices and FX rates for a portfolio's monitored constituents
 and writes them idempotently to the database.
 
+``ingest_prices_for_all_portfolios`` does the same for the union of
+monitored listings across every portfolio: each distinct listing and FX
+pair is fetched and written once, then sliced back into one IngestResult
+per portfolio for the DQ gate.
+
 CRITICAL: Uses externally-managed DB sessions (NOT FastAPI Depends).
 Caller (worker) is responsible for commit/rollback.
 """
@@ -12,16 +17,26 @@ from dataclasses import dataclass, field
 from decimal import Decimal
 
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert
 
 from app.domain.models import (
-    PricePoint,
-    FxRate,
     PortfolioConstituent,
     InstrumentListing,
     Portfolio,
 )
-from app.services.market_data_adapter import MarketDataAdapter, PriceQuote, FxQuote
+from app.services.ingest_writer import (
+    fx_rate_row,
+    insert_fx_rates,
+    insert_price_points,
+    price_point_row,
+)
+from app.services.market_data_adapter import (
+    BatchQuotes,
+    FetchFailure,
+    FxQuote,
+    ListingRef,
+    MarketDataAdapter,
+    PriceQuote,
+)
 
 
 @dataclass
@@ -39,6 +54,118 @@ class IngestResult:
     errors: list[str] = field(default_factory=list)
 
 
+@dataclass
+class SharedIngestResult:
+    """Result of a cross-portfolio ingestion run."""
+
+    run_id: str
+    job_id: str
+    portfolios: dict[str, IngestResult]  # portfolio_id → that portfolio's slice
+    listings: list[InstrumentListing]    # distinct listings fetched
+    fx_pairs: list[tuple[str, str]]
+    price_quotes: list[PriceQuote]
+    fx_quotes: list[FxQuote]
+    prices_inserted: int
+    fx_inserted: int
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _FetchOutcome:
+    price_quotes: list[PriceQuote]
+    fx_quotes: list[FxQuote]
+    failures: list[FetchFailure]
+    prices_inserted: int
+    fx_inserted: int
+    errors: list[str]
+
+
+def _fx_pairs(base_currency: str, listings: list[InstrumentListing]) -> list[tuple[str, str]]:
+    trading_currencies = {listing.trading_currency for listing in listings}
+    return [(base_currency, ccy) for ccy in trading_currencies if ccy != base_currency]
+
+
+async def _fetch_and_write(
+    db: Session,
+    adapter: MarketDataAdapter,
+    listings: list[InstrumentListing],
+    fx_pairs: list[tuple[str, str]],
+    *,
+    want_close: bool,
+    want_intraday: bool,
+) -> _FetchOutcome:
+    """Fetch ``listings`` and ``fx_pairs`` in one batched call and write them."""
+    errors: list[str] = []
+
+    listing_refs = [
+        ListingRef(
+            listing_id=str(listing.listing_id),
+            ticker=listing.ticker,
+            trading_currency=listing.trading_currency,
+        )
+        for listing in listings
+    ]
+    try:
+        batch = await adapter.fetch_batch(
+            listing_refs,
+            fx_pairs,
+            want_close=want_close,
+            want_intraday=want_intraday,
+        )
+    except Exception as exc:
+        errors.append(f"Market data fetch failed: {exc}")
+        batch = BatchQuotes()
+
+    price_quotes = batch.price_quotes
+    fx_quotes = batch.fx_quotes
+
+    # Write price_points IDEMPOTENTLY (one multi-row ON CONFLICT DO NOTHING;
+    # latest_prices is upserted from the RETURNING rows)
+    prices_inserted = insert_price_points(
+        db,
+        (
+            price_point_row(
+                listing_id=quote.listing_id,
+                as_of=quote.as_of,
+                price=Decimal(quote.price),
+                currency=quote.currency,
+                is_close=quote.is_close,
+                source_id=adapter.source_id,
+                raw=quote.raw,
+            )
+            for quote in price_quotes
+        ),
+    )
+
+    # Write fx_rates IDEMPOTENTLY (one multi-row ON CONFLICT DO NOTHING)
+    fx_inserted = insert_fx_rates(
+        db,
+        (
+            fx_rate_row(
+                base_ccy=fx.base_ccy,
+                quote_ccy=fx.quote_ccy,
+                as_of=fx.as_of,
+                rate=Decimal(fx.rate),
+                source_id=adapter.source_id,
+            )
+            for fx in fx_quotes
+        ),
+    )
+
+    return _FetchOutcome(
+        price_quotes=price_quotes,
+        fx_quotes=fx_quotes,
+        failures=batch.failures,
+        prices_inserted=prices_inserted,
+        fx_inserted=fx_inserted,
+        errors=errors,
+    )
+
+
+def _failure_messages(failures: list[FetchFailure]) -> list[str]:
+    return [f"Fetch failed for {failure.key}: {failure.error}" for failure in failures]
+
+
 async def ingest_prices_for_portfolio(
     db: Session,
     adapter: MarketDataAdapter,
@@ -101,74 +228,21 @@ async def ingest_prices_for_portfolio(
         )
 
     listings: list[InstrumentListing] = [row.InstrumentListing for row in constituents]
-    listing_ids: list[str] = [str(listing.listing_id) for listing in listings]
 
     # 3. Determine FX pairs needed (portfolio base currency vs. listing currencies)
-    base_currency: str = portfolio.base_currency
-    trading_currencies = {listing.trading_currency for listing in listings}
-    fx_pairs = [(base_currency, ccy) for ccy in trading_currencies if ccy != base_currency]
+    fx_pairs = _fx_pairs(portfolio.base_currency, listings)
 
-    # 4. Fetch prices from adapter
-    try:
-        price_quotes = await adapter.fetch_prices(
-            listing_ids,
-            want_close=want_close,
-            want_intraday=want_intraday,
-        )
-    except Exception as exc:
-        errors.append(f"Price fetch failed: {exc}")
-        price_quotes = []
-
-    # 5. Fetch FX rates from adapter
-    try:
-        fx_quotes = await adapter.fetch_fx_rates(fx_pairs) if fx_pairs else []
-    except Exception as exc:
-        errors.append(f"FX fetch failed: {exc}")
-        fx_quotes = []
-
-    # 6. Write price_points IDEMPOTENTLY (ON CONFLICT DO NOTHING)
-    prices_inserted = 0
-    for quote in price_quotes:
-        stmt = (
-            insert(PricePoint)
-            .values(
-                price_point_id=uuid.uuid4(),
-                listing_id=quote.listing_id,
-                as_of=quote.as_of,
-                price=Decimal(quote.price),
-                currency=quote.currency,
-                is_close=quote.is_close,
-                source_id=adapter.source_id,
-                raw=quote.raw,
-            )
-            .on_conflict_do_nothing(
-                index_elements=["listing_id", "as_of", "source_id", "is_close"]
-            )
-        )
-        result = db.execute(stmt)
-        if result.rowcount > 0:
-            prices_inserted += 1
-
-    # 7. Write fx_rates IDEMPOTENTLY (ON CONFLICT DO NOTHING)
-    fx_inserted = 0
-    for fx in fx_quotes:
-        stmt = (
-            insert(FxRate)
-            .values(
-                fx_rate_id=uuid.uuid4(),
-                base_ccy=fx.base_ccy,
-                quote_ccy=fx.quote_ccy,
-                as_of=fx.as_of,
-                rate=Decimal(fx.rate),
-                source_id=adapter.source_id,
-            )
-            .on_conflict_do_nothing(
-                index_elements=["base_ccy", "quote_ccy", "as_of", "source_id"]
-            )
-        )
-        result = db.execute(stmt)
-        if result.rowcount > 0:
-            fx_inserted += 1
+    # 4–6. Fetch prices and FX rates in one batched call, write idempotently
+    outcome = await _fetch_and_write(
+        db,
+        adapter,
+        listings,
+        fx_pairs,
+        want_close=want_close,
+        want_intraday=want_intraday,
+    )
+    errors.extend(outcome.errors)
+    errors.extend(_failure_messages(outcome.failures))
 
     # Note: Caller (worker) handles commit/rollback — do NOT commit here.
 
@@ -176,10 +250,130 @@ async def ingest_prices_for_portfolio(
         run_id=run_id,
         portfolio_id=portfolio_id,
         job_id=job_id,
-        price_quotes=price_quotes,
-        fx_quotes=fx_quotes,
+        price_quotes=outcome.price_quotes,
+        fx_quotes=outcome.fx_quotes,
         listings=listings,
-        prices_inserted=prices_inserted,
-        fx_inserted=fx_inserted,
+        prices_inserted=outcome.prices_inserted,
+        fx_inserted=outcome.fx_inserted,
         errors=errors,
     )
+
+
+async def ingest_prices_for_all_portfolios(
+    db: Session,
+    adapter: MarketDataAdapter,
+    job_id: str,
+    *,
+    want_close: bool = True,
+    want_intraday: bool = True,
+) -> SharedIngestResult:
+    """
+    Ingest market data once for every monitored listing across all portfolios.
+
+    Provider calls and price_points writes scale with the number of distinct
+    listings (and FX pairs), not portfolios × listings.  Each portfolio's
+    IngestResult holds only its own listings, quotes, FX pairs and fetch
+    errors; insert counts are reported once, on the SharedIngestResult.
+
+    CRITICAL: Uses externally-provided db session (worker manages lifecycle).
+
+    Args:
+        db: SQLAlchemy Session (provided by worker, NOT FastAPI Depends)
+        adapter: MarketDataAdapter implementation
+        job_id: Job ID from queue for correlation
+        want_close: Whether to fetch EOD close prices
+        want_intraday: Whether to fetch intraday prices
+
+    Returns:
+        SharedIngestResult with per-portfolio slices
+    """
+    run_id = str(uuid.uuid4())
+
+    rows = (
+        db.query(
+            PortfolioConstituent.portfolio_id,
+            Portfolio.base_currency,
+            InstrumentListing,
+        )
+        .join(Portfolio, Portfolio.portfolio_id == PortfolioConstituent.portfolio_id)
+        .join(
+            InstrumentListing,
+            PortfolioConstituent.listing_id == InstrumentListing.listing_id,
+        )
+        .filter(PortfolioConstituent.is_monitored == True)  # noqa: E712
+        .all()
+    )
+
+    listings_by_id: dict[str, InstrumentListing] = {}
+    portfolio_listings: dict[str, list[InstrumentListing]] = {}
+    portfolio_base: dict[str, str] = {}
+    for portfolio_id, base_currency, listing in rows:
+        key = str(portfolio_id)
+        listings_by_id.setdefault(str(listing.listing_id), listing)
+        portfolio_listings.setdefault(key, []).append(listing)
+        portfolio_base[key] = base_currency
+
+    portfolio_pairs = {
+        key: _fx_pairs(portfolio_base[key], listings)
+        for key, listings in portfolio_listings.items()
+    }
+    fx_pairs = sorted({pair for pairs in portfolio_pairs.values() for pair in pairs})
+    listings = list(listings_by_id.values())
+
+    if not listings:
+        return SharedIngestResult(
+            run_id=run_id,
+            job_id=job_id,
+            portfolios={},
+            listings=[],
+            fx_pairs=[],
+            price_quotes=[],
+            fx_quotes=[],
+            prices_inserted=0,
+            fx_inserted=0,
+            errors=["No monitored constituents found"],
+        )
+
+    outcome = await _fetch_and_write(
+        db,
+        adapter,
+        listings,
+        fx_pairs,
+        want_close=want_close,
+        want_intraday=want_intraday,
+    )
+
+    portfolios: dict[str, IngestResult] = {}
+    for key, own_listings in portfolio_listings.items():
+        listing_ids = {str(listing.listing_id) for listing in own_listings}
+        pairs = set(portfolio_pairs[key])
+        pair_keys = {f"{base}/{quote}" for base, quote in pairs}
+        portfolios[key] = IngestResult(
+            run_id=run_id,
+            portfolio_id=key,
+            job_id=job_id,
+            price_quotes=[q for q in outcome.price_quotes if q.listing_id in listing_ids],
+            fx_quotes=[
+                q for q in outcome.fx_quotes if (q.base_ccy, q.quote_ccy) in pairs
+            ],
+            listings=own_listings,
+            prices_inserted=0,
+            fx_inserted=0,
+            errors=outcome.errors + _failure_messages([
+                f for f in outcome.failures
+                if f.key in listing_ids or f.key in pair_keys
+            ]),
+        )
+
+    return SharedIngestResult(
+        run_id=run_id,
+        job_id=job_id,
+        portfolios=portfolios,
+        listings=listings,
+        fx_pairs=fx_pairs,
+        price_quotes=outcome.price_quotes,
+        fx_quotes=outcome.fx_quotes,
+        prices_inserted=outcome.prices_inserted,
+        fx_inserted=outcome.fx_inserted,
+        errors=outcome.errors + _failure_messages(outcome.failures),
+    )
@@ -14,13 +14,13 @@ from decimal import Decimal
 from typing import Sequence
 
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import insert
 
 from app.domain.models import (
     PricePoint,
     InstrumentListing,
     HoldingSnapshot,
 )
+from app.services.ingest_writer import insert_price_points, price_point_row
 from app.services.providers.yfinance_adapter import YFinanceAdapter
 
 
@@ -132,6 +132,10 @@ async def sync_portfolio_prices(
     prices_inserted = 0
     prices_fetched = 0
     
+    # Listing currencies seed the adapter's metadata cache, so the batch
+    # below does not need a per-ticker currency lookup.
+    adapter.seed_currencies((listing.ticker, listing.trading_currency) for listing in listings)
+    
     try:
         # Fetch all prices in a single batch request
         price_data = await asyncio.to_thread(
@@ -140,18 +144,16 @@ async def sync_portfolio_prices(
         )
         
         # Process the batch results
+        rows = []
         for ticker, (price, as_of, currency) in price_data.items():
             listing_id_str = ticker_to_listing.get(ticker)
             if not listing_id_str:
                 continue
             
             prices_fetched += 1
-            
-            stmt = (
-                insert(PricePoint)
-                .values(
-                    price_point_id=uuid.uuid4(),
-                    listing_id=uuid.UUID(listing_id_str),
+            rows.append(
+                price_point_row(
+                    listing_id=listing_id_str,
                     as_of=as_of,
                     price=price,
                     currency=currency,
@@ -159,14 +161,10 @@ async def sync_portfolio_prices(
                     source_id=adapter.source_id,
                     raw={"ticker": ticker, "batch_fetch": True},
                 )
-                .on_conflict_do_nothing(
-                    index_elements=["listing_id", "as_of", "source_id", "is_close"]
-                )
             )
-            
-            result = db.execute(stmt)
-            if result.rowcount > 0:
-                prices_inserted += 1
+        
+        # Single multi-row insert; also keeps latest_prices in step
+        prices_inserted = insert_price_points(db, rows)
         
         # Report tickers that failed to fetch
         failed_tickers = set(unique_tickers) - set(price_data.keys())
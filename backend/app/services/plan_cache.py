@@ -0,0 +1,338 @@
+"""
+Trade Plan Cache
+
+A trade plan is fully determined by the cash snapshot ``version_no``, the
+holding ``version_no``s, the trusted-close ``price_point_id``s, the
+allocation ``policy_hash`` and the engine parameters
+(``engine_calculator.plan_parameters``).  ``inputs_cache_key`` digests
+exactly those from ``gather_engine_inputs`` output (``plan_cache_key`` from
+a stored audit payload); ``probe_plan_cache_key`` derives the same digest
+from a handful of column-only queries, so a dashboard polling /engine/plan
+pays a version check instead of the full gather → hash → batch lookup path
+on every call.
+
+The probe returns None whenever the full path is needed to produce the
+right answer: the portfolio is frozen, or a held listing has no trusted
+close or a stale one (those requests return a blocked response, which is
+never cached).
+
+Backends (``settings.engine_plan_cache_backend``):
+  - ``memory``: per-process TTL + LRU dict (default);
+  - ``redis``:  shared across API processes; TTL per entry plus a sorted-set
+    recency index trimmed to ``engine_plan_cache_max_entries``;
+  - ``off``:    no caching.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Optional, Protocol
+import uuid
+
+import redis
+from sqlalchemy import true
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.domain.models import (
+    CashSnapshot,
+    FreezeState,
+    HoldingSnapshot,
+    LatestPrice,
+    PortfolioPolicyAllocation,
+)
+from app.services.engine_calculator import plan_parameters
+from app.services.engine_inputs import EngineInputs
+from app.services.price_lookup import (
+    PRICE_STALENESS_THRESHOLD,
+    get_listing_exchanges,
+    is_close_stale,
+)
+
+logger = get_logger(__name__)
+
+REDIS_KEY_PREFIX = "ta:plan:"
+REDIS_LRU_KEY = "ta:plan:lru"
+
+
+class PlanCache(Protocol):
+    def get(self, key: str) -> Optional[dict[str, Any]]: ...
+
+    def put(self, key: str, value: dict[str, Any]) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+# ─── Keys ────────────────────────────────────────────────────────────────────
+
+
+def _digest(
+    portfolio_id: str,
+    cash_version: Optional[int],
+    holding_versions: Iterable[tuple[str, Optional[int]]],
+    price_point_ids: Iterable[str],
+    policy_hashes: Iterable[str],
+) -> str:
+    payload = [
+        cash_version,
+        sorted(holding_versions),
+        sorted(price_point_ids),
+        sorted(set(policy_hashes)),
+        plan_parameters(),
+    ]
+    encoded = json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str)
+    return f"{portfolio_id}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+
+def inputs_cache_key(inputs: EngineInputs) -> str:
+    """Cache key for gathered EngineInputs (read off the typed rows)."""
+    cash = inputs.cash_snapshot
+    return _digest(
+        str(inputs.portfolio_id),
+        int(cash.version_no) if cash is not None and cash.version_no is not None else None,
+        (
+            (str(h.listing_id), int(h.version_no) if h.version_no is not None else None)
+            for h in inputs.holdings
+        ),
+        (str(close.price_point_id) for close, _ in inputs.closes_used),
+        (a.policy_hash for a in inputs.allocations),
+    )
+
+
+def plan_cache_key(snapshot_data: dict[str, Any]) -> str:
+    """Cache key for the inputs in an audit payload (EngineInputs.audit_payload)."""
+    return _digest(
+        snapshot_data["portfolio_id"],
+        snapshot_data["cash_snapshot"].get("version_no"),
+        ((h["listing_id"], h.get("version_no")) for h in snapshot_data["holding_snapshots"]),
+        (p["price_point_id"] for p in snapshot_data["price_points_used"]),
+        (a["policy_hash"] for a in snapshot_data["allocation_map"]),
+    )
+
+
+def probe_plan_cache_key(
+    db: Session,
+    portfolio_id: uuid.UUID | str,
+    as_of: datetime,
+) -> Optional[str]:
+    """The plan_cache_key the full gather would produce now, or None when
+    the request must take the full path (frozen / missing or stale close)."""
+    portfolio_uuid = uuid.UUID(str(portfolio_id))
+
+    frozen = (
+        db.query(FreezeState.freeze_id)
+        .filter(
+            FreezeState.portfolio_id == portfolio_uuid,
+            FreezeState.is_frozen == true(),
+            FreezeState.cleared_at.is_(None),
+        )
+        .first()
+    )
+    if frozen is not None:
+        return None
+
+    cash_version = (
+        db.query(CashSnapshot.version_no)
+        .filter(CashSnapshot.portfolio_id == portfolio_uuid)
+        .scalar()
+    )
+    holdings = (
+        db.query(HoldingSnapshot.listing_id, HoldingSnapshot.version_no)
+        .filter(HoldingSnapshot.portfolio_id == portfolio_uuid)
+        .all()
+    )
+    policy_hashes = [
+        policy_hash
+        for (policy_hash,) in db.query(PortfolioPolicyAllocation.policy_hash)
+        .filter(PortfolioPolicyAllocation.portfolio_id == portfolio_uuid)
+        .distinct()
+        .all()
+    ]
+
+    price_point_ids: list[str] = []
+    listing_ids = [listing_id for listing_id, _ in holdings]
+    if listing_ids:
+        # Same selection as price_lookup.get_latest_closes.
+        closes = (
+            db.query(LatestPrice.listing_id, LatestPrice.price_point_id, LatestPrice.as_of)
+            .filter(
+                LatestPrice.listing_id.in_(listing_ids),
+                LatestPrice.is_close == true(),
+            )
+            .distinct(LatestPrice.listing_id)
+            .order_by(LatestPrice.listing_id, LatestPrice.as_of.desc())
+            .all()
+        )
+        if len(closes) < len(set(listing_ids)):
+            return None
+        # Same verdict as price_lookup.evaluate_trusted_closes.
+        aged_cutoff = _as_utc(as_of) - PRICE_STALENESS_THRESHOLD
+        exchanges = get_listing_exchanges(
+            db,
+            (listing_id for listing_id, _, close_as_of in closes if _as_utc(close_as_of) < aged_cutoff),
+        )
+        for listing_id, price_point_id, close_as_of in closes:
+            if is_close_stale(close_as_of, as_of, exchanges.get(listing_id)):
+                return None
+            price_point_ids.append(str(price_point_id))
+
+    return _digest(
+        str(portfolio_uuid),
+        int(cash_version) if cash_version is not None else None,
+        ((str(listing_id), int(version) if version is not None else None) for listing_id, version in holdings),
+        price_point_ids,
+        policy_hashes,
+    )
+
+
+# ─── Backends ────────────────────────────────────────────────────────────────
+
+
+class LocalPlanCache:
+    """Thread-safe TTL + LRU cache of key → plan response body."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisPlanCache:
+    """Plan cache shared by every API process through Redis."""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        *,
+        client: Optional[redis.Redis] = None,
+        ttl_seconds: int,
+        max_entries: int,
+    ) -> None:
+        self.client = client or redis.Redis.from_url(
+            redis_url or settings.redis_url, decode_responses=True
+        )
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        raw = self.client.get(REDIS_KEY_PREFIX + key)
+        if raw is None:
+            return None
+        self.client.zadd(REDIS_LRU_KEY, {key: time.time()})
+        return json.loads(raw)
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(REDIS_KEY_PREFIX + key, json.dumps(value), ex=self.ttl_seconds)
+            pipe.zadd(REDIS_LRU_KEY, {key: time.time()})
+            # Entries idle past the TTL have expired on their own.
+            pipe.zremrangebyscore(REDIS_LRU_KEY, "-inf", time.time() - self.ttl_seconds)
+            pipe.zcard(REDIS_LRU_KEY)
+            size = pipe.execute()[-1]
+        excess = size - self.max_entries
+        if excess > 0:
+            evicted = [member for member, _ in self.client.zpopmin(REDIS_LRU_KEY, excess)]
+            if evicted:
+                self.client.delete(*(REDIS_KEY_PREFIX + member for member in evicted))
+
+    def clear(self) -> None:
+        members = self.client.zrange(REDIS_LRU_KEY, 0, -1)
+        if members:
+            self.client.delete(*(REDIS_KEY_PREFIX + member for member in members))
+        self.client.delete(REDIS_LRU_KEY)
+
+
+_plan_cache: Optional[PlanCache] = None
+
+
+def get_plan_cache() -> Optional[PlanCache]:
+    """Process-wide plan cache from settings; None when caching is off."""
+    global _plan_cache
+    backend = settings.engine_plan_cache_backend
+    if backend == "off":
+        return None
+    if _plan_cache is None:
+        if backend == "redis":
+            _plan_cache = RedisPlanCache(
+                ttl_seconds=settings.engine_plan_cache_ttl_seconds,
+                max_entries=settings.engine_plan_cache_max_entries,
+            )
+        else:
+            _plan_cache = LocalPlanCache(
+                ttl_seconds=settings.engine_plan_cache_ttl_seconds,
+                max_entries=settings.engine_plan_cache_max_entries,
+            )
+    return _plan_cache
+
+
+def lookup_cached_plan(
+    db: Session,
+    portfolio_id: uuid.UUID | str,
+    as_of: datetime,
+) -> Optional[dict[str, Any]]:
+    """Best-effort probe + cache read; None on a miss or any cache error."""
+    cache = get_plan_cache()
+    if cache is None:
+        return None
+    try:
+        key = probe_plan_cache_key(db, portfolio_id, as_of)
+        return cache.get(key) if key is not None else None
+    except Exception as exc:
+        logger.warning(f"Plan cache lookup failed: {exc}")
+        return None
+
+
+def store_cached_plan(inputs: EngineInputs, body: dict[str, Any]) -> None:
+    """Best-effort cache write of a plan response body."""
+    cache = get_plan_cache()
+    if cache is None:
+        return
+    try:
+        cache.put(inputs_cache_key(inputs), body)
+    except Exception as exc:
+        logger.warning(f"Plan cache store failed: {exc}")
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
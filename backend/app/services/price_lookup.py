@@ -0,0 +1,288 @@
+"""
+Price Lookup Service
+
+Set-based "latest trusted close per listing" reads shared by the engine
+input gathering, the dashboard and the DQ gate.
+
+Reads come from the ``latest_prices`` table (maintained on ingest), so a
+lookup is one indexed query regardless of how much price history exists or
+how many holdings the portfolio has.  When several sources hold a price for
+the same listing, the most recent one wins.
+
+A close is stale once it is more than PRICE_STALENESS_DAYS old, not counting
+the weekend / holiday days at its listing's venue (the same allowance the
+DQ_STALE_CLOSE check makes), so a bank holiday does not block the engine.
+Venues the trading calendar does not know age in calendar days.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Iterable, Mapping, Optional
+import uuid
+
+from sqlalchemy import true
+from sqlalchemy.orm import Session
+
+from app.domain.models import InstrumentListing, LatestPrice
+from app.services.trading_calendar import get_trading_calendar
+
+
+PRICE_STALENESS_DAYS = 3
+PRICE_STALENESS_THRESHOLD = timedelta(days=PRICE_STALENESS_DAYS)
+
+
+class StalePriceError(Exception):
+    def __init__(self, ticker: str, age: timedelta) -> None:
+        self.ticker = ticker
+        self.age = age
+        age_days = age.total_seconds() / 86_400
+        super().__init__(
+            f"Stale market data for {ticker}; latest trusted price is older than "
+            f"{PRICE_STALENESS_DAYS} days (age={age_days:.2f}d)"
+        )
+
+
+@dataclass
+class TrustedCloseResult:
+    """Outcome of resolving trusted closes for a set of listings.
+
+    ``closes_used`` holds ``(close, ticker)`` in the order of the requested
+    listings; ``price_points_used`` renders them as the (deterministic) audit
+    payload on demand.
+    """
+
+    is_blocked: bool
+    block_reason: Optional[str]
+    block_message: Optional[str]
+    closes_used: list[tuple[LatestPrice, str]] = field(default_factory=list)
+    closes: dict[uuid.UUID, LatestPrice] = field(default_factory=dict)
+
+    @property
+    def price_points_used(self) -> list[dict[str, Any]]:
+        return [price_point_payload(close, ticker) for close, ticker in self.closes_used]
+
+
+def price_point_payload(close: LatestPrice, ticker: str) -> dict[str, Any]:
+    """Audit-payload entry for a trusted close."""
+    return {
+        "listing_id": str(close.listing_id),
+        "price_point_id": str(close.price_point_id),
+        "ticker": ticker,
+        "as_of": _isoformat(close.as_of),
+        "price": _to_str(close.price),
+        "currency": close.currency,
+        "is_close": close.is_close,
+    }
+
+
+@dataclass
+class ListingLatestPrices:
+    """Latest close and intraday price for one listing (either may be absent)."""
+
+    close: Optional[LatestPrice] = None
+    intraday: Optional[LatestPrice] = None
+
+
+def get_latest_closes(
+    db: Session,
+    listing_ids: Iterable[uuid.UUID],
+) -> dict[uuid.UUID, LatestPrice]:
+    """Return the latest close for each listing in one query.
+
+    Listings without any close price are absent from the result.
+    """
+    unique_ids = list(dict.fromkeys(_as_uuid(lid) for lid in listing_ids))
+    if not unique_ids:
+        return {}
+
+    rows = (
+        db.query(LatestPrice)
+        .filter(
+            LatestPrice.listing_id.in_(unique_ids),
+            LatestPrice.is_close == true(),
+        )
+        .distinct(LatestPrice.listing_id)
+        .order_by(LatestPrice.listing_id, LatestPrice.as_of.desc())
+        .all()
+    )
+    return {row.listing_id: row for row in rows}
+
+
+def get_latest_prices(
+    db: Session,
+    listing_ids: Iterable[uuid.UUID],
+) -> dict[uuid.UUID, ListingLatestPrices]:
+    """Return the latest close and latest intraday price per listing in one query.
+
+    Every requested listing is present in the result; missing prices are None.
+    """
+    unique_ids = list(dict.fromkeys(_as_uuid(lid) for lid in listing_ids))
+    result = {listing_id: ListingLatestPrices() for listing_id in unique_ids}
+    if not unique_ids:
+        return result
+
+    rows = (
+        db.query(LatestPrice)
+        .filter(LatestPrice.listing_id.in_(unique_ids))
+        .distinct(LatestPrice.listing_id, LatestPrice.is_close)
+        .order_by(
+            LatestPrice.listing_id,
+            LatestPrice.is_close,
+            LatestPrice.as_of.desc(),
+        )
+        .all()
+    )
+    for row in rows:
+        if row.is_close:
+            result[row.listing_id].close = row
+        else:
+            result[row.listing_id].intraday = row
+    return result
+
+
+def get_listing_exchanges(
+    db: Session,
+    listing_ids: Iterable[uuid.UUID],
+) -> dict[uuid.UUID, str]:
+    """Exchange code of each listing, in one query (none when no ids)."""
+    unique_ids = list(dict.fromkeys(_as_uuid(lid) for lid in listing_ids))
+    if not unique_ids:
+        return {}
+    rows = (
+        db.query(InstrumentListing.listing_id, InstrumentListing.exchange)
+        .filter(InstrumentListing.listing_id.in_(unique_ids))
+        .all()
+    )
+    return {listing_id: exchange for listing_id, exchange in rows}
+
+
+def aged_listing_ids(
+    closes: Mapping[uuid.UUID, LatestPrice],
+    as_of: datetime,
+) -> list[uuid.UUID]:
+    """Listings whose close is past PRICE_STALENESS_THRESHOLD in calendar days
+    — the only ones whose venue calendar can change the verdict."""
+    cutoff = _as_utc(as_of) - PRICE_STALENESS_THRESHOLD
+    return [listing_id for listing_id, close in closes.items() if _as_utc(close.as_of) < cutoff]
+
+
+def is_close_stale(
+    close_as_of: datetime,
+    as_of: datetime,
+    exchange: Optional[str] = None,
+) -> bool:
+    """True when a close is more than PRICE_STALENESS_DAYS old at *as_of*,
+    weekend / holiday days at *exchange* excluded."""
+    close_utc, as_of_utc = _as_utc(close_as_of), _as_utc(as_of)
+    if close_utc >= as_of_utc - PRICE_STALENESS_THRESHOLD:
+        return False
+    calendar = get_trading_calendar()
+    if exchange is None or not calendar.knows(exchange):
+        return True
+    non_trading_days = calendar.non_trading_days_between(
+        exchange,
+        calendar.local_date(exchange, close_utc),
+        calendar.local_date(exchange, as_of_utc),
+    )
+    age = as_of_utc - close_utc - timedelta(days=non_trading_days)
+    return age > PRICE_STALENESS_THRESHOLD
+
+
+def resolve_trusted_closes(
+    db: Session,
+    listing_ids: Iterable[uuid.UUID],
+    ticker_by_listing: dict[uuid.UUID, str],
+    as_of: datetime,
+) -> TrustedCloseResult:
+    """Look up trusted closes and apply the MISSING_PRICE / STALE_PRICE gates.
+
+    Listings are checked in the order given; the first listing without a
+    close, or with a stale one (is_close_stale), blocks the run.  Exchanges
+    are only looked up for closes old enough for the calendar to matter.
+    """
+    ordered_ids = [_as_uuid(lid) for lid in listing_ids]
+    closes = get_latest_closes(db, ordered_ids)
+    exchanges = get_listing_exchanges(db, aged_listing_ids(closes, as_of))
+    return evaluate_trusted_closes(ordered_ids, closes, ticker_by_listing, as_of, exchanges)
+
+
+def evaluate_trusted_closes(
+    listing_ids: Iterable[uuid.UUID],
+    closes: dict[uuid.UUID, LatestPrice],
+    ticker_by_listing: dict[uuid.UUID, str],
+    as_of: datetime,
+    exchange_by_listing: Optional[Mapping[uuid.UUID, str]] = None,
+) -> TrustedCloseResult:
+    """Apply the blocking gates to already-loaded closes (no DB access).
+
+    Listings missing from *exchange_by_listing* age in calendar days.
+    """
+    as_of_utc = _as_utc(as_of)
+    exchange_by_listing = exchange_by_listing or {}
+    closes_used: list[tuple[LatestPrice, str]] = []
+
+    for listing_id in listing_ids:
+        latest_close = closes.get(listing_id)
+        ticker = ticker_by_listing.get(listing_id, str(listing_id))
+
+        if latest_close is None:
+            return TrustedCloseResult(
+                is_blocked=True,
+                block_reason="MISSING_PRICE",
+                block_message=(
+                    f"Missing trusted close price for {ticker}; run is blocked"
+                ),
+            )
+
+        latest_close_as_of = _as_utc(latest_close.as_of)
+        if is_close_stale(latest_close_as_of, as_of_utc, exchange_by_listing.get(listing_id)):
+            stale_error = StalePriceError(
+                ticker=ticker,
+                age=as_of_utc - latest_close_as_of,
+            )
+            return TrustedCloseResult(
+                is_blocked=True,
+                block_reason="STALE_PRICE",
+                block_message=(
+                    f"Stale market data for {stale_error.ticker}; "
+                    f"latest trusted price is older than {PRICE_STALENESS_DAYS} days"
+                ),
+            )
+
+        closes_used.append((latest_close, ticker))
+
+    return TrustedCloseResult(
+        is_blocked=False,
+        block_reason=None,
+        block_message=None,
+        closes_used=closes_used,
+        closes=closes,
+    )
+
+
+def _as_uuid(value: uuid.UUID | str) -> uuid.UUID:
+    if isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(str(value))
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return _as_utc(value).isoformat().replace("+00:00", "Z")
+
+
+def _to_str(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return str(value)
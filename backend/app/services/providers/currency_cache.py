@@ -0,0 +1,208 @@
+"""
+Currency Metadata Cache
+
+A listing's trading currency almost never changes, yet looking it up on
+yfinance costs a ``Ticker.fast_info`` round trip per symbol.  This cache
+keeps symbol → currency with a TTL and LRU eviction, shared by every
+adapter instance.
+
+Backends (``settings.marketdata_currency_cache_backend``):
+  - ``memory``: per-process dict (default); lost on restart;
+  - ``redis``:  persistent and shared across workers and restarts; one hash
+    of symbol → (currency, expiry) plus a sorted-set recency index trimmed
+    to ``marketdata_currency_cache_max_entries``.
+
+Entries come from three places:
+  - ``seed``: ``InstrumentListing.trading_currency``, inserted already
+    expired and only when the symbol is not cached yet.  It is a fallback
+    for a failed provider lookup, never a hit: a quote must carry the
+    provider's currency, or DQ_CCY_MISMATCH would compare the listing's
+    currency with itself;
+  - ``put``: currencies the provider reported as a by-product of another
+    request (e.g. history metadata);
+  - ``get_or_fetch``: a lazy provider lookup when an entry is missing or
+    has expired.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+import redis
+
+from app.core.config import settings
+
+REDIS_ENTRIES_KEY = "ta:ccy"
+REDIS_LRU_KEY = "ta:ccy:lru"
+
+
+class CurrencyCache:
+    """Thread-safe TTL + LRU cache of symbol → currency."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[Optional[str], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> tuple[bool, Optional[str]]:
+        """Return ``(hit, currency)``; expired entries count as a miss."""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None:
+                return False, None
+            currency, expires_at = entry
+            if expires_at <= self._clock():
+                return False, currency
+            self._entries.move_to_end(symbol)
+            return True, currency
+
+    def put(self, symbol: str, currency: Optional[str]) -> None:
+        with self._lock:
+            self._store(symbol, currency)
+
+    def seed(self, currencies: Iterable[tuple[str, Optional[str]]]) -> None:
+        """Insert listing-declared currencies for symbols not cached yet,
+        as expired fallbacks (see the module docstring)."""
+        with self._lock:
+            for symbol, currency in currencies:
+                if currency and symbol not in self._entries:
+                    self._store(symbol, currency, expires_at=self._clock())
+
+    def get_or_fetch(
+        self,
+        symbol: str,
+        fetch: Callable[[str], Optional[str]],
+    ) -> Optional[str]:
+        """Cached currency, or ``fetch(symbol)`` on a miss / expiry.
+
+        A failed refresh (``fetch`` returns None) keeps serving the stale
+        value rather than dropping it.
+        """
+        hit, currency = self.get(symbol)
+        if hit:
+            return currency
+        fetched = fetch(symbol)
+        if fetched is None and currency is not None:
+            fetched = currency
+        self.put(symbol, fetched)
+        return fetched
+
+    def expired(self, symbols: Iterable[str]) -> list[str]:
+        """Symbols that are missing or past their TTL."""
+        return [symbol for symbol in symbols if not self.get(symbol)[0]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(
+        self, symbol: str, currency: Optional[str], expires_at: Optional[float] = None
+    ) -> None:
+        if expires_at is None:
+            expires_at = self._clock() + self.ttl_seconds
+        self._entries[symbol] = (currency, expires_at)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCurrencyCache(CurrencyCache):
+    """Currency cache kept in Redis, so it survives restarts and is shared
+    by every worker.  Expiries are wall-clock (``time.time``) timestamps.
+
+    Entries carry their own expiry instead of a Redis TTL: an expired
+    currency is still served when the provider refresh fails.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        *,
+        client: Optional[redis.Redis] = None,
+        ttl_seconds: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(ttl_seconds=ttl_seconds, max_entries=max_entries, clock=clock)
+        self.client = client or redis.Redis.from_url(
+            redis_url or settings.redis_url, decode_responses=True
+        )
+
+    def get(self, symbol: str) -> tuple[bool, Optional[str]]:
+        raw = self.client.hget(REDIS_ENTRIES_KEY, symbol)
+        if raw is None:
+            return False, None
+        currency, expires_at = json.loads(raw)
+        now = self._clock()
+        if expires_at <= now:
+            return False, currency
+        self.client.zadd(REDIS_LRU_KEY, {symbol: now})
+        return True, currency
+
+    def put(self, symbol: str, currency: Optional[str]) -> None:
+        now = self._clock()
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.hset(REDIS_ENTRIES_KEY, symbol, json.dumps([currency, now + self.ttl_seconds]))
+            pipe.zadd(REDIS_LRU_KEY, {symbol: now})
+            pipe.execute()
+        self._trim()
+
+    def seed(self, currencies: Iterable[tuple[str, Optional[str]]]) -> None:
+        now = self._clock()
+        seeded = [(symbol, currency) for symbol, currency in currencies if currency]
+        if not seeded:
+            return
+        with self.client.pipeline(transaction=False) as pipe:
+            for symbol, currency in seeded:
+                pipe.hsetnx(REDIS_ENTRIES_KEY, symbol, json.dumps([currency, now]))
+            added = pipe.execute()
+        new = {symbol: now for (symbol, _), was_added in zip(seeded, added) if was_added}
+        if new:
+            self.client.zadd(REDIS_LRU_KEY, new)
+            self._trim()
+
+    def clear(self) -> None:
+        self.client.delete(REDIS_ENTRIES_KEY, REDIS_LRU_KEY)
+
+    def __len__(self) -> int:
+        return int(self.client.hlen(REDIS_ENTRIES_KEY))
+
+    def _trim(self) -> None:
+        excess = int(self.client.zcard(REDIS_LRU_KEY)) - self.max_entries
+        if excess > 0:
+            evicted = [member for member, _ in self.client.zpopmin(REDIS_LRU_KEY, excess)]
+            if evicted:
+                self.client.hdel(REDIS_ENTRIES_KEY, *evicted)
+
+
+_CURRENCY_CACHE: Optional[CurrencyCache] = None
+
+
+def get_currency_cache() -> CurrencyCache:
+    """Process-wide cache, created on first use from settings."""
+    global _CURRENCY_CACHE
+    if _CURRENCY_CACHE is None:
+        cache_cls = (
+            RedisCurrencyCache
+            if settings.marketdata_currency_cache_backend == "redis"
+            else CurrencyCache
+        )
+        _CURRENCY_CACHE = cache_cls(
+            ttl_seconds=settings.marketdata_currency_cache_ttl_hours * 3600,
+            max_entries=settings.marketdata_currency_cache_max_entries,
+        )
+    return _CURRENCY_CACHE
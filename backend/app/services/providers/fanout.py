@@ -0,0 +1,127 @@
+"""
+Bounded Concurrent Fan-out for Provider Requests
+
+Providers whose upstream API only answers one symbol per request (e.g.
+``yf.Ticker.history``) fan out with ``fan_out``: at most ``max_concurrency``
+requests are in flight, each start is paced by a shared per-host
+``AdaptiveRateLimiter``, and a failure for one item is returned alongside
+the successes instead of aborting the batch.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Hashable, Sequence, TypeVar
+
+from app.services.market_data_adapter import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class AdaptiveRateLimiter:
+    """Paces request starts to ``rate`` per second, adapting to throttling.
+
+    ``record_throttle`` cuts the rate by ``backoff_factor`` (down to
+    ``min_rate``); every ``record_success`` nudges it back up by
+    ``recovery_factor`` (up to the configured ``max_rate``).
+
+    Slots are reserved under a plain thread lock and then awaited, so one
+    limiter can be shared across event loops and threads (worker jobs run
+    on their own loops).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        *,
+        min_rate: float | None = None,
+        backoff_factor: float = 0.5,
+        recovery_factor: float = 1.05,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.rate = rate
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self._clock = clock
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate * self.recovery_factor)
+
+    def record_throttle(self) -> None:
+        self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+        logger.warning("Provider throttled; rate limit reduced to %.2f req/s", self.rate)
+
+
+_HOST_LIMITERS: dict[str, AdaptiveRateLimiter] = {}
+
+
+def get_host_rate_limiter(host: str, rate: float) -> AdaptiveRateLimiter:
+    """Return the process-wide limiter for ``host`` (created on first use)."""
+    limiter = _HOST_LIMITERS.get(host)
+    if limiter is None:
+        limiter = AdaptiveRateLimiter(rate)
+        _HOST_LIMITERS[host] = limiter
+    return limiter
+
+
+@dataclass(frozen=True)
+class FanOutResult(Generic[K, T]):
+    """Per-item outcome: exactly one of ``value`` / ``error`` is set."""
+
+    key: K
+    value: T | None = None
+    error: Exception | None = None
+
+
+async def fan_out(
+    keys: Sequence[K],
+    fetch_one: Callable[[K], Awaitable[T]],
+    *,
+    max_concurrency: int,
+    limiter: AdaptiveRateLimiter | None = None,
+) -> list[FanOutResult[K, T]]:
+    """Run ``fetch_one`` for every key with bounded concurrency.
+
+    Results are returned in ``keys`` order.  Exceptions are captured per
+    key; a ``RateLimitError`` additionally slows the shared limiter down.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(key: K) -> FanOutResult[K, T]:
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                value = await fetch_one(key)
+            except RateLimitError as exc:
+                if limiter is not None:
+                    limiter.record_throttle()
+                return FanOutResult(key=key, error=exc)
+            except Exception as exc:
+                return FanOutResult(key=key, error=exc)
+            if limiter is not None:
+                limiter.record_success()
+            return FanOutResult(key=key, value=value)
+
+    return list(await asyncio.gather(*(run(key) for key in keys)))
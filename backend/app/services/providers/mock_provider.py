@@ -6,16 +6,23 @@ A deterministic mock implementation of MarketDataAdapter for:
 - Repeatable testing with known price values
 - DQ gate testing via configurable anomalies
 """
+import asyncio
+import random
 from datetime import datetime, timezone
-from typing import Sequence
+from typing import Iterable, Sequence
 import uuid
 
 from app.services.market_data_adapter import (
+    BatchQuotes,
+    FetchFailure,
+    ListingRef,
     MarketDataAdapter,
     PriceQuote,
     FxQuote,
     MarketDataError,
+    ProviderUnavailableError,
 )
+from app.services.providers.fanout import fan_out
 
 
 class MockProvider:
@@ -39,6 +46,9 @@ class MockProvider:
         jump_prices: bool = False,
         scale_mismatch: bool = False,
         fixed_as_of: "datetime | None" = None,
+        latency_seconds: float = 0.0,
+        fail_listing_ids: "Iterable[str] | None" = None,
+        max_concurrency: int = 8,
     ):
         """Initialize mock provider with optional anomaly flags.
         
@@ -47,11 +57,18 @@ class MockProvider:
             jump_prices: If True, return prices 10x higher than normal
             scale_mismatch: If True, return GBX prices as GBP (100x)
             fixed_as_of: If set, always use this timestamp (idempotency tests)
+            latency_seconds: Simulated per-listing request latency
+            fail_listing_ids: Listings whose fetch raises (per-listing errors)
+            max_concurrency: Fan-out bound, as for the real provider
         """
         self.stale_prices = stale_prices
         self.jump_prices = jump_prices
         self.scale_mismatch = scale_mismatch
         self.fixed_as_of = fixed_as_of
+        self.latency_seconds = latency_seconds
+        self.fail_listing_ids = set(fail_listing_ids or ())
+        self.max_concurrency = max_concurrency
+        self.last_fetch_failures: list[FetchFailure] = []
     
     def _generate_price(self, listing_id: str) -> tuple[float, str]:
         """Generate a deterministic price for a listing.
@@ -99,62 +116,102 @@ class MockProvider:
         Returns deterministic prices for each listing_id.
         Supports close and intraday requests (returns same price for both
         in mock, differentiated by is_close flag).
+        
+        Listings are fetched with the same bounded fan-out as the real
+        provider; failing listings are reported in last_fetch_failures and
+        only an all-failed batch raises.
         """
-        results: list[PriceQuote] = []
+        self.last_fetch_failures = []
         timestamp = self._get_timestamp()
         
-        for listing_id in listing_ids:
-            try:
-                price_val, currency = self._generate_price(listing_id)
-                
-                # Apply scale mismatch anomaly (return GBX as GBP = 100x)
-                if self.scale_mismatch and currency == "GBP":
-                    # Simulate GBX/GBP confusion by multiplying by 100
-                    price_val = price_val * 100
-                
-                # Create close price if requested
-                if want_close:
-                    results.append(PriceQuote(
-                        listing_id=listing_id,
-                        as_of=timestamp,
-                        price=f"{price_val:.4f}",
-                        currency=currency,
-                        is_close=True,
-                        raw={
-                            "mock": True,
-                            "anomaly_stale": self.stale_prices,
-                            "anomaly_jump": self.jump_prices,
-                            "anomaly_scale": self.scale_mismatch,
-                        }
-                    ))
-                
-                # Create intraday price if requested
-                if want_intraday:
-                    # Intraday price is slightly different (up to 1% variance)
-                    import random
-                    random.seed(listing_id)  # Deterministic variance
-                    variance = 1.0 + (random.random() * 0.02 - 0.01)
-                    intraday_price = price_val * variance
-                    
-                    results.append(PriceQuote(
-                        listing_id=listing_id,
-                        as_of=timestamp,
-                        price=f"{intraday_price:.4f}",
-                        currency=currency,
-                        is_close=False,
-                        raw={
-                            "mock": True,
-                            "variance": f"{variance:.4f}",
-                        }
-                    ))
-                    
-            except ValueError as e:
-                # Invalid listing_id format
-                raise MarketDataError(
-                    f"Invalid listing_id format: {listing_id}",
-                    provider=self.source_id,
-                    details={"error": str(e)}
+        outcomes = await fan_out(
+            list(listing_ids),
+            lambda listing_id: self._fetch_listing(
+                listing_id, timestamp, want_close, want_intraday
+            ),
+            max_concurrency=self.max_concurrency,
+        )
+        
+        results: list[PriceQuote] = []
+        for outcome in outcomes:
+            if outcome.error is not None:
+                self.last_fetch_failures.append(
+                    FetchFailure(key=outcome.key, error=outcome.error)
                 )
+            else:
+                results.extend(outcome.value)
+        
+        if outcomes and len(self.last_fetch_failures) == len(outcomes):
+            raise self.last_fetch_failures[0].error
+        return results
+    
+    async def _fetch_listing(
+        self,
+        listing_id: str,
+        timestamp: datetime,
+        want_close: bool,
+        want_intraday: bool,
+    ) -> list[PriceQuote]:
+        """Quotes for one listing, after the injected latency / failure."""
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if listing_id in self.fail_listing_ids:
+            raise ProviderUnavailableError(
+                f"Injected failure for {listing_id}",
+                provider=self.source_id,
+                details={"listing_id": listing_id},
+            )
+        
+        results: list[PriceQuote] = []
+        try:
+            price_val, currency = self._generate_price(listing_id)
+        except ValueError as e:
+            # Invalid listing_id format
+            raise MarketDataError(
+                f"Invalid listing_id format: {listing_id}",
+                provider=self.source_id,
+                details={"error": str(e)}
+            )
+        
+        # Apply scale mismatch anomaly (return GBX as GBP = 100x)
+        if self.scale_mismatch and currency == "GBP":
+            # Simulate GBX/GBP confusion by multiplying by 100
+            price_val = price_val * 100
+        
+        # Create close price if requested
+        if want_close:
+            results.append(PriceQuote(
+                listing_id=listing_id,
+                as_of=timestamp,
+                price=f"{price_val:.4f}",
+                currency=currency,
+                is_close=True,
+                raw={
+                    "mock": True,
+                    "anomaly_stale": self.stale_prices,
+                    "anomaly_jump": self.jump_prices,
+                    "anomaly_scale": self.scale_mismatch,
+                }
+            ))
+        
+        # Create intraday price if requested
+        if want_intraday:
+            # Intraday price is slightly different (up to 1% variance)
+            rng = random.Random(listing_id)  # Deterministic variance
+            variance = 1.0 + (rng.random() * 0.02 - 0.01)
+            intraday_price = price_val * variance
+            
+            results.append(PriceQuote(
+                listing_id=listing_id,
+                as_of=timestamp,
+                price=f"{intraday_price:.4f}",
+                currency=currency,
+                is_close=False,
+                raw={
+                    "mock": True,
+                    "variance": f"{variance:.4f}",
+                }
+            ))
         
         return results
     
@@ -170,6 +227,7 @@ class MockProvider:
         - EUR/GBP: ~0.85
         - Other pairs: generated deterministically
         """
+        self.last_fetch_failures = []
         results: list[FxQuote] = []
         timestamp = self._get_timestamp()
         
@@ -208,6 +266,32 @@ class MockProvider:
         
         return results
 
+    
+    async def fetch_batch(
+        self,
+        listings: Sequence[ListingRef],
+        fx_pairs: Sequence[tuple[str, str]],
+        *,
+        want_close: bool,
+        want_intraday: bool,
+    ) -> BatchQuotes:
+        """Batched fetch: prices keyed by listing_id plus FX, in one call.
+        
+        Mock prices derive from the listing_id, so tickers are not used.
+        Per-listing failures are reported in BatchQuotes.failures.
+        """
+        batch = BatchQuotes()
+        if want_close or want_intraday:
+            batch.price_quotes = await self.fetch_prices(
+                [ref.listing_id for ref in listings],
+                want_close=want_close,
+                want_intraday=want_intraday,
+            )
+            batch.failures.extend(self.last_fetch_failures)
+        if fx_pairs:
+            batch.fx_quotes = await self.fetch_fx_rates(fx_pairs)
+        return batch
+
 
 # Type alias for protocol compliance
 MockProvider: type[MarketDataAdapter]
@@ -11,22 +11,36 @@ import logging
 import math
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Sequence
+from typing import Iterable, Sequence
 
 import pandas as pd
 import yfinance as yf
 
+from app.core.config import settings
 from app.services.market_data_adapter import (
+    BatchQuotes,
+    FetchFailure,
     FxQuote,
     InvalidResponseError,
+    ListingRef,
     MarketDataAdapter,
     MarketDataError,
     PriceQuote,
     ProviderUnavailableError,
+    RateLimitError,
+)
+from app.services.providers.currency_cache import CurrencyCache, get_currency_cache
+from app.services.providers.fanout import (
+    AdaptiveRateLimiter,
+    fan_out,
+    get_host_rate_limiter,
 )
 
 logger = logging.getLogger(__name__)
 
+# All yfinance requests share one upstream host, hence one rate limiter.
+YAHOO_HOST = "query1.finance.yahoo.com"
+
 
 def _lse_ticker(ticker: str) -> str:
     return ticker if "." in ticker else f"{ticker}.L"
@@ -36,6 +50,28 @@ class YFinanceAdapter:
 
     source_id: str = "yfinance"
 
+    def __init__(
+        self,
+        *,
+        max_concurrency: int | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        currency_cache: CurrencyCache | None = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency or settings.marketdata_max_concurrency
+        self.rate_limiter = rate_limiter or get_host_rate_limiter(
+            YAHOO_HOST, settings.marketdata_rate_limit_per_second
+        )
+        self.currency_cache = (
+            currency_cache if currency_cache is not None else get_currency_cache()
+        )
+        self.last_fetch_failures: list[FetchFailure] = []
+
+    def seed_currencies(self, listings: Iterable[tuple[str, str | None]]) -> None:
+        """Seed the currency cache from (ticker, trading_currency) pairs."""
+        self.currency_cache.seed(
+            (_lse_ticker(ticker), currency) for ticker, currency in listings
+        )
+
     async def fetch_prices(
         self,
         listing_ids: Sequence[str],
@@ -43,25 +79,29 @@ class YFinanceAdapter:
         want_close: bool,
         want_intraday: bool,
     ) -> list[PriceQuote]:
+        """Fetch tickers concurrently; per-ticker failures land in last_fetch_failures.
+
+        Raises only when every ticker failed (provider effectively down).
+        """
+        self.last_fetch_failures = []
         if not want_close and not want_intraday:
             return []
 
-        results: list[PriceQuote] = []
+        outcomes = await fan_out(
+            list(listing_ids),
+            lambda ticker_raw: asyncio.to_thread(self._fetch_single_price, ticker_raw),
+            max_concurrency=self.max_concurrency,
+            limiter=self.rate_limiter,
+        )
 
-        for ticker_raw in listing_ids:
-            try:
-                price, as_of, currency, used_ticker, raw_payload = await asyncio.to_thread(
-                    self._fetch_single_price, ticker_raw
-                )
-            except (ProviderUnavailableError, InvalidResponseError):
-                raise
-            except Exception as exc:
-                raise MarketDataError(
-                    f"Unexpected error fetching price for {ticker_raw!r}: {exc}",
-                    provider=self.source_id,
-                    details={"ticker": ticker_raw, "error": str(exc)},
-                ) from exc
+        results: list[PriceQuote] = []
+        for outcome in outcomes:
+            ticker_raw = outcome.key
+            if outcome.error is not None:
+                self._record_failure(ticker_raw, outcome.error, "price", {"ticker": ticker_raw})
+                continue
 
+            price, as_of, currency, used_ticker, raw_payload = outcome.value
             quote_kwargs = dict(
                 listing_id=ticker_raw,
                 as_of=as_of,
@@ -75,39 +115,252 @@ class YFinanceAdapter:
             if want_intraday:
                 results.append(PriceQuote(**quote_kwargs, is_close=False))
 
+        self._raise_if_all_failed(outcomes)
         return results
 
     async def fetch_fx_rates(
         self,
         pairs: Sequence[tuple[str, str]],
     ) -> list[FxQuote]:
-        results: list[FxQuote] = []
+        """Fetch FX pairs concurrently; per-pair failures land in last_fetch_failures.
 
-        for base_ccy, quote_ccy in pairs:
-            fx_ticker = f"{base_ccy.upper()}{quote_ccy.upper()}=X"
-            try:
-                rate, as_of, raw_payload = await asyncio.to_thread(
-                    self._fetch_fx_rate, fx_ticker
+        Raises only when every pair failed (provider effectively down).
+        """
+        self.last_fetch_failures = []
+        normalized = [(base.upper(), quote.upper()) for base, quote in pairs]
+
+        outcomes = await fan_out(
+            normalized,
+            lambda pair: asyncio.to_thread(self._fetch_fx_rate, f"{pair[0]}{pair[1]}=X"),
+            max_concurrency=self.max_concurrency,
+            limiter=self.rate_limiter,
+        )
+
+        results: list[FxQuote] = []
+        for outcome in outcomes:
+            base_ccy, quote_ccy = outcome.key
+            if outcome.error is not None:
+                self._record_failure(
+                    f"{base_ccy}/{quote_ccy}",
+                    outcome.error,
+                    "FX rate",
+                    {"pair": f"{base_ccy}{quote_ccy}=X"},
                 )
-            except (ProviderUnavailableError, InvalidResponseError):
-                raise
-            except Exception as exc:
-                raise MarketDataError(
-                    f"Unexpected error fetching FX rate for {fx_ticker!r}: {exc}",
-                    provider=self.source_id,
-                    details={"pair": fx_ticker, "error": str(exc)},
-                ) from exc
+                continue
 
+            rate, as_of, raw_payload = outcome.value
             results.append(FxQuote(
-                base_ccy=base_ccy.upper(),
-                quote_ccy=quote_ccy.upper(),
+                base_ccy=base_ccy,
+                quote_ccy=quote_ccy,
                 as_of=as_of,
                 rate=str(rate),
                 raw=raw_payload,
             ))
 
+        self._raise_if_all_failed(outcomes)
         return results
 
+    async def fetch_batch(
+        self,
+        listings: Sequence[ListingRef],
+        fx_pairs: Sequence[tuple[str, str]],
+        *,
+        want_close: bool,
+        want_intraday: bool,
+    ) -> BatchQuotes:
+        """One ``yf.download`` for every listing and FX pair in the job.
+
+        Listings whose ``.L`` symbol returned nothing are retried as bare
+        tickers in a single second download, so a job makes at most two
+        provider calls regardless of constituent count.
+        """
+        priced = list(listings) if (want_close or want_intraday) else []
+        resolved = {ref.listing_id: _lse_ticker(ref.ticker) for ref in priced}
+        fx_symbols = {
+            (base.upper(), quote.upper()): f"{base.upper()}{quote.upper()}=X"
+            for base, quote in fx_pairs
+        }
+
+        closes = await self._download_closes_limited(
+            list(dict.fromkeys([*resolved.values(), *fx_symbols.values()]))
+        )
+
+        retry = {
+            ref.listing_id: ref.ticker
+            for ref in priced
+            if resolved[ref.listing_id] not in closes
+            and resolved[ref.listing_id] != ref.ticker
+        }
+        if retry:
+            logger.debug("No data for %d .L symbols, retrying bare tickers", len(retry))
+            bare_closes = await self._download_closes_limited(list(dict.fromkeys(retry.values())))
+            for listing_id, ticker in retry.items():
+                if ticker in bare_closes:
+                    resolved[listing_id] = ticker
+                    closes[ticker] = bare_closes[ticker]
+
+        currencies = await self._resolve_currencies(
+            [(resolved[ref.listing_id], ref.trading_currency) for ref in priced]
+        )
+
+        batch = BatchQuotes()
+        for ref in priced:
+            symbol = resolved[ref.listing_id]
+            if symbol not in closes:
+                batch.failures.append(FetchFailure(
+                    key=ref.listing_id,
+                    error=InvalidResponseError(
+                        f"No price data returned for {ref.ticker!r} (tried: {symbol!r})",
+                        provider=self.source_id,
+                        details={"ticker": ref.ticker, "resolved": symbol},
+                    ),
+                ))
+                continue
+
+            close, as_of = closes[symbol]
+            price = close.quantize(Decimal("0.0001"), rounding=ROUND_HALF_UP)
+            quote_kwargs = dict(
+                listing_id=ref.listing_id,
+                as_of=as_of,
+                price=str(price),
+                currency=currencies.get(symbol),
+                raw={
+                    "source": "yfinance",
+                    "close": str(price),
+                    "resolved_ticker": symbol,
+                    "batch_fetch": True,
+                },
+            )
+            if want_close:
+                batch.price_quotes.append(PriceQuote(**quote_kwargs, is_close=True))
+            if want_intraday:
+                batch.price_quotes.append(PriceQuote(**quote_kwargs, is_close=False))
+
+        for (base_ccy, quote_ccy), fx_symbol in fx_symbols.items():
+            if fx_symbol not in closes:
+                batch.failures.append(FetchFailure(
+                    key=f"{base_ccy}/{quote_ccy}",
+                    error=InvalidResponseError(
+                        f"No FX data returned for {fx_symbol!r}",
+                        provider=self.source_id,
+                        details={"fx_ticker": fx_symbol},
+                    ),
+                ))
+                continue
+
+            close, as_of = closes[fx_symbol]
+            rate = close.quantize(Decimal("0.000001"), rounding=ROUND_HALF_UP)
+            batch.fx_quotes.append(FxQuote(
+                base_ccy=base_ccy,
+                quote_ccy=quote_ccy,
+                as_of=as_of,
+                rate=str(rate),
+                raw={
+                    "source": "yfinance",
+                    "fx_ticker": fx_symbol,
+                    "close": str(rate),
+                    "batch_fetch": True,
+                },
+            ))
+
+        return batch
+
+    async def _resolve_currencies(
+        self, symbols: list[tuple[str, str | None]]
+    ) -> dict[str, str | None]:
+        """Currency per symbol from the cache.
+
+        Only missing or expired entries cost a metadata request, and those
+        are fanned out like price requests.
+        """
+        self.currency_cache.seed(symbols)
+        unique_symbols = list(dict.fromkeys(symbol for symbol, _ in symbols))
+        stale = self.currency_cache.expired(unique_symbols)
+        if stale:
+            await fan_out(
+                stale,
+                lambda symbol: asyncio.to_thread(self._get_currency, symbol),
+                max_concurrency=self.max_concurrency,
+                limiter=self.rate_limiter,
+            )
+        return {symbol: self.currency_cache.get(symbol)[1] for symbol in unique_symbols}
+
+    async def _download_closes_limited(
+        self, symbols: list[str]
+    ) -> dict[str, tuple[Decimal, datetime]]:
+        if not symbols:
+            return {}
+        await self.rate_limiter.acquire()
+        try:
+            closes = await asyncio.to_thread(self._download_closes, symbols)
+        except RateLimitError:
+            self.rate_limiter.record_throttle()
+            raise
+        self.rate_limiter.record_success()
+        return closes
+
+    @staticmethod
+    def _download_closes(symbols: list[str]) -> dict[str, tuple[Decimal, datetime]]:
+        """Latest non-NaN daily close per symbol from a single ``yf.download``.
+
+        Symbols without data are absent from the result.
+        """
+        try:
+            data = yf.download(" ".join(symbols), period="5d", progress=False)
+        except Exception as exc:
+            error_cls = RateLimitError if _is_rate_limited(exc) else ProviderUnavailableError
+            raise error_cls(
+                f"yfinance batch download failed: {exc}",
+                provider="yfinance",
+                details={"tickers": symbols, "error": str(exc)},
+            ) from exc
+
+        if data is None or data.empty:
+            return {}
+
+        if isinstance(data.columns, pd.MultiIndex):
+            price_types = data.columns.get_level_values(0)
+            if "Close" in price_types:
+                close_df = data["Close"]
+            elif "Adj Close" in price_types:
+                close_df = data["Adj Close"]
+            else:
+                return {}
+        else:
+            price_col = "Close" if "Close" in data.columns else "Adj Close"
+            if price_col not in data.columns or len(symbols) != 1:
+                return {}
+            close_df = data[[price_col]].rename(columns={price_col: symbols[0]})
+
+        closes: dict[str, tuple[Decimal, datetime]] = {}
+        for symbol in symbols:
+            if symbol not in close_df.columns:
+                continue
+            series = close_df[symbol].dropna()
+            if series.empty:
+                continue
+            ts_index = series.index[-1]
+            if hasattr(ts_index, "tzinfo") and ts_index.tzinfo is not None:
+                as_of = ts_index.to_pydatetime().astimezone(timezone.utc)
+            else:
+                as_of = ts_index.to_pydatetime().replace(tzinfo=timezone.utc)
+            closes[symbol] = (Decimal(str(series.iloc[-1])), as_of)
+        return closes
+
+    def _record_failure(self, key: str, exc: Exception, what: str, details: dict) -> None:
+        if not isinstance(exc, MarketDataError):
+            exc = MarketDataError(
+                f"Unexpected error fetching {what} for {key!r}: {exc}",
+                provider=self.source_id,
+                details={**details, "error": str(exc)},
+            )
+        logger.warning("yfinance %s fetch failed for %s: %s", what, key, exc)
+        self.last_fetch_failures.append(FetchFailure(key=key, error=exc))
+
+    def _raise_if_all_failed(self, outcomes: list) -> None:
+        if outcomes and len(self.last_fetch_failures) == len(outcomes):
+            raise self.last_fetch_failures[0].error
+
     def _fetch_single_price(
         self, ticker_raw: str
     ) -> tuple[float, datetime, str | None, str, dict]:
@@ -135,6 +388,10 @@ class YFinanceAdapter:
             as_of = ts_index.to_pydatetime().replace(tzinfo=timezone.utc)
 
         currency: str | None = info.get("currency") if info else None
+        if currency:
+            self.currency_cache.put(resolved, currency)
+        else:
+            currency = self.currency_cache.get(resolved)[1]
 
         return close_price, as_of, currency, resolved, {
             "source": "yfinance",
@@ -324,6 +581,8 @@ class YFinanceAdapter:
                     price = Decimal(str(fast_info.last_price))
                     as_of = datetime.now(timezone.utc)
                     currency = getattr(fast_info, 'currency', None)
+                    if currency:
+                        self.currency_cache.put(resolved, currency)
 
                     results[original] = (price, as_of, currency)
                     logger.info(f"Successfully fetched {original} via fast_info: {price} {currency}")
@@ -336,31 +595,43 @@ class YFinanceAdapter:
         return results
 
     def _get_currency(self, ticker: str) -> str | None:
-        """Get currency for a ticker (best effort)."""
-        try:
-            t = yf.Ticker(ticker)
-            fast = t.fast_info
-            return getattr(fast, "currency", None)
-        except Exception:
-            return None
+        """Get currency for a ticker (cached; best effort on a miss)."""
+        return self.currency_cache.get_or_fetch(ticker, _fetch_currency)
 
     @staticmethod
     def _download(ticker: str):
+        # Currency comes from the history response metadata, so a single
+        # request serves both (no separate fast_info round trip).
         try:
             t = yf.Ticker(ticker)
             hist = t.history(period="5d")
-            try:
-                fast = t.fast_info
-                info_dict = {"currency": getattr(fast, "currency", None)}
-            except Exception:
-                info_dict = {}
+            info_dict = {}
+            if hist is not None and not hist.empty:
+                metadata = t.history_metadata or {}
+                info_dict = {"currency": metadata.get("currency")}
             return hist, info_dict
         except Exception as exc:
-            raise ProviderUnavailableError(
+            error_cls = RateLimitError if _is_rate_limited(exc) else ProviderUnavailableError
+            raise error_cls(
                 f"yfinance request failed for {ticker!r}: {exc}",
                 provider="yfinance",
                 details={"ticker": ticker, "error": str(exc)},
             ) from exc
 
 
+def _fetch_currency(ticker: str) -> str | None:
+    try:
+        t = yf.Ticker(ticker)
+        fast = t.fast_info
+        return getattr(fast, "currency", None)
+    except Exception:
+        return None
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    if type(exc).__name__ == "YFRateLimitError":
+        return True
+    message = str(exc).lower()
+    return "too many requests" in message or "rate limit" in message
+
 YFinanceAdapter: type[MarketDataAdapter]
@@ -0,0 +1,196 @@
+"""
+Recommendation Generation Service
+
+Persists engine trade plans as PENDING recommendation batches, so a plan is
+computed once per set of engine inputs and then read back from storage:
+
+  - ``input_hash`` (EngineInputs.input_hash) keys the batch.  Any
+    change to cash, holdings, trusted closes or the allocation policy gives a
+    new hash and therefore a new batch.
+  - ``plan_summary`` is the /engine/plan response body at generation time;
+    ``recommendation_lines`` carry the executable trades.  Neither is changed
+    afterwards except by execution / ignore, which only set execution fields.
+  - Generating a batch supersedes the portfolio's other PENDING batches, whose
+    inputs are by definition out of date.
+
+Concurrent generations for the same inputs race on the partial unique index
+``uq_recommendation_batches_pending_input``; the loser returns the winner's
+batch.  Nothing here commits; the caller owns the transaction.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional
+import uuid
+
+from sqlalchemy import insert as sa_insert
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.domain.engine import RunInputSnapshot, TradePlan
+from app.domain.models import RecommendationBatch, RecommendationLine
+from app.services.engine_calculator import DRIFT_THRESHOLD_PCT
+
+
+# Statuses a stored plan is still served from.  SUPERSEDED batches were
+# replaced by newer inputs and are regenerated if those inputs come back.
+SERVABLE_STATUSES = ("PENDING", "EXECUTED", "EXECUTED_PARTIAL", "IGNORED")
+
+
+def find_batch_for_inputs(
+    db: Session,
+    portfolio_id: uuid.UUID | str,
+    input_hash: str,
+) -> Optional[RecommendationBatch]:
+    """Most recent servable batch generated from exactly these inputs."""
+    return (
+        db.query(RecommendationBatch)
+        .filter(
+            RecommendationBatch.portfolio_id == uuid.UUID(str(portfolio_id)),
+            RecommendationBatch.input_hash == input_hash,
+            RecommendationBatch.status.in_(SERVABLE_STATUSES),
+        )
+        .order_by(RecommendationBatch.generated_at.desc())
+        .first()
+    )
+
+
+def batch_status(db: Session, batch_id: uuid.UUID | str) -> Optional[str]:
+    """Current status of a batch (primary-key read)."""
+    return (
+        db.query(RecommendationBatch.status)
+        .filter(RecommendationBatch.recommendation_batch_id == uuid.UUID(str(batch_id)))
+        .scalar()
+    )
+
+
+def plan_summary(run_input: RunInputSnapshot, plan: TradePlan, as_of: str) -> dict[str, Any]:
+    """The /engine/plan response body (all amounts as plain strings)."""
+    total_value = run_input.cash_balance_gbp + sum(
+        (pos.current_value_gbp for pos in run_input.positions), Decimal("0")
+    )
+    return {
+        "portfolio_id": str(run_input.portfolio_id),
+        "as_of": as_of,
+        "total_value_gbp": _to_str(total_value),
+        "cash_balance_gbp": _to_str(run_input.cash_balance_gbp),
+        "positions": [
+            {
+                "listing_id": str(pos.listing_id),
+                "ticker": pos.ticker,
+                "current_quantity": _to_str(pos.current_quantity),
+                "current_price_gbp": _to_str(pos.current_price_gbp),
+                "current_value_gbp": _to_str(pos.current_value_gbp),
+                "target_weight_pct": _to_str(pos.target_weight_pct),
+                "current_weight_pct": _to_str(pos.current_weight_pct),
+                "drift_pct": _to_str(pos.drift_pct),
+                "is_drifted": abs(pos.drift_pct) > DRIFT_THRESHOLD_PCT,
+            }
+            for pos in run_input.positions
+        ],
+        "trades": [
+            {
+                "action": trade.action,
+                "ticker": trade.ticker,
+                "listing_id": str(trade.listing_id),
+                "quantity": _to_str(trade.quantity),
+                "estimated_value_gbp": _to_str(trade.estimated_value_gbp),
+                "reason": trade.reason,
+            }
+            for trade in plan.trades
+        ],
+        "projected_post_trade_cash": _to_str(plan.projected_post_trade_cash),
+        "cash_pool_used": _to_str(plan.cash_pool_used),
+        "cash_pool_remaining": _to_str(plan.cash_pool_remaining),
+        "warnings": list(plan.warnings),
+    }
+
+
+def generate_recommendation_batch(
+    db: Session,
+    run_input: RunInputSnapshot,
+    plan: TradePlan,
+    input_hash: str,
+    as_of: str,
+    *,
+    run_id: Optional[uuid.UUID | str] = None,
+    generated_at: Optional[datetime] = None,
+) -> RecommendationBatch:
+    """Persist *plan* as the PENDING batch for *input_hash*.
+
+    Returns the existing PENDING batch instead when one was already generated
+    for these inputs.  Does NOT commit.
+    """
+    portfolio_id = run_input.portfolio_id
+    summary = plan_summary(run_input, plan, as_of)
+    price_by_listing = {pos.listing_id: pos.current_price_gbp for pos in run_input.positions}
+
+    lines: list[dict[str, Any]] = []
+    for trade, trade_summary in zip(plan.trades, summary["trades"]):
+        line_id = uuid.uuid4()
+        trade_summary["recommendation_line_id"] = str(line_id)
+        lines.append(
+            {
+                "recommendation_line_id": line_id,
+                "listing_id": trade.listing_id,
+                "action": trade.action,
+                "proposed_quantity": trade.quantity,
+                "proposed_price_gbp": price_by_listing[trade.listing_id],
+                "proposed_value_gbp": trade.estimated_value_gbp,
+                "proposed_fee_gbp": Decimal("0"),
+                "status": "PROPOSED",
+            }
+        )
+
+    (
+        db.query(RecommendationBatch)
+        .filter(
+            RecommendationBatch.portfolio_id == portfolio_id,
+            RecommendationBatch.status == "PENDING",
+            RecommendationBatch.input_hash != input_hash,
+        )
+        .update({"status": "SUPERSEDED"}, synchronize_session=False)
+    )
+
+    values: dict[str, Any] = {
+        "recommendation_batch_id": uuid.uuid4(),
+        "portfolio_id": portfolio_id,
+        "status": "PENDING",
+        "input_hash": input_hash,
+        "plan_summary": summary,
+        "run_id": uuid.UUID(str(run_id)) if run_id else None,
+    }
+    if generated_at is not None:
+        values["generated_at"] = generated_at
+    batch_id = db.scalar(
+        insert(RecommendationBatch)
+        .values(values)
+        .on_conflict_do_nothing(
+            index_elements=["portfolio_id", "input_hash"],
+            index_where=RecommendationBatch.status == "PENDING",
+        )
+        .returning(RecommendationBatch.recommendation_batch_id)
+    )
+    if batch_id is None:
+        # Lost the race: another request generated these inputs first.
+        return (
+            db.query(RecommendationBatch)
+            .filter(
+                RecommendationBatch.portfolio_id == portfolio_id,
+                RecommendationBatch.input_hash == input_hash,
+                RecommendationBatch.status == "PENDING",
+            )
+            .one()
+        )
+
+    if lines:
+        db.execute(
+            sa_insert(RecommendationLine),
+            [{**line, "recommendation_batch_id": batch_id} for line in lines],
+        )
+    return db.get(RecommendationBatch, batch_id)
+
+
+def _to_str(value: Decimal) -> str:
+    return format(value, "f")
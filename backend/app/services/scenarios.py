@@ -0,0 +1,139 @@
+"""
+Price-Shock Scenarios
+
+What-if evaluation of the engine under price shocks: each scenario scales
+listing prices by per-listing and/or per-sleeve multipliers (both apply
+when both are given), and gets its own drift and trade plan.
+
+The engine inputs are gathered once and every scenario is built from them
+in a plain Decimal loop, with the arithmetic of EngineInputs.run_input
+(same operations, same order), so each scenario snapshot is exactly the one
+run_input would build at the shocked prices and an unshocked scenario is
+the /engine/plan snapshot.  Only shocked holdings are revalued; totals and
+weights are recomputed per scenario.  generate_trade_plan then runs on
+each snapshot and dominates the cost.
+
+Weights are relative to cash plus every priced holding, including holdings
+without a policy allocation (not among the snapshot's positions, but
+shocked by listing multipliers all the same), as in run_input.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Mapping, Optional, Sequence
+
+from app.domain.engine import AssetPosition, RunInputSnapshot, TradePlan
+from app.services.engine_calculator import generate_trade_plan
+from app.services.engine_inputs import EngineInputs, _normalize_price_to_gbp
+
+_HUNDRED = Decimal("100")
+_ZERO = Decimal("0")
+_ONE = Decimal("1")
+
+
+@dataclass(frozen=True)
+class PriceShock:
+    name: str
+    listing_multipliers: Mapping[uuid.UUID, Decimal] = field(default_factory=dict)
+    sleeve_multipliers: Mapping[str, Decimal] = field(default_factory=dict)
+
+
+def price_multipliers(
+    shock: PriceShock, sleeve_by_listing: Mapping[uuid.UUID, Optional[str]]
+) -> dict[uuid.UUID, Decimal]:
+    """Combined multiplier per shocked listing of *sleeve_by_listing* (the
+    held listings); sleeve first, then listing.
+
+    Multipliers for listings or sleeves that are not held are ignored.
+    """
+    multipliers: dict[uuid.UUID, Decimal] = {}
+    if shock.sleeve_multipliers:
+        for listing_id, sleeve_code in sleeve_by_listing.items():
+            multiplier = shock.sleeve_multipliers.get(sleeve_code) if sleeve_code is not None else None
+            if multiplier is not None:
+                multipliers[listing_id] = _ONE * multiplier
+    for listing_id, multiplier in shock.listing_multipliers.items():
+        if listing_id in sleeve_by_listing:
+            multipliers[listing_id] = multipliers.get(listing_id, _ONE) * multiplier
+    return multipliers
+
+
+def shocked_snapshots(inputs: EngineInputs, shocks: Sequence[PriceShock]) -> list[RunInputSnapshot]:
+    """One RunInputSnapshot per shock, prices scaled by its multipliers."""
+    base = inputs.run_input()
+    position_by_listing = {position.listing_id: position for position in base.positions}
+    price_by_listing = {
+        close.listing_id: _normalize_price_to_gbp(close.price, close.currency)
+        for close, _ in inputs.closes_used
+    }
+    # (listing_id, quantity, price, value) of every priced holding, in
+    # run_input order.
+    holdings: list[tuple[uuid.UUID, Decimal, Decimal, Decimal]] = []
+    for holding in inputs.holdings:
+        price = price_by_listing.get(holding.listing_id)
+        if price is not None:
+            holdings.append((holding.listing_id, holding.quantity, price, holding.quantity * price))
+    sleeve_by_listing = {
+        listing_id: (
+            position_by_listing[listing_id].sleeve_code if listing_id in position_by_listing else None
+        )
+        for listing_id, _, _, _ in holdings
+    }
+
+    snapshots = []
+    for shock in shocks:
+        multipliers = price_multipliers(shock, sleeve_by_listing)
+        values = holdings
+        if multipliers:
+            values = []
+            for listing_id, quantity, price, value in holdings:
+                multiplier = multipliers.get(listing_id)
+                if multiplier is not None:
+                    price = price * multiplier
+                    value = quantity * price
+                values.append((listing_id, quantity, price, value))
+
+        total_value = base.cash_balance_gbp
+        for _, _, _, value in values:
+            total_value += value
+
+        positions = []
+        for listing_id, quantity, price, value in values:
+            position = position_by_listing.get(listing_id)
+            if position is None:
+                continue
+            if total_value > 0:
+                current_weight_pct = (value / total_value) * _HUNDRED
+            else:
+                current_weight_pct = _ZERO
+            positions.append(
+                AssetPosition(
+                    listing_id=listing_id,
+                    ticker=position.ticker,
+                    current_quantity=quantity,
+                    current_price_gbp=price,
+                    current_value_gbp=value,
+                    target_weight_pct=position.target_weight_pct,
+                    current_weight_pct=current_weight_pct,
+                    drift_pct=current_weight_pct - position.target_weight_pct,
+                    sleeve_code=position.sleeve_code,
+                )
+            )
+        snapshots.append(
+            RunInputSnapshot(
+                portfolio_id=base.portfolio_id,
+                cash_balance_gbp=base.cash_balance_gbp,
+                base_currency=base.base_currency,
+                positions=positions,
+            )
+        )
+    return snapshots
+
+
+def evaluate_scenarios(
+    inputs: EngineInputs, shocks: Sequence[PriceShock]
+) -> list[tuple[RunInputSnapshot, TradePlan]]:
+    """(shocked snapshot, trade plan) per shock, in order."""
+    return [(snapshot, generate_trade_plan(snapshot)) for snapshot in shocked_snapshots(inputs, shocks)]
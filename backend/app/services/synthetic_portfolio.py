@@ -0,0 +1,380 @@
+"""
+Synthetic Portfolios
+
+Deterministic generator of portfolios of any size for benchmarking the
+engine hot path (``scripts/benchmark_engine.py``):
+
+  - ``generate_portfolio`` builds one in memory from a seed, a drift profile
+    and a price profile;
+  - ``gathered_inputs`` wraps it in the EngineInputs ``gather_engine_inputs``
+    would return (``snapshot_data``: their audit payload), so snapshot
+    building and calculation run without a database;
+  - ``seed_portfolio`` / ``delete_portfolio`` write and remove the matching
+    rows (instrument, listing, portfolio, cash, holdings, allocations, price
+    points, latest prices) so input gathering can be timed against Postgres.
+
+Drift profiles (how far holdings sit from their targets):
+  - ``balanced``:     every holding within ~2% (relative) of target;
+  - ``mixed``:        mostly balanced, ~15% of holdings far off target;
+  - ``drifted``:      every holding anywhere from 0.2× to 2.5× target;
+  - ``concentrated``: Zipf-like targets (a few large sleeves) with ``mixed``
+    drift, so the largest positions cross the 5-point threshold even in
+    portfolios of thousands of holdings.
+
+Price profiles:
+  - ``uniform``:   GBP 1–500, 2 dp;
+  - ``lognormal``: GBP, long-tailed around 50, 4 dp;
+  - ``pence``:     GBX-quoted 50–9000p, 2 dp (normalized to GBP on build).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_DOWN, Decimal
+import math
+import random
+from typing import Any
+import uuid
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.domain.models import (
+    CashSnapshot,
+    HoldingSnapshot,
+    Instrument,
+    InstrumentListing,
+    LatestPrice,
+    Portfolio,
+    PortfolioPolicyAllocation,
+    PricePoint,
+)
+from app.services.engine_inputs import EngineInputs
+from app.services.latest_prices import latest_price_row, upsert_latest_prices
+
+
+DRIFT_PROFILES = ("balanced", "mixed", "drifted", "concentrated")
+PRICE_PROFILES = ("uniform", "lognormal", "pence")
+
+SOURCE_ID = "synthetic"
+VALUE_PER_POSITION_GBP = 10_000
+
+_WEIGHT_PLACES = Decimal("0.00000001")  # portfolio_policy_allocations.target_weight_pct
+
+
+@dataclass
+class SyntheticHolding:
+    listing_id: uuid.UUID
+    instrument_id: uuid.UUID
+    price_point_id: uuid.UUID
+    ticker: str
+    quantity: Decimal
+    price: Decimal  # in the listing's quote currency
+    currency: str
+    target_weight_pct: Decimal
+
+
+@dataclass
+class SyntheticPortfolio:
+    portfolio_id: uuid.UUID
+    cash_gbp: Decimal
+    policy_hash: str
+    drift: str
+    prices: str
+    holdings: list[SyntheticHolding] = field(default_factory=list)
+
+
+def generate_portfolio(
+    positions: int,
+    *,
+    seed: int = 0,
+    drift: str = "mixed",
+    prices: str = "lognormal",
+    cash_pct: Decimal = Decimal("2"),
+) -> SyntheticPortfolio:
+    """A portfolio of *positions* holdings, identical for the same arguments."""
+    if drift not in DRIFT_PROFILES:
+        raise ValueError(f"drift must be one of {DRIFT_PROFILES}, got {drift!r}")
+    if prices not in PRICE_PROFILES:
+        raise ValueError(f"prices must be one of {PRICE_PROFILES}, got {prices!r}")
+
+    rng = random.Random(f"{seed}:{positions}:{drift}:{prices}")
+    raw_targets = [
+        1 / (rank + 1) if drift == "concentrated" else rng.uniform(0.5, 1.5)
+        for rank in range(positions)
+    ]
+    invested_pct = Decimal(100) - cash_pct
+    scale = float(invested_pct) / sum(raw_targets) if raw_targets else 0.0
+    total_value = VALUE_PER_POSITION_GBP * max(positions, 1)
+
+    portfolio = SyntheticPortfolio(
+        portfolio_id=_uuid(rng),
+        cash_gbp=(Decimal(total_value) * cash_pct / 100).quantize(Decimal("0.01")),
+        policy_hash=f"synthetic-{rng.getrandbits(64):016x}",
+        drift=drift,
+        prices=prices,
+    )
+    for index, raw_target in enumerate(raw_targets):
+        target_pct = Decimal(raw_target * scale).quantize(_WEIGHT_PLACES, rounding=ROUND_DOWN)
+        price, currency = _price(rng, prices)
+        price_gbp = price / 100 if currency == "GBX" else price
+        value_gbp = total_value * float(target_pct) / 100 * _drift_multiplier(rng, drift)
+        portfolio.holdings.append(
+            SyntheticHolding(
+                listing_id=_uuid(rng),
+                instrument_id=_uuid(rng),
+                price_point_id=_uuid(rng),
+                ticker=f"SY{index:05d}",
+                quantity=Decimal(max(1, round(value_gbp / float(price_gbp)))),
+                price=price,
+                currency=currency,
+                target_weight_pct=target_pct,
+            )
+        )
+    return portfolio
+
+
+def gathered_inputs(portfolio: SyntheticPortfolio, as_of: datetime) -> EngineInputs:
+    """*portfolio* as ``gather_engine_inputs`` would return it once seeded
+    (transient, unsaved rows)."""
+    close_as_of = _close_time(as_of)
+    return EngineInputs(
+        portfolio_id=portfolio.portfolio_id,
+        as_of=as_of,
+        cash_snapshot=CashSnapshot(
+            portfolio_id=portfolio.portfolio_id,
+            balance_gbp=portfolio.cash_gbp,
+            updated_at=as_of,
+            version_no=1,
+        ),
+        holdings=[
+            HoldingSnapshot(
+                portfolio_id=portfolio.portfolio_id,
+                listing_id=h.listing_id,
+                quantity=h.quantity,
+                book_cost_gbp=Decimal("0"),
+                avg_cost_gbp=Decimal("0"),
+                updated_at=as_of,
+                version_no=1,
+            )
+            for h in portfolio.holdings
+        ],
+        allocations=[
+            PortfolioPolicyAllocation(
+                portfolio_id=portfolio.portfolio_id,
+                listing_id=h.listing_id,
+                ticker=h.ticker,
+                sleeve_code="CORE",
+                policy_role="STRATEGIC",
+                target_weight_pct=h.target_weight_pct,
+                priority_rank=rank,
+                policy_hash=portfolio.policy_hash,
+            )
+            for rank, h in enumerate(portfolio.holdings, start=1)
+        ],
+        ticker_by_listing={h.listing_id: h.ticker for h in portfolio.holdings},
+        closes_used=[
+            (
+                LatestPrice(
+                    listing_id=h.listing_id,
+                    price_point_id=h.price_point_id,
+                    as_of=close_as_of,
+                    price=h.price,
+                    currency=h.currency,
+                    is_close=True,
+                    source_id=SOURCE_ID,
+                ),
+                h.ticker,
+            )
+            for h in portfolio.holdings
+        ],
+    )
+
+
+def snapshot_data(portfolio: SyntheticPortfolio, as_of: datetime) -> dict[str, Any]:
+    """*portfolio* in the audit payload format (``EngineInputs.audit_payload``)."""
+    return gathered_inputs(portfolio, as_of).audit_payload()
+
+
+def seed_portfolio(
+    db: Session,
+    portfolio: SyntheticPortfolio,
+    *,
+    owner_user_id: uuid.UUID,
+    as_of: datetime,
+) -> None:
+    """Insert every row ``gather_engine_inputs`` reads for *portfolio*.
+
+    Bulk INSERTs, so a 10,000-position portfolio seeds in seconds.  Does NOT
+    commit.
+    """
+    holdings = portfolio.holdings
+    close_as_of = _close_time(as_of)
+    db.execute(
+        insert(Portfolio),
+        [
+            {
+                "portfolio_id": portfolio.portfolio_id,
+                "owner_user_id": owner_user_id,
+                "name": f"Synthetic {len(holdings)} ({portfolio.drift}/{portfolio.prices})",
+                "broker": "Synthetic",
+                "base_currency": "GBP",
+                "tax_profile": "GIA",
+                "is_enabled": False,  # never picked up by fleet runs
+            }
+        ],
+    )
+    db.execute(
+        insert(CashSnapshot),
+        [
+            {
+                "portfolio_id": portfolio.portfolio_id,
+                "balance_gbp": portfolio.cash_gbp,
+                "updated_at": as_of,
+                "version_no": 1,
+            }
+        ],
+    )
+    if not holdings:
+        return
+
+    db.execute(
+        insert(Instrument),
+        [
+            {
+                "instrument_id": h.instrument_id,
+                "isin": f"SY{h.instrument_id.hex[:10].upper()}",
+                "instrument_type": "ETF",
+                "name": f"Synthetic {h.ticker}",
+            }
+            for h in holdings
+        ],
+    )
+    db.execute(
+        insert(InstrumentListing),
+        [
+            {
+                "listing_id": h.listing_id,
+                "instrument_id": h.instrument_id,
+                "ticker": h.ticker,
+                "exchange": "LSE",
+                "trading_currency": h.currency,
+                "quote_scale": "MINOR" if h.currency == "GBX" else "MAJOR",
+                "is_primary": True,
+            }
+            for h in holdings
+        ],
+    )
+    db.execute(
+        insert(HoldingSnapshot),
+        [
+            {
+                "portfolio_id": portfolio.portfolio_id,
+                "listing_id": h.listing_id,
+                "quantity": h.quantity,
+                "book_cost_gbp": Decimal("0"),
+                "avg_cost_gbp": Decimal("0"),
+                "updated_at": as_of,
+                "version_no": 1,
+            }
+            for h in holdings
+        ],
+    )
+    db.execute(
+        insert(PortfolioPolicyAllocation),
+        [
+            {
+                "portfolio_policy_allocation_id": uuid.uuid4(),
+                "portfolio_id": portfolio.portfolio_id,
+                "listing_id": h.listing_id,
+                "ticker": h.ticker,
+                "sleeve_code": "CORE",
+                "policy_role": "STRATEGIC",
+                "target_weight_pct": h.target_weight_pct,
+                "priority_rank": rank,
+                "policy_hash": portfolio.policy_hash,
+            }
+            for rank, h in enumerate(holdings, start=1)
+        ],
+    )
+    db.execute(
+        insert(PricePoint),
+        [
+            {
+                "price_point_id": h.price_point_id,
+                "listing_id": h.listing_id,
+                "as_of": close_as_of,
+                "price": h.price,
+                "currency": h.currency,
+                "is_close": True,
+                "source_id": SOURCE_ID,
+            }
+            for h in holdings
+        ],
+    )
+    upsert_latest_prices(
+        db,
+        (
+            latest_price_row(
+                price_point_id=h.price_point_id,
+                listing_id=h.listing_id,
+                is_close=True,
+                source_id=SOURCE_ID,
+                as_of=close_as_of,
+                price=h.price,
+                currency=h.currency,
+            )
+            for h in holdings
+        ),
+    )
+
+
+def delete_portfolio(db: Session, portfolio: SyntheticPortfolio) -> None:
+    """Remove everything ``seed_portfolio`` inserted.  Does NOT commit."""
+    listing_ids = [h.listing_id for h in portfolio.holdings]
+    instrument_ids = [h.instrument_id for h in portfolio.holdings]
+    pid = portfolio.portfolio_id
+    db.execute(delete(PortfolioPolicyAllocation).where(PortfolioPolicyAllocation.portfolio_id == pid))
+    db.execute(delete(HoldingSnapshot).where(HoldingSnapshot.portfolio_id == pid))
+    db.execute(delete(CashSnapshot).where(CashSnapshot.portfolio_id == pid))
+    if listing_ids:
+        db.execute(delete(LatestPrice).where(LatestPrice.listing_id.in_(listing_ids)))
+        db.execute(delete(PricePoint).where(PricePoint.listing_id.in_(listing_ids)))
+        db.execute(delete(InstrumentListing).where(InstrumentListing.listing_id.in_(listing_ids)))
+        db.execute(delete(Instrument).where(Instrument.instrument_id.in_(instrument_ids)))
+    db.execute(delete(Portfolio).where(Portfolio.portfolio_id == pid))
+
+
+def _drift_multiplier(rng: random.Random, drift: str) -> float:
+    if drift == "balanced":
+        return max(0.0, rng.gauss(1.0, 0.02))
+    if drift == "drifted":
+        return rng.uniform(0.2, 2.5)
+    # mixed / concentrated
+    if rng.random() < 0.15:
+        return rng.uniform(0.2, 2.5)
+    return max(0.0, rng.gauss(1.0, 0.03))
+
+
+def _price(rng: random.Random, prices: str) -> tuple[Decimal, str]:
+    if prices == "uniform":
+        return Decimal(rng.randrange(100, 50_000)) / 100, "GBP"
+    if prices == "pence":
+        return Decimal(rng.randrange(5_000, 900_000)) / 100, "GBX"
+    price = min(max(math.exp(rng.gauss(math.log(50), 1.2)), 0.05), 20_000)
+    return Decimal(round(price * 10_000)) / 10_000, "GBP"
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _close_time(as_of: datetime) -> datetime:
+    """The previous day's close: always within PRICE_STALENESS_DAYS of as_of."""
+    return _as_utc(as_of) - timedelta(days=1)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
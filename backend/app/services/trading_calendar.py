@@ -0,0 +1,353 @@
+"""
+Trading Calendar Service
+
+Per-venue trading sessions (open / close instants) shared by the DQ gate,
+the scheduler and staleness checks.
+
+Session instants are precomputed in blocks of ``trading_calendar_window_days``
+UTC days (plus a week of padding either side), so the usual queries —
+"is the venue open?", "when was the last close?", "when is the next open?",
+"has today's session closed?" — are a dict lookup plus at most a couple of
+index steps.  Time-zone objects and "HH:MM" settings are resolved once, when
+the calendar is built.
+
+Weekends are never trading days.  Exchange holidays come from a JSON file
+mapping a venue code to a list of ISO dates (see ``trading_holidays.json``);
+``settings.trading_holidays_file`` points at a replacement file.  The table
+only lists the years someone has entered; a query for a venue outside those
+years logs a warning (once per venue) because its holidays will be treated
+as trading days.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import zoneinfo
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_HOLIDAYS_FILE = Path(__file__).with_name("trading_holidays.json")
+
+# Sessions are never more than this far apart (weekend + holiday run), so a
+# block padded by this much can answer last-close / next-open on its own.
+_WINDOW_PAD_DAYS = 7
+_MAX_CACHED_WINDOWS = 64
+_SECONDS_PER_DAY = 86_400
+
+# Exchange codes (as stored in InstrumentListing.exchange) → calendar venue.
+# NASDAQ shares NYSE hours and holidays.
+VENUE_ALIASES: dict[str, str] = {
+    "LSE": "LSE",
+    "XLON": "LSE",
+    "LON": "LSE",
+    "NYSE": "NYSE",
+    "XNYS": "NYSE",
+    "NASDAQ": "NYSE",
+    "XNAS": "NYSE",
+}
+
+
+@dataclass(frozen=True)
+class VenueHours:
+    """Regular session hours of one venue, in venue-local time."""
+
+    venue: str
+    tz: zoneinfo.ZoneInfo
+    open_time: time
+    close_time: time
+
+
+@dataclass(frozen=True)
+class TradingSession:
+    """One trading day of a venue, as POSIX timestamps."""
+
+    venue: str
+    day: date  # venue-local trading date
+    open_ts: float
+    close_ts: float
+    day_end_ts: float  # venue-local midnight after the session
+
+    @property
+    def opens_at(self) -> datetime:
+        return datetime.fromtimestamp(self.open_ts, tz=timezone.utc)
+
+    @property
+    def closes_at(self) -> datetime:
+        return datetime.fromtimestamp(self.close_ts, tz=timezone.utc)
+
+
+@dataclass(frozen=True)
+class _Window:
+    """Sessions around one block of UTC days, indexed by UTC day number."""
+
+    sessions: tuple[TradingSession, ...]
+    first_day: int
+    # first_index[d - first_day] = index of the first session with close_ts > d's midnight
+    first_index: tuple[int, ...]
+
+
+def _parse_hhmm(value: str) -> time:
+    hours, minutes = (int(part) for part in value.split(":"))
+    return time(hours, minutes)
+
+
+def _ts(at: datetime) -> float:
+    """POSIX timestamp; naive datetimes are UTC."""
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.timestamp()
+
+
+def load_holidays(path: Path | str) -> dict[str, frozenset[date]]:
+    """Read a ``{"VENUE": ["YYYY-MM-DD", ...]}`` holiday table."""
+    with open(path, encoding="utf-8") as handle:
+        raw = json.load(handle)
+    holidays: dict[str, set[date]] = {}
+    for code, days in raw.items():
+        venue = VENUE_ALIASES.get(code.upper(), code.upper())
+        holidays.setdefault(venue, set()).update(date.fromisoformat(d) for d in days)
+    return {venue: frozenset(days) for venue, days in holidays.items()}
+
+
+class TradingCalendar:
+    """Session open / close lookups for a fixed set of venues."""
+
+    def __init__(
+        self,
+        venues: Iterable[VenueHours],
+        holidays: Optional[dict[str, frozenset[date]]] = None,
+        aliases: Optional[dict[str, str]] = None,
+        window_days: int = 30,
+    ) -> None:
+        if window_days <= 0:
+            raise ValueError("window_days must be positive")
+        self._venues = {v.venue: v for v in venues}
+        self._aliases = {code: venue for code, venue in (aliases or VENUE_ALIASES).items()}
+        for venue in self._venues:
+            self._aliases.setdefault(venue, venue)
+        holidays = holidays or {}
+        self._holidays = {venue: holidays.get(venue, frozenset()) for venue in self._venues}
+        self._sorted_holidays = {
+            venue: sorted(d for d in days if d.weekday() < 5)
+            for venue, days in self._holidays.items()
+        }
+        self._covered_years = {
+            venue: (min(d.year for d in days), max(d.year for d in days)) if days else None
+            for venue, days in self._holidays.items()
+        }
+        self._uncovered_warned: set[str] = set()
+        self._window_days = window_days
+        self._windows: dict[tuple[str, int], _Window] = {}
+        self._lock = threading.Lock()
+
+    # ── Venue resolution ─────────────────────────────────────────────────────
+
+    def venue_for(self, exchange: str) -> Optional[str]:
+        """Calendar venue for an exchange code, or None when unknown."""
+        venue = self._aliases.get(exchange.upper())
+        return venue if venue in self._venues else None
+
+    def knows(self, exchange: str) -> bool:
+        return self.venue_for(exchange) is not None
+
+    @property
+    def venues(self) -> list[str]:
+        return list(self._venues)
+
+    # ── Day-level queries ────────────────────────────────────────────────────
+
+    def is_trading_day(self, exchange: str, day: date) -> bool:
+        venue = self._require(exchange)
+        return day.weekday() < 5 and day not in self._holidays[venue]
+
+    def local_date(self, exchange: str, at: datetime) -> date:
+        """Venue-local calendar date of *at*."""
+        venue = self._require(exchange)
+        return datetime.fromtimestamp(_ts(at), tz=self._venues[venue].tz).date()
+
+    def trading_days_between(self, exchange: str, start: date, end: date) -> int:
+        """Trading days in the half-open range ``(start, end]``."""
+        venue = self._require(exchange)
+        if end <= start:
+            return 0
+        first, last = start + timedelta(days=1), end
+        total = (last - first).days + 1
+        full_weeks, remainder = divmod(total, 7)
+        weekdays = full_weeks * 5
+        weekday = first.weekday()
+        for offset in range(remainder):
+            if (weekday + offset) % 7 < 5:
+                weekdays += 1
+        self._check_coverage(venue, first.year, last.year)
+        holidays = self._sorted_holidays[venue]
+        return weekdays - (bisect_right(holidays, last) - bisect_left(holidays, first))
+
+    def non_trading_days_between(self, exchange: str, start: date, end: date) -> int:
+        """Weekend / holiday days in the half-open range ``(start, end]``."""
+        if end <= start:
+            return 0
+        return (end - start).days - self.trading_days_between(exchange, start, end)
+
+    def holidays_between(self, exchange: str, start: date, end: date) -> list[date]:
+        """The venue's weekday holidays in ``[start, end]``, sorted."""
+        venue = self._require(exchange)
+        self._check_coverage(venue, start.year, end.year)
+        holidays = self._sorted_holidays[venue]
+        return holidays[bisect_left(holidays, start):bisect_right(holidays, end)]
+
+    # ── Instant queries (O(1) via precomputed windows) ───────────────────────
+
+    def is_open(self, exchange: str, at: datetime) -> bool:
+        """True while a regular session is in progress (open ≤ at < close)."""
+        sessions, i, ts = self._locate(exchange, at)
+        return i < len(sessions) and sessions[i].open_ts <= ts
+
+    def last_close(self, exchange: str, at: datetime) -> Optional[datetime]:
+        """Most recent session close at or before *at*."""
+        sessions, i, _ = self._locate(exchange, at)
+        return sessions[i - 1].closes_at if i > 0 else None
+
+    def next_open(self, exchange: str, at: datetime) -> Optional[datetime]:
+        """First session open strictly after *at*."""
+        sessions, i, ts = self._locate(exchange, at)
+        for session in sessions[i:i + 2]:
+            if session.open_ts > ts:
+                return session.opens_at
+        return None
+
+    def closed_for_day(self, exchange: str, at: datetime) -> bool:
+        """True when *at* is on a trading day, after that day's close.
+
+        This is the "today's close should exist by now" test: it is False
+        before the open, during the session, and on weekends / holidays.
+        """
+        sessions, i, ts = self._locate(exchange, at)
+        return i > 0 and ts < sessions[i - 1].day_end_ts
+
+    def session_at(self, exchange: str, at: datetime) -> Optional[TradingSession]:
+        """The session in progress at *at*, if any."""
+        sessions, i, ts = self._locate(exchange, at)
+        if i < len(sessions) and sessions[i].open_ts <= ts:
+            return sessions[i]
+        return None
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _require(self, exchange: str) -> str:
+        venue = self.venue_for(exchange)
+        if venue is None:
+            raise KeyError(f"Unknown trading venue: {exchange}")
+        return venue
+
+    def _locate(self, exchange: str, at: datetime) -> tuple[tuple[TradingSession, ...], int, float]:
+        """(sessions, index of the first session closing after *at*, ts)."""
+        venue = self._require(exchange)
+        ts = _ts(at)
+        day = int(ts // _SECONDS_PER_DAY)
+        window = self._window(venue, day // self._window_days)
+        sessions = window.sessions
+        i = window.first_index[day - window.first_day]
+        while i < len(sessions) and sessions[i].close_ts <= ts:
+            i += 1
+        return sessions, i, ts
+
+    def _check_coverage(self, venue: str, first_year: int, last_year: int) -> None:
+        """Warn (once per venue) about a query outside the holiday table."""
+        if venue in self._uncovered_warned:
+            return
+        covered = self._covered_years[venue]
+        if covered is not None and covered[0] <= first_year and last_year <= covered[1]:
+            return
+        self._uncovered_warned.add(venue)
+        if covered is None:
+            logger.warning(f"No trading holidays loaded for {venue}; only weekends are non-trading days")
+        else:
+            logger.warning(
+                f"Trading holidays for {venue} cover {covered[0]}-{covered[1]}; "
+                f"dates in {first_year}-{last_year} outside that range treat holidays as trading days"
+            )
+
+    def _window(self, venue: str, block: int) -> _Window:
+        key = (venue, block)
+        window = self._windows.get(key)
+        if window is not None:
+            return window
+        window = self._build_window(venue, block)
+        with self._lock:
+            if len(self._windows) >= _MAX_CACHED_WINDOWS:
+                self._windows.pop(next(iter(self._windows)))
+            self._windows[key] = window
+        return window
+
+    def _build_window(self, venue: str, block: int) -> _Window:
+        hours = self._venues[venue]
+        first_day = block * self._window_days
+        epoch = date(1970, 1, 1)
+        start = epoch + timedelta(days=first_day - _WINDOW_PAD_DAYS)
+        end = epoch + timedelta(days=first_day + self._window_days + _WINDOW_PAD_DAYS)
+        self._check_coverage(venue, start.year, end.year)
+
+        sessions: list[TradingSession] = []
+        day = start
+        while day <= end:
+            if day.weekday() < 5 and day not in self._holidays[venue]:
+                next_midnight = datetime.combine(day + timedelta(days=1), time(), hours.tz)
+                sessions.append(
+                    TradingSession(
+                        venue=venue,
+                        day=day,
+                        open_ts=datetime.combine(day, hours.open_time, hours.tz).timestamp(),
+                        close_ts=datetime.combine(day, hours.close_time, hours.tz).timestamp(),
+                        day_end_ts=next_midnight.timestamp(),
+                    )
+                )
+            day += timedelta(days=1)
+
+        close_times = [s.close_ts for s in sessions]
+        first_index = tuple(
+            bisect_right(close_times, float((first_day + offset) * _SECONDS_PER_DAY))
+            for offset in range(self._window_days)
+        )
+        return _Window(sessions=tuple(sessions), first_day=first_day, first_index=first_index)
+
+
+def build_trading_calendar() -> TradingCalendar:
+    """Build the calendar from venue settings and the holiday file."""
+    venues = [
+        VenueHours(
+            venue="LSE",
+            tz=zoneinfo.ZoneInfo(settings.venue_lse_tz),
+            open_time=_parse_hhmm(settings.venue_lse_open_time),
+            close_time=_parse_hhmm(settings.venue_lse_close_time),
+        ),
+        VenueHours(
+            venue="NYSE",
+            tz=zoneinfo.ZoneInfo(settings.venue_nyse_tz),
+            open_time=_parse_hhmm(settings.venue_nyse_open_time),
+            close_time=_parse_hhmm(settings.venue_nyse_close_time),
+        ),
+    ]
+    path = settings.trading_holidays_file or DEFAULT_HOLIDAYS_FILE
+    try:
+        holidays = load_holidays(path)
+    except (OSError, ValueError) as exc:
+        logger.error(f"Could not load trading holidays from {path}: {exc}")
+        holidays = {}
+    return TradingCalendar(
+        venues, holidays, window_days=settings.trading_calendar_window_days
+    )
+
+
+@lru_cache
+def get_trading_calendar() -> TradingCalendar:
+    """Process-wide calendar instance."""
+    return build_trading_calendar()
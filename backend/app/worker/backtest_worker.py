@@ -0,0 +1,107 @@
+"""
+BACKTEST Worker Handler
+
+Replays generate_trade_plan over stored closes for one portfolio (see
+app.services.backtest).  ``job.params`` is a BacktestRequest: the window,
+an optional starting ledger and up to 50 engine parameter sets, all
+replayed over one load of the price history.
+
+The result is a BACKTEST TaskRun whose summary holds one entry per
+parameter set (totals, drawdown and, unless disabled, the daily valuation
+series).  Session lifecycle matches the other handlers: commit on success,
+FAILED TaskRun after a rollback.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.logging import with_correlation
+from app.db.session import SessionLocal
+from app.domain.models import TaskRun
+from app.queue.redis_queue import JobPayload
+from app.schemas.backtest import BacktestConfig, BacktestRequest
+from app.services.backtest import (
+    BacktestParams,
+    load_price_history,
+    load_start_state,
+    run_backtest,
+)
+from app.worker.price_refresh_worker import _write_failed_run
+
+
+async def handle_backtest(job: JobPayload, ctx_logger: logging.Logger) -> str:
+    """
+    Handle a BACKTEST job.
+
+    Returns:
+        run_id of the BACKTEST TaskRun.
+    """
+    run_id = str(uuid.uuid4())
+    started_at = datetime.now(timezone.utc)
+    base_logger = ctx_logger.logger if isinstance(ctx_logger, logging.LoggerAdapter) else ctx_logger
+    ctx_logger = with_correlation(
+        base_logger, job_id=job.job_id, run_id=run_id, portfolio_id=job.portfolio_id
+    )
+
+    db: Session = SessionLocal()
+    try:
+        request = BacktestRequest.model_validate(job.params)
+        portfolio_id = uuid.UUID(job.portfolio_id)
+        start = load_start_state(
+            db, portfolio_id, cash_gbp=request.cash_gbp, quantities=request.holdings
+        )
+        history = load_price_history(db, list(start.quantities), request.start, request.end)
+        summaries = run_backtest(history, start, [backtest_params(c) for c in request.configs])
+
+        db.add(
+            TaskRun(
+                run_id=uuid.UUID(run_id),
+                job_id=uuid.UUID(job.job_id),
+                task_kind="BACKTEST",
+                portfolio_id=portfolio_id,
+                status="SUCCESS",
+                started_at=started_at,
+                ended_at=datetime.now(timezone.utc),
+                summary={
+                    "start": request.start.isoformat(),
+                    "end": request.end.isoformat(),
+                    "listings": len(history.listing_ids),
+                    "trading_days": len(history.days),
+                    "results": [s.to_json(request.include_series) for s in summaries],
+                },
+            )
+        )
+        db.commit()
+        ctx_logger.info(
+            "Job complete — run_id=%s days=%d configs=%d",
+            run_id,
+            len(history.days),
+            len(summaries),
+        )
+        return run_id
+
+    except Exception as exc:
+        db.rollback()
+        ctx_logger.error("Job failed: %s", exc, exc_info=True)
+        _write_failed_run(
+            db, job, "BACKTEST", job.portfolio_id, run_id, started_at, exc, ctx_logger
+        )
+        raise
+
+    finally:
+        db.close()
+
+
+def backtest_params(config: BacktestConfig) -> BacktestParams:
+    return BacktestParams(
+        drift_threshold=config.drift_threshold_pct,
+        min_trade_size=config.min_trade_size_gbp,
+        max_sells=config.max_sells,
+        max_buys=config.max_buys,
+        sleeve_sell_caps=config.sleeve_sell_caps,
+        sleeve_buy_caps=config.sleeve_buy_caps,
+    )
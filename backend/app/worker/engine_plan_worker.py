@@ -0,0 +1,66 @@
+"""
+FLEET_TRADE_PLAN Worker Handler
+
+Computes trade plans for every enabled portfolio in one job (see
+app.services.engine_batch).  The plan calculation itself fans out over a
+process pool inside this handler.
+
+Session lifecycle matches the price-refresh handlers: the worker opens the
+session, commits the fleet + per-portfolio TaskRuns on success and writes a
+FAILED TaskRun after a rollback.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.logging import with_correlation
+from app.db.session import SessionLocal
+from app.queue.redis_queue import JobPayload
+from app.services.engine_batch import plan_fleet, record_fleet_run
+from app.worker.price_refresh_worker import _write_failed_run
+
+
+async def handle_fleet_trade_plan(job: JobPayload, ctx_logger: logging.Logger) -> str:
+    """
+    Handle a FLEET_TRADE_PLAN job.
+
+    ``job.portfolio_id`` may name a single portfolio; empty means the whole
+    fleet.
+
+    Returns:
+        run_id of the FLEET_TRADE_PLAN TaskRun.
+    """
+    started_at = datetime.now(timezone.utc)
+    base_logger = ctx_logger.logger if isinstance(ctx_logger, logging.LoggerAdapter) else ctx_logger
+
+    db: Session = SessionLocal()
+    run_id = str(uuid.uuid4())
+    try:
+        run = plan_fleet(db, portfolio_ids=[job.portfolio_id] if job.portfolio_id else None)
+        run_id = run.run_id
+        ctx_logger = with_correlation(base_logger, job_id=job.job_id, run_id=run_id)
+        record_fleet_run(db, run, job.job_id)
+        db.commit()
+        ctx_logger.info(
+            "Job complete — run_id=%s portfolios=%d counts=%s trades=%d",
+            run_id,
+            len(run.outcomes),
+            run.counts,
+            run.trade_count,
+        )
+        return run_id
+
+    except Exception as exc:
+        db.rollback()
+        ctx_logger.error("Job failed: %s", exc, exc_info=True)
+        _write_failed_run(
+            db, job, "FLEET_TRADE_PLAN", None, run_id, started_at, exc, ctx_logger
+        )
+        raise
+
+    finally:
+        db.close()
@@ -0,0 +1,218 @@
+"""
+Worker Pool — Concurrent Job Runtime
+
+Runs up to ``concurrency`` jobs at once in a single event loop.  One
+dispatcher coroutine waits on the async queue only while a slot is free,
+so a slow job (e.g. a yfinance fetch) never stalls the others, and the
+queue is never drained faster than jobs can run.
+
+Per-task-kind caps (``kind_limits``) bound how many jobs of one kind run
+at the same time; a capped job holds its slot while it waits, so the total
+number of dequeued-but-unfinished jobs never exceeds ``concurrency``.
+
+Handlers mix async provider I/O with synchronous SQLAlchemy work, so each
+job runs on its own thread with a private event loop; the dispatcher loop
+itself only ever awaits.
+
+While a job is in flight its lease is extended every
+``lease_heartbeat_interval`` seconds (``queue.extend_lease``), so a job
+that legitimately outlives the visibility timeout (a fleet plan run, a long
+backtest) is not reaped and delivered a second time.
+
+Every finished job is settled on the queue: ``ack`` on success, ``fail``
+(retry with backoff, then dead-letter) on an exception.  A maintenance task
+runs the queue's reaper every ``maintenance_interval`` seconds so jobs left
+behind by a crashed worker are picked up again.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Protocol
+
+from app.core.logging import get_logger, with_correlation
+from app.queue.redis_queue import JobPayload
+
+logger = get_logger(__name__)
+
+JobHandler = Callable[[JobPayload, logging.LoggerAdapter], Awaitable[object]]
+
+
+class JobSource(Protocol):
+    """What the pool needs from a queue (AsyncRedisQueue satisfies it)."""
+
+    async def dequeue_job(self, timeout: int = 5) -> Optional[JobPayload]:
+        ...
+
+    async def extend_lease(self, job: JobPayload) -> bool:
+        ...
+
+    async def ack(self, job: JobPayload) -> None:
+        ...
+
+    async def fail(self, job: JobPayload, error: str, *, retry: bool = True) -> None:
+        ...
+
+    async def maintain(self) -> None:
+        ...
+
+
+class WorkerPool:
+    """Bounded-concurrency dispatcher for queued jobs."""
+
+    def __init__(
+        self,
+        queue: JobSource,
+        handlers: dict[str, JobHandler],
+        *,
+        concurrency: int,
+        kind_limits: Optional[dict[str, int]] = None,
+        dequeue_timeout: int = 5,
+        maintenance_interval: float = 5.0,
+        lease_heartbeat_interval: float = 60.0,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.dequeue_timeout = dequeue_timeout
+        self.maintenance_interval = maintenance_interval
+        self.lease_heartbeat_interval = lease_heartbeat_interval
+        self.kind_limits = {
+            kind: max(1, min(limit, concurrency))
+            for kind, limit in (kind_limits or {}).items()
+        }
+        self._slots = asyncio.Semaphore(concurrency)
+        self._kind_slots = {
+            kind: asyncio.Semaphore(limit) for kind, limit in self.kind_limits.items()
+        }
+        self._in_flight: set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="worker-job"
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, shutdown_event: asyncio.Event) -> None:
+        """Dispatch jobs until ``shutdown_event`` is set, then drain in-flight jobs."""
+        logger.info(
+            "Worker pool started: concurrency=%d kind_limits=%s",
+            self.concurrency,
+            self.kind_limits,
+        )
+        maintenance = asyncio.create_task(self._maintain(shutdown_event))
+        while not shutdown_event.is_set():
+            await self._slots.acquire()
+            try:
+                job = await self._next_job(shutdown_event)
+            except Exception as exc:
+                self._slots.release()
+                logger.error("Dequeue failed: %s", exc, exc_info=True)
+                await asyncio.sleep(1)
+                continue
+
+            if job is None:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._run_job(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+        if self._in_flight:
+            logger.info("Waiting for %d in-flight job(s) to finish...", len(self._in_flight))
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        await maintenance
+        self._executor.shutdown(wait=True)
+
+    async def _maintain(self, shutdown_event: asyncio.Event) -> None:
+        """Run the queue reaper periodically until shutdown."""
+        while not shutdown_event.is_set():
+            try:
+                await self.queue.maintain()
+            except Exception as exc:
+                logger.error("Queue maintenance failed: %s", exc, exc_info=True)
+            try:
+                await asyncio.wait_for(shutdown_event.wait(), self.maintenance_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _next_job(self, shutdown_event: asyncio.Event) -> Optional[JobPayload]:
+        """Wait for a job, returning None on timeout or shutdown."""
+        dequeue = asyncio.create_task(self.queue.dequeue_job(timeout=self.dequeue_timeout))
+        stop = asyncio.create_task(shutdown_event.wait())
+        done, _ = await asyncio.wait({dequeue, stop}, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if dequeue in done:
+            return dequeue.result()
+        dequeue.cancel()
+        return None
+
+    async def _run_job(self, job: JobPayload) -> None:
+        ctx_logger = with_correlation(
+            logger,
+            job_id=job.job_id,
+            portfolio_id=job.portfolio_id,
+        )
+        heartbeat = asyncio.create_task(self._keep_leased(job, ctx_logger))
+        try:
+            handler = self.handlers.get(job.task_kind)
+            if handler is None:
+                ctx_logger.warning("Unknown task_kind: %s — dead-lettering", job.task_kind)
+                await self._settle(
+                    self.queue.fail(job, f"Unknown task_kind: {job.task_kind}", retry=False),
+                    ctx_logger,
+                )
+                return
+
+            try:
+                kind_slot = self._kind_slots.get(job.task_kind)
+                if kind_slot is None:
+                    await self._dispatch(handler, job, ctx_logger)
+                else:
+                    async with kind_slot:
+                        await self._dispatch(handler, job, ctx_logger)
+            except Exception as exc:
+                # Log but do NOT crash the pool — the queue decides retry vs dead letter.
+                ctx_logger.error("Job failed: %s", exc, exc_info=True)
+                await self._settle(self.queue.fail(job, repr(exc)), ctx_logger)
+            else:
+                await self._settle(self.queue.ack(job), ctx_logger)
+        finally:
+            heartbeat.cancel()
+            self._slots.release()
+
+    async def _keep_leased(self, job: JobPayload, ctx_logger: logging.LoggerAdapter) -> None:
+        """Extend the job's lease every heartbeat interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.lease_heartbeat_interval)
+            try:
+                if not await self.queue.extend_lease(job):
+                    ctx_logger.warning("Lease lost before the job finished; it may run again")
+                    return
+            except Exception as exc:
+                ctx_logger.error("Could not extend job lease: %s", exc, exc_info=True)
+
+    @staticmethod
+    async def _settle(outcome: Awaitable[None], ctx_logger: logging.LoggerAdapter) -> None:
+        """Await an ack/fail; a Redis error here must not take the pool down."""
+        try:
+            await outcome
+        except Exception as exc:
+            ctx_logger.error("Could not settle job on the queue: %s", exc, exc_info=True)
+
+    async def _dispatch(
+        self,
+        handler: JobHandler,
+        job: JobPayload,
+        ctx_logger: logging.LoggerAdapter,
+    ) -> None:
+        ctx_logger.info("Processing job: %s", job.task_kind)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self._executor, lambda: asyncio.run(handler(job, ctx_logger))
+        )
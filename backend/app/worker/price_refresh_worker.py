@@ -4,13 +4,17 @@ PRICE_REFRESH Worker Handler
 Orchestrates the full ingest → DQ gate → alerts/freeze/notifications → audit pipeline
 for a single PRICE_REFRESH job dequeued from Redis.
 
+GLOBAL_PRICE_REFRESH runs the same pipeline for every portfolio at once: one
+shared ingest of the distinct monitored listings, then the DQ gate per
+portfolio (see handle_global_price_refresh).
+
 Session lifecycle:
   - Worker opens the session (SessionLocal()).
   - Worker commits on success, rolls back on failure.
-  - Individual services (alerts, freeze) also commit their own rows because
-    the current service implementations issue db.commit() internally.
-    This is intentional: alert deduplication depends on rows being durable
-    before the next dedup check.
+  - Alerts are inserted in bulk without committing; deduplication is
+    enforced by the uq_alerts_open_rule partial unique index, so it does not
+    depend on earlier rows being committed.  freeze_portfolio still commits
+    its own rows.
   - TaskRun + RunInputSnapshot are committed in the final step.
 """
 from __future__ import annotations
@@ -25,10 +29,21 @@ from app.core.logging import get_logger, with_correlation
 from app.db.session import SessionLocal
 from app.domain.models import Portfolio, RunInputSnapshot, TaskRun
 from app.queue.redis_queue import JobPayload
-from app.services.alerts import create_alert
-from app.services.data_quality import evaluate_dq
+from app.services.alerts import create_alerts, resolve_cleared_alerts
+from app.services.data_quality import (
+    DQViolation,
+    critical_listing_ids,
+    evaluate_dq,
+    freshly_evaluated,
+)
+from app.services.dq_columnar import evaluate_dq_fleet
+from app.services.drift_monitor import load_baselines, track_prices
 from app.services.freeze import freeze_portfolio, is_portfolio_frozen
-from app.services.market_data_ingest import IngestResult, ingest_prices_for_portfolio
+from app.services.market_data_ingest import (
+    IngestResult,
+    ingest_prices_for_all_portfolios,
+    ingest_prices_for_portfolio,
+)
 from app.services.notifications import emit_notification
 from app.services.providers.yfinance_adapter import YFinanceAdapter
 from app.core.config import settings
@@ -44,10 +59,13 @@ async def handle_price_refresh(job: JobPayload, ctx_logger: logging.Logger) -> s
       1.  Open DB session (worker-managed lifecycle).
       2.  Ingest prices via MockProvider → IngestResult.
       3.  Evaluate DQ rules → list[DQViolation].
-      4.  For each violation: create_alert() with dedup.
+      4.  create_alerts() for all violations in one deduplicating INSERT;
+          resolve_cleared_alerts() resolves alerts whose violation cleared
+          (only for listings / FX pairs fetched in this run).
       5.  For each new CRITICAL alert: freeze_portfolio() + emit_notification().
       6.  Determine run status: SUCCESS / FROZEN / FAILED.
-      7.  Write TaskRun + RunInputSnapshot.
+      7.  Write TaskRun + RunInputSnapshot; apply the drift monitor ticks
+          for quotes without a CRITICAL violation.
       8.  Commit (or rollback + write FAILED TaskRun on exception).
       9.  Return run_id.
 
@@ -80,6 +98,9 @@ async def handle_price_refresh(job: JobPayload, ctx_logger: logging.Logger) -> s
         adapter = YFinanceAdapter()
         ctx_logger.info("Using provider: %s", adapter.source_id)
 
+        # Drift monitor baseline first, so this ingest's closes apply as deltas.
+        load_baselines(db, [job.portfolio_id])
+
         # ── 2. Ingest market data ──────────────────────────────────────────────
         ctx_logger.info("Ingesting prices for portfolio %s", job.portfolio_id)
         ingest_result: IngestResult = await ingest_prices_for_portfolio(
@@ -100,177 +121,447 @@ async def handle_price_refresh(job: JobPayload, ctx_logger: logging.Logger) -> s
             for err in ingest_result.errors:
                 ctx_logger.warning("Ingest error: %s", err)
 
-        # ── 3. Evaluate data quality ───────────────────────────────────────────
+        # ── 3–8. DQ gate, alerts/freeze/notifications, audit rows ─────────────
+        run_status, violations = _evaluate_and_record(
+            db,
+            job,
+            job.portfolio_id,
+            run_id,
+            started_at,
+            ingest_result,
+            adapter.source_id,
+            ctx_logger,
+        )
+
+        # Drift ticks only for quotes the DQ gate let through.
+        rejected = critical_listing_ids(violations)
+        crossings = track_prices(
+            db, [q for q in ingest_result.price_quotes if str(q.listing_id) not in rejected]
+        )
+        if crossings:
+            ctx_logger.info("Drift threshold crossed — sleeves=%d", len(crossings))
+
+        # ── Commit ────────────────────────────────────────────────────────────
+        # NOTE: freeze_portfolio() calls db.commit() internally for its own
+        # rows.  This final commit persists alerts, TaskRun and
+        # RunInputSnapshot (plus any unflushed changes).
+        db.commit()
+        ctx_logger.info(
+            "Job complete — run_id=%s status=%s", run_id, run_status
+        )
+
+        return run_id
+
+    except Exception as exc:
+        db.rollback()
+        ctx_logger.error("Job failed: %s", exc, exc_info=True)
+
+        _write_failed_run(
+            db, job, "PRICE_REFRESH", job.portfolio_id, run_id, started_at, exc, ctx_logger
+        )
+        raise
+
+    finally:
+        db.close()
+        ctx_logger.info("DB session closed: run_id=%s", run_id)
+
+
+def _evaluate_and_record(
+    db: Session,
+    job: JobPayload,
+    portfolio_id: str,
+    run_id: str,
+    started_at: datetime,
+    ingest_result: IngestResult,
+    provider: str,
+    ctx_logger: logging.LoggerAdapter,
+    *,
+    shared_run_id: str | None = None,
+    violations: list[DQViolation] | None = None,
+) -> tuple[str, list[DQViolation]]:
+    """
+    DQ gate → alerts/freeze/notifications → TaskRun + RunInputSnapshot for one
+    portfolio's ingest result.  Does not commit the TaskRun.
+
+    ``violations`` may be precomputed (columnar fleet evaluation); otherwise
+    evaluate_dq runs here.
+
+    Returns:
+        (run status: SUCCESS / FROZEN / FAILED, the DQ violations).
+    """
+    # ── 3. Evaluate data quality ───────────────────────────────────────────
+    if violations is None:
         ctx_logger.info("Evaluating data quality...")
         violations = evaluate_dq(
             db=db,
-            portfolio_id=job.portfolio_id,
+            portfolio_id=portfolio_id,
             price_quotes=ingest_result.price_quotes,
             fx_quotes=ingest_result.fx_quotes,
             as_of=datetime.now(timezone.utc),
         )
-        ctx_logger.info("DQ evaluation complete — violations=%d", len(violations))
+    ctx_logger.info("DQ evaluation complete — violations=%d", len(violations))
 
-        # ── 4 & 5. Process violations: alerts, freeze, notifications ──────────
-        critical_count = 0
+    # ── 4 & 5. Process violations: alerts, freeze, notifications ──────────
+    critical_count = 0
 
-        for v in violations:
-            ctx_logger.info(
-                "DQ violation: rule=%s severity=%s listing=%s",
-                v.rule_code,
-                v.severity,
-                v.listing_id,
-            )
+    for v in violations:
+        ctx_logger.info(
+            "DQ violation: rule=%s severity=%s listing=%s",
+            v.rule_code,
+            v.severity,
+            v.listing_id,
+        )
 
-            if v.severity == "CRITICAL":
-                critical_count += 1
+        if v.severity == "CRITICAL":
+            critical_count += 1
 
-            # create_alert() deduplicates: returns None if unresolved alert exists.
-            alert = create_alert(
-                db=db,
-                portfolio_id=job.portfolio_id,
-                listing_id=v.listing_id,
-                severity=v.severity,
-                rule_code=v.rule_code,
-                title=v.title,
-                message=v.message,
-                details=v.details,
-            )
+    # One INSERT ... ON CONFLICT DO NOTHING for every violation; only alerts
+    # that did not already exist unresolved come back.
+    new_alerts = create_alerts(db, portfolio_id, violations)
+    ctx_logger.info(
+        "Alerts written — created=%d deduplicated=%d",
+        len(new_alerts),
+        len(violations) - len(new_alerts),
+    )
 
-            if alert is not None:
-                ctx_logger.info(
-                    "Alert created: alert_id=%s rule=%s severity=%s",
-                    alert.alert_id,
-                    v.rule_code,
-                    v.severity,
-                )
+    # Violations that cleared since the last pass resolve their open alerts —
+    # but not those whose listing / FX pair failed to fetch this time.
+    base_currency = (
+        db.query(Portfolio.base_currency)
+        .filter(Portfolio.portfolio_id == portfolio_id)
+        .scalar()
+    )
+    resolved_alert_ids = resolve_cleared_alerts(
+        db,
+        portfolio_id,
+        violations,
+        evaluated=freshly_evaluated(
+            ingest_result.listings,
+            ingest_result.price_quotes,
+            ingest_result.fx_quotes,
+            base_currency or "GBP",
+        ),
+    )
+    if resolved_alert_ids:
+        ctx_logger.info("Alerts auto-resolved — count=%d", len(resolved_alert_ids))
 
-                if v.severity == "CRITICAL":
-                    ctx_logger.warning(
-                        "CRITICAL violation — freezing portfolio: rule=%s", v.rule_code
-                    )
-                    freeze_portfolio(
-                        db=db,
-                        portfolio_id=job.portfolio_id,
-                        reason_alert_id=str(alert.alert_id),
-                    )
-                    ctx_logger.info("Portfolio frozen: portfolio_id=%s", job.portfolio_id)
-
-                    portfolio = (
-                        db.query(Portfolio)
-                        .filter(Portfolio.portfolio_id == job.portfolio_id)
-                        .first()
-                    )
-                    if portfolio is not None:
-                        emit_notification(
-                            db=db,
-                            owner_user_id=str(portfolio.owner_user_id),
-                            severity="CRITICAL",
-                            title=f"Portfolio Frozen: {v.title}",
-                            body=v.message,
-                            meta={
-                                "portfolio_id": job.portfolio_id,
-                                "alert_id": str(alert.alert_id),
-                                "run_id": run_id,
-                                "rule_code": v.rule_code,
-                            },
-                        )
-                        ctx_logger.info(
-                            "Notification emitted: owner=%s", portfolio.owner_user_id
-                        )
-                    else:
-                        ctx_logger.warning(
-                            "Portfolio not found for notification: portfolio_id=%s",
-                            job.portfolio_id,
-                        )
-            else:
-                ctx_logger.info(
-                    "Alert deduplicated (unresolved exists): rule=%s", v.rule_code
-                )
+    portfolio = None
+    for alert in new_alerts:
+        ctx_logger.info(
+            "Alert created: alert_id=%s rule=%s severity=%s",
+            alert.alert_id,
+            alert.rule_code,
+            alert.severity,
+        )
+        if alert.severity != "CRITICAL":
+            continue
 
-        # ── 6. Determine run status ────────────────────────────────────────────
-        # FROZEN: at least one CRITICAL violation AND portfolio is now frozen.
-        # FAILED: violations exist but portfolio was not frozen
-        #         (e.g. freeze already existed from a prior run).
-        # SUCCESS: no violations.
-        if critical_count > 0 and is_portfolio_frozen(db, job.portfolio_id):
-            run_status = "FROZEN"
-        elif len(violations) > 0:
-            run_status = "FAILED"
-        else:
-            run_status = "SUCCESS"
+        ctx_logger.warning(
+            "CRITICAL violation — freezing portfolio: rule=%s", alert.rule_code
+        )
+        freeze_portfolio(
+            db=db,
+            portfolio_id=portfolio_id,
+            reason_alert_id=str(alert.alert_id),
+        )
+        ctx_logger.info("Portfolio frozen: portfolio_id=%s", portfolio_id)
 
-        ctx_logger.info("Run status determined: status=%s", run_status)
+        if portfolio is None:
+            portfolio = (
+                db.query(Portfolio)
+                .filter(Portfolio.portfolio_id == portfolio_id)
+                .first()
+            )
+        if portfolio is not None:
+            emit_notification(
+                db=db,
+                owner_user_id=str(portfolio.owner_user_id),
+                severity="CRITICAL",
+                title=f"Portfolio Frozen: {alert.title}",
+                body=alert.message,
+                meta={
+                    "portfolio_id": portfolio_id,
+                    "alert_id": str(alert.alert_id),
+                    "run_id": run_id,
+                    "rule_code": alert.rule_code,
+                },
+            )
+            ctx_logger.info(
+                "Notification emitted: owner=%s", portfolio.owner_user_id
+            )
+        else:
+            ctx_logger.warning(
+                "Portfolio not found for notification: portfolio_id=%s",
+                portfolio_id,
+            )
 
-        # ── 7. Write TaskRun ───────────────────────────────────────────────────
-        task_run = TaskRun(
+    # ── 6. Determine run status ────────────────────────────────────────────
+    # FROZEN: at least one CRITICAL violation AND portfolio is now frozen.
+    # FAILED: violations exist but portfolio was not frozen
+    #         (e.g. freeze already existed from a prior run).
+    # SUCCESS: no violations.
+    if critical_count > 0 and is_portfolio_frozen(db, portfolio_id):
+        run_status = "FROZEN"
+    elif len(violations) > 0:
+        run_status = "FAILED"
+    else:
+        run_status = "SUCCESS"
+
+    ctx_logger.info("Run status determined: status=%s", run_status)
+
+    # ── 7. Write TaskRun ───────────────────────────────────────────────────
+    summary = {
+        "prices_fetched": len(ingest_result.price_quotes),
+        "prices_inserted": ingest_result.prices_inserted,
+        "fx_fetched": len(ingest_result.fx_quotes),
+        "fx_inserted": ingest_result.fx_inserted,
+        "violations": len(violations),
+        "critical_violations": critical_count,
+        "alerts_resolved": len(resolved_alert_ids),
+        "errors": ingest_result.errors,
+    }
+    if shared_run_id is not None:
+        # Inserts are counted once on the shared GLOBAL_PRICE_REFRESH run.
+        summary["shared_run_id"] = shared_run_id
+    task_run = TaskRun(
+        run_id=uuid.UUID(run_id),
+        job_id=uuid.UUID(job.job_id),
+        task_kind="PRICE_REFRESH",
+        portfolio_id=uuid.UUID(portfolio_id) if portfolio_id else None,
+        status=run_status,
+        started_at=started_at,
+        ended_at=datetime.now(timezone.utc),
+        summary=summary,
+    )
+    db.add(task_run)
+    db.flush()
+
+    # ── 8. Write RunInputSnapshot ──────────────────────────────────────────
+    input_snapshot = RunInputSnapshot(
+        run_id=uuid.UUID(run_id),
+        input_json={
+            "portfolio_id": portfolio_id,
+            "job_id": job.job_id,
+            "task_kind": job.task_kind,
+            "provider": provider,
+            "dq_config": {
+                "stale_max_minutes_intraday": settings.dq_stale_max_minutes_intraday,
+                "stale_max_days_close": settings.dq_stale_max_days_close,
+                "jump_threshold_pct": settings.dq_jump_threshold_pct,
+                "require_close": settings.dq_require_close,
+                "fx_stale_max_days": settings.dq_fx_stale_max_days,
+            },
+            "listings": [str(lst.listing_id) for lst in ingest_result.listings],
+            "price_quotes": [
+                {
+                    "listing_id": q.listing_id,
+                    "price": q.price,
+                    "currency": q.currency,
+                    "is_close": q.is_close,
+                    "as_of": q.as_of.isoformat(),
+                }
+                for q in ingest_result.price_quotes
+            ],
+            "fx_quotes": [
+                {
+                    "base_ccy": q.base_ccy,
+                    "quote_ccy": q.quote_ccy,
+                    "rate": q.rate,
+                    "as_of": q.as_of.isoformat(),
+                }
+                for q in ingest_result.fx_quotes
+            ],
+        },
+        input_hash="",
+    )
+    db.add(input_snapshot)
+
+    return run_status, violations
+
+
+def _write_failed_run(
+    db: Session,
+    job: JobPayload,
+    task_kind: str,
+    portfolio_id: str | None,
+    run_id: str,
+    started_at: datetime,
+    exc: Exception,
+    ctx_logger: logging.LoggerAdapter,
+) -> None:
+    """Record a FAILED TaskRun after a rollback; never raises."""
+    try:
+        failed_run = TaskRun(
             run_id=uuid.UUID(run_id),
             job_id=uuid.UUID(job.job_id),
-            task_kind="PRICE_REFRESH",
-            portfolio_id=uuid.UUID(job.portfolio_id) if job.portfolio_id else None,
-            status=run_status,
+            task_kind=task_kind,
+            portfolio_id=uuid.UUID(portfolio_id) if portfolio_id else None,
+            status="FAILED",
             started_at=started_at,
             ended_at=datetime.now(timezone.utc),
             summary={
-                "prices_fetched": len(ingest_result.price_quotes),
-                "prices_inserted": ingest_result.prices_inserted,
-                "fx_fetched": len(ingest_result.fx_quotes),
-                "fx_inserted": ingest_result.fx_inserted,
-                "violations": len(violations),
-                "critical_violations": critical_count,
-                "errors": ingest_result.errors,
+                "error": str(exc),
+                "error_type": type(exc).__name__,
             },
         )
-        db.add(task_run)
-        db.flush()
+        db.add(failed_run)
+        db.commit()
+        ctx_logger.info("FAILED TaskRun written: run_id=%s", run_id)
+    except Exception as inner_exc:
+        ctx_logger.error(
+            "Failed to write FAILED TaskRun: %s", inner_exc, exc_info=True
+        )
 
-        # ── 8. Write RunInputSnapshot ──────────────────────────────────────────
-        input_snapshot = RunInputSnapshot(
-            run_id=uuid.UUID(run_id),
-            input_json={
-                "portfolio_id": job.portfolio_id,
-                "job_id": job.job_id,
-                "task_kind": job.task_kind,
-                "provider": adapter.source_id,
-                "dq_config": {
-                    "stale_max_minutes_intraday": settings.dq_stale_max_minutes_intraday,
-                    "stale_max_days_close": settings.dq_stale_max_days_close,
-                    "jump_threshold_pct": settings.dq_jump_threshold_pct,
-                    "require_close": settings.dq_require_close,
-                    "fx_stale_max_days": settings.dq_fx_stale_max_days,
+
+async def handle_global_price_refresh(job: JobPayload, ctx_logger: logging.Logger) -> str:
+    """
+    Handle a GLOBAL_PRICE_REFRESH job: one shared ingest for every portfolio.
+
+    Orchestration flow:
+      1.  Ingest the union of monitored listings across all portfolios —
+          each distinct listing / FX pair is fetched and written once.
+      2.  Commit the ingest, so prices survive a failing portfolio below.
+      3.  For each portfolio: DQ gate → alerts/freeze/notifications →
+          PRICE_REFRESH TaskRun (own run_id), committed per portfolio.  A
+          failure is recorded as that portfolio's FAILED run and the loop
+          continues.
+      4.  Write the GLOBAL_PRICE_REFRESH TaskRun (no portfolio) with the
+          insert counts and per-portfolio statuses, plus the drift monitor
+          ticks for the quotes no portfolio's DQ gate rejected.
+
+    Returns:
+        run_id of the GLOBAL_PRICE_REFRESH TaskRun.
+    """
+    run_id = str(uuid.uuid4())
+    started_at = datetime.now(timezone.utc)
+
+    base_logger = ctx_logger.logger if isinstance(ctx_logger, logging.LoggerAdapter) else ctx_logger
+    ctx_logger = with_correlation(base_logger, job_id=job.job_id, run_id=run_id)
+    ctx_logger.info("Starting GLOBAL_PRICE_REFRESH job")
+
+    db: Session = SessionLocal()
+
+    try:
+        adapter = YFinanceAdapter()
+        ctx_logger.info("Using provider: %s", adapter.source_id)
+
+        load_baselines(
+            db, [str(pid) for (pid,) in db.query(Portfolio.portfolio_id).all()]
+        )
+
+        # ── 1 & 2. Shared ingest ──────────────────────────────────────────────
+        shared = await ingest_prices_for_all_portfolios(
+            db=db,
+            adapter=adapter,
+            job_id=job.job_id,
+            want_close=True,
+            want_intraday=True,
+        )
+        db.commit()
+        ctx_logger.info(
+            "Shared ingest complete — listings=%d portfolios=%d prices_inserted=%d "
+            "fx_inserted=%d errors=%d",
+            len(shared.listings),
+            len(shared.portfolios),
+            shared.prices_inserted,
+            shared.fx_inserted,
+            len(shared.errors),
+        )
+        for err in shared.errors:
+            ctx_logger.warning("Ingest error: %s", err)
+
+        # ── 3. Per-portfolio DQ fan-out ───────────────────────────────────────
+        fleet_violations: dict[str, list[DQViolation]] = {}
+        if settings.dq_columnar_evaluation and shared.portfolios:
+            fleet_violations = evaluate_dq_fleet(
+                db,
+                shared.price_quotes,
+                shared.fx_quotes,
+                datetime.now(timezone.utc),
+                portfolio_ids=list(shared.portfolios),
+                fx_quotes_by_portfolio={
+                    pid: result.fx_quotes for pid, result in shared.portfolios.items()
                 },
-                "listings": [str(lst.listing_id) for lst in ingest_result.listings],
-                "price_quotes": [
-                    {
-                        "listing_id": q.listing_id,
-                        "price": q.price,
-                        "currency": q.currency,
-                        "is_close": q.is_close,
-                        "as_of": q.as_of.isoformat(),
-                    }
-                    for q in ingest_result.price_quotes
-                ],
-                "fx_quotes": [
-                    {
-                        "base_ccy": q.base_ccy,
-                        "quote_ccy": q.quote_ccy,
-                        "rate": q.rate,
-                        "as_of": q.as_of.isoformat(),
-                    }
-                    for q in ingest_result.fx_quotes
-                ],
-            },
-            input_hash="",
+            )
+            ctx_logger.info(
+                "Columnar DQ evaluation complete — violations=%d",
+                sum(len(v) for v in fleet_violations.values()),
+            )
+
+        portfolio_statuses: dict[str, str] = {}
+        rejected: set[str] = set()  # listings whose quotes did not pass DQ
+        for portfolio_id, ingest_result in shared.portfolios.items():
+            portfolio_run_id = str(uuid.uuid4())
+            portfolio_started_at = datetime.now(timezone.utc)
+            portfolio_logger = with_correlation(
+                base_logger,
+                job_id=job.job_id,
+                run_id=portfolio_run_id,
+                portfolio_id=portfolio_id,
+            )
+            try:
+                portfolio_statuses[portfolio_id], violations = _evaluate_and_record(
+                    db,
+                    job,
+                    portfolio_id,
+                    portfolio_run_id,
+                    portfolio_started_at,
+                    ingest_result,
+                    adapter.source_id,
+                    portfolio_logger,
+                    shared_run_id=run_id,
+                    violations=fleet_violations.get(portfolio_id),
+                )
+                rejected |= critical_listing_ids(violations)
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                portfolio_logger.error("Portfolio DQ failed: %s", exc, exc_info=True)
+                _write_failed_run(
+                    db,
+                    job,
+                    "PRICE_REFRESH",
+                    portfolio_id,
+                    portfolio_run_id,
+                    portfolio_started_at,
+                    exc,
+                    portfolio_logger,
+                )
+                portfolio_statuses[portfolio_id] = "FAILED"
+                # Unchecked quotes count as rejected.
+                rejected |= {str(listing.listing_id) for listing in ingest_result.listings}
+
+        # Drift ticks only for quotes the DQ gate let through (committed with
+        # the global TaskRun).
+        crossings = track_prices(
+            db, [q for q in shared.price_quotes if str(q.listing_id) not in rejected]
         )
-        db.add(input_snapshot)
+        if crossings:
+            ctx_logger.info("Drift threshold crossed — sleeves=%d", len(crossings))
 
-        # ── Commit ────────────────────────────────────────────────────────────
-        # NOTE: create_alert() and freeze_portfolio() each call db.commit()
-        # internally for their own rows.  This final commit persists TaskRun
-        # and RunInputSnapshot (plus any unflushed changes).
+        # ── 4. Global TaskRun ─────────────────────────────────────────────────
+        db.add(TaskRun(
+            run_id=uuid.UUID(run_id),
+            job_id=uuid.UUID(job.job_id),
+            task_kind="GLOBAL_PRICE_REFRESH",
+            portfolio_id=None,
+            status="SUCCESS",
+            started_at=started_at,
+            ended_at=datetime.now(timezone.utc),
+            summary={
+                "listings": len(shared.listings),
+                "fx_pairs": len(shared.fx_pairs),
+                "prices_fetched": len(shared.price_quotes),
+                "prices_inserted": shared.prices_inserted,
+                "fx_fetched": len(shared.fx_quotes),
+                "fx_inserted": shared.fx_inserted,
+                "portfolio_statuses": portfolio_statuses,
+                "errors": shared.errors,
+            },
+        ))
         db.commit()
         ctx_logger.info(
-            "Job complete — run_id=%s status=%s", run_id, run_status
+            "Job complete — run_id=%s portfolios=%d", run_id, len(portfolio_statuses)
         )
 
         return run_id
@@ -278,29 +569,9 @@ async def handle_price_refresh(job: JobPayload, ctx_logger: logging.Logger) -> s
     except Exception as exc:
         db.rollback()
         ctx_logger.error("Job failed: %s", exc, exc_info=True)
-
-        try:
-            failed_run = TaskRun(
-                run_id=uuid.UUID(run_id),
-                job_id=uuid.UUID(job.job_id),
-                task_kind="PRICE_REFRESH",
-                portfolio_id=uuid.UUID(job.portfolio_id) if job.portfolio_id else None,
-                status="FAILED",
-                started_at=started_at,
-                ended_at=datetime.now(timezone.utc),
-                summary={
-                    "error": str(exc),
-                    "error_type": type(exc).__name__,
-                },
-            )
-            db.add(failed_run)
-            db.commit()
-            ctx_logger.info("FAILED TaskRun written: run_id=%s", run_id)
-        except Exception as inner_exc:
-            ctx_logger.error(
-                "Failed to write FAILED TaskRun: %s", inner_exc, exc_info=True
-            )
-
+        _write_failed_run(
+            db, job, "GLOBAL_PRICE_REFRESH", None, run_id, started_at, exc, ctx_logger
+        )
         raise
 
     finally:
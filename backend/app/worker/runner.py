@@ -3,19 +3,41 @@ Worker Runner — Entry Point
 
 Run as: python -m app.worker.runner
 
-Main loop: dequeues jobs from Redis, dispatches to handlers,
-handles graceful shutdown on SIGINT/SIGTERM.
+Main loop: a WorkerPool dequeues jobs from Redis (async client) and runs up
+to WORKER_CONCURRENCY of them at once, honouring per-task-kind caps
+(WORKER_TASK_KIND_LIMITS).  In reliable-queue mode (QUEUE_RELIABLE) jobs
+are acked on success, retried with backoff on failure and dead-lettered
+after QUEUE_MAX_ATTEMPTS; running jobs keep their lease alive every
+QUEUE_LEASE_HEARTBEAT_SECONDS and stalled jobs are requeued by the pool's
+reaper.
+Handles graceful shutdown on SIGINT/SIGTERM: no new jobs are taken and
+in-flight jobs are allowed to finish.
 """
 import asyncio
 import logging
 import signal
 
-from app.core.logging import get_logger, with_correlation
-from app.queue.redis_queue import dequeue_job
-from app.worker.price_refresh_worker import handle_price_refresh
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.queue.redis_queue import AsyncRedisQueue
+from app.worker.backtest_worker import handle_backtest
+from app.worker.engine_plan_worker import handle_fleet_trade_plan
+from app.worker.pool import JobHandler, WorkerPool
+from app.worker.price_refresh_worker import (
+    handle_global_price_refresh,
+    handle_price_refresh,
+)
 
 logger = get_logger(__name__)
 
+# task_kind → handler.  Handlers are ``async def handler(job, ctx_logger)``.
+TASK_HANDLERS: dict[str, JobHandler] = {
+    "PRICE_REFRESH": handle_price_refresh,
+    "GLOBAL_PRICE_REFRESH": handle_global_price_refresh,
+    "FLEET_TRADE_PLAN": handle_fleet_trade_plan,
+    "BACKTEST": handle_backtest,
+}
+
 
 async def main() -> None:
     """Main worker loop — blocks until shutdown signal received."""
@@ -29,44 +51,31 @@ async def main() -> None:
 
     # ── Graceful shutdown ─────────────────────────────────────────────────────
     shutdown_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
 
-    def _signal_handler(signum: int, frame: object) -> None:
+    def _signal_handler(signum: int) -> None:
         logger.info("Received signal %s, shutting down...", signum)
         shutdown_event.set()
 
-    signal.signal(signal.SIGINT, _signal_handler)
-    signal.signal(signal.SIGTERM, _signal_handler)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, _signal_handler, signum)
+
+    queue = AsyncRedisQueue()
+    pool = WorkerPool(
+        queue,
+        TASK_HANDLERS,
+        concurrency=settings.worker_concurrency,
+        kind_limits=settings.worker_task_kind_limits,
+        maintenance_interval=settings.queue_maintenance_interval_seconds,
+        lease_heartbeat_interval=settings.queue_lease_heartbeat_seconds,
+    )
 
     logger.info("Worker ready, waiting for jobs...")
 
-    # ── Poll loop ─────────────────────────────────────────────────────────────
-    while not shutdown_event.is_set():
-        try:
-            # Blocking dequeue with 5-second timeout so the loop can
-            # periodically check the shutdown event.
-            job = dequeue_job(timeout=5)
-
-            if job is None:
-                # Timeout — check shutdown flag and loop again.
-                continue
-
-            # Attach correlation IDs for all downstream logging.
-            ctx_logger = with_correlation(
-                logger,
-                job_id=job.job_id,
-                portfolio_id=job.portfolio_id,
-            )
-            ctx_logger.info("Processing job: %s", job.task_kind)
-
-            # ── Dispatch ──────────────────────────────────────────────────────
-            if job.task_kind == "PRICE_REFRESH":
-                await handle_price_refresh(job, ctx_logger)
-            else:
-                ctx_logger.warning("Unknown task_kind: %s — skipping", job.task_kind)
-
-        except Exception as exc:
-            # Log but do NOT crash the worker — keep looping.
-            logger.error("Worker error: %s", exc, exc_info=True)
+    try:
+        await pool.run(shutdown_event)
+    finally:
+        await queue.close()
 
     logger.info("Worker shutdown complete")
 
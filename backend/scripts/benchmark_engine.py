@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Engine Benchmark Script
+
+Times the engine hot path stage by stage on synthetic portfolios
+(app/services/synthetic_portfolio.py):
+
+  gather             gather_engine_inputs against Postgres (--db only)
+  build              EngineInputs.run_input (typed rows → RunInputSnapshot)
+  audit_payload      EngineInputs.audit_payload (JSON, rendered when persisted)
+  calculate_decimal  generate_trade_plan_decimal
+  calculate_fixed    generate_trade_plan_fixed (the integer core)
+
+Every (size, drift profile, price profile) combination is generated from
+--seed, so two runs on different commits time exactly the same inputs.  The
+result is one JSON document: the commit, the environment and min / median /
+mean / max milliseconds per stage and case.  Keep one per commit (e.g.
+``--output bench/engine-$(git rev-parse --short HEAD).json``) and pass an
+earlier one as --baseline to fail on regressions.
+
+Usage:
+    cd backend && python scripts/benchmark_engine.py [--sizes 10,100,1000,10000]
+        [--drift mixed,drifted] [--prices lognormal,pence] [--repeat 5]
+        [--seed 0] [--db] [--output FILE] [--baseline FILE]
+        [--max-regression 1.25]
+
+--db seeds each portfolio into DATABASE_URL (a local, disposable database),
+times the gather stage and deletes the rows again.  Exit status is 1 when a
+median is more than --max-regression times its baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import replace
+from datetime import datetime, timezone
+
+# Add the parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+from app.domain.models import User
+from app.services.engine_calculator import (
+    DRIFT_THRESHOLD_PCT,
+    MAX_BUY_ORDERS,
+    MAX_SELL_ORDERS,
+    MIN_TRADE_SIZE_GBP,
+    generate_trade_plan_decimal,
+)
+from app.services.engine_calculator_fixed import generate_trade_plan_fixed
+from app.services.engine_inputs import gather_engine_inputs
+from app.services.synthetic_portfolio import (
+    DRIFT_PROFILES,
+    PRICE_PROFILES,
+    delete_portfolio,
+    gathered_inputs,
+    generate_portfolio,
+    seed_portfolio,
+)
+
+load_dotenv()
+
+AS_OF = datetime(2026, 3, 4, 17, 0, tzinfo=timezone.utc)
+PLAN_ARGS = (DRIFT_THRESHOLD_PCT, MIN_TRADE_SIZE_GBP, MAX_SELL_ORDERS, MAX_BUY_ORDERS)
+
+
+def _time(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "max_ms": round(max(samples), 4),
+    }
+
+
+def run_case(size: int, drift: str, prices: str, *, seed: int, repeat: int, session=None) -> list[dict]:
+    portfolio = generate_portfolio(size, seed=seed, drift=drift, prices=prices)
+    case = {"positions": size, "drift": drift, "prices": prices}
+    results = []
+
+    inputs = gathered_inputs(portfolio, AS_OF)
+    if session is not None:
+        owner_id = _ensure_owner(session)
+        seed_portfolio(session, portfolio, owner_user_id=owner_id, as_of=AS_OF)
+        session.commit()
+        try:
+            gathered = gather_engine_inputs(session, str(portfolio.portfolio_id), AS_OF)
+            if gathered.is_blocked:
+                raise RuntimeError(f"Synthetic portfolio blocked: {gathered.block_message}")
+            inputs = gathered.inputs
+            results.append(
+                {"stage": "gather", **case, **_time(
+                    lambda: gather_engine_inputs(session, str(portfolio.portfolio_id), AS_OF),
+                    repeat,
+                )}
+            )
+        finally:
+            session.rollback()
+            delete_portfolio(session, portfolio)
+            session.commit()
+
+    results.append({"stage": "build", **case, **_time(inputs.run_input, repeat)})
+    # replace() drops the rendered payload, so every repeat renders it afresh.
+    results.append(
+        {"stage": "audit_payload", **case, **_time(lambda: replace(inputs).audit_payload(), repeat)}
+    )
+    run_input = inputs.run_input()
+    plan = generate_trade_plan_decimal(run_input, *PLAN_ARGS)
+    for stage, core in (
+        ("calculate_decimal", generate_trade_plan_decimal),
+        ("calculate_fixed", generate_trade_plan_fixed),
+    ):
+        results.append(
+            {
+                "stage": stage,
+                **case,
+                "trades": len(plan.trades),
+                **_time(lambda: core(run_input, *PLAN_ARGS), repeat),
+            }
+        )
+    return results
+
+
+def _ensure_owner(session) -> uuid.UUID:
+    """The benchmark's portfolio owner (created once, reused)."""
+    email = "engine-benchmark@example.invalid"
+    user = session.query(User).filter(User.email == email).first()
+    if user is None:
+        user = User(user_id=uuid.uuid4(), email=email, password_hash="!", is_enabled=False)
+        session.add(user)
+        session.commit()
+    return user.user_id
+
+
+def compare(results: list[dict], baseline: dict, max_regression: float) -> list[str]:
+    """Cases whose median exceeds the baseline median by more than the ratio."""
+    def key(row: dict) -> tuple:
+        return (row["stage"], row["positions"], row["drift"], row["prices"])
+
+    previous = {key(row): row for row in baseline.get("results", [])}
+    regressions = []
+    for row in results:
+        before = previous.get(key(row))
+        if before is None or before["median_ms"] <= 0:
+            continue
+        ratio = row["median_ms"] / before["median_ms"]
+        if ratio > max_regression:
+            regressions.append(
+                f"{row['stage']} positions={row['positions']} drift={row['drift']} "
+                f"prices={row['prices']}: {before['median_ms']:.3f}ms → "
+                f"{row['median_ms']:.3f}ms (x{ratio:.2f})"
+            )
+    return regressions
+
+
+def _git(*args: str) -> str | None:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _csv(allowed):
+    def parse(value: str) -> list[str]:
+        items = [item.strip() for item in value.split(",") if item.strip()]
+        unknown = [item for item in items if item not in allowed]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown value(s) {unknown}; choose from {allowed}")
+        return items
+    return parse
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the engine hot path")
+    parser.add_argument(
+        "--sizes", type=lambda v: [int(s) for s in v.split(",")], default=[10, 100, 1000, 10000]
+    )
+    parser.add_argument("--drift", type=_csv(DRIFT_PROFILES), default=["mixed"])
+    parser.add_argument("--prices", type=_csv(PRICE_PROFILES), default=["lognormal"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", action="store_true", help="also time gather against DATABASE_URL")
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON result to compare medians against")
+    parser.add_argument("--max-regression", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    session = None
+    if args.db:
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            print("ERROR: DATABASE_URL environment variable not set")
+            return 1
+        session = sessionmaker(bind=create_engine(database_url))()
+
+    results: list[dict] = []
+    try:
+        for size in args.sizes:
+            for drift in args.drift:
+                for prices in args.prices:
+                    results.extend(
+                        run_case(size, drift, prices, seed=args.seed, repeat=args.repeat, session=session)
+                    )
+                    print(f"  {size} positions, {drift}/{prices}: done", file=sys.stderr)
+    finally:
+        if session is not None:
+            session.close()
+
+    document = {
+        "benchmark": "engine",
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "recorded_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "results": results,
+    }
+    encoded = json.dumps(document, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fh:
+            fh.write(encoded + "\n")
+        print(f"Wrote {len(results)} result(s) to {args.output}", file=sys.stderr)
+    else:
+        print(encoded)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
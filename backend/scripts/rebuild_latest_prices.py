@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Rebuild Latest Prices Script
+
+Recomputes the latest_prices table from price_points history.  Run after a
+restore, a manual price_points repair, or whenever latest_prices is suspected
+to have drifted from history.
+
+Usage:
+    cd backend && python scripts/rebuild_latest_prices.py [LISTING_ID ...]
+
+With no arguments the whole table is rebuilt; otherwise only the given
+listings are.
+"""
+import os
+import sys
+import uuid
+
+# Add the parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+from app.services.latest_prices import rebuild_latest_prices
+
+load_dotenv()
+
+
+def main(argv: list[str]) -> int:
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("ERROR: DATABASE_URL environment variable not set")
+        return 1
+
+    listing_ids = [uuid.UUID(arg) for arg in argv] or None
+
+    engine = create_engine(database_url)
+    session = sessionmaker(bind=engine)()
+    try:
+        written = rebuild_latest_prices(session, listing_ids)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"ERROR: {e}")
+        raise
+    finally:
+        session.close()
+
+    scope = "all listings" if listing_ids is None else f"{len(listing_ids)} listing(s)"
+    print(f"Rebuilt latest_prices for {scope}: {written} row(s) written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
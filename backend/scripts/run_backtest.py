@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Backtest Script
+
+Replays generate_trade_plan over stored closes for one portfolio, for every
+combination of the given engine parameters, and prints one line per
+combination.  The same work runs in the worker as a BACKTEST job.
+
+Usage:
+    cd backend && python scripts/run_backtest.py PORTFOLIO_ID --start 2016-01-01
+        [--end 2025-12-31] [--drift-threshold 2,5,10] [--min-trade-size 250,500]
+        [--max-sells 2] [--max-buys 3] [--json FILE]
+
+The starting ledger is the portfolio's current cash and holdings.  --json
+writes the full summaries, daily valuation series included.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+# Add the parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+from app.services.backtest import BacktestParams, load_price_history, load_start_state, run_backtest
+from app.services.engine_calculator import (
+    DRIFT_THRESHOLD_PCT,
+    MAX_BUY_ORDERS,
+    MAX_SELL_ORDERS,
+    MIN_TRADE_SIZE_GBP,
+)
+
+load_dotenv()
+
+
+def _decimals(value: str) -> list[Decimal]:
+    return [Decimal(item) for item in value.split(",") if item.strip()]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Backtest the engine over stored closes")
+    parser.add_argument("portfolio_id", type=uuid.UUID)
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, default=datetime.now(timezone.utc).date())
+    parser.add_argument("--drift-threshold", type=_decimals, default=[DRIFT_THRESHOLD_PCT])
+    parser.add_argument("--min-trade-size", type=_decimals, default=[MIN_TRADE_SIZE_GBP])
+    parser.add_argument("--max-sells", type=int, default=MAX_SELL_ORDERS)
+    parser.add_argument("--max-buys", type=int, default=MAX_BUY_ORDERS)
+    parser.add_argument("--json", help="write the full summaries here")
+    args = parser.parse_args(argv)
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("ERROR: DATABASE_URL environment variable not set")
+        return 1
+
+    session = sessionmaker(bind=create_engine(database_url))()
+    try:
+        started = time.perf_counter()
+        start = load_start_state(session, args.portfolio_id)
+        history = load_price_history(session, list(start.quantities), args.start, args.end)
+        loaded = time.perf_counter()
+    finally:
+        session.close()
+
+    params_list = [
+        BacktestParams(
+            drift_threshold=threshold,
+            min_trade_size=min_trade,
+            max_sells=args.max_sells,
+            max_buys=args.max_buys,
+        )
+        for threshold, min_trade in itertools.product(args.drift_threshold, args.min_trade_size)
+    ]
+    summaries = run_backtest(history, start, params_list)
+    finished = time.perf_counter()
+
+    print(
+        f"Backtest {args.portfolio_id}: {len(history.listing_ids)} listing(s), "
+        f"{len(history.days)} trading day(s); load {loaded - started:.2f}s, "
+        f"replay {finished - loaded:.2f}s"
+    )
+    for summary in summaries:
+        params = summary.params
+        print(
+            f"  drift={params.drift_threshold} min_trade={params.min_trade_size}: "
+            f"end_value={summary.end_value_gbp} trades={summary.trades} "
+            f"turnover={summary.turnover_gbp} max_drawdown={summary.max_drawdown_pct:.2f}% "
+            f"blocked_days={summary.blocked_days}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump([summary.to_json() for summary in summaries], fh, indent=2)
+            fh.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
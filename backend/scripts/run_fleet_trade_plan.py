@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Fleet Trade Plan Script
+
+Computes trade plans for every enabled portfolio (or the given ones) in one
+batch and records them as ENGINE_PLAN task runs under a FLEET_TRADE_PLAN run.
+The same work runs in the worker as a FLEET_TRADE_PLAN job.
+
+Usage:
+    cd backend && python scripts/run_fleet_trade_plan.py [--workers N] [PORTFOLIO_ID ...]
+
+--workers defaults to ENGINE_BATCH_MAX_WORKERS, then the CPU count.
+"""
+import argparse
+import os
+import sys
+import uuid
+
+# Add the parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+from app.services.engine_batch import run_fleet_trade_plan
+
+load_dotenv()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Compute trade plans for the fleet")
+    parser.add_argument("portfolio_ids", nargs="*", type=uuid.UUID)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("ERROR: DATABASE_URL environment variable not set")
+        return 1
+
+    engine = create_engine(database_url)
+    session = sessionmaker(bind=engine)()
+    try:
+        run = run_fleet_trade_plan(
+            session,
+            str(uuid.uuid4()),
+            portfolio_ids=args.portfolio_ids or None,
+            max_workers=args.workers,
+        )
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"ERROR: {e}")
+        raise
+    finally:
+        session.close()
+
+    counts = run.counts
+    print(
+        f"Fleet trade plan {run.run_id}: {len(run.outcomes)} portfolio(s) — "
+        f"{counts['PLANNED']} planned, {counts['BLOCKED']} blocked, "
+        f"{counts['FAILED']} failed, {run.trade_count} trade(s)"
+    )
+    for outcome in run.outcomes:
+        if outcome.status != "PLANNED":
+            detail = outcome.block_reason or outcome.error
+            print(f"  {outcome.portfolio_id}: {outcome.status} ({detail})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -10,7 +10,6 @@ Usage:
 """
 import os
 import sys
-import uuid
 import time
 import asyncio
 from decimal import Decimal
@@ -24,7 +23,8 @@ from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
 from app.services.providers.yfinance_adapter import YFinanceAdapter
-from app.domain.models import PricePoint, InstrumentListing
+from app.domain.models import InstrumentListing
+from app.services.ingest_writer import insert_price_points, price_point_row
 
 load_dotenv()
 
@@ -66,41 +66,23 @@ async def fetch_and_save_price(
         
         quote = quotes[0]
         
-        # Create PricePoint record
-        price_point = PricePoint(
-            price_point_id=uuid.uuid4(),
-            listing_id=uuid.UUID(listing_id),
-            as_of=quote.as_of,
-            price=Decimal(quote.price),
-            currency=quote.currency,
-            is_close=quote.is_close,
-            source_id=adapter.source_id,
-            raw=quote.raw,
+        # ON CONFLICT DO NOTHING for idempotency; also keeps latest_prices in step
+        inserted = insert_price_points(
+            session,
+            [
+                price_point_row(
+                    listing_id=listing_id,
+                    as_of=quote.as_of,
+                    price=Decimal(quote.price),
+                    currency=quote.currency,
+                    is_close=quote.is_close,
+                    source_id=adapter.source_id,
+                    raw=quote.raw,
+                )
+            ],
         )
         
-        # Use ON CONFLICT DO NOTHING for idempotency
-        from sqlalchemy.dialects.postgresql import insert
-        
-        stmt = (
-            insert(PricePoint)
-            .values(
-                price_point_id=price_point.price_point_id,
-                listing_id=price_point.listing_id,
-                as_of=price_point.as_of,
-                price=price_point.price,
-                currency=price_point.currency,
-                is_close=price_point.is_close,
-                source_id=price_point.source_id,
-                raw=price_point.raw,
-            )
-            .on_conflict_do_nothing(
-                index_elements=["listing_id", "as_of", "source_id", "is_close"]
-            )
-        )
-        
-        result = session.execute(stmt)
-        
-        if result.rowcount > 0:
+        if inserted > 0:
             return True, f"Saved {ticker}: {quote.price} {quote.currency} @ {quote.as_of}"
         else:
             return True, f"Skipped {ticker}: Price already exists for this timestamp"
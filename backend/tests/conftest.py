@@ -110,6 +110,16 @@ def test_user(db: Session):
             ),
             {"uid": str(user.user_id)},
         )
+        db.execute(
+            text(
+                "DELETE FROM latest_prices WHERE listing_id IN ("
+                "  SELECT pc.listing_id FROM portfolio_constituent pc "
+                "  JOIN portfolio p ON p.portfolio_id = pc.portfolio_id "
+                "  WHERE p.owner_user_id = :uid"
+                ")"
+            ),
+            {"uid": str(user.user_id)},
+        )
         db.execute(
             text(
                 "DELETE FROM price_points WHERE listing_id IN ("
@@ -219,6 +229,10 @@ def test_portfolio(db: Session, test_user: User, sleeve_core):
 
     # Extra cleanup: instrument + listing (user fixture cleans portfolio/constituent)
     try:
+        db.execute(
+            text("DELETE FROM latest_prices WHERE listing_id = :lid"),
+            {"lid": str(listing_id)},
+        )
         db.execute(
             text("DELETE FROM price_points WHERE listing_id = :lid"),
             {"lid": str(listing_id)},
@@ -8,6 +8,9 @@ Covers (playbook §6.1):
 Additional coverage:
   - WARN alert does NOT create notification (Phase 2 policy)
   - Resolve alert clears deduplication gate
+  - Bulk create_alerts returns only newly inserted alerts, in input order
+  - resolve_cleared_alerts resolves DQ alerts missing from the current violations,
+    but not those of a listing whose fetch failed
   - Notification meta contains required references
 """
 import uuid
@@ -16,7 +19,16 @@ from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 
 from app.domain.models import Alert, Notification, Portfolio
-from app.services.alerts import create_alert, resolve_alert, get_unresolved_alerts
+from app.services.alerts import (
+    AlertSpec,
+    create_alert,
+    create_alerts,
+    get_unresolved_alerts,
+    resolve_alert,
+    resolve_cleared_alerts,
+)
+from app.services.data_quality import freshly_evaluated
+from app.services.market_data_adapter import PriceQuote
 from app.services.notifications import emit_notification, get_notifications
 
 
@@ -239,6 +251,109 @@ def test_alert_deduplication_portfolio_level(db: Session, test_portfolio: Portfo
     assert alert2 is None, "Portfolio-level alerts also deduplicate"
 
 
+def test_create_alerts_bulk_returns_only_new(db: Session, test_portfolio: Portfolio):
+    """
+    One INSERT ... ON CONFLICT DO NOTHING: keys with an unresolved alert and
+    repeated keys within the batch are skipped; the rest come back in order.
+    """
+    portfolio_id = str(test_portfolio.portfolio_id)
+    listing_id = str(test_portfolio._test_listing.listing_id)
+
+    existing = create_alert(
+        db=db,
+        portfolio_id=portfolio_id,
+        listing_id=listing_id,
+        severity="WARN",
+        rule_code="DQ_STALE_CLOSE",
+        title="Already open",
+    )
+    assert existing is not None
+
+    created = create_alerts(
+        db,
+        portfolio_id,
+        [
+            AlertSpec(listing_id, "CRITICAL", "DQ_JUMP_CLOSE", "Jump"),
+            AlertSpec(listing_id, "WARN", "DQ_STALE_CLOSE", "Stale again"),
+            AlertSpec(None, "WARN", "DQ_FX_MISSING", "FX"),
+            AlertSpec(listing_id, "CRITICAL", "DQ_JUMP_CLOSE", "Jump twice"),
+        ],
+    )
+    db.commit()
+
+    assert [(a.rule_code, a.title) for a in created] == [
+        ("DQ_JUMP_CLOSE", "Jump"),
+        ("DQ_FX_MISSING", "FX"),
+    ]
+    assert all(a.alert_id is not None and a.resolved_at is None for a in created)
+
+    unresolved = get_unresolved_alerts(db, portfolio_id)
+    assert sorted(a.rule_code for a in unresolved) == [
+        "DQ_FX_MISSING",
+        "DQ_JUMP_CLOSE",
+        "DQ_STALE_CLOSE",
+    ]
+
+    # Everything is now open: a repeat batch creates nothing.
+    assert create_alerts(
+        db, portfolio_id, [AlertSpec(None, "WARN", "DQ_FX_MISSING", "FX")]
+    ) == []
+
+
+def test_resolve_cleared_alerts_resolves_only_cleared_dq_alerts(
+    db: Session, test_portfolio: Portfolio
+):
+    """Open DQ alerts absent from the current violation set are resolved in bulk."""
+    portfolio_id = str(test_portfolio.portfolio_id)
+    listing_id = str(test_portfolio._test_listing.listing_id)
+
+    still_active = AlertSpec(listing_id, "WARN", "DQ_STALE_CLOSE", "Stale")
+    cleared = AlertSpec(listing_id, "CRITICAL", "DQ_JUMP_CLOSE", "Jump")
+    cleared_portfolio_level = AlertSpec(None, "WARN", "DQ_FX_MISSING", "FX")
+    other_family = AlertSpec(None, "CRITICAL", "SYSTEM_SAFETY", "Not a DQ rule")
+    created = create_alerts(
+        db, portfolio_id, [still_active, cleared, cleared_portfolio_level, other_family]
+    )
+    db.commit()
+    ids = {a.rule_code: a.alert_id for a in created}
+
+    resolved = resolve_cleared_alerts(db, portfolio_id, [still_active])
+    db.commit()
+
+    assert set(resolved) == {ids["DQ_JUMP_CLOSE"], ids["DQ_FX_MISSING"]}
+    open_codes = {a.rule_code for a in get_unresolved_alerts(db, portfolio_id)}
+    assert open_codes == {"DQ_STALE_CLOSE", "SYSTEM_SAFETY"}
+
+    # Nothing left to clear.
+    assert resolve_cleared_alerts(db, portfolio_id, [still_active]) == []
+
+
+def test_resolve_cleared_alerts_keeps_alerts_whose_fetch_failed(
+    db: Session, test_portfolio: Portfolio
+):
+    """A listing missing from this run's quotes has not cleared its alerts."""
+    portfolio_id = str(test_portfolio.portfolio_id)
+    listing = test_portfolio._test_listing
+    create_alerts(db, portfolio_id, [AlertSpec(str(listing.listing_id), "CRITICAL", "DQ_JUMP_CLOSE", "Jump")])
+    db.commit()
+
+    # The fetch failed: no quote, hence no violation, for the alerted listing.
+    failed_fetch = freshly_evaluated([listing], [], [], test_portfolio.base_currency)
+    assert resolve_cleared_alerts(db, portfolio_id, [], evaluated=failed_fetch) == []
+    assert [a.rule_code for a in get_unresolved_alerts(db, portfolio_id)] == ["DQ_JUMP_CLOSE"]
+
+    quote = PriceQuote(
+        listing_id=str(listing.listing_id),
+        as_of=datetime.now(timezone.utc),
+        price="100",
+        currency=listing.trading_currency,
+        is_close=True,
+        raw=None,
+    )
+    fetched = freshly_evaluated([listing], [quote], [], test_portfolio.base_currency)
+    assert len(resolve_cleared_alerts(db, portfolio_id, [], evaluated=fetched)) == 1
+
+
 # ─── Additional alert / notification coverage ─────────────────────────────────
 
 
@@ -0,0 +1,211 @@
+"""
+test_backtest.py — Historical backtest
+
+Covers:
+  - Columnar history: trading-day axis, close in force per day, same-day
+    replacement, GBX → GBP, staleness mask (trading days at the venue)
+  - Replay: trades applied to the ledger, valuations at the closes in force,
+    blocked days (stale / missing close) value but do not trade
+  - A tighter drift threshold trades more; summaries are JSON-ready
+  - BacktestRequest validation
+  - Benchmark (opt-in, -m benchmark): 10 years × 50 listings
+"""
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.domain.models import PortfolioPolicyAllocation
+from app.schemas.backtest import BacktestRequest
+from app.services.backtest import (
+    BacktestDay,
+    BacktestParams,
+    BacktestSummary,
+    StartState,
+    build_price_history,
+    replay,
+    run_backtest,
+)
+
+AAA, BBB = uuid.UUID(int=1), uuid.UUID(int=2)
+
+
+def _close(listing_id, day: date, price: str, currency: str = "GBP", hour: int = 16):
+    as_of = datetime(day.year, day.month, day.day, hour, 30, tzinfo=timezone.utc)
+    return (listing_id, as_of, Decimal(price), currency)
+
+
+def _allocation(listing_id, ticker: str, target: str) -> PortfolioPolicyAllocation:
+    return PortfolioPolicyAllocation(
+        listing_id=listing_id, ticker=ticker, sleeve_code="CORE", target_weight_pct=Decimal(target)
+    )
+
+
+def _start(quantities: dict, cash: str = "0") -> StartState:
+    return StartState(
+        portfolio_id=uuid.uuid4(),
+        cash_gbp=Decimal(cash),
+        quantities={lid: Decimal(q) for lid, q in quantities.items()},
+        allocations=[_allocation(AAA, "AAA", "50"), _allocation(BBB, "BBB", "50")],
+    )
+
+
+def test_history_columns():
+    d = date(2026, 1, 5)
+    rows = [
+        _close(AAA, d - timedelta(days=3), "10"),  # before the window: in force on day one
+        _close(AAA, d + timedelta(days=1), "11"),
+        _close(AAA, d + timedelta(days=1), "12", hour=17),  # same day, later: replaces 11
+        _close(BBB, d, "500", "GBX"),
+        _close(BBB, d + timedelta(days=2), "510", "GBX"),
+    ]
+    history = build_price_history(rows, d, d + timedelta(days=10))
+
+    assert history.days.tolist() == [d, d + timedelta(days=1), d + timedelta(days=2)]
+    in_force = [
+        [history.prices[i] if i >= 0 else None for i in row] for row in history.close_index.tolist()
+    ]
+    assert in_force == [
+        [Decimal("10"), Decimal("5")],
+        [Decimal("12"), Decimal("5")],
+        [Decimal("12"), Decimal("5.1")],
+    ]
+    assert history.trusted.all()
+
+    # A listing with no close yet is untrusted; one whose close ages past
+    # PRICE_STALENESS_DAYS becomes untrusted again.
+    late = build_price_history(
+        [
+            _close(AAA, d, "1"),
+            _close(AAA, d + timedelta(days=9), "1"),
+            _close(BBB, d + timedelta(days=5), "1"),
+        ],
+        d,
+        d + timedelta(days=9),
+        listing_ids=[AAA, BBB],
+    )
+    assert late.trusted.tolist() == [[True, False], [False, True], [True, False]]
+
+
+def test_staleness_counts_venue_trading_days():
+    thursday = date(2026, 4, 2)  # then Good Friday and Easter Monday
+    rows = [
+        _close(AAA, thursday, "1"),
+        *(_close(BBB, day, "1") for day in (thursday, date(2026, 4, 7), date(2026, 4, 8), date(2026, 4, 10))),
+    ]
+
+    london = build_price_history(rows, thursday, date(2026, 4, 10), exchange_by_listing={AAA: "LSE"})
+    calendar_days = build_price_history(rows, thursday, date(2026, 4, 10))
+
+    assert london.trusted[:, 0].tolist() == [True, True, True, False]
+    assert calendar_days.trusted[:, 0].tolist() == [True, False, False, False]
+
+
+def test_replay_rebalances_and_values_the_ledger():
+    d = date(2026, 1, 5)
+    rows = [_close(AAA, d, "10"), _close(BBB, d, "10"), _close(AAA, d + timedelta(days=1), "20")]
+    history = build_price_history(rows, d, d + timedelta(days=1))
+    days = list(replay(history, _start({AAA: 900, BBB: 100}), BacktestParams()))
+
+    # Day 1: 9,000 vs 1,000 at a 50/50 target → sell 400 AAA (4,000), buy 400 BBB.
+    first = days[0]
+    assert [(t.action, t.ticker, t.quantity) for t in first.trades] == [
+        ("SELL", "AAA", Decimal("400")),
+        ("BUY", "BBB", Decimal("400")),
+    ]
+    assert first.total_value_gbp == Decimal("10000") and first.cash_gbp == 0
+    # Day 2: AAA doubles on 500 held; BBB's close carries forward.
+    assert days[1].total_value_gbp == 500 * 20 + 500 * 10
+
+
+def test_stale_or_missing_close_blocks_the_day():
+    d = date(2026, 1, 5)
+    rows = [_close(AAA, d, "10"), _close(BBB, d, "10"), _close(AAA, d + timedelta(days=8), "10")]
+    history = build_price_history(rows, d, d + timedelta(days=8))
+    days = list(replay(history, _start({AAA: 900, BBB: 100}), BacktestParams()))
+
+    assert [day.blocked for day in days] == [False, True]
+    assert days[1].trades == [] and days[1].total_value_gbp == days[0].total_value_gbp
+
+    unknown = _start({uuid.uuid4(): 1})
+    assert all(day.blocked for day in replay(history, unknown, BacktestParams()))
+
+
+def _random_walk(listings: int, years: int, seed: int = 24) -> tuple[list, StartState, date, date]:
+    rng = random.Random(seed)
+    start = date(2016, 1, 4)
+    days = [start + timedelta(days=i) for i in range(365 * years)]
+    days = [day for day in days if day.weekday() < 5]
+    ids = [uuid.UUID(int=i + 1) for i in range(listings)]
+    rows = []
+    for listing_id in ids:
+        price = 100.0
+        for day in days:
+            price *= 1 + rng.gauss(0.0002, 0.012)
+            rows.append(_close(listing_id, day, f"{price:.4f}"))
+    state = StartState(
+        portfolio_id=uuid.uuid4(),
+        cash_gbp=Decimal("5000"),
+        quantities={listing_id: Decimal(100) for listing_id in ids},
+        allocations=[
+            _allocation(listing_id, f"L{i:02d}", str(Decimal(98) / listings))
+            for i, listing_id in enumerate(ids)
+        ],
+    )
+    return rows, state, days[0], days[-1]
+
+
+def test_tighter_threshold_trades_more():
+    rows, state, first, last = _random_walk(listings=8, years=1)
+    history = build_price_history(rows, first, last)
+    loose, tight = run_backtest(
+        history,
+        state,
+        [BacktestParams(drift_threshold=Decimal("5")), BacktestParams(drift_threshold=Decimal("0.5"))],
+    )
+
+    assert loose.days == tight.days == len(history.days)
+    assert tight.trades > loose.trades
+    payload = tight.to_json()
+    assert payload["params"]["drift_threshold_pct"] == "0.5"
+    assert len(payload["series"]["days"]) == tight.days
+    assert "series" not in tight.to_json(include_series=False)
+
+
+def test_summary_drawdown():
+    summary = BacktestSummary(params=BacktestParams())
+    for value in ("100", "120", "90", "130", "117"):
+        summary.add(BacktestDay(date(2026, 1, 1), Decimal(value), Decimal("0"), [], False))
+    assert summary.max_drawdown_pct == Decimal("25")
+    assert summary.end_value_gbp == Decimal("117")
+
+
+def test_request_validation():
+    request = BacktestRequest.model_validate({"start": "2016-01-01", "end": "2025-12-31"})
+    assert len(request.configs) == 1 and request.configs[0].drift_threshold_pct == Decimal("5.0")
+    assert BacktestRequest.model_validate(request.model_dump(mode="json")) == request
+    with pytest.raises(ValidationError):
+        BacktestRequest.model_validate({"start": "2025-01-01", "end": "2016-01-01"})
+    with pytest.raises(ValidationError):
+        BacktestRequest.model_validate({"start": "2016-01-01", "end": "2025-12-31", "configs": []})
+
+
+@pytest.mark.benchmark
+def test_benchmark_10_years_50_listings():
+    rows, state, first, last = _random_walk(listings=50, years=10)
+    started = time.perf_counter()
+    history = build_price_history(rows, first, last)
+    built = time.perf_counter()
+    (summary,) = run_backtest(history, state, [BacktestParams(drift_threshold=Decimal("0.5"))])
+    finished = time.perf_counter()
+
+    assert summary.days == len(history.days) == np.busday_count(first, last + timedelta(days=1))
+    print(
+        f"\n10y × 50 listings: build={(built - started) * 1000:.0f}ms "
+        f"replay={(finished - built) * 1000:.0f}ms trades={summary.trades}"
+    )
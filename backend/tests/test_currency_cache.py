@@ -0,0 +1,113 @@
+"""
+test_currency_cache.py — symbol → currency metadata cache
+
+Covers:
+  - Listing seeds are expired fallbacks: never a hit, never override cached
+    entries, served only when the provider lookup fails
+  - TTL expiry triggers exactly one lazy refresh
+  - A failed refresh keeps serving the stale value
+  - LRU eviction at max_entries
+  - RedisCurrencyCache: same seed / expiry / eviction semantics, shared by
+    every instance on the same Redis
+"""
+import pytest
+
+from app.services.providers.currency_cache import CurrencyCache, RedisCurrencyCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cache(clock: FakeClock, max_entries: int = 10) -> CurrencyCache:
+    return CurrencyCache(ttl_seconds=100, max_entries=max_entries, clock=clock)
+
+
+def test_seeded_entry_is_only_a_fallback():
+    cache = _cache(FakeClock())
+    cache.seed([("VWRP.L", "GBP"), ("SEMI.L", "GBP"), ("AAPL", None)])
+
+    # Seeds never count as hits: the provider is always asked first.
+    assert cache.get("VWRP.L") == (False, "GBP")
+    assert cache.get_or_fetch("VWRP.L", lambda s: "USD") == "USD"
+    assert cache.get_or_fetch("SEMI.L", lambda s: None) == "GBP"
+    assert cache.get("AAPL") == (False, None)
+
+
+def test_seed_does_not_override_provider_value():
+    cache = _cache(FakeClock())
+    cache.put("VWRP.L", "GBp")
+    cache.seed([("VWRP.L", "GBP")])
+
+    assert cache.get("VWRP.L") == (True, "GBp")
+
+
+def test_expired_entry_is_refreshed_lazily_once():
+    clock = FakeClock()
+    cache = _cache(clock)
+    cache.put("VWRP.L", "GBP")
+    calls: list[str] = []
+
+    def fetch(symbol: str) -> str:
+        calls.append(symbol)
+        return "GBp"
+
+    clock.now = 101
+    assert cache.get_or_fetch("VWRP.L", fetch) == "GBp"
+    assert cache.get_or_fetch("VWRP.L", fetch) == "GBp"
+    assert calls == ["VWRP.L"]
+
+
+def test_failed_refresh_keeps_stale_value():
+    clock = FakeClock()
+    cache = _cache(clock)
+    cache.put("VWRP.L", "GBP")
+
+    clock.now = 101
+    assert cache.get_or_fetch("VWRP.L", lambda s: None) == "GBP"
+    assert cache.get("VWRP.L") == (True, "GBP")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache(FakeClock(), max_entries=2)
+    cache.put("A", "GBP")
+    cache.put("B", "USD")
+    cache.get("A")
+    cache.put("C", "EUR")
+
+    assert len(cache) == 2
+    assert cache.get("B") == (False, None)
+    assert cache.get("A") == (True, "GBP")
+
+
+def test_redis_cache_is_shared_and_keeps_seed_semantics():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis(decode_responses=True)
+    clock = FakeClock()
+    cache = RedisCurrencyCache(client=client, ttl_seconds=100, max_entries=2, clock=clock)
+    cache.seed([("VWRP.L", "GBP")])
+    assert cache.get("VWRP.L") == (False, "GBP")
+
+    cache.put("VWRP.L", "GBp")
+    cache.seed([("VWRP.L", "GBP")])
+    # A second worker (or a restarted one) sees the same entry.
+    other = RedisCurrencyCache(client=client, ttl_seconds=100, max_entries=2, clock=clock)
+    assert other.get("VWRP.L") == (True, "GBp")
+
+    clock.now = 101
+    assert other.get_or_fetch("VWRP.L", lambda s: None) == "GBp"
+    assert cache.get("VWRP.L") == (True, "GBp")
+
+    cache.put("B", "USD")
+    clock.now = 102
+    cache.get("VWRP.L")
+    clock.now = 103
+    cache.put("C", "EUR")
+    assert len(cache) == 2
+    assert cache.get("B") == (False, None)
+    cache.clear()
+    assert len(other) == 0
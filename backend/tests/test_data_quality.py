@@ -14,6 +14,10 @@ Additional coverage:
   - Currency mismatch
   - FX missing / stale
   - Full evaluate_dq integration with mock DB data
+  - Per-listing views: previous close from bulk history, jump fallback
+  - Trading calendar: no missing-close / staleness on weekends and holidays
+  - freshly_evaluated: failed fetches do not count as cleared violations
+  - critical_listing_ids: the listings whose quotes the gate rejects
 """
 import uuid
 import zoneinfo
@@ -35,8 +39,13 @@ from app.services.data_quality import (
     check_currency_mismatch,
     check_fx_missing,
     check_fx_stale,
+    critical_listing_ids,
+    evaluate_listing,
+    freshly_evaluated,
+    ListingDQView,
     _is_market_closed,
 )
+from app.services.latest_prices import upsert_latest_from_price_points
 from app.services.market_data_adapter import FxQuote, PriceQuote
 
 
@@ -71,7 +80,7 @@ def _make_price_point(
     return m
 
 
-NOW = datetime(2026, 2, 28, 17, 0, 0, tzinfo=timezone.utc)  # after LSE close
+NOW = datetime(2026, 2, 27, 17, 0, 0, tzinfo=timezone.utc)  # Friday, after LSE close
 
 
 # ─── Test 2: DQ_GBX_SCALE 100× mismatch (playbook §6.1) ──────────────────────
@@ -232,6 +241,7 @@ def test_dq_stale_close_creates_alert(db: Session, test_portfolio: Portfolio):
         raw=None,
     )
     db.add(stale_price)
+    upsert_latest_from_price_points(db, [stale_price])
     db.commit()
 
     violation = check_staleness_close(listing, stale_price, NOW)
@@ -286,14 +296,14 @@ def test_missing_close_only_after_market_close_time():
     listing = _make_listing(exchange="LSE")
 
     # ── Before market close: 09:00 UTC = 09:00 London (winter) ───────────────
-    before_close = datetime(2026, 2, 28, 9, 0, tzinfo=timezone.utc)
+    before_close = datetime(2026, 2, 27, 9, 0, tzinfo=timezone.utc)
     violation_before = check_missing_close(listing, None, before_close)
     assert violation_before is None, (
         "Should NOT flag missing close before market close (09:00 London)"
     )
 
     # ── After market close: 17:00 UTC = 17:00 London (winter, after 16:30) ───
-    after_close = datetime(2026, 2, 28, 17, 0, tzinfo=timezone.utc)
+    after_close = datetime(2026, 2, 27, 17, 0, tzinfo=timezone.utc)
     violation_after = check_missing_close(listing, None, after_close)
     assert violation_after is not None, (
         "Should flag missing close after market close (17:00 London)"
@@ -302,6 +312,27 @@ def test_missing_close_only_after_market_close_time():
     assert violation_after.severity == "CRITICAL"
 
 
+def test_missing_close_silent_on_weekends_and_holidays():
+    """No close is expected on non-trading days, whatever the time."""
+    listing = _make_listing(exchange="LSE")
+    saturday = datetime(2026, 2, 28, 17, 0, tzinfo=timezone.utc)
+    good_friday = datetime(2026, 4, 3, 17, 0, tzinfo=timezone.utc)
+    assert check_missing_close(listing, None, saturday) is None
+    assert check_missing_close(listing, None, good_friday) is None
+
+
+def test_stale_close_ignores_weekend_days():
+    """Friday's close is not stale on Tuesday evening; weekend days don't count."""
+    listing = _make_listing(exchange="LSE")
+    friday_close = _make_price_point("50", datetime(2026, 3, 6, 16, 30, tzinfo=timezone.utc))
+    tuesday = datetime(2026, 3, 10, 17, 0, tzinfo=timezone.utc)
+    assert check_staleness_close(listing, friday_close, tuesday) is None
+
+    # Unknown venues keep plain calendar-day ageing.
+    xetra = _make_listing(exchange="XETRA")
+    assert check_staleness_close(xetra, friday_close, tuesday) is not None
+
+
 def test_missing_close_silent_when_close_exists():
     """No violation when a close price is available, even post-market."""
     listing = _make_listing(exchange="LSE")
@@ -411,5 +442,72 @@ def test_dq_market_closed_lse_is_closed_at_1700_utc():
 
 
 def test_dq_market_closed_lse_is_open_at_0900_utc():
-    market_open = datetime(2026, 2, 28, 9, 0, 0, tzinfo=timezone.utc)
+    market_open = datetime(2026, 2, 27, 9, 0, 0, tzinfo=timezone.utc)
     assert _is_market_closed("LSE", market_open) is False
+
+
+# ─── Per-listing views ────────────────────────────────────────────────────────
+
+
+def test_view_previous_close_skips_rows_not_older_than_latest():
+    """History may contain the latest close itself; previous is the first older row."""
+    latest = _make_price_point("50", NOW - timedelta(hours=1))
+    same = _make_price_point("50", NOW - timedelta(hours=1))
+    older = _make_price_point("49", NOW - timedelta(days=1))
+    view = ListingDQView(
+        listing=_make_listing(),
+        latest_close=latest,
+        recent_closes=[same, older],
+    )
+    assert view.previous_close is older
+
+
+def test_evaluate_listing_jump_fallback_uses_view_history():
+    """No incoming close → DB latest vs DB previous close from the view."""
+    listing = _make_listing()
+    latest = _make_price_point("56", NOW - timedelta(hours=1))
+    previous = _make_price_point("50", NOW - timedelta(days=1))
+    intraday = _make_price_point("56", NOW - timedelta(minutes=5), is_close=False)
+    view = ListingDQView(
+        listing=listing,
+        latest_intraday=intraday,
+        latest_close=latest,
+        recent_closes=[latest, previous],
+    )
+
+    violations = evaluate_listing(view, "GBP", [], NOW)
+
+    assert [v.rule_code for v in violations] == ["DQ_JUMP_CLOSE"]
+
+
+# ─── Auto-resolution coverage ─────────────────────────────────────────────────
+
+def test_freshly_evaluated_excludes_listings_and_fx_pairs_that_failed_to_fetch():
+    fetched = _make_listing(ticker="VWRP", trading_currency="GBX")
+    failed = _make_listing(ticker="VUSA", trading_currency="USD")
+    quotes = [
+        PriceQuote(
+            listing_id=fetched.listing_id, as_of=NOW, price="100", currency="GBX", is_close=True, raw=None
+        )
+    ]
+
+    evaluated = freshly_evaluated([fetched, failed], quotes, [], "GBP")
+
+    assert evaluated(fetched.listing_id, "DQ_JUMP_CLOSE")
+    assert evaluated(fetched.listing_id, "DQ_FX_STALE")  # GBX needs no FX pair
+    assert not evaluated(failed.listing_id, "DQ_CCY_MISMATCH")
+    assert not evaluated(failed.listing_id, "DQ_FX_STALE")
+    assert evaluated(None, "DQ_FX_MISSING")
+
+    fx = [FxQuote(base_ccy="GBP", quote_ccy="USD", as_of=NOW, rate="1.27", raw=None)]
+    assert freshly_evaluated([failed], [], fx, "GBP")(failed.listing_id, "DQ_FX_STALE")
+
+
+def test_critical_listing_ids_ignores_warnings():
+    violations = [
+        DQViolation("DQ_JUMP_CLOSE", "CRITICAL", "a", "Jump", ""),
+        DQViolation("DQ_STALE_INTRADAY", "WARN", "b", "Stale", ""),
+        DQViolation("DQ_FX_MISSING", "CRITICAL", None, "FX", ""),
+    ]
+
+    assert critical_listing_ids(violations) == {"a"}
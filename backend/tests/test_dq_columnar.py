@@ -0,0 +1,147 @@
+"""
+test_dq_columnar.py — Columnar (NumPy) DQ evaluation
+
+Covers:
+  - Columnar evaluation emits exactly the scalar evaluate_listing violations
+    over randomized views, including threshold boundaries
+  - 10k listings: columnar output equals scalar output
+  - Benchmark (opt-in, -m benchmark): columnar is faster than scalar at 10k
+"""
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.data_quality import ListingDQView, evaluate_listing
+from app.services.dq_columnar import evaluate_views_columnar
+from app.services.market_data_adapter import FxQuote, PriceQuote
+
+
+NOW = datetime(2026, 3, 4, 17, 0, 0, tzinfo=timezone.utc)  # Wednesday, after LSE close
+
+FX_QUOTES = [
+    FxQuote(base_ccy="GBP", quote_ccy="USD", as_of=NOW - timedelta(hours=2), rate="1.27", raw=None),
+    FxQuote(base_ccy="GBP", quote_ccy="EUR", as_of=NOW - timedelta(days=5), rate="1.17", raw=None),
+]
+
+
+def _listing(rng: random.Random) -> SimpleNamespace:
+    exchange, ccy, scale = rng.choice([
+        ("LSE", "GBX", "MINOR"),
+        ("LSE", "GBP", "MAJOR"),
+        ("NYSE", "USD", "MAJOR"),
+        ("XETRA", "EUR", "MAJOR"),
+        ("NASDAQ", "JPY", "MAJOR"),
+    ])
+    return SimpleNamespace(
+        listing_id=str(uuid.UUID(int=rng.getrandbits(128))),
+        ticker=f"T{rng.randrange(100000)}",
+        exchange=exchange,
+        trading_currency=ccy,
+        quote_scale=scale,
+    )
+
+
+def _price(price, as_of: datetime, is_close: bool = True) -> SimpleNamespace:
+    return SimpleNamespace(price=Decimal(str(price)), as_of=as_of, is_close=is_close)
+
+
+def make_views(count: int, seed: int = 7, violation_rate: float = 0.3) -> list[ListingDQView]:
+    """Random views; ``violation_rate`` of them get a deliberately bad input."""
+    rng = random.Random(seed)
+    views = []
+    for _ in range(count):
+        listing = _listing(rng)
+        base = Decimal(rng.randrange(100, 10000)) / 10
+        bad = rng.random() < violation_rate
+
+        intraday_age = timedelta(minutes=rng.choice([5, 30, 31, 600]) if bad else 5)
+        close_age = timedelta(days=rng.choice([1, 3, 4, 7]) if bad else 1)
+        latest_close = None if bad and rng.random() < 0.2 else _price(base, NOW - close_age)
+        previous = _price(
+            base / Decimal(rng.choice(["1.10", "1.2", "1.0"]) if bad else "1.01"),
+            NOW - close_age - timedelta(days=1),
+        )
+
+        quotes = []
+        if rng.random() < 0.7:
+            factor = rng.choice(["1", "1.1", "0.01", "0.02", "100", "150", "1.5"]) if bad else "1.001"
+            currency = rng.choice([listing.trading_currency, "GBP", "USD", None]) if bad else listing.trading_currency
+            is_close = rng.random() < 0.5
+            quotes.append(PriceQuote(
+                listing_id=listing.listing_id,
+                as_of=NOW - timedelta(minutes=1),
+                price=str(base * Decimal(factor)),
+                currency=currency,
+                is_close=is_close,
+                raw=None,
+            ))
+
+        views.append(ListingDQView(
+            listing=listing,
+            latest_intraday=None if rng.random() < 0.1 else _price(base, NOW - intraday_age, False),
+            latest_close=latest_close,
+            quotes=quotes,
+            recent_closes=[latest_close, previous] if latest_close is not None else [],
+        ))
+    return views
+
+
+def _entries(views: list[ListingDQView], rng_seed: int = 3):
+    rng = random.Random(rng_seed)
+    return [(view, rng.choice(["GBP", "GBP", "USD"]), FX_QUOTES) for view in views]
+
+
+def test_columnar_matches_scalar_including_boundaries():
+    entries = _entries(make_views(3000))
+
+    scalar = [evaluate_listing(view, base, fx, NOW) for view, base, fx in entries]
+    columnar = evaluate_views_columnar(entries, NOW)
+
+    assert columnar == scalar
+    fired = {v.rule_code for violations in scalar for v in violations}
+    assert fired == {
+        "DQ_STALE_INTRADAY",
+        "DQ_STALE_CLOSE",
+        "DQ_MISSING_CLOSE",
+        "DQ_JUMP_CLOSE",
+        "DQ_GBX_SCALE",
+        "DQ_CCY_MISMATCH",
+        "DQ_FX_MISSING",
+        "DQ_FX_STALE",
+    }
+
+
+def test_columnar_handles_empty_input():
+    assert evaluate_views_columnar([], NOW) == []
+
+
+def test_columnar_matches_scalar_at_10k_listings():
+    entries = _entries(make_views(10_000, violation_rate=0.05))
+
+    scalar = [evaluate_listing(view, base, fx, NOW) for view, base, fx in entries]
+    assert evaluate_views_columnar(entries, NOW) == scalar
+
+
+@pytest.mark.benchmark
+def test_benchmark_10k_listings():
+    entries = _entries(make_views(10_000, violation_rate=0.05))
+
+    started = time.perf_counter()
+    scalar = [evaluate_listing(view, base, fx, NOW) for view, base, fx in entries]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    columnar = evaluate_views_columnar(entries, NOW)
+    columnar_seconds = time.perf_counter() - started
+
+    print(
+        f"\nDQ 10k listings: scalar={scalar_seconds * 1000:.1f}ms "
+        f"columnar={columnar_seconds * 1000:.1f}ms"
+    )
+    assert columnar == scalar
+    assert columnar_seconds < scalar_seconds
@@ -21,7 +21,7 @@ from app.services.data_quality import (
 from app.services.market_data_adapter import FxQuote, PriceQuote
 
 # 5pm UTC = 5pm London time → after 16:30 LSE close
-NOW = datetime(2026, 2, 28, 17, 0, 0, tzinfo=timezone.utc)
+NOW = datetime(2026, 2, 27, 17, 0, 0, tzinfo=timezone.utc)
 
 
 def make_listing(
@@ -66,7 +66,7 @@ def run_tests():
         "_is_market_closed: LSE closed at 17:00 UTC",
         _is_market_closed("LSE", NOW) is True,
     )
-    market_open = datetime(2026, 2, 28, 9, 0, 0, tzinfo=timezone.utc)
+    market_open = datetime(2026, 2, 27, 9, 0, 0, tzinfo=timezone.utc)
     check(
         "_is_market_closed: LSE open at 09:00 UTC",
         _is_market_closed("LSE", market_open) is False,
@@ -0,0 +1,216 @@
+"""
+test_drift_monitor.py — Incremental drift monitor
+
+Covers:
+  - Price / quantity / cash deltas keep running totals equal to a full recompute
+  - A crossing is reported once when a sleeve breaches, re-armed on recovery
+  - Redis-backed monitor: price ticks fan out to holders; ledger deltas apply
+  - Ledger versions: a batch the build already read is not applied twice, a
+    missed batch drops the state, a build older than a seen batch is redone
+"""
+import random
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services import drift_monitor
+from app.services.drift_monitor import (
+    DriftMonitor,
+    DriftState,
+    PositionTerm,
+    SleeveTerm,
+    _encode_position,
+    _encode_totals,
+    listing_index_key,
+    state_key,
+)
+from app.services.market_data_adapter import PriceQuote
+
+
+THRESHOLD = Decimal("5.0")
+EQ1, EQ2, BD1 = (str(uuid.uuid4()) for _ in range(3))
+
+
+def _state() -> DriftState:
+    """Two sleeves at target: EQ 60% (two listings), BD 30%; 10% cash."""
+    state = DriftState(
+        portfolio_id=str(uuid.uuid4()),
+        cash_gbp=Decimal("1000"),
+        holdings_value_gbp=Decimal("9000"),
+        sleeves={
+            "EQ": SleeveTerm(Decimal("6000"), Decimal("60")),
+            "BD": SleeveTerm(Decimal("3000"), Decimal("30")),
+        },
+        positions={
+            EQ1: PositionTerm(Decimal("10"), Decimal("300"), "EQ"),
+            EQ2: PositionTerm(Decimal("30"), Decimal("100"), "EQ"),
+            BD1: PositionTerm(Decimal("30"), Decimal("100"), "BD"),
+        },
+    )
+    state.crossings(THRESHOLD)
+    return state
+
+
+def _recomputed(state: DriftState) -> tuple[Decimal, dict[str, Decimal]]:
+    holdings = sum((p.value for p in state.positions.values()), Decimal("0"))
+    sleeves = {code: Decimal("0") for code in state.sleeves}
+    for position in state.positions.values():
+        if position.sleeve_code in sleeves:
+            sleeves[position.sleeve_code] += position.value
+    return holdings, sleeves
+
+
+def test_incremental_updates_match_full_recompute():
+    rng = random.Random(11)
+    state = _state()
+    for _ in range(500):
+        listing_id = rng.choice([EQ1, EQ2, BD1, "new"])
+        action = rng.random()
+        if action < 0.6:
+            state.set_price(listing_id, Decimal(rng.randrange(50, 500)))
+        elif action < 0.9:
+            state.add_quantity(listing_id, Decimal(rng.randrange(-5, 6)))
+        else:
+            state.add_cash(Decimal(rng.randrange(-100, 100)))
+
+    holdings, sleeves = _recomputed(state)
+    assert state.holdings_value_gbp == holdings
+    assert {code: term.value_gbp for code, term in state.sleeves.items()} == sleeves
+
+
+def test_crossing_reported_once_and_rearmed():
+    state = _state()
+    assert state.drifted == set()
+
+    # EQ: 10×300 + 30×100 = 6000 → 10×600 + 3000 = 9000 of 13000 ≈ 69.2%.
+    state.set_price(EQ1, Decimal("600"))
+    crossed = state.crossings(THRESHOLD)
+    assert [c.sleeve_code for c in crossed] == ["BD", "EQ"]
+    assert crossed[0].drift_pct < -THRESHOLD
+    assert crossed[1].drift_pct > THRESHOLD
+
+    # Still drifted: no new event.
+    state.set_price(EQ1, Decimal("610"))
+    assert state.crossings(THRESHOLD) == []
+
+    # Back within threshold, then out again → reported again.
+    state.set_price(EQ1, Decimal("300"))
+    assert state.crossings(THRESHOLD) == []
+    assert state.drifted == set()
+    state.set_price(EQ1, Decimal("600"))
+    assert [c.sleeve_code for c in state.crossings(THRESHOLD)] == ["BD", "EQ"]
+
+
+# ─── Redis-backed monitor ─────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def monitor():
+    fakeredis = pytest.importorskip("fakeredis")
+    return DriftMonitor(client=fakeredis.FakeRedis(decode_responses=True))
+
+
+def _store(monitor: DriftMonitor, state: DriftState) -> None:
+    mapping = _encode_totals(state)
+    mapping.update({f"pos:{lid}": _encode_position(p) for lid, p in state.positions.items()})
+    monitor.client.hset(state_key(state.portfolio_id), mapping=mapping)
+    for listing_id in state.positions:
+        monitor.client.sadd(listing_index_key(listing_id), state.portfolio_id)
+
+
+def _close(listing_id: str, price: str) -> PriceQuote:
+    return PriceQuote(
+        listing_id=listing_id,
+        as_of=datetime(2026, 3, 4, 16, 30, tzinfo=timezone.utc),
+        price=price,
+        currency="GBP",
+        is_close=True,
+        raw=None,
+    )
+
+
+def test_price_tick_updates_holders_and_records_crossing(monitor):
+    state = _state()
+    _store(monitor, state)
+    db = MagicMock()
+
+    crossings = monitor.on_prices(db, [_close(EQ1, "600"), _close(str(uuid.uuid4()), "1")])
+
+    assert [c.sleeve_code for c in crossings] == ["BD", "EQ"]
+    assert db.add.call_count == 2
+    stored = monitor.get_state(state.portfolio_id)
+    assert stored.holdings_value_gbp == Decimal("12000")
+    assert stored.sleeves["EQ"].value_gbp == Decimal("9000")
+    assert stored.drifted == {"EQ", "BD"}
+
+
+def test_ledger_entries_apply_cash_and_quantity(monitor, monkeypatch):
+    monkeypatch.setattr("app.services.drift_monitor.get_latest_closes", lambda db, ids: {})
+    state = _state()
+    _store(monitor, state)
+    entry = MagicMock(net_cash_delta_gbp=Decimal("-1000"), listing_id=BD1, quantity_delta=Decimal("10"))
+    db = MagicMock()
+
+    monitor.on_ledger_entries(db, state.portfolio_id, [entry])
+
+    stored = monitor.get_state(state.portfolio_id)
+    assert stored.cash_gbp == Decimal("0")
+    assert stored.sleeves["BD"].value_gbp == Decimal("4000")
+    assert stored.total_value_gbp == Decimal("10000")
+
+
+def _batch(cash: str) -> list[MagicMock]:
+    return [MagicMock(net_cash_delta_gbp=Decimal(cash), listing_id=None, quantity_delta=None)]
+
+
+def test_ledger_batch_already_in_the_build_is_not_applied_twice(monitor, monkeypatch):
+    monkeypatch.setattr("app.services.drift_monitor.get_latest_closes", lambda db, ids: {})
+    state = _state()
+    state.ledger_version = 5  # built from snapshots that include batch 5
+    _store(monitor, state)
+
+    monitor.on_ledger_entries(MagicMock(), state.portfolio_id, _batch("500"), ledger_version=5)
+    assert monitor.get_state(state.portfolio_id).cash_gbp == Decimal("1000")
+
+    monitor.on_ledger_entries(MagicMock(), state.portfolio_id, _batch("500"), ledger_version=6)
+    stored = monitor.get_state(state.portfolio_id)
+    assert stored.cash_gbp == Decimal("1500")
+    assert stored.ledger_version == 6
+
+
+def test_missed_ledger_batch_drops_the_state(monitor, monkeypatch):
+    monkeypatch.setattr("app.services.drift_monitor.get_latest_closes", lambda db, ids: {})
+    state = _state()
+    state.ledger_version = 5
+    _store(monitor, state)
+
+    monitor.on_ledger_entries(MagicMock(), state.portfolio_id, _batch("500"), ledger_version=7)
+
+    assert monitor.get_state(state.portfolio_id) is None
+
+
+def test_build_older_than_a_seen_batch_is_redone(monitor, monkeypatch):
+    portfolio_id = str(uuid.uuid4())
+    # Batch 6 was posted (and skipped: nothing loaded) while the first build
+    # was still reading the version-5 snapshots.
+    monitor.on_ledger_entries(MagicMock(), portfolio_id, _batch("500"), ledger_version=6)
+    builds = []
+
+    def build(db, portfolio_ids):
+        version = 5 if not builds else 6
+        builds.append(version)
+        state = _state()
+        state.portfolio_id = portfolio_id
+        state.ledger_version = version
+        state.cash_gbp = Decimal("1000") if version == 5 else Decimal("1500")
+        return {portfolio_id: state}
+
+    monkeypatch.setattr(drift_monitor, "build_drift_states", build)
+
+    assert monitor.ensure_loaded(MagicMock(), [portfolio_id]) == 1
+    assert builds == [5, 6]
+    stored = monitor.get_state(portfolio_id)
+    assert stored.cash_gbp == Decimal("1500") and stored.ledger_version == 6
@@ -0,0 +1,171 @@
+"""
+test_engine_batch.py — Fleet trade plan
+
+Covers:
+  - Thread pool, process pool and serial runs produce identical plans, in order
+  - A failing portfolio is reported without sinking the batch
+  - plan_fleet: blocked inputs are skipped, unblocked ones planned; a
+    portfolio whose snapshot cannot be built (negative cash) is FAILED alone
+  - record_fleet_run: fleet run + one ENGINE_PLAN run per portfolio, and a
+    recommendation batch for each planned one
+"""
+import random
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from app.domain.engine import AssetPosition, RunInputSnapshot
+from app.domain.models import (
+    CashSnapshot,
+    HoldingSnapshot,
+    LatestPrice,
+    PortfolioPolicyAllocation,
+)
+from app.services.engine_batch import (
+    compute_trade_plans,
+    plan_fleet,
+    plan_to_json,
+    record_fleet_run,
+)
+from app.services.engine_calculator import generate_trade_plan
+from app.services.engine_inputs import EngineInputResult, EngineInputs
+
+
+def _snapshot(rng: random.Random, n_positions: int = 8) -> RunInputSnapshot:
+    positions = []
+    for i in range(n_positions):
+        quantity = Decimal(rng.randrange(1, 500))
+        price = Decimal(rng.randrange(100, 50_000)) / 100
+        positions.append(
+            AssetPosition(
+                listing_id=uuid.uuid4(),
+                ticker=f"T{i:03d}",
+                current_quantity=quantity,
+                current_price_gbp=price,
+                current_value_gbp=quantity * price,
+                target_weight_pct=Decimal(rng.randrange(0, 30)),
+                current_weight_pct=Decimal("0"),
+                drift_pct=Decimal("0"),
+            )
+        )
+    return RunInputSnapshot(
+        portfolio_id=uuid.uuid4(),
+        cash_balance_gbp=Decimal(rng.randrange(0, 100_000)),
+        positions=positions,
+    )
+
+
+def test_pools_match_serial_plans():
+    rng = random.Random(17)
+    snapshots = [_snapshot(rng) for _ in range(12)]
+    expected = [generate_trade_plan(s) for s in snapshots]
+
+    serial = compute_trade_plans(snapshots, max_workers=1)
+    threaded = compute_trade_plans(snapshots, max_workers=4, process_threshold=1000)
+    processes = compute_trade_plans(snapshots, max_workers=2, process_threshold=1)
+
+    for results in (serial, threaded, processes):
+        assert [error for _, error in results] == [None] * len(snapshots)
+        assert [plan for plan, _ in results] == expected
+
+
+def test_failure_is_isolated_per_portfolio():
+    rng = random.Random(3)
+    good = _snapshot(rng)
+    bad = MagicMock(positions=None)  # not iterable → the calculator raises
+
+    results = compute_trade_plans([good, bad, good], max_workers=2, process_threshold=1000)
+
+    assert results[0] == (generate_trade_plan(good), None)
+    assert results[1][0] is None and results[1][1].startswith("TypeError")
+    assert results[2][1] is None
+
+
+def _inputs(portfolio_id: str) -> EngineInputs:
+    listing_id = uuid.uuid4()
+    return EngineInputs(
+        portfolio_id=uuid.UUID(portfolio_id),
+        as_of=datetime(2026, 3, 11, 12, 0, tzinfo=timezone.utc),
+        cash_snapshot=None,
+        holdings=[HoldingSnapshot(listing_id=listing_id, quantity=Decimal("100"))],
+        allocations=[
+            PortfolioPolicyAllocation(
+                listing_id=listing_id, ticker="AAA", target_weight_pct=Decimal("50"), policy_hash="p1"
+            )
+        ],
+        ticker_by_listing={listing_id: "AAA"},
+        closes_used=[
+            (
+                LatestPrice(
+                    listing_id=listing_id,
+                    price_point_id=uuid.uuid4(),
+                    as_of=datetime(2026, 3, 10, 17, 0, tzinfo=timezone.utc),
+                    price=Decimal("1000"),
+                    currency="GBX",
+                    is_close=True,
+                ),
+                "AAA",
+            )
+        ],
+    )
+
+
+def test_plan_fleet_and_record(monkeypatch):
+    planned, frozen = str(uuid.uuid4()), str(uuid.uuid4())
+    monkeypatch.setattr(
+        "app.services.engine_batch.gather_fleet_engine_inputs",
+        lambda db, as_of, ids: {
+            planned: EngineInputResult(False, None, None, _inputs(planned)),
+            frozen: EngineInputResult(True, "FROZEN", "Portfolio is frozen"),
+        },
+    )
+
+    run = plan_fleet(MagicMock(), max_workers=1)
+
+    assert run.counts == {"PLANNED": 1, "BLOCKED": 1, "FAILED": 0}
+    outcome = run.outcomes[0]
+    # 100 × 10.00 GBP fully held vs a 50% target → sell half.
+    assert plan_to_json(outcome.plan)["trades"][0]["action"] == "SELL"
+    assert outcome.input_hash is not None
+
+    generated = []
+    monkeypatch.setattr(
+        "app.services.engine_batch.generate_recommendation_batch",
+        lambda db, run_input, plan, input_hash, as_of, run_id: generated.append(
+            (run_input.portfolio_id, input_hash, run_id)
+        ) or MagicMock(recommendation_batch_id="batch-1"),
+    )
+    db = MagicMock()
+    record_fleet_run(db, run, str(uuid.uuid4()))
+
+    fleet_rows, portfolio_rows, input_rows = (call.args[1] for call in db.execute.call_args_list)
+    assert fleet_rows[0]["task_kind"] == "FLEET_TRADE_PLAN"
+    assert fleet_rows[0]["summary"]["planned"] == 1
+    assert [r["status"] for r in portfolio_rows] == ["SUCCESS", "BLOCKED"]
+    assert portfolio_rows[1]["summary"]["block_reason"] == "FROZEN"
+    assert len(input_rows) == 1 and input_rows[0]["input_hash"] == outcome.input_hash
+    assert input_rows[0]["input_json"]["as_of"] == "2026-03-11T12:00:00Z"
+    assert generated == [(uuid.UUID(planned), outcome.input_hash, portfolio_rows[0]["run_id"])]
+    assert outcome.recommendation_batch_id == "batch-1"
+
+
+def test_plan_fleet_fails_only_the_overdrawn_portfolio(monkeypatch):
+    planned, overdrawn = str(uuid.uuid4()), str(uuid.uuid4())
+    bad_inputs = _inputs(overdrawn)
+    bad_inputs.cash_snapshot = CashSnapshot(balance_gbp=Decimal("-250.00"))
+    monkeypatch.setattr(
+        "app.services.engine_batch.gather_fleet_engine_inputs",
+        lambda db, as_of, ids: {
+            overdrawn: EngineInputResult(False, None, None, bad_inputs),
+            planned: EngineInputResult(False, None, None, _inputs(planned)),
+        },
+    )
+
+    run = plan_fleet(MagicMock(), max_workers=1)
+
+    assert run.counts == {"PLANNED": 1, "BLOCKED": 0, "FAILED": 1}
+    failed = run.outcomes[0]
+    assert failed.portfolio_id == overdrawn
+    assert failed.plan is None and failed.error.startswith("ValueError")
+    assert run.outcomes[1].plan is not None
@@ -0,0 +1,157 @@
+"""
+test_engine_calculator_fixed.py — Fixed-point trade plan core
+
+Covers:
+  - Bit-identical TradePlans (values, exponents, warnings, trade order) vs the
+    Decimal core over randomized snapshots and engine parameters
+  - Exact half-unit weight ties round the same way in both cores
+  - Inputs off the 10^-10 grid fall back to the Decimal core
+  - settings.engine_calculator_fixed_point routes generate_trade_plan
+  - Benchmark (opt-in, -m benchmark): 10k positions, fixed-point vs Decimal
+"""
+import random
+import time
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.domain.engine import AssetPosition, RunInputSnapshot, TradePlan
+from app.services import engine_calculator
+from app.services.engine_calculator import generate_trade_plan, generate_trade_plan_decimal
+from app.services.engine_calculator_fixed import generate_trade_plan_fixed
+
+
+def _position(listing_id: uuid.UUID, ticker: str, quantity, price, target) -> AssetPosition:
+    quantity, price = Decimal(quantity), Decimal(price)
+    return AssetPosition(
+        listing_id=listing_id,
+        ticker=ticker,
+        current_quantity=quantity,
+        current_price_gbp=price,
+        current_value_gbp=quantity * price,
+        target_weight_pct=Decimal(target),
+        current_weight_pct=Decimal("0"),
+        drift_pct=Decimal("0"),
+    )
+
+
+def make_snapshot(rng: random.Random, count: int) -> RunInputSnapshot:
+    """Random portfolio: whole and fractional quantities, GBP and GBX-style
+    prices, zero prices, repeated tickers (ties fall through to listing_id)."""
+    positions = []
+    for _ in range(count):
+        quantity = Decimal(rng.randrange(0, 5000)) / rng.choice([1, 1, 1, 100])
+        price = Decimal(rng.randrange(0, 200000)) / rng.choice([1, 100, 10000])
+        target = Decimal(rng.randrange(0, 4000)) / rng.choice([1, 100, 1000])
+        positions.append(
+            _position(
+                uuid.UUID(int=rng.getrandbits(128)),
+                rng.choice(["VWRL", "VUSA", "IGLT", "SGLN"]),
+                quantity,
+                price,
+                target,
+            )
+        )
+    cash = Decimal(rng.randrange(0, 10**7)) / 100
+    return RunInputSnapshot(portfolio_id=uuid.uuid4(), cash_balance_gbp=cash, positions=positions)
+
+
+def fingerprint(plan: TradePlan) -> tuple:
+    """Everything a caller can observe, Decimals by sign/digits/exponent."""
+    def exact(value: Decimal) -> tuple:
+        return value.as_tuple()
+
+    return (
+        [
+            (t.action, t.ticker, t.listing_id, exact(t.quantity), exact(t.estimated_value_gbp), t.reason)
+            for t in plan.trades
+        ],
+        exact(plan.projected_post_trade_cash),
+        list(plan.warnings),
+        exact(plan.total_value_before),
+        exact(plan.total_value_after),
+        exact(plan.cash_pool_used),
+        exact(plan.cash_pool_remaining),
+    )
+
+
+def _outcome(core, snapshot, *args):
+    try:
+        return fingerprint(core(snapshot, *args))
+    except ValueError as exc:
+        return repr(exc)
+
+
+def test_matches_decimal_core_over_random_snapshots():
+    rng = random.Random(20)
+    for _ in range(2000):
+        snapshot = make_snapshot(rng, rng.randrange(0, 16))
+        args = (
+            Decimal(rng.choice(["5.0", "1", "0.25", "0"])),
+            Decimal(rng.choice(["500", "0", "10.5"])),
+            rng.randrange(0, 4),
+            rng.randrange(0, 4),
+        )
+        fixed = generate_trade_plan_fixed(snapshot, *args)
+        if fixed is None:  # trivial / out-of-domain inputs use the Decimal core
+            continue
+        assert fingerprint(fixed) == _outcome(generate_trade_plan_decimal, snapshot, *args)
+
+
+def test_exact_half_unit_weight_rounds_up_in_both_cores():
+    # 0.0000000001 of 200 GBP is a 5E-11 % weight, exactly half a unit: it
+    # rounds up to 1E-10 %, drifts above a zero threshold and is sold.
+    snapshot = RunInputSnapshot(
+        portfolio_id=uuid.uuid4(),
+        cash_balance_gbp=Decimal("199.9999999999"),
+        positions=[_position(uuid.uuid4(), "TINY", "1", "0.0000000001", "0")],
+    )
+    args = (Decimal("0"), Decimal("0"), 2, 3)
+    fixed = generate_trade_plan_fixed(snapshot, *args)
+    assert [t.action for t in fixed.trades] == ["SELL"]
+    assert fingerprint(fixed) == fingerprint(generate_trade_plan_decimal(snapshot, *args))
+
+
+def test_off_grid_inputs_fall_back_to_decimal_core():
+    snapshot = RunInputSnapshot(
+        portfolio_id=uuid.uuid4(),
+        cash_balance_gbp=Decimal("1000"),
+        positions=[_position(uuid.uuid4(), "VWRL", "3.333333", "101.23456789", "50")],
+    )
+    args = (Decimal("5.0"), Decimal("500"), 2, 3)
+    assert generate_trade_plan_fixed(snapshot, *args) is None
+
+
+def test_flag_selects_fixed_point_core(monkeypatch):
+    snapshot = make_snapshot(random.Random(3), 12)
+    calls = []
+
+    def spy(*args):
+        plan = generate_trade_plan_fixed(*args)
+        calls.append(plan)
+        return plan
+
+    monkeypatch.setattr(engine_calculator, "generate_trade_plan_fixed", spy)
+    expected = fingerprint(generate_trade_plan(snapshot))
+    assert calls == []
+
+    monkeypatch.setattr(engine_calculator.settings, "engine_calculator_fixed_point", True)
+    assert fingerprint(generate_trade_plan(snapshot)) == expected
+    assert len(calls) == 1 and calls[0] is not None
+
+
+@pytest.mark.benchmark
+def test_benchmark_10k_positions():
+    snapshot = make_snapshot(random.Random(10), 10_000)
+    args = (Decimal("5.0"), Decimal("500"), 2, 3)
+    timings = {}
+    for name, core in (("decimal", generate_trade_plan_decimal), ("fixed", generate_trade_plan_fixed)):
+        started = time.perf_counter()
+        plan = core(snapshot, *args)
+        timings[name] = time.perf_counter() - started
+    assert plan is not None
+    print(
+        f"\n10k positions: decimal={timings['decimal'] * 1000:.1f}ms "
+        f"fixed={timings['fixed'] * 1000:.1f}ms"
+    )
@@ -0,0 +1,117 @@
+"""
+test_engine_calculator_properties.py — Fixed-point vs Decimal core (Hypothesis)
+
+Covers:
+  - For any snapshot and engine parameters the fixed-point core either
+    declines (returns None) or returns a TradePlan identical to the Decimal
+    core's, down to Decimal exponents, warnings and trade order
+  - On-grid inputs (amounts at 10^-10 GBP, portfolios below 10^16 GBP) are
+    never declined
+"""
+import uuid
+from decimal import Decimal
+
+import pytest
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings as hypothesis_settings, strategies as st  # noqa: E402
+
+from app.domain.engine import AssetPosition, RunInputSnapshot, TradePlan  # noqa: E402
+from app.services.engine_calculator import generate_trade_plan_decimal  # noqa: E402
+from app.services.engine_calculator_fixed import generate_trade_plan_fixed  # noqa: E402
+
+
+def _amount(max_units: int, places: int) -> st.SearchStrategy[Decimal]:
+    """Non-negative Decimals with up to *places* decimal places."""
+    return st.integers(min_value=0, max_value=max_units).map(
+        lambda units: Decimal(units).scaleb(-places)
+    )
+
+
+on_grid_amounts = st.one_of(
+    _amount(10**6, 0), _amount(10**8, 2), _amount(10**10, 4), _amount(10**14, 10)
+)
+# Up to 14 places: some land off the 10^-10 grid.
+any_amounts = st.one_of(on_grid_amounts, _amount(10**12, 12), _amount(10**16, 14))
+weights = st.one_of(_amount(100, 0), _amount(10**4, 2), _amount(10**12, 10))
+whole_quantities = _amount(10**5, 0)
+any_quantities = st.one_of(whole_quantities, _amount(10**7, 4))
+
+
+@st.composite
+def positions(draw, amounts, quantities) -> AssetPosition:
+    quantity = draw(quantities)
+    price = draw(amounts)
+    return AssetPosition(
+        listing_id=uuid.UUID(int=draw(st.integers(min_value=0, max_value=2**128 - 1))),
+        ticker=draw(st.sampled_from(["VWRL", "VUSA", "IGLT"])),
+        current_quantity=quantity,
+        current_price_gbp=price,
+        current_value_gbp=quantity * price,
+        target_weight_pct=draw(weights),
+        current_weight_pct=Decimal("0"),
+        drift_pct=Decimal("0"),
+    )
+
+
+@st.composite
+def cases(draw, amounts, quantities) -> tuple:
+    snapshot = RunInputSnapshot(
+        portfolio_id=uuid.uuid4(),
+        cash_balance_gbp=draw(amounts),
+        positions=draw(st.lists(positions(amounts, quantities), max_size=12)),
+    )
+    args = (
+        draw(st.one_of(st.sampled_from([Decimal("5.0"), Decimal("0")]), weights)),
+        draw(st.one_of(st.sampled_from([Decimal("500"), Decimal("0")]), on_grid_amounts)),
+        draw(st.integers(min_value=0, max_value=4)),
+        draw(st.integers(min_value=0, max_value=4)),
+    )
+    return snapshot, args
+
+
+def fingerprint(plan: TradePlan) -> tuple:
+    return (
+        [
+            (
+                t.action,
+                t.ticker,
+                t.listing_id,
+                t.quantity.as_tuple(),
+                t.estimated_value_gbp.as_tuple(),
+                t.reason,
+            )
+            for t in plan.trades
+        ],
+        plan.projected_post_trade_cash.as_tuple(),
+        list(plan.warnings),
+        plan.total_value_before.as_tuple(),
+        plan.total_value_after.as_tuple(),
+        plan.cash_pool_used.as_tuple(),
+        plan.cash_pool_remaining.as_tuple(),
+    )
+
+
+def _outcome(plan_fn, snapshot, args):
+    try:
+        plan = plan_fn(snapshot, *args)
+    except ValueError as exc:
+        return repr(exc)
+    return None if plan is None else fingerprint(plan)
+
+
+@hypothesis_settings(max_examples=500, deadline=None)
+@given(cases(any_amounts, any_quantities))
+def test_fixed_core_matches_or_declines(case):
+    snapshot, args = case
+    fixed = _outcome(generate_trade_plan_fixed, snapshot, args)
+    if fixed is not None:
+        assert fixed == _outcome(generate_trade_plan_decimal, snapshot, args)
+
+
+@hypothesis_settings(max_examples=500, deadline=None)
+@given(cases(on_grid_amounts, whole_quantities))
+def test_on_grid_inputs_are_not_declined(case):
+    snapshot, args = case
+    hypothesis.assume(snapshot.cash_balance_gbp > 0 or any(p.current_value_gbp for p in snapshot.positions))
+    assert _outcome(generate_trade_plan_fixed, snapshot, args) is not None
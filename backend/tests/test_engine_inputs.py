@@ -14,7 +14,16 @@ from app.domain.models import (
     PortfolioPolicyAllocation,
     PricePoint,
 )
-from app.services.engine_inputs import EngineInputResult, gather_engine_inputs
+from app.core.config import settings
+from app.services.engine_inputs import (
+    EngineInputResult,
+    build_run_input_snapshot,
+    gather_engine_inputs,
+    gather_fleet_engine_inputs,
+)
+from app.services.latest_prices import upsert_latest_from_price_points
+from app.services.plan_cache import inputs_cache_key, plan_cache_key, probe_plan_cache_key
+from app.services.synthetic_portfolio import gathered_inputs, generate_portfolio
 
 
 NOW = datetime(2026, 3, 11, 12, 0, 0, tzinfo=timezone.utc)
@@ -104,7 +113,7 @@ async def test_run_blocked_when_required_price_is_older_than_3_days(
     stale_price = PricePoint(
         price_point_id=uuid.uuid4(),
         listing_id=listing.listing_id,
-        as_of=NOW - timedelta(days=4),
+        as_of=NOW - timedelta(days=6),  # four London trading days before NOW
         price=Decimal("101.25"),
         currency="GBP",
         is_close=True,
@@ -112,6 +121,7 @@ async def test_run_blocked_when_required_price_is_older_than_3_days(
         raw=None,
     )
     db.add(stale_price)
+    upsert_latest_from_price_points(db, [stale_price])
     db.commit()
 
     result = gather_engine_inputs(db, str(test_portfolio.portfolio_id), NOW)
@@ -142,6 +152,7 @@ async def test_run_succeeds_with_fresh_prices(
         raw=None,
     )
     db.add(fresh_price)
+    upsert_latest_from_price_points(db, [fresh_price])
     db.commit()
 
     result = gather_engine_inputs(db, str(test_portfolio.portfolio_id), NOW)
@@ -208,6 +219,7 @@ async def test_snapshot_contains_cash_and_holdings(
         raw=None,
     )
     db.add(fresh_price)
+    upsert_latest_from_price_points(db, [fresh_price])
     db.commit()
 
     result = gather_engine_inputs(db, str(test_portfolio.portfolio_id), NOW)
@@ -245,6 +257,7 @@ async def test_snapshot_contains_allocation_map(
         raw=None,
     )
     db.add(fresh_price)
+    upsert_latest_from_price_points(db, [fresh_price])
     db.commit()
 
     result = gather_engine_inputs(db, str(test_portfolio.portfolio_id), NOW)
@@ -258,3 +271,107 @@ async def test_snapshot_contains_allocation_map(
     assert allocation_map[0]["listing_id"] == str(listing.listing_id)
     assert allocation_map[0]["ticker"] == listing.ticker
     assert allocation_map[0]["sleeve_code"] == "CORE"
+
+
+@pytest.mark.asyncio
+async def test_fleet_inputs_match_per_portfolio_gather(
+    db: Session,
+    test_portfolio: Portfolio,
+):
+    listing = test_portfolio._test_listing
+    _seed_cash_holding_and_allocation(db, test_portfolio, ticker=listing.ticker)
+
+    fresh_price = PricePoint(
+        price_point_id=uuid.uuid4(),
+        listing_id=listing.listing_id,
+        as_of=NOW - timedelta(days=1),
+        price=Decimal("104.00"),
+        currency="GBP",
+        is_close=True,
+        source_id="test_engine_inputs_fleet",
+        raw=None,
+    )
+    db.add(fresh_price)
+    upsert_latest_from_price_points(db, [fresh_price])
+    db.commit()
+
+    single = gather_engine_inputs(db, str(test_portfolio.portfolio_id), NOW)
+    fleet = gather_fleet_engine_inputs(db, NOW, [test_portfolio.portfolio_id])
+
+    assert fleet == {str(test_portfolio.portfolio_id): single}
+
+    db.add(FreezeState(freeze_id=uuid.uuid4(), portfolio_id=test_portfolio.portfolio_id, is_frozen=True))
+    db.commit()
+
+    frozen = gather_fleet_engine_inputs(db, NOW, [test_portfolio.portfolio_id])
+    assert frozen[str(test_portfolio.portfolio_id)].block_reason == "FROZEN"
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_probe_matches_gathered_inputs(
+    db: Session,
+    test_portfolio: Portfolio,
+):
+    listing = test_portfolio._test_listing
+    _seed_cash_holding_and_allocation(db, test_portfolio, ticker=listing.ticker)
+
+    fresh_price = PricePoint(
+        price_point_id=uuid.uuid4(),
+        listing_id=listing.listing_id,
+        as_of=NOW - timedelta(days=1),
+        price=Decimal("101.00"),
+        currency="GBP",
+        is_close=True,
+        source_id="test_engine_inputs_probe",
+        raw=None,
+    )
+    db.add(fresh_price)
+    upsert_latest_from_price_points(db, [fresh_price])
+    db.commit()
+
+    result = gather_engine_inputs(db, str(test_portfolio.portfolio_id), NOW)
+
+    assert result.snapshot_data["price_points_used"][0]["price_point_id"] == str(
+        fresh_price.price_point_id
+    )
+    assert probe_plan_cache_key(db, test_portfolio.portfolio_id, NOW) == plan_cache_key(
+        result.snapshot_data
+    )
+    assert inputs_cache_key(result.inputs) == plan_cache_key(result.snapshot_data)
+    # Past the staleness window the probe defers to the full (blocking) path.
+    assert probe_plan_cache_key(db, test_portfolio.portfolio_id, NOW + timedelta(days=5)) is None
+
+
+def test_typed_run_input_matches_audit_payload_build():
+    for prices in ("uniform", "lognormal", "pence"):
+        inputs = gathered_inputs(generate_portfolio(200, drift="drifted", prices=prices), NOW)
+        from_payload = build_run_input_snapshot(inputs.audit_payload())
+        assert inputs.run_input() == from_payload
+        assert [p.current_weight_pct.as_tuple() for p in inputs.run_input().positions] == [
+            p.current_weight_pct.as_tuple() for p in from_payload.positions
+        ]
+
+
+def test_input_hash_ignores_order_and_timestamps_only():
+    portfolio = generate_portfolio(20)
+    inputs = gathered_inputs(portfolio, NOW)
+    later = gathered_inputs(portfolio, NOW + timedelta(hours=1))
+    later.holdings.reverse()
+    later.closes_used.reverse()
+    assert later.input_hash() == inputs.input_hash()
+
+    changed = gathered_inputs(portfolio, NOW)
+    changed.holdings[3].quantity += 1
+    assert changed.input_hash() != inputs.input_hash()
+    repriced = gathered_inputs(portfolio, NOW)
+    repriced.closes_used[0][0].price_point_id = uuid.uuid4()
+    assert repriced.input_hash() != inputs.input_hash()
+
+
+def test_input_hash_and_cache_key_follow_engine_parameters(monkeypatch):
+    inputs = gathered_inputs(generate_portfolio(20), NOW)
+    input_hash, cache_key = inputs.input_hash(), inputs_cache_key(inputs)
+
+    monkeypatch.setattr(settings, "engine_sleeve_sell_caps", {"CORE": 1})
+    assert inputs.input_hash() != input_hash
+    assert inputs_cache_key(inputs) != cache_key
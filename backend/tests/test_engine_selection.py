@@ -0,0 +1,98 @@
+"""
+test_engine_selection.py — Rebalance candidate selection
+
+Covers:
+  - first_by_key matches a full sort + slice, ties and negative caps included
+  - Per-sleeve caps keep each capped sleeve's highest-drift positions, then
+    the overall cap applies; uncapped sleeves are untouched
+  - Both trade plan cores apply sleeve caps identically, with one warning per
+    sleeve over its cap
+  - generate_trade_plan defaults the caps from settings
+"""
+import random
+import uuid
+from decimal import Decimal
+from operator import itemgetter
+
+from app.domain.engine import AssetPosition, RunInputSnapshot
+from app.services import engine_calculator
+from app.services.engine_calculator import generate_trade_plan, generate_trade_plan_decimal
+from app.services.engine_calculator_fixed import generate_trade_plan_fixed
+from app.services.engine_selection import first_by_key, select_candidates
+
+
+def test_first_by_key_matches_sorted_slice():
+    rng = random.Random(23)
+    for _ in range(500):
+        # Few distinct keys: plenty of ties, which must keep input order.
+        items = [(rng.randrange(5), rng.choice("AB"), index) for index in range(rng.randrange(0, 30))]
+        key = itemgetter(0, 1)
+        for limit in (-1, 0, 1, 2, 3, 50):
+            assert first_by_key(items, limit, key) == sorted(items, key=key)[:limit]
+
+
+def test_sleeve_caps_then_overall_cap():
+    # (drift order, sleeve)
+    items = [(1, "EQ"), (2, "EQ"), (3, "BOND"), (4, "EQ"), (5, None), (6, "BOND")]
+    warnings: list[str] = []
+    selected = select_candidates(
+        items, "SELL", 3, lambda item: item[0], lambda item: item[1], {"EQ": 1, "GOLD": 0}, warnings
+    )
+
+    assert selected == [(1, "EQ"), (3, "BOND"), (5, None)]
+    assert warnings == [
+        "Overweight assets in sleeve EQ exceed sell cap (1); limiting sells to highest drift",
+        "Overweight assets exceed sell cap (3); limiting sells to highest drift",
+    ]
+
+
+def _position(ticker: str, sleeve: str, quantity: int, target: str) -> AssetPosition:
+    return AssetPosition(
+        listing_id=uuid.UUID(int=len(ticker) * 1000 + quantity),
+        ticker=ticker,
+        current_quantity=Decimal(quantity),
+        current_price_gbp=Decimal("10"),
+        current_value_gbp=Decimal(quantity) * 10,
+        target_weight_pct=Decimal(target),
+        current_weight_pct=Decimal("0"),
+        drift_pct=Decimal("0"),
+        sleeve_code=sleeve,
+    )
+
+
+def _snapshot() -> RunInputSnapshot:
+    return RunInputSnapshot(
+        portfolio_id=uuid.uuid4(),
+        cash_balance_gbp=Decimal("0"),
+        positions=[
+            _position("EQA", "EQUITY", 400, "10"),
+            _position("EQB", "EQUITY", 300, "10"),
+            _position("EQC", "EQUITY", 200, "10"),
+            _position("BDA", "BONDS", 50, "35"),
+            _position("BDB", "BONDS", 50, "35"),
+        ],
+    )
+
+
+def test_cores_apply_sleeve_caps_identically():
+    args = (Decimal("5.0"), Decimal("0"), 2, 3, {"EQUITY": 1}, {"BONDS": 1})
+    plan = generate_trade_plan_decimal(_snapshot(), *args)
+
+    assert [(t.action, t.ticker) for t in plan.trades] == [("SELL", "EQA"), ("BUY", "BDA")]
+    assert plan.warnings == [
+        "Overweight assets in sleeve EQUITY exceed sell cap (1); limiting sells to highest drift",
+        "Underweight assets in sleeve BONDS exceed buy cap (1); limiting buys to lowest drift",
+    ]
+    fixed = generate_trade_plan_fixed(_snapshot(), *args)
+    assert fixed == plan
+
+    uncapped = generate_trade_plan_decimal(_snapshot(), *args[:4])
+    assert [t.ticker for t in uncapped.trades] == ["EQA", "EQB", "BDA", "BDB"]
+
+
+def test_caps_default_from_settings(monkeypatch):
+    monkeypatch.setattr(engine_calculator.settings, "engine_sleeve_sell_caps", {"EQUITY": 1})
+    assert [t.ticker for t in generate_trade_plan(_snapshot()).trades if t.action == "SELL"] == ["EQA"]
+    # Explicit caps win over settings.
+    plan = generate_trade_plan(_snapshot(), sleeve_sell_caps={})
+    assert [t.ticker for t in plan.trades if t.action == "SELL"] == ["EQA", "EQB"]
@@ -0,0 +1,99 @@
+"""
+test_ingest_writer.py — Batched multi-row price / FX inserts
+
+Covers:
+  - Rows are sent in chunks, one statement per chunk (pure)
+  - Inserted counts come from RETURNING: duplicates within a batch and
+    rows already in the DB are not counted (DB)
+  - latest_prices is upserted only from newly inserted rows (DB)
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.models import LatestPrice, Portfolio, PricePoint
+from app.services.ingest_writer import (
+    fx_rate_row,
+    insert_fx_rates,
+    insert_price_points,
+    price_point_row,
+)
+
+
+NOW = datetime(2026, 3, 11, 12, 0, 0, tzinfo=timezone.utc)
+SOURCE = "test_ingest_writer"
+
+
+def _price_row(listing_id: uuid.UUID, price: str, as_of: datetime) -> dict:
+    return price_point_row(
+        listing_id=listing_id,
+        as_of=as_of,
+        price=Decimal(price),
+        currency="GBP",
+        is_close=True,
+        source_id=SOURCE,
+    )
+
+
+def test_price_rows_are_sent_in_chunks():
+    db = MagicMock()
+    db.execute.return_value = []
+    listing_id = uuid.uuid4()
+    rows = [_price_row(listing_id, "1", NOW - timedelta(minutes=i)) for i in range(5)]
+
+    inserted = insert_price_points(db, rows, chunk_size=2)
+
+    assert inserted == 0
+    # 3 chunked inserts; latest_prices upsert skipped because nothing landed
+    assert db.execute.call_count == 3
+
+
+def test_empty_input_issues_no_statements():
+    db = MagicMock()
+
+    assert insert_price_points(db, []) == 0
+    assert insert_fx_rates(db, []) == 0
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_insert_counts_only_new_rows(db: Session, test_portfolio: Portfolio):
+    listing = test_portfolio._test_listing
+    first = _price_row(listing.listing_id, "100", NOW - timedelta(days=1))
+    duplicate = _price_row(listing.listing_id, "100", NOW - timedelta(days=1))
+    newest = _price_row(listing.listing_id, "101", NOW)
+
+    assert insert_price_points(db, [first, duplicate]) == 1
+    assert insert_price_points(db, [first, newest], chunk_size=1) == 1
+    db.commit()
+
+    stored = (
+        db.query(PricePoint)
+        .filter(PricePoint.listing_id == listing.listing_id, PricePoint.source_id == SOURCE)
+        .count()
+    )
+    latest = (
+        db.query(LatestPrice)
+        .filter(LatestPrice.listing_id == listing.listing_id, LatestPrice.source_id == SOURCE)
+        .one()
+    )
+    assert stored == 2
+    assert latest.price == Decimal("101")
+
+
+@pytest.mark.asyncio
+async def test_fx_insert_counts_only_new_rows(db: Session):
+    # Far-past timestamp keeps this row distinct from real provider data
+    as_of = datetime(2001, 1, 2, 16, 30, 0, tzinfo=timezone.utc)
+    row = fx_rate_row(
+        base_ccy="GBP", quote_ccy="USD", as_of=as_of, rate=Decimal("1.25"), source_id=SOURCE
+    )
+    try:
+        assert insert_fx_rates(db, [row]) == 1
+        assert insert_fx_rates(db, [dict(row, fx_rate_id=uuid.uuid4())]) == 0
+    finally:
+        db.rollback()
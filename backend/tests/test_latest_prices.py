@@ -0,0 +1,137 @@
+"""
+test_latest_prices.py — latest_prices maintenance
+
+Covers:
+  - upsert_latest_prices collapses rows to the newest per key (pure)
+  - Ingest keeps latest_prices in step with price_points (DB)
+  - An older backfill never moves the latest price backwards (DB)
+  - rebuild_latest_prices reproduces the table from history (DB)
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.models import LatestPrice, Portfolio, PricePoint
+from app.services.latest_prices import (
+    latest_price_row,
+    rebuild_latest_prices,
+    upsert_latest_prices,
+)
+from app.services.market_data_ingest import ingest_prices_for_portfolio
+from app.services.providers.mock_provider import MockProvider
+
+
+NOW = datetime(2026, 3, 11, 12, 0, 0, tzinfo=timezone.utc)
+SOURCE = "test_latest_prices"
+
+
+def _row(listing_id: uuid.UUID, price: str, as_of: datetime, is_close: bool = True) -> dict:
+    return latest_price_row(
+        price_point_id=uuid.uuid4(),
+        listing_id=listing_id,
+        is_close=is_close,
+        source_id=SOURCE,
+        as_of=as_of,
+        price=Decimal(price),
+        currency="GBP",
+    )
+
+
+def _latest_close(db: Session, listing_id: uuid.UUID) -> LatestPrice:
+    return (
+        db.query(LatestPrice)
+        .filter(
+            LatestPrice.listing_id == listing_id,
+            LatestPrice.is_close == True,  # noqa: E712
+        )
+        .one()
+    )
+
+
+def test_upsert_collapses_rows_to_newest_per_key():
+    listing_id = uuid.uuid4()
+    db = MagicMock()
+
+    sent = upsert_latest_prices(
+        db,
+        [
+            _row(listing_id, "1", NOW - timedelta(days=2)),
+            _row(listing_id, "3", NOW),
+            _row(listing_id, "2", NOW - timedelta(days=1)),
+            _row(listing_id, "9", NOW, is_close=False),
+        ],
+    )
+
+    assert sent == 2
+    db.execute.assert_called_once()
+
+
+def test_upsert_with_no_rows_skips_query():
+    db = MagicMock()
+
+    assert upsert_latest_prices(db, []) == 0
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ingest_maintains_latest_prices(db: Session, test_portfolio: Portfolio):
+    listing = test_portfolio._test_listing
+    fixed_ts = datetime(2026, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+
+    await ingest_prices_for_portfolio(
+        db=db,
+        adapter=MockProvider(fixed_as_of=fixed_ts),
+        portfolio_id=str(test_portfolio.portfolio_id),
+        job_id=str(uuid.uuid4()),
+        want_close=True,
+        want_intraday=False,
+    )
+    db.commit()
+
+    latest = _latest_close(db, listing.listing_id)
+    stored = (
+        db.query(PricePoint)
+        .filter(PricePoint.price_point_id == latest.price_point_id)
+        .one()
+    )
+    assert latest.as_of == fixed_ts
+    assert latest.price == stored.price
+
+
+@pytest.mark.asyncio
+async def test_older_backfill_does_not_replace_latest(db: Session, test_portfolio: Portfolio):
+    listing = test_portfolio._test_listing
+
+    upsert_latest_prices(db, [_row(listing.listing_id, "101", NOW)])
+    upsert_latest_prices(db, [_row(listing.listing_id, "99", NOW - timedelta(days=5))])
+    db.commit()
+
+    assert _latest_close(db, listing.listing_id).price == Decimal("101")
+
+
+@pytest.mark.asyncio
+async def test_rebuild_restores_latest_from_history(db: Session, test_portfolio: Portfolio):
+    listing = test_portfolio._test_listing
+    for days_ago, price in ((2, "100"), (1, "105")):
+        db.add(
+            PricePoint(
+                price_point_id=uuid.uuid4(),
+                listing_id=listing.listing_id,
+                as_of=NOW - timedelta(days=days_ago),
+                price=Decimal(price),
+                currency="GBP",
+                is_close=True,
+                source_id=SOURCE,
+            )
+        )
+    db.commit()
+
+    written = rebuild_latest_prices(db, [listing.listing_id])
+    db.commit()
+
+    assert written == 1
+    assert _latest_close(db, listing.listing_id).price == Decimal("105")
@@ -4,14 +4,18 @@ test_market_data_ingest.py — Phase 2 Test Suite
 Covers:
   - test_price_ingest_idempotent_unique_constraint (playbook §6.1)
   - Additional coverage: FX ingest idempotency, empty portfolio handling
+  - Cross-portfolio ingest fetches a shared listing once and slices per portfolio
 """
 import uuid
 import pytest
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.orm import Session
 
-from app.domain.models import PricePoint, Portfolio
-from app.services.market_data_ingest import ingest_prices_for_portfolio
+from app.domain.models import PricePoint, Portfolio, PortfolioConstituent
+from app.services.market_data_ingest import (
+    ingest_prices_for_all_portfolios,
+    ingest_prices_for_portfolio,
+)
 from app.services.providers.mock_provider import MockProvider
 
 
@@ -190,3 +194,65 @@ async def test_ingest_idempotent_close_and_intraday(
     assert result2.prices_inserted == 0, (
         "Second close+intraday ingest must insert 0 (idempotent)"
     )
+
+
+class _RecordingProvider(MockProvider):
+    """MockProvider that records the listing ids of every batched fetch."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fetched_listing_ids: list[str] = []
+
+    async def fetch_batch(self, listings, fx_pairs, **kwargs):
+        self.fetched_listing_ids.extend(ref.listing_id for ref in listings)
+        return await super().fetch_batch(listings, fx_pairs, **kwargs)
+
+
+async def test_shared_ingest_fetches_each_listing_once(
+    db: Session, test_portfolio: Portfolio
+):
+    """Two portfolios holding one listing → one fetch, one write, two slices."""
+    listing = test_portfolio._test_listing
+    other = Portfolio(
+        portfolio_id=uuid.uuid4(),
+        owner_user_id=test_portfolio.owner_user_id,
+        name="Second Portfolio",
+        broker="Test Broker",
+        base_currency="GBP",
+        tax_profile="ISA",
+        is_enabled=True,
+    )
+    db.add(other)
+    db.commit()
+    db.add(PortfolioConstituent(
+        portfolio_id=other.portfolio_id,
+        listing_id=listing.listing_id,
+        sleeve_code="CORE",
+        is_monitored=True,
+    ))
+    db.commit()
+
+    adapter = _RecordingProvider(
+        fixed_as_of=datetime(2026, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+    )
+    result = await ingest_prices_for_all_portfolios(
+        db=db,
+        adapter=adapter,
+        job_id=str(uuid.uuid4()),
+        want_close=True,
+        want_intraday=False,
+    )
+    db.commit()
+
+    assert adapter.fetched_listing_ids.count(str(listing.listing_id)) == 1
+    row_count = (
+        db.query(PricePoint)
+        .filter(PricePoint.listing_id == listing.listing_id)
+        .count()
+    )
+    assert row_count == 1
+
+    for portfolio_id in (test_portfolio.portfolio_id, other.portfolio_id):
+        slice_ = result.portfolios[str(portfolio_id)]
+        assert [str(l.listing_id) for l in slice_.listings] == [str(listing.listing_id)]
+        assert {q.listing_id for q in slice_.price_quotes} == {str(listing.listing_id)}
@@ -0,0 +1,89 @@
+"""
+test_plan_cache.py — Trade plan cache
+
+Covers:
+  - plan_cache_key depends on exactly the versioned inputs (order-insensitive)
+  - LocalPlanCache: TTL expiry and LRU eviction
+  - RedisPlanCache: round trip and LRU trim
+"""
+import copy
+
+import pytest
+
+from app.services.plan_cache import LocalPlanCache, RedisPlanCache, plan_cache_key
+
+
+def _snapshot_data() -> dict:
+    return {
+        "portfolio_id": "p1",
+        "as_of": "2026-03-16T12:00:00Z",
+        "cash_snapshot": {"balance_gbp": "100", "updated_at": None, "version_no": 4},
+        "holding_snapshots": [
+            {"listing_id": "l1", "quantity": "1", "version_no": 2},
+            {"listing_id": "l2", "quantity": "5", "version_no": 7},
+        ],
+        "price_points_used": [
+            {"listing_id": "l1", "price_point_id": "pp1", "price": "10"},
+            {"listing_id": "l2", "price_point_id": "pp2", "price": "20"},
+        ],
+        "allocation_map": [
+            {"listing_id": "l1", "policy_hash": "h1"},
+            {"listing_id": "l2", "policy_hash": "h1"},
+        ],
+    }
+
+
+def test_key_tracks_versioned_inputs_only():
+    base = _snapshot_data()
+    key = plan_cache_key(base)
+
+    reordered = copy.deepcopy(base)
+    reordered["holding_snapshots"].reverse()
+    reordered["price_points_used"].reverse()
+    reordered["as_of"] = "2026-03-16T12:05:00Z"
+    assert plan_cache_key(reordered) == key
+
+    for path, value in [
+        (("cash_snapshot", "version_no"), 5),
+        (("holding_snapshots", 0, "version_no"), 3),
+        (("price_points_used", 1, "price_point_id"), "pp3"),
+        (("allocation_map", 0, "policy_hash"), "h2"),
+    ]:
+        changed = copy.deepcopy(base)
+        target = changed
+        for step in path[:-1]:
+            target = target[step]
+        target[path[-1]] = value
+        assert plan_cache_key(changed) != key, path
+
+
+def test_local_cache_ttl_and_lru():
+    now = [0.0]
+    cache = LocalPlanCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # a is now most recent
+
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+    now[0] = 11.0
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_redis_cache_round_trip_and_trim():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisPlanCache(
+        client=fakeredis.FakeRedis(decode_responses=True), ttl_seconds=60, max_entries=2
+    )
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.put("c", {"v": 3})
+
+    assert cache.get("a") is None
+    assert cache.get("c") == {"v": 3}
+    cache.clear()
+    assert cache.get("c") is None
+
@@ -0,0 +1,140 @@
+"""
+test_price_lookup.py — Set-based latest-close lookup
+
+Covers:
+  - Blocking semantics (MISSING_PRICE / STALE_PRICE) of evaluate_trusted_closes
+  - Staleness skips weekends / exchange holidays at the listing's venue
+  - price_points_used payload shape and ordering
+  - get_latest_closes picks the newest close per listing (DB)
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.domain.models import LatestPrice, Portfolio, PricePoint
+from app.services.latest_prices import upsert_latest_from_price_points
+from app.services.price_lookup import evaluate_trusted_closes, get_latest_closes
+
+
+NOW = datetime(2026, 3, 11, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _make_close(listing_id: uuid.UUID, price: str, as_of: datetime) -> MagicMock:
+    pp = MagicMock(spec=LatestPrice)
+    pp.listing_id = listing_id
+    pp.price_point_id = uuid.UUID(int=listing_id.int ^ 1)
+    pp.price = Decimal(price)
+    pp.currency = "GBP"
+    pp.as_of = as_of
+    pp.is_close = True
+    return pp
+
+
+def test_all_fresh_closes_build_payload_in_listing_order():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    closes = {
+        second: _make_close(second, "20.5000000000", NOW - timedelta(days=1)),
+        first: _make_close(first, "10.2500000000", NOW - timedelta(hours=2)),
+    }
+
+    result = evaluate_trusted_closes(
+        [first, second], closes, {first: "AAA", second: "BBB"}, NOW
+    )
+
+    assert result.is_blocked is False
+    assert [p["ticker"] for p in result.price_points_used] == ["AAA", "BBB"]
+    assert result.price_points_used[0] == {
+        "listing_id": str(first),
+        "price_point_id": str(uuid.UUID(int=first.int ^ 1)),
+        "ticker": "AAA",
+        "as_of": "2026-03-11T10:00:00Z",
+        "price": "10.2500000000",
+        "currency": "GBP",
+        "is_close": True,
+    }
+
+
+def test_missing_close_blocks_with_ticker_in_message():
+    listing_id = uuid.uuid4()
+
+    result = evaluate_trusted_closes([listing_id], {}, {listing_id: "VWRP"}, NOW)
+
+    assert result.is_blocked is True
+    assert result.block_reason == "MISSING_PRICE"
+    assert "VWRP" in result.block_message
+    assert result.price_points_used == []
+
+
+def test_stale_close_blocks():
+    listing_id = uuid.uuid4()
+    closes = {listing_id: _make_close(listing_id, "1", NOW - timedelta(days=4))}
+
+    result = evaluate_trusted_closes([listing_id], closes, {}, NOW)
+
+    assert result.block_reason == "STALE_PRICE"
+    assert "older than 3 days" in result.block_message
+
+
+def test_first_failing_listing_determines_block_reason():
+    stale, missing = uuid.uuid4(), uuid.uuid4()
+    closes = {stale: _make_close(stale, "1", NOW - timedelta(days=10))}
+
+    result = evaluate_trusted_closes([stale, missing], closes, {}, NOW)
+
+    assert result.block_reason == "STALE_PRICE"
+
+
+def test_close_before_a_bank_holiday_is_not_stale():
+    listing_id = uuid.uuid4()
+    # Thursday's close, checked on Tuesday after Easter (Good Friday and
+    # Easter Monday are London holidays): one trading day old.
+    thursday_close = datetime(2026, 4, 2, 15, 30, tzinfo=timezone.utc)
+    tuesday = datetime(2026, 4, 7, 12, 0, tzinfo=timezone.utc)
+    closes = {listing_id: _make_close(listing_id, "1", thursday_close)}
+
+    assert not evaluate_trusted_closes([listing_id], closes, {}, tuesday, {listing_id: "LSE"}).is_blocked
+    # Unknown venues (and listings without one) age in calendar days.
+    assert evaluate_trusted_closes([listing_id], closes, {}, tuesday, {listing_id: "XETRA"}).is_blocked
+    assert evaluate_trusted_closes([listing_id], closes, {}, tuesday).is_blocked
+    # Four London trading days later it is stale.
+    friday = datetime(2026, 4, 10, 12, 0, tzinfo=timezone.utc)
+    result = evaluate_trusted_closes([listing_id], closes, {}, friday, {listing_id: "LSE"})
+    assert result.block_reason == "STALE_PRICE"
+
+
+def test_get_latest_closes_empty_input_skips_query():
+    db = MagicMock()
+
+    assert get_latest_closes(db, []) == {}
+    db.query.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_latest_closes_returns_newest_close_per_listing(
+    db: Session, test_portfolio: Portfolio
+):
+    listing = test_portfolio._test_listing
+    price_points = [
+        PricePoint(
+            price_point_id=uuid.uuid4(),
+            listing_id=listing.listing_id,
+            as_of=NOW - timedelta(days=days_ago),
+            price=Decimal(price),
+            currency="GBP",
+            is_close=is_close,
+            source_id="test_price_lookup",
+        )
+        for days_ago, price, is_close in ((3, "100", True), (1, "101", True), (0, "999", False))
+    ]
+    db.add_all(price_points)
+    upsert_latest_from_price_points(db, price_points)
+    db.commit()
+
+    closes = get_latest_closes(db, [listing.listing_id, uuid.uuid4()])
+
+    assert list(closes) == [listing.listing_id]
+    assert closes[listing.listing_id].price == Decimal("101")
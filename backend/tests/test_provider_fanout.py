@@ -0,0 +1,130 @@
+"""
+test_provider_fanout.py — Concurrent provider fan-out
+
+Covers:
+  - MockProvider with injected latency: wall time ~ latency × ceil(n / concurrency)
+  - Per-listing failures are reported, not raised, unless every listing fails
+  - YFinanceAdapter fans out _fetch_single_price and isolates failing tickers
+  - AdaptiveRateLimiter paces starts and backs off on throttling
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.market_data_adapter import (
+    InvalidResponseError,
+    ProviderUnavailableError,
+    RateLimitError,
+)
+from app.services.providers.fanout import AdaptiveRateLimiter, fan_out
+from app.services.providers.mock_provider import MockProvider
+from app.services.providers.yfinance_adapter import YFinanceAdapter
+
+
+pytestmark = pytest.mark.asyncio
+
+LATENCY = 0.05
+
+
+def _listing_ids(n: int) -> list[str]:
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+
+async def test_mock_fan_out_overlaps_latency():
+    listing_ids = _listing_ids(20)
+    adapter = MockProvider(latency_seconds=LATENCY, max_concurrency=10)
+
+    started = time.perf_counter()
+    quotes = await adapter.fetch_prices(listing_ids, want_close=True, want_intraday=False)
+    elapsed = time.perf_counter() - started
+
+    assert [q.listing_id for q in quotes] == listing_ids
+    # Serial would be 20 × LATENCY; two waves of 10 is 2 × LATENCY.
+    assert elapsed < 20 * LATENCY / 2
+
+
+async def test_mock_fan_out_respects_concurrency_bound():
+    in_flight = 0
+    peak = 0
+
+    async def fetch_one(key: int) -> int:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return key
+
+    outcomes = await fan_out(list(range(12)), fetch_one, max_concurrency=3)
+
+    assert [o.value for o in outcomes] == list(range(12))
+    assert peak == 3
+
+
+async def test_mock_failed_listing_is_reported_per_listing():
+    listing_ids = _listing_ids(4)
+    adapter = MockProvider(latency_seconds=LATENCY, fail_listing_ids=[listing_ids[1]])
+
+    quotes = await adapter.fetch_prices(listing_ids, want_close=True, want_intraday=False)
+
+    assert {q.listing_id for q in quotes} == set(listing_ids) - {listing_ids[1]}
+    assert [f.key for f in adapter.last_fetch_failures] == [listing_ids[1]]
+    assert isinstance(adapter.last_fetch_failures[0].error, ProviderUnavailableError)
+
+
+async def test_mock_all_listings_failing_raises():
+    listing_ids = _listing_ids(2)
+    adapter = MockProvider(fail_listing_ids=listing_ids)
+
+    with pytest.raises(ProviderUnavailableError):
+        await adapter.fetch_prices(listing_ids, want_close=True, want_intraday=False)
+
+
+async def test_yfinance_fans_out_and_isolates_failures(monkeypatch):
+    as_of = datetime(2026, 3, 11, 16, 30, tzinfo=timezone.utc)
+
+    def fake_fetch_single_price(self, ticker_raw):
+        time.sleep(LATENCY)
+        if ticker_raw == "BAD":
+            raise InvalidResponseError("no data", provider="yfinance")
+        return 1.2345, as_of, "GBP", f"{ticker_raw}.L", {"source": "yfinance"}
+
+    monkeypatch.setattr(YFinanceAdapter, "_fetch_single_price", fake_fetch_single_price)
+    tickers = ["AAA", "BAD", "CCC", "DDD", "EEE", "FFF"]
+    adapter = YFinanceAdapter(max_concurrency=6, rate_limiter=AdaptiveRateLimiter(1000))
+
+    started = time.perf_counter()
+    quotes = await adapter.fetch_prices(tickers, want_close=True, want_intraday=True)
+    elapsed = time.perf_counter() - started
+
+    assert [q.listing_id for q in quotes if q.is_close] == ["AAA", "CCC", "DDD", "EEE", "FFF"]
+    assert [f.key for f in adapter.last_fetch_failures] == ["BAD"]
+    assert elapsed < len(tickers) * LATENCY / 2
+
+
+async def test_rate_limiter_paces_request_starts():
+    limiter = AdaptiveRateLimiter(20.0)  # one start every 50ms
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed >= 0.14
+
+
+async def test_rate_limiter_backs_off_on_throttle_and_recovers():
+    limiter = AdaptiveRateLimiter(8.0, min_rate=1.0, recovery_factor=2.0)
+
+    async def throttled(_key):
+        raise RateLimitError("429", provider="yfinance")
+
+    await fan_out(["a", "b"], throttled, max_concurrency=1, limiter=limiter)
+    assert limiter.rate == 2.0
+
+    limiter.record_success()
+    limiter.record_success()
+    limiter.record_success()
+    assert limiter.rate == 8.0
@@ -0,0 +1,134 @@
+"""
+test_recommendation_generation.py — Persisted trade plans
+
+Covers:
+  - plan_summary: response body built from the snapshot and plan
+  - One PENDING batch per input hash; repeat generation returns it
+  - New inputs supersede the previous PENDING batch
+  - Lines carry the executable trades with the snapshot price
+"""
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.domain.engine import AssetPosition, ProposedTrade, RunInputSnapshot, TradePlan
+from app.domain.models import RecommendationBatch
+from app.services.recommendation_generation import (
+    find_batch_for_inputs,
+    generate_recommendation_batch,
+    plan_summary,
+)
+
+
+AS_OF = "2026-03-16T12:00:00Z"
+
+
+def _run_input(portfolio_id: uuid.UUID, listing_id: uuid.UUID) -> RunInputSnapshot:
+    return RunInputSnapshot(
+        portfolio_id=portfolio_id,
+        cash_balance_gbp=Decimal("1000"),
+        positions=[
+            AssetPosition(
+                listing_id=listing_id,
+                ticker="AAA",
+                current_quantity=Decimal("100"),
+                current_price_gbp=Decimal("10"),
+                current_value_gbp=Decimal("1000"),
+                target_weight_pct=Decimal("80"),
+                current_weight_pct=Decimal("50"),
+                drift_pct=Decimal("-30"),
+            )
+        ],
+    )
+
+
+def _plan(listing_id: uuid.UUID) -> TradePlan:
+    return TradePlan(
+        trades=[
+            ProposedTrade(
+                action="BUY",
+                ticker="AAA",
+                listing_id=listing_id,
+                quantity=Decimal("60"),
+                estimated_value_gbp=Decimal("600"),
+                reason="DRIFT_BELOW_THRESHOLD",
+            )
+        ],
+        projected_post_trade_cash=Decimal("400"),
+        cash_pool_used=Decimal("600"),
+        cash_pool_remaining=Decimal("400"),
+    )
+
+
+def test_plan_summary_matches_response_shape():
+    listing_id = uuid.uuid4()
+    summary = plan_summary(_run_input(uuid.uuid4(), listing_id), _plan(listing_id), AS_OF)
+
+    assert summary["total_value_gbp"] == "2000"
+    assert summary["positions"][0]["is_drifted"] is True
+    assert summary["trades"][0] == {
+        "action": "BUY",
+        "ticker": "AAA",
+        "listing_id": str(listing_id),
+        "quantity": "60",
+        "estimated_value_gbp": "600",
+        "reason": "DRIFT_BELOW_THRESHOLD",
+    }
+    assert summary["cash_pool_remaining"] == "400"
+
+
+@pytest.fixture
+def cleanup_batches(db, test_portfolio):
+    yield
+    db.rollback()
+    params = {"pid": str(test_portfolio.portfolio_id)}
+    db.execute(
+        text(
+            "DELETE FROM recommendation_lines WHERE recommendation_batch_id IN "
+            "(SELECT recommendation_batch_id FROM recommendation_batches WHERE portfolio_id = :pid)"
+        ),
+        params,
+    )
+    db.execute(text("DELETE FROM recommendation_batches WHERE portfolio_id = :pid"), params)
+    db.commit()
+
+
+def test_generation_is_keyed_by_input_hash(db, test_portfolio, cleanup_batches):
+    listing_id = test_portfolio._test_listing.listing_id
+    run_input = _run_input(test_portfolio.portfolio_id, listing_id)
+
+    first = generate_recommendation_batch(db, run_input, _plan(listing_id), "hash-1", AS_OF)
+    db.commit()
+    again = generate_recommendation_batch(db, run_input, _plan(listing_id), "hash-1", AS_OF)
+    db.commit()
+
+    assert again.recommendation_batch_id == first.recommendation_batch_id
+    assert first.status == "PENDING"
+    assert [line.proposed_price_gbp for line in first.lines] == [Decimal("10")]
+    assert first.plan_summary["trades"][0]["recommendation_line_id"] == str(
+        first.lines[0].recommendation_line_id
+    )
+    assert find_batch_for_inputs(db, test_portfolio.portfolio_id, "hash-1") == first
+
+
+def test_new_inputs_supersede_pending_batch(db, test_portfolio, cleanup_batches):
+    listing_id = test_portfolio._test_listing.listing_id
+    run_input = _run_input(test_portfolio.portfolio_id, listing_id)
+
+    old = generate_recommendation_batch(db, run_input, _plan(listing_id), "hash-old", AS_OF)
+    db.commit()
+    new = generate_recommendation_batch(db, run_input, _plan(listing_id), "hash-new", AS_OF)
+    db.commit()
+    db.refresh(old)
+
+    assert old.status == "SUPERSEDED"
+    assert new.status == "PENDING"
+    assert find_batch_for_inputs(db, test_portfolio.portfolio_id, "hash-old") is None
+    pending = (
+        db.query(RecommendationBatch)
+        .filter_by(portfolio_id=test_portfolio.portfolio_id, status="PENDING")
+        .all()
+    )
+    assert pending == [new]
@@ -0,0 +1,305 @@
+"""
+test_reliable_queue.py — Reliable-queue mode of AsyncRedisQueue
+
+Covers:
+  - Dequeue moves the job into the processing list with a lease; ack clears it
+  - Failures are retried with exponential backoff, then dead-lettered
+  - The reaper reschedules jobs whose visibility timeout expired, and only
+    those still in the processing list
+  - A running job's lease heartbeat keeps a long job from being reaped and
+    re-delivered; a reaped lease is not revived
+  - Dead letters are listed newest first
+  - Enqueue coalesces per (task_kind, portfolio_id, params) until the job
+    starts; jobs with different params (backtests) get their own job
+  - Job status follows the lifecycle (QUEUED → RUNNING → SUCCEEDED / RETRYING / DEAD)
+
+Runs against fakeredis when it is installed (skipped otherwise).
+"""
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.queue.redis_queue import (
+    AsyncRedisQueue,
+    JobPayload,
+    JobStatus,
+    retry_delay_seconds,
+    status_key,
+)
+from app.worker.pool import WorkerPool
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+async def queue(clock):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    q = AsyncRedisQueue(client=client, reliable=True, clock=clock)
+    yield q
+    await client.flushall()
+    await q.close()
+
+
+def _job(portfolio_id: str | None = None) -> JobPayload:
+    return JobPayload(
+        task_kind="PRICE_REFRESH",
+        portfolio_id=portfolio_id or str(uuid.uuid4()),
+        requested_by_user_id=str(uuid.uuid4()),
+    )
+
+
+async def _status(queue: AsyncRedisQueue, job_id: str) -> JobStatus:
+    return JobStatus.model_validate(await queue.client.hgetall(status_key(job_id)))
+
+
+async def test_retry_delay_is_exponential_and_capped():
+    base = settings.queue_retry_backoff_seconds
+    assert retry_delay_seconds(1) == base
+    assert retry_delay_seconds(2) == base * 2
+    assert retry_delay_seconds(3) == base * 4
+    assert retry_delay_seconds(50) == settings.queue_retry_backoff_max_seconds
+
+
+async def test_dequeue_leases_job_until_ack(queue):
+    job = _job()
+    await queue.enqueue_job(job)
+
+    taken = await queue.dequeue_job(timeout=1)
+
+    assert taken.job_id == job.job_id
+    assert await queue.client.llen(queue.processing_name) == 1
+    assert await queue.client.zcard(queue.leases_name) == 1
+
+    await queue.ack(taken)
+
+    assert await queue.client.llen(queue.processing_name) == 0
+    assert await queue.client.zcard(queue.leases_name) == 0
+    assert await queue.get_queue_length() == 0
+
+
+async def test_failed_job_retries_with_backoff_then_dead_letters(queue, clock, monkeypatch):
+    monkeypatch.setattr(settings, "queue_max_attempts", 3)
+    await queue.enqueue_job(_job())
+
+    for attempt in range(1, 3):
+        taken = await queue.dequeue_job(timeout=1)
+        assert taken.attempts == attempt - 1
+        await queue.fail(taken, "boom")
+
+        # Not due until the backoff has elapsed.
+        assert await queue.promote_due_retries() == 0
+        clock.now += retry_delay_seconds(attempt)
+        assert await queue.promote_due_retries() == 1
+
+    taken = await queue.dequeue_job(timeout=1)
+    await queue.fail(taken, "boom again")
+
+    assert await queue.get_queue_length() == 0
+    assert await queue.client.zcard(queue.delayed_name) == 0
+    [dead] = await queue.list_dead_letters()
+    assert dead.job.job_id == taken.job_id
+    assert dead.job.attempts == 3
+    assert dead.error == "boom again"
+
+
+async def test_fail_without_retry_dead_letters_immediately(queue):
+    await queue.enqueue_job(_job())
+    taken = await queue.dequeue_job(timeout=1)
+
+    await queue.fail(taken, "unknown kind", retry=False)
+
+    assert len(await queue.list_dead_letters()) == 1
+    assert await queue.client.zcard(queue.delayed_name) == 0
+
+
+async def test_reaper_requeues_stalled_job(queue, clock):
+    job = _job()
+    await queue.enqueue_job(job)
+    stalled = await queue.dequeue_job(timeout=1)
+
+    assert await queue.reap_stalled() == 0
+    clock.now += settings.queue_visibility_timeout_seconds + 1
+    assert await queue.reap_stalled() == 1
+
+    clock.now += retry_delay_seconds(1)
+    await queue.maintain()
+    retried = await queue.dequeue_job(timeout=1)
+    assert retried.job_id == job.job_id
+    assert retried.attempts == 1
+
+    # The original worker finishing late must not schedule a second retry.
+    await queue.fail(stalled, "late failure")
+    assert await queue.client.zcard(queue.delayed_name) == 0
+
+
+async def test_long_job_keeps_its_lease_and_runs_once(queue, clock):
+    job = _job()
+    await queue.enqueue_job(job)
+    release = threading.Event()
+    runs = []
+
+    async def long_job(job, ctx_logger):
+        runs.append(job.job_id)
+        while not release.is_set():
+            await asyncio.sleep(0.005)
+
+    pool = WorkerPool(
+        queue,
+        {"PRICE_REFRESH": long_job},
+        concurrency=1,
+        dequeue_timeout=1,
+        maintenance_interval=0.01,
+        lease_heartbeat_interval=0.01,
+    )
+    shutdown = asyncio.Event()
+    runner = asyncio.create_task(pool.run(shutdown))
+
+    reaped = 0
+    try:
+        # Five visibility timeouts pass while the job runs.
+        for _ in range(10):
+            await asyncio.sleep(0.05)
+            clock.now += settings.queue_visibility_timeout_seconds / 2
+            reaped += await queue.reap_stalled()
+    finally:
+        release.set()
+        shutdown.set()
+        await runner
+
+    assert reaped == 0
+
+    assert runs == [job.job_id]
+    assert (await _status(queue, job.job_id)).status == "SUCCEEDED"
+    assert await queue.client.zcard(queue.delayed_name) == 0
+    assert await queue.client.zcard(queue.leases_name) == 0
+
+
+async def test_extend_lease_does_not_revive_reaped_job(queue, clock):
+    await queue.enqueue_job(_job())
+    taken = await queue.dequeue_job(timeout=1)
+    assert await queue.extend_lease(taken)
+
+    clock.now += settings.queue_visibility_timeout_seconds + 1
+    assert await queue.reap_stalled() == 1
+
+    assert not await queue.extend_lease(taken)
+    assert await queue.client.zcard(queue.leases_name) == 0
+
+
+async def test_reaper_leases_orphaned_processing_entries(queue, clock):
+    job = _job()
+    # Simulate a crash between BLMOVE and the lease ZADD.
+    await queue.client.lpush(queue.processing_name, job.model_dump_json())
+
+    assert await queue.reap_stalled() == 0
+    assert await queue.client.zcard(queue.leases_name) == 1
+
+    clock.now += settings.queue_visibility_timeout_seconds + 1
+    assert await queue.reap_stalled() == 1
+    assert await queue.client.llen(queue.processing_name) == 0
+
+
+async def test_reaper_drops_lease_of_job_no_longer_processing(queue, clock):
+    job = _job()
+    # A lease left behind for an entry that was acked in the meantime.
+    await queue.client.zadd(queue.leases_name, {job.model_dump_json(): clock.now})
+
+    clock.now += 1
+    assert await queue.reap_stalled() == 0
+    assert await queue.client.zcard(queue.leases_name) == 0
+    assert await queue.client.zcard(queue.delayed_name) == 0
+
+
+async def test_dead_letters_newest_first(queue):
+    jobs = [_job(), _job()]
+    for job in jobs:
+        await queue.enqueue_job(job)
+        taken = await queue.dequeue_job(timeout=1)
+        await queue.fail(taken, "dead", retry=False)
+
+    dead = await queue.list_dead_letters()
+
+    assert [d.job.job_id for d in dead] == [jobs[1].job_id, jobs[0].job_id]
+
+
+async def test_enqueue_coalesces_pending_jobs_per_portfolio(queue):
+    portfolio_id = str(uuid.uuid4())
+    first = _job(portfolio_id)
+
+    ids = [await queue.enqueue_job(first)]
+    ids += [await queue.enqueue_job(_job(portfolio_id)) for _ in range(5)]
+    other = await queue.enqueue_job(_job())
+
+    assert set(ids) == {first.job_id}
+    assert other != first.job_id
+    assert await queue.get_queue_length() == 2
+
+
+async def test_jobs_with_different_params_do_not_coalesce(queue):
+    portfolio_id = str(uuid.uuid4())
+
+    def backtest(end: str) -> JobPayload:
+        return JobPayload(
+            task_kind="BACKTEST",
+            portfolio_id=portfolio_id,
+            requested_by_user_id=str(uuid.uuid4()),
+            params={"start": "2016-01-01", "end": end},
+        )
+
+    first = await queue.enqueue_job(backtest("2025-12-31"))
+    second = await queue.enqueue_job(backtest("2020-12-31"))
+    repeat = await queue.enqueue_job(backtest("2025-12-31"))
+
+    assert second != first
+    assert repeat == first
+    assert await queue.get_queue_length() == 2
+
+
+async def test_enqueue_after_job_started_creates_new_job(queue):
+    portfolio_id = str(uuid.uuid4())
+    first_id = await queue.enqueue_job(_job(portfolio_id))
+    running = await queue.dequeue_job(timeout=1)
+    assert running.job_id == first_id
+
+    second_id = await queue.enqueue_job(_job(portfolio_id))
+
+    assert second_id != first_id
+    assert await queue.get_queue_length() == 1
+
+
+async def test_job_status_lifecycle(queue, monkeypatch):
+    monkeypatch.setattr(settings, "queue_max_attempts", 1)
+    ok, bad = _job(), _job()
+    for job in (ok, bad):
+        await queue.enqueue_job(job)
+    assert (await _status(queue, ok.job_id)).status == "QUEUED"
+
+    taken = await queue.dequeue_job(timeout=1)
+    assert (await _status(queue, taken.job_id)).status == "RUNNING"
+    await queue.ack(taken)
+    assert (await _status(queue, ok.job_id)).status == "SUCCEEDED"
+
+    taken = await queue.dequeue_job(timeout=1)
+    await queue.fail(taken, "boom")
+    dead = await _status(queue, bad.job_id)
+    assert dead.status == "DEAD"
+    assert dead.attempts == 1
+    assert dead.error == "boom"
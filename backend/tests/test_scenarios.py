@@ -0,0 +1,153 @@
+"""
+test_scenarios.py — Price-shock scenarios
+
+Covers:
+  - An unshocked scenario is the base snapshot and the base trade plan, i.e.
+    the /engine/plan response (unallocated holdings count towards the total)
+  - Each shocked scenario is exactly what run_input / generate_trade_plan give
+    for the same inputs at shocked prices (GBX listings included)
+  - Sleeve and listing multipliers combine; unknown keys are ignored
+  - ScenarioRequest validation (multipliers between 0 and 1000); the largest
+    allowed multiplier still plans
+  - Benchmark (opt-in, -m benchmark): 500 scenarios over a 50-position
+    portfolio
+"""
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.scenarios import MAX_PRICE_MULTIPLIER, ScenarioRequest
+from app.services.engine_calculator import generate_trade_plan
+from app.services.recommendation_generation import plan_summary
+from app.services.scenarios import PriceShock, evaluate_scenarios, price_multipliers, shocked_snapshots
+from app.services.synthetic_portfolio import gathered_inputs, generate_portfolio
+
+NOW = datetime(2026, 3, 11, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _inputs(positions: int = 20, **kwargs):
+    inputs = gathered_inputs(generate_portfolio(positions, drift="drifted", **kwargs), NOW)
+    for index, allocation in enumerate(inputs.allocations):
+        allocation.sleeve_code = "EQUITY" if index % 2 else "BONDS"
+    return inputs
+
+
+def test_unshocked_scenario_is_the_base_plan():
+    inputs = _inputs()
+    base = inputs.run_input()
+    ((snapshot, plan),) = evaluate_scenarios(inputs, [PriceShock(name="base")])
+
+    assert snapshot == base
+    assert plan == generate_trade_plan(base)
+
+
+def test_unshocked_scenario_matches_engine_plan_with_unallocated_holdings():
+    inputs = _inputs()
+    unallocated = inputs.allocations.pop(5)  # still held and priced
+    base = inputs.run_input()
+    assert unallocated.listing_id not in {p.listing_id for p in base.positions}
+
+    ((snapshot, plan),) = evaluate_scenarios(inputs, [PriceShock(name="base")])
+    assert plan_summary(snapshot, plan, "now") == plan_summary(base, generate_trade_plan(base), "now")
+
+    # A listing multiplier on the unallocated holding moves everyone's weight.
+    (shocked,) = shocked_snapshots(
+        inputs, [PriceShock(name="x", listing_multipliers={unallocated.listing_id: Decimal("3")})]
+    )
+    assert [p.current_value_gbp for p in shocked.positions] == [p.current_value_gbp for p in base.positions]
+    assert all(s.current_weight_pct < b.current_weight_pct for s, b in zip(shocked.positions, base.positions))
+
+
+@pytest.mark.parametrize("prices", ["lognormal", "pence"])
+def test_shocked_scenarios_match_run_input_at_shocked_prices(prices):
+    inputs = _inputs(prices=prices)
+    base = inputs.run_input()
+    sleeves = {p.listing_id: p.sleeve_code for p in base.positions}
+    listing = base.positions[3].listing_id
+    shocks = [
+        PriceShock(name="crash", sleeve_multipliers={"EQUITY": Decimal("0.7")}),
+        PriceShock(name="rally", sleeve_multipliers={"BONDS": Decimal("1.15")}, listing_multipliers={listing: Decimal("2")}),
+        PriceShock(name="delisted", listing_multipliers={listing: Decimal("0")}),
+    ]
+    base_price = {p.listing_id: p.current_price_gbp for p in base.positions}
+
+    for shock, (snapshot, plan) in zip(shocks, evaluate_scenarios(inputs, shocks)):
+        multipliers = price_multipliers(shock, sleeves)
+        for close, _ in inputs.closes_used:
+            close.price = base_price[close.listing_id] * multipliers.get(close.listing_id, Decimal("1"))
+            close.currency = "GBP"
+        expected = inputs.run_input()
+        assert snapshot == expected
+        assert plan == generate_trade_plan(expected)
+
+
+def test_multipliers_combine_and_unknown_keys_are_ignored():
+    inputs = _inputs(positions=4)
+    base = inputs.run_input()
+    listing = base.positions[1].listing_id  # an EQUITY position
+    shock = PriceShock(
+        name="mixed",
+        listing_multipliers={listing: Decimal("0.5"), uuid.uuid4(): Decimal("9")},
+        sleeve_multipliers={"EQUITY": Decimal("0.8"), "GOLD": Decimal("9")},
+    )
+
+    assert price_multipliers(shock, {p.listing_id: p.sleeve_code for p in base.positions}) == {
+        base.positions[1].listing_id: Decimal("0.40"),
+        base.positions[3].listing_id: Decimal("0.8"),
+    }
+    (snapshot,) = shocked_snapshots(inputs, [shock])
+    assert snapshot.positions[1].current_price_gbp == base.positions[1].current_price_gbp * Decimal("0.40")
+
+
+def test_scenario_request_validation():
+    request = ScenarioRequest.model_validate(
+        {"scenarios": [{"name": "crash", "sleeve_multipliers": {"EQUITY": "0.7"}}, {}]}
+    )
+    assert request.scenarios[0].sleeve_multipliers == {"EQUITY": Decimal("0.7")}
+    assert request.scenarios[1].name is None
+    with pytest.raises(ValidationError):
+        ScenarioRequest.model_validate({"scenarios": []})
+    with pytest.raises(ValidationError):
+        ScenarioRequest.model_validate({"scenarios": [{"sleeve_multipliers": {"EQUITY": "-1"}}]})
+    for too_large in ("1000.01", "1e20", "1e400"):
+        with pytest.raises(ValidationError):
+            ScenarioRequest.model_validate({"scenarios": [{"sleeve_multipliers": {"EQUITY": too_large}}]})
+    with pytest.raises(ValidationError):
+        ScenarioRequest.model_validate({"scenarios": [{}] * 1001})
+
+
+def test_largest_allowed_multiplier_still_plans():
+    shock = PriceShock(name="max", sleeve_multipliers={"EQUITY": MAX_PRICE_MULTIPLIER})
+
+    ((_, plan),) = evaluate_scenarios(_inputs(), [shock])
+    assert plan.trades
+
+
+@pytest.mark.benchmark
+def test_benchmark_500_scenarios_50_positions():
+    inputs = _inputs(positions=50)
+    base = inputs.run_input()
+    shocks = [
+        PriceShock(
+            name=str(index),
+            sleeve_multipliers={"EQUITY": Decimal(50 + index % 100) / 100},
+            listing_multipliers={base.positions[index % 50].listing_id: Decimal("4")},
+        )
+        for index in range(500)
+    ]
+    started = time.perf_counter()
+    snapshots = shocked_snapshots(inputs, shocks)
+    shocked = time.perf_counter()
+    results = evaluate_scenarios(inputs, shocks)
+    finished = time.perf_counter()
+
+    assert [snapshot for snapshot, _ in results] == snapshots
+    print(
+        f"\n500 scenarios × 50 positions: shock={(shocked - started) * 1000:.0f}ms "
+        f"shock+plan={(finished - shocked) * 1000:.0f}ms "
+        f"trades={sum(len(plan.trades) for _, plan in results)}"
+    )
@@ -0,0 +1,90 @@
+"""
+test_synthetic_portfolio.py — Synthetic portfolio generator (benchmarks)
+
+Covers:
+  - Same arguments → same portfolio; targets sum to 100% less cash
+  - Drift profiles order by how far holdings sit from target
+  - snapshot_data builds into a RunInputSnapshot with every holding
+  - Seeded rows gather back to the same RunInputSnapshot, and are removed again
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.domain.models import HoldingSnapshot, Portfolio
+from app.services.engine_inputs import build_run_input_snapshot, gather_engine_inputs
+from app.services.synthetic_portfolio import (
+    DRIFT_PROFILES,
+    delete_portfolio,
+    generate_portfolio,
+    seed_portfolio,
+    snapshot_data,
+)
+
+
+AS_OF = datetime(2026, 3, 4, 17, 0, tzinfo=timezone.utc)
+
+
+def _mean_abs_drift(drift: str) -> Decimal:
+    run_input = build_run_input_snapshot(snapshot_data(generate_portfolio(500, drift=drift), AS_OF))
+    return sum((abs(p.drift_pct) for p in run_input.positions), Decimal("0")) / len(run_input.positions)
+
+
+def test_generation_is_deterministic():
+    first = generate_portfolio(200, seed=3, drift="drifted", prices="pence")
+    again = generate_portfolio(200, seed=3, drift="drifted", prices="pence")
+    other = generate_portfolio(200, seed=4, drift="drifted", prices="pence")
+
+    assert first == again
+    assert first.holdings != other.holdings
+    assert len(first.holdings) == 200
+    assert {h.currency for h in first.holdings} == {"GBX"}
+    total_target = sum((h.target_weight_pct for h in first.holdings), Decimal("0"))
+    assert Decimal("97.99") < total_target <= Decimal("98")
+
+
+def test_drift_profiles_order_by_spread():
+    spread = {drift: _mean_abs_drift(drift) for drift in DRIFT_PROFILES if drift != "concentrated"}
+    assert spread["balanced"] < spread["mixed"] < spread["drifted"]
+
+
+def test_rejects_unknown_profiles():
+    with pytest.raises(ValueError):
+        generate_portfolio(10, drift="sideways")
+    with pytest.raises(ValueError):
+        generate_portfolio(10, prices="free")
+
+
+def test_snapshot_data_builds_every_position():
+    portfolio = generate_portfolio(1000, drift="concentrated", prices="uniform")
+    run_input = build_run_input_snapshot(snapshot_data(portfolio, AS_OF))
+
+    assert len(run_input.positions) == 1000
+    assert run_input.cash_balance_gbp == portfolio.cash_gbp
+    # Zipf targets: the largest sleeve dwarfs the smallest.
+    assert run_input.positions[0].target_weight_pct > 100 * run_input.positions[-1].target_weight_pct
+
+
+def test_seeded_portfolio_gathers_to_same_snapshot(db, test_user):
+    portfolio = generate_portfolio(50, drift="mixed", prices="pence")
+    seed_portfolio(db, portfolio, owner_user_id=test_user.user_id, as_of=AS_OF)
+    db.commit()
+    try:
+        result = gather_engine_inputs(db, str(portfolio.portfolio_id), AS_OF)
+        assert result.is_blocked is False
+
+        def by_listing(snapshot):
+            return sorted(snapshot.positions, key=lambda p: p.listing_id)
+
+        gathered = build_run_input_snapshot(result.snapshot_data)
+        expected = build_run_input_snapshot(snapshot_data(portfolio, AS_OF))
+        assert gathered.cash_balance_gbp == expected.cash_balance_gbp
+        assert by_listing(gathered) == by_listing(expected)
+    finally:
+        db.rollback()
+        delete_portfolio(db, portfolio)
+        db.commit()
+
+    assert db.get(Portfolio, portfolio.portfolio_id) is None
+    assert db.query(HoldingSnapshot).filter_by(portfolio_id=portfolio.portfolio_id).count() == 0
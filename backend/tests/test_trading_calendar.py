@@ -0,0 +1,156 @@
+"""
+test_trading_calendar.py — Venue trading calendar
+
+Covers:
+  - Session open / close instants in venue-local time (incl. DST)
+  - is_open / last_close / next_open across weekends and holidays
+  - closed_for_day: only after the close on a trading day
+  - Trading-day counting over weekends and holidays
+  - Holiday table loading and exchange-code aliases
+  - Window boundaries give the same answers as a brute-force scan
+  - A warning (once per venue) for dates outside the holiday table
+"""
+import json
+import logging
+import zoneinfo
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from app.services.trading_calendar import (
+    TradingCalendar,
+    VenueHours,
+    build_trading_calendar,
+    load_holidays,
+)
+
+
+UTC = timezone.utc
+LONDON = zoneinfo.ZoneInfo("Europe/London")
+NEW_YORK = zoneinfo.ZoneInfo("America/New_York")
+
+GOOD_FRIDAY = date(2026, 4, 3)
+EASTER_MONDAY = date(2026, 4, 6)
+
+
+def _calendar(window_days: int = 30) -> TradingCalendar:
+    return TradingCalendar(
+        [
+            VenueHours("LSE", LONDON, time(8, 0), time(16, 30)),
+            VenueHours("NYSE", NEW_YORK, time(9, 30), time(16, 0)),
+        ],
+        holidays={
+            "LSE": frozenset({GOOD_FRIDAY, EASTER_MONDAY}),
+            "NYSE": frozenset({GOOD_FRIDAY}),
+        },
+        window_days=window_days,
+    )
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def test_is_open_within_regular_session_only():
+    cal = _calendar()
+    friday = date(2026, 2, 27)
+    assert not cal.is_open("LSE", _utc(2026, 2, 27, 7, 59))
+    assert cal.is_open("LSE", _utc(2026, 2, 27, 8, 0))
+    assert cal.is_open("LSE", _utc(2026, 2, 27, 16, 29))
+    assert not cal.is_open("LSE", _utc(2026, 2, 27, 16, 30))
+    assert not cal.is_open("LSE", _utc(2026, 2, 28, 12, 0))  # Saturday
+    assert cal.session_at("LSE", _utc(2026, 2, 27, 12, 0)).day == friday
+
+
+def test_session_instants_follow_dst():
+    cal = _calendar()
+    # London moves to BST on 2026-03-29: the 16:30 close becomes 15:30 UTC.
+    assert cal.last_close("LSE", _utc(2026, 3, 27, 18, 0)) == _utc(2026, 3, 27, 16, 30)
+    assert cal.last_close("LSE", _utc(2026, 3, 30, 18, 0)) == _utc(2026, 3, 30, 15, 30)
+    # New York is on EDT by then: 09:30 local = 13:30 UTC.
+    assert cal.next_open("NYSE", _utc(2026, 3, 30, 0, 0)) == _utc(2026, 3, 30, 13, 30)
+
+
+def test_last_close_and_next_open_skip_weekend_and_holidays():
+    cal = _calendar()
+    saturday = _utc(2026, 4, 4, 12, 0)  # between Good Friday and Easter Monday
+    assert cal.last_close("LSE", saturday) == _utc(2026, 4, 2, 15, 30)
+    assert cal.next_open("LSE", saturday) == _utc(2026, 4, 7, 7, 0)
+    assert cal.next_open("NYSE", saturday) == _utc(2026, 4, 6, 13, 30)
+
+
+def test_closed_for_day_only_after_close_on_trading_days():
+    cal = _calendar()
+    assert not cal.closed_for_day("LSE", _utc(2026, 2, 27, 9, 0))
+    assert cal.closed_for_day("LSE", _utc(2026, 2, 27, 17, 0))
+    assert cal.closed_for_day("LSE", _utc(2026, 2, 27, 23, 59))
+    assert not cal.closed_for_day("LSE", _utc(2026, 2, 28, 17, 0))  # Saturday
+    assert not cal.closed_for_day("LSE", _utc(2026, 4, 3, 17, 0))  # Good Friday
+    assert not cal.closed_for_day("LSE", _utc(2026, 3, 2, 7, 0))  # Monday pre-open
+
+
+def test_trading_days_between_excludes_weekends_and_holidays():
+    cal = _calendar()
+    assert cal.trading_days_between("LSE", date(2026, 2, 27), date(2026, 3, 2)) == 1
+    assert cal.non_trading_days_between("LSE", date(2026, 2, 27), date(2026, 3, 2)) == 2
+    # Thursday → Tuesday over Easter: only the Tuesday trades in London.
+    assert cal.trading_days_between("LSE", date(2026, 4, 2), date(2026, 4, 7)) == 1
+    assert cal.trading_days_between("NYSE", date(2026, 4, 2), date(2026, 4, 7)) == 2
+    assert cal.trading_days_between("LSE", date(2026, 3, 2), date(2026, 3, 2)) == 0
+
+
+def test_matches_brute_force_across_window_boundaries():
+    cal = _calendar(window_days=5)
+    reference = _calendar(window_days=400)
+    at = _utc(2026, 3, 20, 0, 0)
+    while at < _utc(2026, 4, 20, 0, 0):
+        for venue in ("LSE", "NYSE"):
+            assert cal.is_open(venue, at) == reference.is_open(venue, at)
+            assert cal.last_close(venue, at) == reference.last_close(venue, at)
+            assert cal.next_open(venue, at) == reference.next_open(venue, at)
+            assert cal.closed_for_day(venue, at) == reference.closed_for_day(venue, at)
+        at += timedelta(minutes=47)
+
+
+def test_aliases_and_unknown_venues():
+    cal = _calendar()
+    assert cal.venue_for("xlon") == "LSE"
+    assert cal.venue_for("NASDAQ") == "NYSE"
+    assert not cal.knows("XETRA")
+    with pytest.raises(KeyError):
+        cal.is_open("XETRA", _utc(2026, 2, 27, 12, 0))
+
+
+def test_load_holidays_resolves_aliases(tmp_path):
+    path = tmp_path / "holidays.json"
+    path.write_text(json.dumps({"XLON": ["2026-04-03"], "NYSE": ["2026-07-03"]}))
+
+    holidays = load_holidays(path)
+
+    assert holidays == {
+        "LSE": frozenset({date(2026, 4, 3)}),
+        "NYSE": frozenset({date(2026, 7, 3)}),
+    }
+
+
+def test_default_calendar_uses_bundled_holidays():
+    cal = build_trading_calendar()
+    assert not cal.is_trading_day("LSE", date(2026, 12, 28))  # Boxing Day (substitute)
+    assert not cal.is_trading_day("NASDAQ", date(2026, 11, 26))  # Thanksgiving
+    assert cal.is_trading_day("NYSE", date(2026, 12, 28))
+
+
+def test_warns_once_per_venue_outside_the_holiday_table(caplog):
+    cal = _calendar()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.trading_calendar"):
+        cal.trading_days_between("LSE", date(2026, 3, 2), date(2026, 3, 9))
+        assert not caplog.records
+        cal.trading_days_between("LSE", date(2027, 3, 2), date(2027, 3, 9))
+        cal.is_open("LSE", _utc(2027, 6, 1, 12, 0))
+        cal.holidays_between("NYSE", date(2028, 1, 1), date(2028, 2, 1))
+
+    assert [record.getMessage().split(" cover ")[0] for record in caplog.records] == [
+        "Trading holidays for LSE",
+        "Trading holidays for NYSE",
+    ]
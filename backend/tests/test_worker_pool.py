@@ -0,0 +1,168 @@
+"""
+test_worker_pool.py — Concurrent worker runtime
+
+Covers:
+  - Hundreds of slow jobs drain in parallel, bounded by concurrency
+  - Per-task-kind caps limit concurrent jobs of that kind only
+  - Unknown task kinds and failing handlers do not stop the pool
+  - Jobs are acked on success, failed (retry / dead-letter) otherwise
+  - Shutdown stops dequeuing and waits for in-flight jobs
+"""
+import asyncio
+import threading
+import time
+import uuid
+from typing import Optional
+
+import pytest
+
+from app.queue.redis_queue import JobPayload
+from app.worker.pool import WorkerPool
+
+
+pytestmark = pytest.mark.asyncio
+
+JOB_LATENCY = 0.05
+
+
+class InMemoryQueue:
+    """Async queue stand-in; sets ``drained`` once the last job is taken."""
+
+    def __init__(self, jobs: list[JobPayload]) -> None:
+        self.jobs = list(jobs)
+        self.drained = asyncio.Event()
+        self.acked: list[str] = []
+        self.failed: list[tuple[str, bool]] = []
+        self.maintenance_runs = 0
+
+    async def dequeue_job(self, timeout: int = 5) -> Optional[JobPayload]:
+        if not self.jobs:
+            self.drained.set()
+            await asyncio.sleep(0.01)
+            return None
+        return self.jobs.pop(0)
+
+    async def extend_lease(self, job: JobPayload) -> bool:
+        return True
+
+    async def ack(self, job: JobPayload) -> None:
+        self.acked.append(job.job_id)
+
+    async def fail(self, job: JobPayload, error: str, *, retry: bool = True) -> None:
+        self.failed.append((job.job_id, retry))
+
+    async def maintain(self) -> None:
+        self.maintenance_runs += 1
+
+
+class ConcurrencyProbe:
+    """Counts concurrent handler executions across worker threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.active: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self.completed: list[str] = []
+
+    async def handler(self, job: JobPayload, ctx_logger) -> None:
+        with self._lock:
+            self.active[job.task_kind] = self.active.get(job.task_kind, 0) + 1
+            self.peak[job.task_kind] = max(
+                self.peak.get(job.task_kind, 0), self.active[job.task_kind]
+            )
+        await asyncio.sleep(JOB_LATENCY)
+        with self._lock:
+            self.active[job.task_kind] -= 1
+            self.completed.append(job.job_id)
+
+
+def _job(task_kind: str = "PRICE_REFRESH") -> JobPayload:
+    return JobPayload(
+        task_kind=task_kind,
+        portfolio_id=str(uuid.uuid4()),
+        requested_by_user_id=str(uuid.uuid4()),
+    )
+
+
+async def _run_until_drained(pool: WorkerPool, queue: InMemoryQueue) -> None:
+    shutdown = asyncio.Event()
+    runner = asyncio.create_task(pool.run(shutdown))
+    await queue.drained.wait()
+    shutdown.set()
+    await runner
+
+
+async def test_pool_drains_jobs_in_parallel():
+    jobs = [_job() for _ in range(200)]
+    queue = InMemoryQueue(jobs)
+    probe = ConcurrencyProbe()
+    pool = WorkerPool(queue, {"PRICE_REFRESH": probe.handler}, concurrency=20)
+
+    started = time.perf_counter()
+    await _run_until_drained(pool, queue)
+    elapsed = time.perf_counter() - started
+
+    assert sorted(probe.completed) == sorted(j.job_id for j in jobs)
+    assert probe.peak["PRICE_REFRESH"] <= 20
+    # Serial would take 200 × JOB_LATENCY = 10s.
+    assert elapsed < 200 * JOB_LATENCY / 4
+
+
+async def test_kind_limit_caps_only_that_kind():
+    jobs = [_job("PRICE_REFRESH") for _ in range(12)] + [_job("OTHER") for _ in range(12)]
+    queue = InMemoryQueue(jobs)
+    probe = ConcurrencyProbe()
+    pool = WorkerPool(
+        queue,
+        {"PRICE_REFRESH": probe.handler, "OTHER": probe.handler},
+        concurrency=10,
+        kind_limits={"PRICE_REFRESH": 2},
+    )
+
+    await _run_until_drained(pool, queue)
+
+    assert len(probe.completed) == 24
+    assert probe.peak["PRICE_REFRESH"] <= 2
+    assert probe.peak["OTHER"] > 2
+
+
+async def test_unknown_kind_and_failing_handler_do_not_stop_pool():
+    async def boom(job, ctx_logger):
+        raise RuntimeError("handler failed")
+
+    probe = ConcurrencyProbe()
+    good = _job()
+    unknown = _job("NOPE")
+    failing = _job("BOOM")
+    queue = InMemoryQueue([unknown, failing, good])
+    pool = WorkerPool(
+        queue, {"PRICE_REFRESH": probe.handler, "BOOM": boom}, concurrency=1
+    )
+
+    await _run_until_drained(pool, queue)
+
+    assert probe.completed == [good.job_id]
+    assert pool.in_flight == 0
+    assert queue.acked == [good.job_id]
+    # Unknown kinds can never succeed: dead-letter without retrying.
+    assert queue.failed == [(unknown.job_id, False), (failing.job_id, True)]
+    assert queue.maintenance_runs >= 1
+
+
+async def test_shutdown_waits_for_in_flight_jobs():
+    probe = ConcurrencyProbe()
+    queue = InMemoryQueue([_job() for _ in range(3)])
+    pool = WorkerPool(queue, {"PRICE_REFRESH": probe.handler}, concurrency=3)
+    shutdown = asyncio.Event()
+
+    runner = asyncio.create_task(pool.run(shutdown))
+    await asyncio.sleep(JOB_LATENCY / 5)
+    shutdown.set()
+    await runner
+
+    assert len(probe.completed) == 3
+
+
+async def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        WorkerPool(InMemoryQueue([]), {}, concurrency=0)
@@ -1,9 +1,17 @@
 import re
+import uuid
+from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 
 import pytest
 import pytest_asyncio
 
+import app.services.providers.yfinance_adapter as yf_module
+from app.domain.models import InstrumentListing
+from app.services.data_quality import check_currency_mismatch
+from app.services.market_data_adapter import ListingRef
+from app.services.providers.currency_cache import CurrencyCache
+from app.services.providers.fanout import AdaptiveRateLimiter
 from app.services.providers.yfinance_adapter import YFinanceAdapter, _lse_ticker
 
 
@@ -67,3 +75,110 @@ class TestYFinanceAdapterLive:
         rate = Decimal(q.rate)
         assert rate > Decimal("0.5"), f"Unexpected GBP/USD rate: {rate}"
         print(f"\nLive GBP/USD rate: {q.rate} @ {q.as_of}")
+
+
+@pytest.mark.asyncio
+class TestYFinanceBatchFetch:
+    AS_OF = datetime(2026, 3, 11, 16, 30, tzinfo=timezone.utc)
+
+    def _adapter(
+        self,
+        monkeypatch,
+        available: dict[str, str],
+        provider_currencies: dict[str, str] | None = None,
+    ) -> tuple[YFinanceAdapter, list]:
+        calls: list[list[str]] = []
+        self.lookups: list[str] = []
+
+        def fake_fetch_currency(symbol):
+            self.lookups.append(symbol)
+            return (provider_currencies or {}).get(symbol)  # None: lookup failed
+
+        monkeypatch.setattr(yf_module, "_fetch_currency", fake_fetch_currency)
+
+        def fake_download_closes(symbols):
+            calls.append(list(symbols))
+            return {
+                s: (Decimal(available[s]), self.AS_OF) for s in symbols if s in available
+            }
+
+        monkeypatch.setattr(YFinanceAdapter, "_download_closes", staticmethod(fake_download_closes))
+        adapter = YFinanceAdapter(
+            rate_limiter=AdaptiveRateLimiter(1000),
+            currency_cache=CurrencyCache(ttl_seconds=3600, max_entries=100),
+        )
+        return adapter, calls
+
+    @staticmethod
+    def _ref(ticker: str, currency: str = "GBP") -> ListingRef:
+        return ListingRef(listing_id=str(uuid.uuid4()), ticker=ticker, trading_currency=currency)
+
+    async def test_single_download_for_all_listings_and_fx(self, monkeypatch):
+        refs = [self._ref(f"T{i}") for i in range(30)]
+        available = {f"T{i}.L": "10.123456" for i in range(30)}
+        available["GBPUSD=X"] = "1.2712345"
+        adapter, calls = self._adapter(monkeypatch, available)
+
+        batch = await adapter.fetch_batch(
+            refs, [("gbp", "usd")], want_close=True, want_intraday=False
+        )
+
+        assert len(calls) == 1
+        assert [q.listing_id for q in batch.price_quotes] == [r.listing_id for r in refs]
+        assert batch.price_quotes[0].price == "10.1235"
+        assert batch.price_quotes[0].currency == "GBP"
+        assert batch.fx_quotes[0].base_ccy == "GBP"
+        assert batch.fx_quotes[0].rate == "1.271235"
+        assert batch.failures == []
+
+    async def test_bare_ticker_retry_is_one_extra_download(self, monkeypatch):
+        lse, us_a, us_b = self._ref("VWRP"), self._ref("AAPL"), self._ref("MSFT")
+        adapter, calls = self._adapter(
+            monkeypatch, {"VWRP.L": "100", "AAPL": "200", "MSFT": "300"}
+        )
+
+        batch = await adapter.fetch_batch(
+            [lse, us_a, us_b], [], want_close=True, want_intraday=True
+        )
+
+        assert calls[1] == ["AAPL", "MSFT"]
+        assert len(calls) == 2
+        resolved = {q.listing_id: q.raw["resolved_ticker"] for q in batch.price_quotes}
+        assert resolved == {lse.listing_id: "VWRP.L", us_a.listing_id: "AAPL", us_b.listing_id: "MSFT"}
+        assert len(batch.price_quotes) == 6
+
+    async def test_missing_symbols_are_reported_as_failures(self, monkeypatch):
+        good, bad = self._ref("VWRP"), self._ref("NOPE")
+        adapter, _ = self._adapter(monkeypatch, {"VWRP.L": "100"})
+
+        batch = await adapter.fetch_batch(
+            [good, bad], [("GBP", "EUR")], want_close=True, want_intraday=False
+        )
+
+        assert [q.listing_id for q in batch.price_quotes] == [good.listing_id]
+        assert [f.key for f in batch.failures] == [bad.listing_id, "GBP/EUR"]
+
+    async def test_expired_currency_is_refreshed_once(self, monkeypatch):
+        refs = [self._ref("VWRP", currency=None), self._ref("SEMI")]
+        adapter, _ = self._adapter(
+            monkeypatch, {"VWRP.L": "100", "SEMI.L": "50"}, {"VWRP.L": "GBp"}
+        )
+
+        first = await adapter.fetch_batch(refs, [], want_close=True, want_intraday=False)
+        second = await adapter.fetch_batch(refs, [], want_close=True, want_intraday=False)
+
+        # SEMI's lookup fails: its listing currency is the fallback.
+        assert self.lookups == ["VWRP.L", "SEMI.L"]
+        assert [q.currency for q in first.price_quotes] == ["GBp", "GBP"]
+        assert [q.currency for q in second.price_quotes] == ["GBp", "GBP"]
+
+    async def test_provider_currency_mismatch_is_still_detected(self, monkeypatch):
+        ref = self._ref("SEMI", currency="USD")
+        adapter, _ = self._adapter(monkeypatch, {"SEMI.L": "50"}, {"SEMI.L": "EUR"})
+
+        batch = await adapter.fetch_batch([ref], [], want_close=True, want_intraday=False)
+
+        [quote] = batch.price_quotes
+        assert quote.currency == "EUR"
+        violation = check_currency_mismatch(InstrumentListing(trading_currency="USD"), quote)
+        assert violation is not None and violation.rule_code == "DQ_CCY_MISMATCH"